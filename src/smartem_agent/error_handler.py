@@ -92,6 +92,10 @@ class ErrorHandler:
         delay = self.base_delay * (2**record.retry_count)
         return min(delay, self.max_delay)
 
+    def get_retry_count(self, file_path: Path) -> int:
+        record = self._errors.get(file_path)
+        return record.retry_count if record else 0
+
     def record_retry(self, file_path: Path) -> None:
         if file_path in self._errors:
             record = self._errors[file_path]
@@ -1,11 +1,13 @@
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 
 from smartem_agent.error_handler import ErrorHandler
 from smartem_agent.event_classifier import ClassifiedEvent, EntityType
+from smartem_agent.event_queue import EventQueue
 from smartem_agent.fs_parser import EpuParser
 from smartem_agent.metrics import ProcessingMetrics
 from smartem_agent.model.store import InMemoryDataStore
@@ -22,6 +24,7 @@ class ProcessingStats:
     successful: int = 0
     orphaned: int = 0
     failed: int = 0
+    retried: int = 0
     orphans_resolved: int = 0
 
 
@@ -34,6 +37,7 @@ class EventProcessor:
         error_handler: ErrorHandler | None = None,
         metrics: ProcessingMetrics | None = None,
         path_mapper: Callable[[Path], Path] = lambda p: p,
+        event_queue: EventQueue | None = None,
     ):
         self.parser = parser
         self.datastore = datastore
@@ -41,17 +45,20 @@ class EventProcessor:
         self.error_handler = error_handler or ErrorHandler()
         self.metrics = metrics or ProcessingMetrics()
         self.path_mapper = path_mapper
+        # Events that fail with a transient error are scheduled back onto this queue after their backoff
+        self.event_queue = event_queue
         self.stats = ProcessingStats()
+        self._parse_ms = 0.0
 
     def process_batch(self, events: list[ClassifiedEvent]) -> ProcessingStats:
         batch_stats = ProcessingStats()
 
         for event in events:
-            start_time = time.time()
+            start_time = time.perf_counter()
+            self._parse_ms = 0.0
             try:
                 result = self._process_event(event)
-                latency_ms = (time.time() - start_time) * 1000
-                self.metrics.record_latency(latency_ms)
+                self._record_event_latency(event, start_time)
 
                 batch_stats.total_processed += 1
 
@@ -60,13 +67,14 @@ class EventProcessor:
                     self.metrics.record_success()
                 elif result == ProcessingResult.ORPHANED:
                     batch_stats.orphaned += 1
-                elif result == ProcessingResult.FAILED:
+                elif result in (ProcessingResult.FAILED, ProcessingResult.RETRYING):
                     batch_stats.failed += 1
                     self.metrics.record_failure()
+                    if result == ProcessingResult.RETRYING:
+                        batch_stats.retried += 1
 
             except Exception as e:
-                latency_ms = (time.time() - start_time) * 1000
-                self.metrics.record_latency(latency_ms)
+                self._record_event_latency(event, start_time)
                 self.metrics.record_failure()
 
                 logger.error(f"Unexpected error processing {event.file_path}: {e}", exc_info=True)
@@ -77,9 +85,26 @@ class EventProcessor:
         self.stats.successful += batch_stats.successful
         self.stats.orphaned += batch_stats.orphaned
         self.stats.failed += batch_stats.failed
+        self.stats.retried += batch_stats.retried
 
         return batch_stats
 
+    @contextmanager
+    def _parse_stage(self) -> Iterator[None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._parse_ms += (time.perf_counter() - start_time) * 1000
+
+    def _record_event_latency(self, event: ClassifiedEvent, start_time: float) -> None:
+        # "store" is everything other than parsing: datastore and API calls plus orphan bookkeeping
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        entity_type = event.entity_type.value
+        self.metrics.record_latency(latency_ms, entity_type)
+        self.metrics.record_latency(self._parse_ms, entity_type, stage="parse")
+        self.metrics.record_latency(max(latency_ms - self._parse_ms, 0.0), entity_type, stage="store")
+
     def _process_event(self, event: ClassifiedEvent) -> "ProcessingResult":
         match event.entity_type:
             case EntityType.GRID:
@@ -102,7 +127,8 @@ class EventProcessor:
     def _process_grid(self, event: ClassifiedEvent) -> "ProcessingResult":
         try:
             grid = GridData(data_dir=event.file_path.parent.resolve())
-            acquisition_data = self.parser.parse_epu_session_manifest(str(event.file_path))
+            with self._parse_stage():
+                acquisition_data = self.parser.parse_epu_session_manifest(str(event.file_path))
             if not acquisition_data:
                 logger.error(f"Failed to parse session manifest: {event.file_path}")
                 return ProcessingResult.FAILED
@@ -122,11 +148,7 @@ class EventProcessor:
 
         except Exception as e:
             if self.error_handler.should_retry(e, event.file_path):
-                category = self.error_handler.categorize_error(e, event.file_path)
-                self.error_handler.record_retry(event.file_path)
-                self.metrics.record_retry(category.value)
-                logger.warning(f"Transient error processing grid {event.file_path.name}, will retry: {e}")
-                return ProcessingResult.FAILED
+                return self._retry_later(event, e, "grid")
             else:
                 self.error_handler.record_permanent_failure(e, event.file_path)
                 logger.error(f"Permanent failure processing grid {event.file_path}: {e}")
@@ -146,7 +168,8 @@ class EventProcessor:
                 logger.warning(f"Atlas file {event.file_path} has no parent grid, registering as orphan")
                 return ProcessingResult.ORPHANED
 
-            atlas_data = self.parser.parse_atlas_manifest(str(event.file_path), grid_uuid)
+            with self._parse_stage():
+                atlas_data = self.parser.parse_atlas_manifest(str(event.file_path), grid_uuid)
             if not atlas_data:
                 logger.error(f"Failed to parse atlas manifest: {event.file_path}")
                 return ProcessingResult.FAILED
@@ -189,11 +212,7 @@ class EventProcessor:
 
         except Exception as e:
             if self.error_handler.should_retry(e, event.file_path):
-                category = self.error_handler.categorize_error(e, event.file_path)
-                self.error_handler.record_retry(event.file_path)
-                self.metrics.record_retry(category.value)
-                logger.warning(f"Transient error processing atlas {event.file_path.name}, will retry: {e}")
-                return ProcessingResult.FAILED
+                return self._retry_later(event, e, "atlas")
             else:
                 self.error_handler.record_permanent_failure(e, event.file_path)
                 logger.error(f"Permanent failure processing atlas {event.file_path}: {e}")
@@ -214,14 +233,16 @@ class EventProcessor:
                 return ProcessingResult.ORPHANED
 
             if event.natural_id:
-                gridsquare_metadata = self.parser.parse_gridsquare_metadata(str(event.file_path), self.path_mapper)
+                with self._parse_stage():
+                    gridsquare_metadata = self.parser.parse_gridsquare_metadata(str(event.file_path), self.path_mapper)
                 if not gridsquare_metadata:
                     logger.error(f"Failed to parse gridsquare metadata: {event.file_path}")
                     return ProcessingResult.FAILED
 
                 gridsquare_id = event.natural_id
             else:
-                gridsquare_manifest = self.parser.parse_gridsquare_manifest(str(event.file_path))
+                with self._parse_stage():
+                    gridsquare_manifest = self.parser.parse_gridsquare_manifest(str(event.file_path))
                 if not gridsquare_manifest:
                     logger.error(f"Failed to parse gridsquare manifest: {event.file_path}")
                     return ProcessingResult.FAILED
@@ -274,11 +295,7 @@ class EventProcessor:
 
         except Exception as e:
             if self.error_handler.should_retry(e, event.file_path):
-                category = self.error_handler.categorize_error(e, event.file_path)
-                self.error_handler.record_retry(event.file_path)
-                self.metrics.record_retry(category.value)
-                logger.warning(f"Transient error processing gridsquare {event.file_path.name}, will retry: {e}")
-                return ProcessingResult.FAILED
+                return self._retry_later(event, e, "gridsquare")
             else:
                 self.error_handler.record_permanent_failure(e, event.file_path)
                 logger.error(f"Permanent failure processing gridsquare {event.file_path}: {e}")
@@ -286,7 +303,8 @@ class EventProcessor:
 
     def _process_foilhole(self, event: ClassifiedEvent) -> "ProcessingResult":
         try:
-            foilhole = self.parser.parse_foilhole_manifest(str(event.file_path))
+            with self._parse_stage():
+                foilhole = self.parser.parse_foilhole_manifest(str(event.file_path))
             if not foilhole:
                 logger.error(f"Failed to parse foilhole manifest: {event.file_path}")
                 return ProcessingResult.FAILED
@@ -324,11 +342,7 @@ class EventProcessor:
 
         except Exception as e:
             if self.error_handler.should_retry(e, event.file_path):
-                category = self.error_handler.categorize_error(e, event.file_path)
-                self.error_handler.record_retry(event.file_path)
-                self.metrics.record_retry(category.value)
-                logger.warning(f"Transient error processing foilhole {event.file_path.name}, will retry: {e}")
-                return ProcessingResult.FAILED
+                return self._retry_later(event, e, "foilhole")
             else:
                 self.error_handler.record_permanent_failure(e, event.file_path)
                 logger.error(f"Permanent failure processing foilhole {event.file_path}: {e}")
@@ -336,7 +350,8 @@ class EventProcessor:
 
     def _process_micrograph(self, event: ClassifiedEvent) -> "ProcessingResult":
         try:
-            micrograph_manifest = self.parser.parse_micrograph_manifest(str(event.file_path))
+            with self._parse_stage():
+                micrograph_manifest = self.parser.parse_micrograph_manifest(str(event.file_path))
             if not micrograph_manifest:
                 logger.error(f"Failed to parse micrograph manifest: {event.file_path}")
                 return ProcessingResult.FAILED
@@ -380,16 +395,26 @@ class EventProcessor:
 
         except Exception as e:
             if self.error_handler.should_retry(e, event.file_path):
-                category = self.error_handler.categorize_error(e, event.file_path)
-                self.error_handler.record_retry(event.file_path)
-                self.metrics.record_retry(category.value)
-                logger.warning(f"Transient error processing micrograph {event.file_path.name}, will retry: {e}")
-                return ProcessingResult.FAILED
+                return self._retry_later(event, e, "micrograph")
             else:
                 self.error_handler.record_permanent_failure(e, event.file_path)
                 logger.error(f"Permanent failure processing micrograph {event.file_path}: {e}")
                 return ProcessingResult.FAILED
 
+    def _retry_later(self, event: ClassifiedEvent, error: Exception, label: str) -> "ProcessingResult":
+        category = self.error_handler.categorize_error(error, event.file_path)
+        delay = self.error_handler.calculate_backoff_delay(event.file_path)
+        self.error_handler.record_retry(event.file_path)
+        self.metrics.record_retry(
+            category.value, attempt=self.error_handler.get_retry_count(event.file_path), delay_seconds=delay
+        )
+        if self.event_queue is None:
+            logger.warning(f"Transient error processing {label} {event.file_path.name}, will retry: {error}")
+            return ProcessingResult.FAILED
+        self.event_queue.schedule_retry(event, delay)
+        logger.warning(f"Transient error processing {label} {event.file_path.name}, retrying in {delay:.1f}s: {error}")
+        return ProcessingResult.RETRYING
+
     def _resolve_orphan_entities(self, orphans: list) -> None:
         for orphan in orphans:
             try:
@@ -467,3 +492,5 @@ class ProcessingResult(Enum):
     SUCCESS = "success"
     ORPHANED = "orphaned"
     FAILED = "failed"
+    # Failed with a transient error and scheduled to be processed again
+    RETRYING = "retrying"
@@ -1,5 +1,7 @@
 import heapq
+import itertools
 import threading
+import time
 
 from smartem_agent.event_classifier import ClassifiedEvent
 from smartem_common.utils import get_logger
@@ -15,21 +17,54 @@ class EventQueue:
         self._evicted_count = 0
         self._evicted_events: list[ClassifiedEvent] = []
         self._evicted_recovery_enabled = True
+        # (due time on the monotonic clock, tie-break, event) for events waiting out a retry backoff
+        self._delayed: list[tuple[float, int, ClassifiedEvent]] = []
+        self._delayed_sequence = itertools.count()
+
+    def _push(self, event: ClassifiedEvent) -> None:
+        if len(self._queue) >= self.max_size:
+            evicted = heapq.heappop(self._queue)
+            self._evicted_count += 1
+            if self._evicted_recovery_enabled:
+                self._evicted_events.append(evicted)
+            logger.warning(
+                f"Event queue full (size={self.max_size}), evicted event: "
+                f"{evicted.entity_type.value} {evicted.file_path.name} "
+                f"(total evicted: {self._evicted_count})"
+            )
+
+        heapq.heappush(self._queue, event)
 
     def enqueue(self, event: ClassifiedEvent) -> None:
         with self._lock:
-            if len(self._queue) >= self.max_size:
-                evicted = heapq.heappop(self._queue)
-                self._evicted_count += 1
-                if self._evicted_recovery_enabled:
-                    self._evicted_events.append(evicted)
-                logger.warning(
-                    f"Event queue full (size={self.max_size}), evicted event: "
-                    f"{evicted.entity_type.value} {evicted.file_path.name} "
-                    f"(total evicted: {self._evicted_count})"
-                )
+            self._push(event)
 
-            heapq.heappush(self._queue, event)
+    def schedule_retry(self, event: ClassifiedEvent, delay_seconds: float) -> None:
+        """Hold `event` back until `delay_seconds` from now, then queue it again via `release_due_retries`"""
+        with self._lock:
+            heapq.heappush(self._delayed, (time.monotonic() + delay_seconds, next(self._delayed_sequence), event))
+
+    def release_due_retries(self) -> int:
+        """Move every retry whose backoff has expired into the queue and return how many were moved"""
+        with self._lock:
+            now = time.monotonic()
+            released = 0
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, event = heapq.heappop(self._delayed)
+                self._push(event)
+                released += 1
+            return released
+
+    def next_retry_delay(self) -> float | None:
+        """Seconds until the next scheduled retry is due, or None if there are none"""
+        with self._lock:
+            if not self._delayed:
+                return None
+            return max(0.0, self._delayed[0][0] - time.monotonic())
+
+    def pending_retry_count(self) -> int:
+        with self._lock:
+            return len(self._delayed)
 
     def dequeue_batch(self, max_size: int = 50) -> list[ClassifiedEvent]:
         with self._lock:
@@ -44,6 +79,7 @@ class EventQueue:
     def clear(self) -> None:
         with self._lock:
             self._queue.clear()
+            self._delayed.clear()
             self._evicted_count = 0
 
     def get_evicted_count(self) -> int:
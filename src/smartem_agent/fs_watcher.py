@@ -14,7 +14,7 @@ from smartem_agent.event_queue import EventQueue
 from smartem_agent.fs_parser import EpuParser
 from smartem_agent.model.store import InMemoryDataStore, PersistentDataStore
 from smartem_agent.orphan_manager import OrphanManager
-from smartem_backend.api_client import SSEAgentClient
+from smartem_backend.api_client import AsyncSSEAgentClient
 from smartem_common.utils import get_logger
 
 logger = get_logger(__name__)
@@ -72,12 +72,14 @@ class SmartEMWatcherV2(FileSystemEventHandler):
         self.event_queue = EventQueue(max_size=max_queue_size)
         self.orphan_manager = OrphanManager(timeout_seconds=orphan_timeout)
 
+        persistent_datastore: PersistentDataStore | None = None
         if dry_run:
             self.datastore = InMemoryDataStore(str(self.watch_dir))
         else:
             if not api_url:
                 raise ValueError("api_url is required when dry_run is False")
-            self.datastore = PersistentDataStore(str(self.watch_dir), api_url, keycloak_client=keycloak_client)
+            persistent_datastore = PersistentDataStore(str(self.watch_dir), api_url, keycloak_client=keycloak_client)
+            self.datastore = persistent_datastore
 
         self.parser = EpuParser()
 
@@ -89,7 +91,13 @@ class SmartEMWatcherV2(FileSystemEventHandler):
         )
         self.metrics = ProcessingMetrics(window_size=metrics_window_size)
         self.event_processor = EventProcessor(
-            self.parser, self.datastore, self.orphan_manager, self.error_handler, self.metrics, path_mapper
+            self.parser,
+            self.datastore,
+            self.orphan_manager,
+            self.error_handler,
+            self.metrics,
+            path_mapper,
+            event_queue=self.event_queue,
         )
 
         self.batch_size = batch_size
@@ -101,20 +109,25 @@ class SmartEMWatcherV2(FileSystemEventHandler):
         self._shutdown_event = threading.Event()
 
         self.sse_client = None
+        self.acknowledger = None
         self.sse_thread = None
         self.heartbeat_thread = None
         self.heartbeat_interval = heartbeat_interval
         self._sse_shutdown_event = threading.Event()
         self._heartbeat_shutdown_event = threading.Event()
 
-        if agent_id and session_id and api_url and not dry_run:
-            self.sse_client = SSEAgentClient(
+        if agent_id and session_id and api_url and persistent_datastore is not None:
+            self.sse_client = AsyncSSEAgentClient(
                 base_url=api_url,
                 agent_id=agent_id,
                 session_id=session_id,
                 timeout=sse_timeout,
                 keycloak_client=keycloak_client,
+                batch_instructions=True,
+                # one worker keeps the backend's priority and sequence order, e.g. for successive config updates
+                workers=1,
             )
+            self.acknowledger = persistent_datastore.api_client.buffered_acknowledger(agent_id, session_id)
             self._start_sse_stream()
             self._start_heartbeat_timer()
 
@@ -135,6 +148,7 @@ class SmartEMWatcherV2(FileSystemEventHandler):
     def _processing_loop(self):
         while not self._shutdown_event.is_set():
             try:
+                self.event_queue.release_due_retries()
                 if self.event_queue.size() > 0:
                     batch = self.event_queue.dequeue_batch(max_size=self.batch_size)
                     if batch:
@@ -143,7 +157,8 @@ class SmartEMWatcherV2(FileSystemEventHandler):
                             logger.info(
                                 f"Processed batch: {stats.total_processed} events "
                                 f"({stats.successful} successful, {stats.orphaned} orphaned, "
-                                f"{stats.failed} failed, {stats.orphans_resolved} resolved)"
+                                f"{stats.failed} failed ({stats.retried} to retry), "
+                                f"{stats.orphans_resolved} resolved)"
                             )
                 else:
                     recovered = self.event_queue.recover_evicted_events()
@@ -169,7 +184,7 @@ class SmartEMWatcherV2(FileSystemEventHandler):
 
                 timed_out_orphans = self.orphan_manager.check_timeouts()
                 if timed_out_orphans:
-                    logger.warning(f"Found {len(timed_out_orphans)} timed out orphans")
+                    logger.warning(f"Found {len(timed_out_orphans)} newly timed out orphans")
 
             except Exception as e:
                 logger.error(f"Error in orphan check loop: {e}", exc_info=True)
@@ -262,7 +277,7 @@ class SmartEMWatcherV2(FileSystemEventHandler):
             result = self._process_instruction(instruction_type, payload)
             processing_time_ms = int((time.time() - start_time) * 1000)
 
-            self.sse_client.acknowledge_instruction(
+            self._acknowledge(
                 instruction_id=instruction_id,
                 status="processed",
                 result=result or "Instruction processed successfully",
@@ -274,7 +289,7 @@ class SmartEMWatcherV2(FileSystemEventHandler):
             processing_time_ms = int((time.time() - start_time) * 1000)
             logger.error(f"Failed to process instruction {instruction_id}: {e}")
             try:
-                self.sse_client.acknowledge_instruction(
+                self._acknowledge(
                     instruction_id=instruction_id,
                     status="failed",
                     error_message=str(e),
@@ -283,6 +298,14 @@ class SmartEMWatcherV2(FileSystemEventHandler):
             except Exception as ack_error:
                 logger.error(f"Failed to acknowledge instruction failure {instruction_id}: {ack_error}")
 
+    def _acknowledge(self, **acknowledgement):
+        if self.acknowledger:
+            self.acknowledger.acknowledge(**acknowledgement)
+        elif self.sse_client:
+            self.sse_client.acknowledge_instruction(**acknowledgement)
+        else:
+            logger.warning(f"No instruction stream to acknowledge {acknowledgement.get('instruction_id')} on")
+
     def _process_instruction(self, instruction_type: str, payload: dict) -> str:
         match instruction_type:
             case "agent.status.request":
@@ -294,7 +317,8 @@ class SmartEMWatcherV2(FileSystemEventHandler):
 
                 return (
                     f"Agent watching {self.watch_dir}\n"
-                    f"Queue: {self.event_queue.size()} events\n"
+                    f"Queue: {self.event_queue.size()} events, "
+                    f"{self.event_queue.pending_retry_count()} waiting to retry\n"
                     f"Processed: {stats.total_processed} total "
                     f"({stats.successful} success, {stats.orphaned} orphaned, {stats.failed} failed)\n"
                     f"Orphans: {orphan_stats['total_orphans']} pending, "
@@ -335,6 +359,8 @@ class SmartEMWatcherV2(FileSystemEventHandler):
                     f"p95={latency['p95']:.1f}, p99={latency['p99']:.1f}\n"
                     f"Mean latency: {latency['mean']:.1f}ms, Max: {latency['max']:.1f}ms\n"
                     f"Retry distribution: {retry_dist if retry_dist else 'none'}\n"
+                    f"Retry attempts: {metrics_summary['retry_attempts'] or 'none'}\n"
+                    f"Retry delays: {metrics_summary['retry_delays']}\n"
                     f"Uptime: {metrics_summary['uptime_seconds']:.0f}s"
                 )
 
@@ -471,6 +497,7 @@ class SmartEMWatcherV2(FileSystemEventHandler):
             "orphans_pending": orphan_stats["total_orphans"],
             "orphans_by_type": orphan_stats["by_type"],
             "orphans_timed_out": orphan_stats["total_timed_out"],
+            "latency_ms": self.metrics.get_latency_breakdown(),
         }
 
         logger.info(status_log)
@@ -503,4 +530,7 @@ class SmartEMWatcherV2(FileSystemEventHandler):
             logger.info("Waiting for heartbeat thread to stop...")
             self.heartbeat_thread.join(timeout=5)
 
+        if self.acknowledger:
+            self.acknowledger.close()
+
         logger.info("SmartEM Watcher V2 stopped")
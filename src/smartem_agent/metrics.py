@@ -1,29 +1,59 @@
+import bisect
 import time
-from collections import deque
-from dataclasses import dataclass
+from collections import Counter, defaultdict
 
+from smartem_common.metrics import LatencyHistogram
 from smartem_common.utils import get_logger
 
 logger = get_logger(__name__)
 
 
-@dataclass
-class MetricsSample:
-    timestamp: float
-    value: float
+# Upper bounds, in seconds, of the retry delay histogram buckets; longer delays go in a final overflow bucket
+RETRY_DELAY_BUCKETS = (1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+
+class WindowedLatencyHistogram:
+    """Latency histogram over roughly the most recent `window_size` values
+
+    Values go into a current histogram, which is retired once it holds `window_size` values, so
+    percentiles are read from the current and the previous histogram together and cover between
+    `window_size` and `2 * window_size` of the latest values.
+    """
+
+    def __init__(self, window_size: int):
+        self.window_size = max(window_size, 1)
+        self._current = LatencyHistogram()
+        self._previous = LatencyHistogram()
+
+    def record(self, value_ms: float) -> None:
+        if self._current.count >= self.window_size:
+            self._previous, self._current = self._current, LatencyHistogram()
+        self._current.record(value_ms)
+
+    def summary(self) -> dict[str, float]:
+        return self._previous.merge(self._current).summary()
 
 
 class ProcessingMetrics:
     def __init__(self, window_size: int = 1000):
         self.window_size = window_size
-        self._latencies: deque[MetricsSample] = deque(maxlen=window_size)
+        self._latency = WindowedLatencyHistogram(window_size)
+        # (entity type, stage) -> histogram; stage is "total" for the whole event or a part of it such as "parse"
+        self._stage_latency: defaultdict[tuple[str, str], WindowedLatencyHistogram] = defaultdict(
+            lambda: WindowedLatencyHistogram(self.window_size)
+        )
         self._retry_counts: dict[str, int] = {}
+        self._retry_attempts: Counter[int] = Counter()
+        self._retry_delays = [0] * (len(RETRY_DELAY_BUCKETS) + 1)
         self._success_count = 0
         self._failure_count = 0
         self._start_time = time.time()
 
-    def record_latency(self, latency_ms: float) -> None:
-        self._latencies.append(MetricsSample(timestamp=time.time(), value=latency_ms))
+    def record_latency(self, latency_ms: float, entity_type: str | None = None, stage: str = "total") -> None:
+        if stage == "total":
+            self._latency.record(latency_ms)
+        if entity_type is not None:
+            self._stage_latency[(entity_type, stage)].record(latency_ms)
 
     def record_success(self) -> None:
         self._success_count += 1
@@ -31,33 +61,35 @@ class ProcessingMetrics:
     def record_failure(self) -> None:
         self._failure_count += 1
 
-    def record_retry(self, category: str) -> None:
+    def record_retry(self, category: str, attempt: int | None = None, delay_seconds: float | None = None) -> None:
         self._retry_counts[category] = self._retry_counts.get(category, 0) + 1
+        if attempt is not None:
+            self._retry_attempts[attempt] += 1
+        if delay_seconds is not None:
+            self._retry_delays[bisect.bisect_left(RETRY_DELAY_BUCKETS, delay_seconds)] += 1
 
     def get_latency_percentiles(self) -> dict[str, float]:
-        if not self._latencies:
-            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
-
-        sorted_latencies = sorted(sample.value for sample in self._latencies)
-        count = len(sorted_latencies)
-
-        def percentile(p: float) -> float:
-            index = int(count * p)
-            if index >= count:
-                index = count - 1
-            return sorted_latencies[index]
+        return self._latency.summary()
 
+    def get_latency_breakdown(self) -> dict[str, dict[str, float]]:
+        """Latency percentiles for each entity type and stage, keyed by "<entity type>.<stage>" strings"""
         return {
-            "p50": percentile(0.50),
-            "p95": percentile(0.95),
-            "p99": percentile(0.99),
-            "mean": sum(sorted_latencies) / count,
-            "max": sorted_latencies[-1],
+            f"{entity_type}.{stage}": histogram.summary()
+            for (entity_type, stage), histogram in sorted(self._stage_latency.items())
         }
 
     def get_retry_distribution(self) -> dict[str, int]:
         return dict(self._retry_counts)
 
+    def get_retry_attempt_histogram(self) -> dict[int, int]:
+        """Number of retries scheduled, by attempt number (1 for the first retry of a file)"""
+        return dict(sorted(self._retry_attempts.items()))
+
+    def get_retry_delay_histogram(self) -> dict[str, int]:
+        """Number of retries scheduled, by backoff delay bucket"""
+        labels = [f"<={bound:g}s" for bound in RETRY_DELAY_BUCKETS] + [f">{RETRY_DELAY_BUCKETS[-1]:g}s"]
+        return dict(zip(labels, self._retry_delays, strict=True))
+
     def get_throughput(self) -> float:
         elapsed = time.time() - self._start_time
         if elapsed == 0:
@@ -73,7 +105,10 @@ class ProcessingMetrics:
     def get_summary(self) -> dict:
         return {
             "latency_percentiles": self.get_latency_percentiles(),
+            "latency_breakdown": self.get_latency_breakdown(),
             "retry_distribution": self.get_retry_distribution(),
+            "retry_attempts": self.get_retry_attempt_histogram(),
+            "retry_delays": self.get_retry_delay_histogram(),
             "success_count": self._success_count,
             "failure_count": self._failure_count,
             "success_rate": self.get_success_rate(),
@@ -82,8 +117,11 @@ class ProcessingMetrics:
         }
 
     def clear(self) -> None:
-        self._latencies.clear()
+        self._latency = WindowedLatencyHistogram(self.window_size)
+        self._stage_latency.clear()
         self._retry_counts.clear()
+        self._retry_attempts.clear()
+        self._retry_delays = [0] * (len(RETRY_DELAY_BUCKETS) + 1)
         self._success_count = 0
         self._failure_count = 0
         self._start_time = time.time()
@@ -1,4 +1,9 @@
+import heapq
+import itertools
+import threading
 import time
+from collections import Counter
+from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -19,6 +24,14 @@ class OrphanedEntity:
 
 
 class OrphanManager:
+    """Holds entities whose parent has not been seen yet, indexed by the parent they wait for
+
+    Orphans are also kept in a min-heap on `first_seen`, so `check_timeouts` only touches the orphans
+    that have just expired, and per-type counts are kept up to date on register and resolve so
+    `get_orphan_stats` does not walk the orphans either. Resolved orphans are dropped from the heap
+    lazily, when they reach the top or when they make up most of it.
+    """
+
     PARENT_TYPE_MAP = {
         EntityType.ATLAS: EntityType.GRID,
         EntityType.GRIDSQUARE: EntityType.GRID,
@@ -26,12 +39,20 @@ class OrphanManager:
         EntityType.MICROGRAPH: EntityType.FOILHOLE,
     }
 
-    def __init__(self, timeout_seconds: float = 300.0):
+    def __init__(self, timeout_seconds: float = 300.0, clock: Callable[[], float] = time.time):
         self.timeout_seconds = timeout_seconds
+        self._clock = clock
         self._orphans_by_parent: dict[tuple[EntityType, str], list[OrphanedEntity]] = {}
         self._resolution_count = 0
         self._timeout_count = 0
         self._timeout_logged: set[Path] = set()
+        # (first_seen, tie-break, orphan) for orphans that have not timed out yet
+        self._timeout_heap: list[tuple[float, int, OrphanedEntity]] = []
+        self._heap_sequence = itertools.count()
+        # ids of unresolved orphans still in the heap; the heap keeps every id in it alive
+        self._awaiting_timeout: set[int] = set()
+        self._counts_by_type: Counter[EntityType] = Counter()
+        self._lock = threading.Lock()
 
     def register_orphan(
         self,
@@ -51,75 +72,92 @@ class OrphanManager:
             required_parent_type=required_parent_type,
             required_parent_natural_id=required_parent_natural_id,
             file_path=file_path,
-            first_seen=time.time(),
-        )
-
-        key = (required_parent_type, required_parent_natural_id)
-        if key not in self._orphans_by_parent:
-            self._orphans_by_parent[key] = []
-
-        self._orphans_by_parent[key].append(orphan)
-        logger.info(
-            f"Registered orphan: {entity_type.value} from {file_path.name}, "
-            f"waiting for {required_parent_type.value} '{required_parent_natural_id}'"
+            first_seen=self._clock(),
         )
 
-    def resolve_orphans_for(self, parent_type: EntityType, parent_natural_id: str) -> list[OrphanedEntity]:
-        key = (parent_type, parent_natural_id)
-        orphans = self._orphans_by_parent.pop(key, [])
+        with self._lock:
+            key = (required_parent_type, required_parent_natural_id)
+            if key not in self._orphans_by_parent:
+                self._orphans_by_parent[key] = []
 
-        if orphans:
-            self._resolution_count += len(orphans)
-            for orphan in orphans:
-                self._timeout_logged.discard(orphan.file_path)
+            self._orphans_by_parent[key].append(orphan)
+            heapq.heappush(self._timeout_heap, (orphan.first_seen, next(self._heap_sequence), orphan))
+            self._awaiting_timeout.add(id(orphan))
+            self._counts_by_type[entity_type] += 1
             logger.info(
-                f"Resolved {len(orphans)} orphan(s) for {parent_type.value} '{parent_natural_id}' "
-                f"(total resolved: {self._resolution_count})"
+                f"Registered orphan: {entity_type.value} from {file_path.name}, "
+                f"waiting for {required_parent_type.value} '{required_parent_natural_id}'"
             )
 
-        return orphans
+    def resolve_orphans_for(self, parent_type: EntityType, parent_natural_id: str) -> list[OrphanedEntity]:
+        with self._lock:
+            key = (parent_type, parent_natural_id)
+            orphans = self._orphans_by_parent.pop(key, [])
+
+            if orphans:
+                self._resolution_count += len(orphans)
+                for orphan in orphans:
+                    self._timeout_logged.discard(orphan.file_path)
+                    self._awaiting_timeout.discard(id(orphan))
+                    self._counts_by_type[orphan.entity_type] -= 1
+                self._compact_timeout_heap()
+                logger.info(
+                    f"Resolved {len(orphans)} orphan(s) for {parent_type.value} '{parent_natural_id}' "
+                    f"(total resolved: {self._resolution_count})"
+                )
+
+            return orphans
+
+    def _compact_timeout_heap(self) -> None:
+        if len(self._timeout_heap) > 2 * len(self._awaiting_timeout) + 64:
+            self._timeout_heap = [entry for entry in self._timeout_heap if id(entry[2]) in self._awaiting_timeout]
+            heapq.heapify(self._timeout_heap)
 
     def check_timeouts(self, max_age_seconds: float | None = None) -> list[OrphanedEntity]:
+        """Return orphans that have now been waiting `max_age_seconds`, each only once
+
+        Timed out orphans stay registered so they can still be resolved if their parent turns up.
+        """
         if max_age_seconds is None:
             max_age_seconds = self.timeout_seconds
 
-        current_time = time.time()
+        current_time = self._clock()
+        cutoff = current_time - max_age_seconds
         timed_out_orphans = []
 
-        for orphans in self._orphans_by_parent.values():
-            for orphan in orphans:
-                age = current_time - orphan.first_seen
-                if age >= max_age_seconds:
-                    timed_out_orphans.append(orphan)
-                    if orphan.file_path not in self._timeout_logged:
-                        self._timeout_count += 1
-                        self._timeout_logged.add(orphan.file_path)
-                        logger.warning(
-                            f"Orphan timeout: {orphan.entity_type.value} from {orphan.file_path.name}, "
-                            f"waiting for {orphan.required_parent_type.value} '{orphan.required_parent_natural_id}', "
-                            f"age: {age:.1f}s (kept in memory for eventual resolution)"
-                        )
-
-        return timed_out_orphans
+        with self._lock:
+            while self._timeout_heap and self._timeout_heap[0][0] <= cutoff:
+                _, _, orphan = heapq.heappop(self._timeout_heap)
+                if id(orphan) not in self._awaiting_timeout:
+                    continue
+                self._awaiting_timeout.discard(id(orphan))
+                timed_out_orphans.append(orphan)
+                if orphan.file_path not in self._timeout_logged:
+                    self._timeout_count += 1
+                    self._timeout_logged.add(orphan.file_path)
+                    logger.warning(
+                        f"Orphan timeout: {orphan.entity_type.value} from {orphan.file_path.name}, "
+                        f"waiting for {orphan.required_parent_type.value} '{orphan.required_parent_natural_id}', "
+                        f"age: {current_time - orphan.first_seen:.1f}s (kept in memory for eventual resolution)"
+                    )
+
+            return timed_out_orphans
 
     def get_orphan_stats(self) -> dict[str, int | dict[str, int]]:
-        stats_by_type: dict[EntityType, int] = {}
-        total_count = 0
-
-        for orphans in self._orphans_by_parent.values():
-            for orphan in orphans:
-                stats_by_type[orphan.entity_type] = stats_by_type.get(orphan.entity_type, 0) + 1
-                total_count += 1
-
-        return {
-            "total_orphans": total_count,
-            "by_type": {entity_type.value: count for entity_type, count in stats_by_type.items()},
-            "total_resolved": self._resolution_count,
-            "total_timed_out": self._timeout_count,
-        }
+        with self._lock:
+            return {
+                "total_orphans": self._counts_by_type.total(),
+                "by_type": {entity_type.value: count for entity_type, count in self._counts_by_type.items() if count},
+                "total_resolved": self._resolution_count,
+                "total_timed_out": self._timeout_count,
+            }
 
     def clear(self) -> None:
-        self._orphans_by_parent.clear()
-        self._resolution_count = 0
-        self._timeout_count = 0
-        self._timeout_logged.clear()
+        with self._lock:
+            self._orphans_by_parent.clear()
+            self._resolution_count = 0
+            self._timeout_count = 0
+            self._timeout_logged.clear()
+            self._timeout_heap.clear()
+            self._awaiting_timeout.clear()
+            self._counts_by_type.clear()
@@ -1,5 +1,17 @@
+"""Ship agent log records to the backend without blocking the threads that log.
+
+`emit` only formats the record and appends it to a bounded ring buffer, so the
+watchdog and processing threads never wait on the network. A background thread
+sends the buffer in batches of up to `buffer_size` entries, every
+`flush_interval` seconds or as soon as a full batch is waiting. When the
+backend cannot keep up the oldest buffered records are dropped; the next batch
+shipped carries a warning saying how many. A batch that fails to send is
+retried with exponential backoff and dropped after `max_retries` attempts.
+"""
+
 import logging
 import threading
+from collections import deque
 from datetime import UTC, datetime
 
 
@@ -11,6 +23,10 @@ class RemoteLogHandler(logging.Handler):
         session_id: str,
         buffer_size: int = 100,
         flush_interval: float = 5.0,
+        capacity: int = 10_000,
+        max_retries: int = 5,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 60.0,
     ):
         super().__init__(level=logging.INFO)
         self._api_client = api_client
@@ -18,10 +34,22 @@ class RemoteLogHandler(logging.Handler):
         self._session_id = session_id
         self._buffer_size = buffer_size
         self._flush_interval = flush_interval
-        self._buffer: list[dict] = []
+        self._max_retries = max_retries
+        self._retry_base_delay = retry_base_delay
+        self._retry_max_delay = retry_max_delay
+        self._buffer: deque[dict] = deque(maxlen=max(capacity, buffer_size))
+        # batch taken off the buffer that has not been sent yet, and how many times sending it has failed
+        self._in_flight: list[dict] | None = None
+        self._attempts = 0
+        self._unreported_drops = 0
+        self._failures = 0
+        self.dropped_count = 0
+        self.sent_count = 0
         self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._wake = threading.Event()
         self._stop_event = threading.Event()
-        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="remote-log-shipper", daemon=True)
         self._flush_thread.start()
 
     def emit(self, record: logging.LogRecord):
@@ -33,32 +61,108 @@ class RemoteLogHandler(logging.Handler):
                 "message": self.format(record) if self.formatter else record.getMessage(),
             }
             with self._lock:
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.dropped_count += 1
+                    self._unreported_drops += 1
                 self._buffer.append(entry)
-                if len(self._buffer) >= self._buffer_size:
-                    self._flush_locked()
+                batch_ready = len(self._buffer) >= self._buffer_size
+            if batch_ready:
+                self._wake.set()
         except Exception:
             self.handleError(record)
 
-    def _flush_locked(self):
-        if not self._buffer:
-            return
-        batch = self._buffer[:]
-        self._buffer.clear()
+    def _drained(self) -> bool:
+        return not self._buffer and self._in_flight is None
+
+    def _next_batch(self) -> list[dict] | None:
+        with self._lock:
+            if self._in_flight is None and self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self._buffer_size, len(self._buffer)))]
+                if self._unreported_drops:
+                    batch.insert(0, self._drop_notice(self._unreported_drops))
+                    self._unreported_drops = 0
+                self._in_flight = batch
+                self._attempts = 0
+            return self._in_flight
+
+    def _drop_notice(self, dropped: int) -> dict:
+        return {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "level": "WARNING",
+            "logger_name": __name__,
+            "message": f"Dropped {dropped} log records because the log buffer was full",
+        }
+
+    def _send(self, batch: list[dict]) -> bool:
         try:
-            self._api_client.send_logs(self._agent_id, self._session_id, batch)
+            return bool(self._api_client.send_logs(self._agent_id, self._session_id, batch))
         except Exception:
-            pass
+            return False
 
-    def flush(self):
-        with self._lock:
-            self._flush_locked()
+    def _ship_pending(self, give_up_on_failure: bool = False) -> float | None:
+        """Send batches until the buffer is empty or a send fails
+
+        Returns the backoff delay before the failed batch should be retried, or None when nothing is left to retry.
+        """
+        delay = None
+        while (batch := self._next_batch()) is not None:
+            sent = self._send(batch)
+            with self._lock:
+                if sent:
+                    self.sent_count += len(batch)
+                    self._in_flight = None
+                else:
+                    self._attempts += 1
+                    self._failures += 1
+                    if give_up_on_failure:
+                        self.dropped_count += len(batch) + len(self._buffer)
+                        self._buffer.clear()
+                        self._in_flight = None
+                    elif self._attempts >= self._max_retries:
+                        self.dropped_count += len(batch)
+                        self._in_flight = None
+                    else:
+                        delay = min(self._retry_base_delay * 2 ** (self._attempts - 1), self._retry_max_delay)
+                self._idle.notify_all()
+            if delay is not None or (give_up_on_failure and not sent):
+                break
+        return delay
 
     def _flush_loop(self):
-        while not self._stop_event.wait(self._flush_interval):
-            self.flush()
+        delay = None
+        while not self._stop_event.is_set():
+            if delay is None:
+                self._wake.wait(self._flush_interval)
+            else:
+                # a full buffer does not cut a backoff short; only close does
+                self._stop_event.wait(delay)
+            self._wake.clear()
+            if self._stop_event.is_set():
+                break
+            delay = self._ship_pending()
+        # final attempt on close: no retries, and give up on everything left at the first failure
+        self._ship_pending(give_up_on_failure=True)
+        with self._lock:
+            self._idle.notify_all()
+
+    def flush(self, timeout: float | None = None):
+        """Ask the background thread to send everything buffered and wait up to `timeout` seconds for it to finish
+
+        `timeout` defaults to `flush_interval`. A flush returns at the next failed send rather than waiting for
+        its retries to run out.
+        """
+        if not self._flush_thread.is_alive():
+            return
+        self._wake.set()
+        with self._lock:
+            failures = self._failures
+            self._idle.wait_for(
+                lambda: self._drained() or self._failures > failures or not self._flush_thread.is_alive(),
+                timeout=self._flush_interval if timeout is None else timeout,
+            )
 
     def close(self):
         self._stop_event.set()
+        self._wake.set()
         self._flush_thread.join(timeout=self._flush_interval + 1)
-        self.flush()
         super().close()
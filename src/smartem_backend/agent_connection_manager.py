@@ -12,12 +12,15 @@ import uuid
 from datetime import datetime, timedelta
 from typing import Any
 
-from sqlalchemy import and_
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlmodel import Session
 
+from smartem_backend.agent_data_cleanup import update_in_batches
+from smartem_backend.agent_logs import drop_expired_log_partitions, ensure_log_partitions
 from smartem_backend.model.database import AgentConnection, AgentInstruction, AgentLog, AgentSession
 from smartem_backend.mq_publisher import publish_agent_instruction_expired
-from smartem_backend.utils import get_db_engine
+from smartem_backend.utils import get_async_db_engine, get_db_engine
 
 
 class AgentConnectionManager:
@@ -31,8 +34,20 @@ class AgentConnectionManager:
     - Provide connection statistics and monitoring
     """
 
-    def __init__(self, db_engine=None, check_interval: int = 30, log_retention_days: int = 7):
+    def __init__(
+        self,
+        db_engine=None,
+        check_interval: int = 30,
+        log_retention_days: int = 7,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        batch_size: int = 500,
+    ):
         self.db_engine = db_engine or get_db_engine()
+        # The monitoring loop runs on the API's event loop, so its cleanup tasks use the async engine
+        self._session_factory = session_factory or async_sessionmaker(
+            bind=get_async_db_engine(), class_=AsyncSession, expire_on_commit=False
+        )
+        self.batch_size = batch_size
         self.check_interval = check_interval
         self.log_retention_days = log_retention_days
         self.logger = logging.getLogger("AgentConnectionManager")
@@ -86,99 +101,118 @@ class AgentConnectionManager:
             self._handle_expired_instructions(),
             self._update_session_activity(),
         ]
-        self._log_cleanup_counter += 1
-        if self._log_cleanup_counter >= 120:
+        # first pass on startup so today's log partitions exist, then every 120 checks
+        if self._log_cleanup_counter == 0:
             tasks.append(self._cleanup_old_logs())
-            self._log_cleanup_counter = 0
+        self._log_cleanup_counter = (self._log_cleanup_counter + 1) % 120
         await asyncio.gather(*tasks, return_exceptions=True)
 
     async def _cleanup_stale_connections(self):
         """Clean up connections that haven't received heartbeats recently."""
         try:
-            with Session(self.db_engine) as session:
-                # Consider connections stale if no heartbeat for 2 minutes
-                stale_threshold = datetime.now() - timedelta(minutes=2)
-
-                stale_connections = (
-                    session.query(AgentConnection)
-                    .filter(
-                        and_(AgentConnection.status == "active", AgentConnection.last_heartbeat_at < stale_threshold)
-                    )
-                    .all()
+            now = datetime.now()
+            # Consider connections stale if no heartbeat for 2 minutes
+            stale_threshold = now - timedelta(minutes=2)
+            async with self._session_factory() as session:
+                closed = await update_in_batches(
+                    session,
+                    AgentConnection,
+                    where=(AgentConnection.status == "active", AgentConnection.last_heartbeat_at < stale_threshold),
+                    values={"status": "closed", "closed_at": now, "close_reason": "stale_connection"},
+                    returning=(AgentConnection.connection_id,),
+                    batch_size=self.batch_size,
+                )
+            if closed:
+                self.logger.info(
+                    f"Cleaned up {len(closed)} stale connections: {', '.join(row.connection_id for row in closed)}"
                 )
-
-                for conn in stale_connections:
-                    self.logger.info(f"Marking stale connection {conn.connection_id} as closed")
-                    conn.status = "closed"
-                    conn.closed_at = datetime.now()
-                    conn.close_reason = "stale_connection"
-
-                if stale_connections:
-                    session.commit()
-                    self.logger.info(f"Cleaned up {len(stale_connections)} stale connections")
 
         except Exception as e:
             self.logger.error(f"Error cleaning up stale connections: {e}")
 
     async def _handle_expired_instructions(self):
-        """Handle instructions that have expired and need retry or failure logic."""
-        try:
-            with Session(self.db_engine) as session:
-                # Find instructions that have expired
-                now = datetime.now()
-                expired_instructions = (
-                    session.query(AgentInstruction)
-                    .filter(
-                        and_(
-                            AgentInstruction.status.in_(["pending", "sent"]),
-                            AgentInstruction.expires_at.is_not(None),
-                            AgentInstruction.expires_at <= now,
-                        )
-                    )
-                    .all()
-                )
+        """Handle instructions that have expired and need retry or failure logic.
 
-                for instruction in expired_instructions:
-                    self.logger.info(
-                        f"Processing expired instruction {instruction.instruction_id} "
-                        f"(retry {instruction.retry_count}/{instruction.max_retries})"
-                    )
-
-                    # Publish expiration event for processing
-                    success = publish_agent_instruction_expired(
-                        instruction_id=instruction.instruction_id,
-                        session_id=instruction.session_id,
-                        agent_id=instruction.agent_id,
-                        expires_at=instruction.expires_at,
-                        retry_count=instruction.retry_count + 1,
-                    )
-
-                    if success:
-                        # Update retry count immediately
-                        instruction.retry_count += 1
-
-                        if instruction.retry_count >= instruction.max_retries:
-                            instruction.status = "expired"
-                            self.logger.info(
-                                f"Instruction {instruction.instruction_id} marked as expired "
-                                f"after {instruction.retry_count} retries"
+        Expired instructions are read a batch at a time, locked, and an expiration event is published for each.
+        One UPDATE then moves the published batch on: to "expired" once out of retries, otherwise back to
+        "pending" with a fresh 5-minute window. Instructions whose event failed to publish are left as they
+        were and picked up again on the next check.
+        """
+        try:
+            now = datetime.now()
+            retry_count = AgentInstruction.retry_count + 1
+            out_of_retries = retry_count >= AgentInstruction.max_retries
+            processed = expired = 0
+            last_id = 0
+            async with self._session_factory() as session:
+                while True:
+                    batch = (
+                        await session.execute(
+                            select(
+                                AgentInstruction.id,
+                                AgentInstruction.instruction_id,
+                                AgentInstruction.session_id,
+                                AgentInstruction.agent_id,
+                                AgentInstruction.expires_at,
+                                AgentInstruction.retry_count,
                             )
-                        else:
-                            # Reset for retry with new expiration time
-                            instruction.status = "pending"
-                            instruction.expires_at = now + timedelta(minutes=5)  # 5-minute retry window
-                            self.logger.info(
-                                f"Instruction {instruction.instruction_id} reset for retry "
-                                f"({instruction.retry_count}/{instruction.max_retries})"
+                            .where(
+                                AgentInstruction.status.in_(["pending", "sent"]),
+                                AgentInstruction.expires_at.is_not(None),
+                                AgentInstruction.expires_at <= now,
+                                AgentInstruction.id > last_id,
                             )
-                    else:
-                        self.logger.error(
-                            f"Failed to publish expiration event for instruction {instruction.instruction_id}"
+                            .order_by(AgentInstruction.id)
+                            .limit(self.batch_size)
+                            .with_for_update(skip_locked=True)
                         )
+                    ).all()
+                    if not batch:
+                        break
+                    last_id = batch[-1].id
+
+                    published = []
+                    for instruction in batch:
+                        if await publish_agent_instruction_expired(
+                            instruction_id=instruction.instruction_id,
+                            session_id=instruction.session_id,
+                            agent_id=instruction.agent_id,
+                            expires_at=instruction.expires_at,
+                            retry_count=instruction.retry_count + 1,
+                        ):
+                            published.append(instruction.id)
+                        else:
+                            self.logger.error(
+                                f"Failed to publish expiration event for instruction {instruction.instruction_id}"
+                            )
 
-                if expired_instructions:
-                    session.commit()
-                    self.logger.info(f"Processed {len(expired_instructions)} expired instructions")
+                    if published:
+                        updated = (
+                            await session.execute(
+                                update(AgentInstruction)
+                                .where(AgentInstruction.id.in_(published))
+                                .values(
+                                    retry_count=retry_count,
+                                    status=case((out_of_retries, "expired"), else_="pending"),
+                                    # 5-minute retry window
+                                    expires_at=case(
+                                        (out_of_retries, AgentInstruction.expires_at), else_=now + timedelta(minutes=5)
+                                    ),
+                                )
+                                .returning(AgentInstruction.status)
+                            )
+                        ).all()
+                        processed += len(updated)
+                        expired += sum(row.status == "expired" for row in updated)
+                    await session.commit()
+                    if len(batch) < self.batch_size:
+                        break
+
+            if processed:
+                self.logger.info(
+                    f"Processed {processed} expired instructions: {expired} marked as expired, "
+                    f"{processed - expired} reset for retry"
+                )
 
         except Exception as e:
             self.logger.error(f"Error handling expired instructions: {e}")
@@ -186,35 +220,44 @@ class AgentConnectionManager:
     async def _update_session_activity(self):
         """Update session activity and mark inactive sessions."""
         try:
-            with Session(self.db_engine) as session:
-                # Mark sessions inactive if no activity for 1 hour
-                inactive_threshold = datetime.now() - timedelta(hours=1)
-
-                inactive_sessions = (
-                    session.query(AgentSession)
-                    .filter(and_(AgentSession.status == "active", AgentSession.last_activity_at < inactive_threshold))
-                    .all()
+            # Mark sessions inactive if no activity for 1 hour
+            inactive_threshold = datetime.now() - timedelta(hours=1)
+            async with self._session_factory() as session:
+                inactive = await update_in_batches(
+                    session,
+                    AgentSession,
+                    where=(AgentSession.status == "active", AgentSession.last_activity_at < inactive_threshold),
+                    values={"status": "inactive"},
+                    returning=(AgentSession.session_id,),
+                    batch_size=self.batch_size,
+                )
+            if inactive:
+                self.logger.info(
+                    f"Marked {len(inactive)} sessions as inactive: {', '.join(row.session_id for row in inactive)}"
                 )
-
-                for agent_session in inactive_sessions:
-                    self.logger.info(f"Marking session {agent_session.session_id} as inactive")
-                    agent_session.status = "inactive"
-
-                if inactive_sessions:
-                    session.commit()
-                    self.logger.info(f"Marked {len(inactive_sessions)} sessions as inactive")
 
         except Exception as e:
             self.logger.error(f"Error updating session activity: {e}")
 
     async def _cleanup_old_logs(self):
+        """Drop agent log partitions past retention and create the partitions for the coming days.
+
+        Whole days are dropped with their partition; the DELETE only reaches rows in the partition
+        straddling the cutoff and in the default partition.
+        """
         try:
-            with Session(self.db_engine) as session:
-                cutoff = datetime.now() - timedelta(days=self.log_retention_days)
-                deleted = session.query(AgentLog).filter(AgentLog.created_at < cutoff).delete(synchronize_session=False)
-                if deleted:
-                    session.commit()
-                    self.logger.info(f"Purged {deleted} agent log entries older than {self.log_retention_days} days")
+            cutoff = datetime.now() - timedelta(days=self.log_retention_days)
+            async with self._session_factory() as session:
+                dropped = await session.run_sync(drop_expired_log_partitions, cutoff)
+                deleted = (await session.execute(delete(AgentLog).where(AgentLog.created_at < cutoff))).rowcount
+                created = await session.run_sync(ensure_log_partitions)
+                await session.commit()
+            if dropped:
+                self.logger.info(f"Dropped agent log partitions older than {self.log_retention_days} days: {dropped}")
+            if deleted:
+                self.logger.info(f"Purged {deleted} agent log entries older than {self.log_retention_days} days")
+            if created:
+                self.logger.info(f"Created agent log partitions {created}")
         except Exception as e:
             self.logger.error(f"Error cleaning up old agent logs: {e}")
 
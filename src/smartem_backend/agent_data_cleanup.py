@@ -8,11 +8,14 @@ Provides functions to manage data lifecycle for scientific data compliance:
 - Support regulatory compliance for scientific research data
 """
 
+import asyncio
 import logging
+from collections.abc import Sequence
 from datetime import datetime, timedelta
 
-from sqlalchemy import and_, text
-from sqlmodel import Session, select
+from sqlalchemy import String, cast, delete, exists, func, select, text, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from smartem_backend.model.database import (
     AgentConnection,
@@ -20,10 +23,62 @@ from smartem_backend.model.database import (
     AgentInstructionAcknowledgement,
     AgentSession,
 )
-from smartem_backend.utils import setup_postgres_connection
+from smartem_backend.utils import setup_postgres_async_connection
 
 logger = logging.getLogger(__name__)
 
+_EMPTY_JSONB = cast(text("'{}'"), JSONB)
+
+
+def _batch_keys(model, where: Sequence, batch_size: int):
+    """Primary keys of up to `batch_size` rows matching `where`, locked and skipping rows locked elsewhere"""
+    (key,) = model.__table__.primary_key.columns
+    return select(key).where(*where).limit(batch_size).with_for_update(skip_locked=True).scalar_subquery()
+
+
+async def update_in_batches(
+    session: AsyncSession,
+    model,
+    where: Sequence,
+    values: dict,
+    returning: Sequence = (),
+    batch_size: int = 1000,
+) -> list:
+    """`UPDATE ... RETURNING` the rows of `model` matching `where`, `batch_size` rows per statement
+
+    Each batch is committed on its own so row locks are held briefly. `values` must take the rows out of
+    `where`, or the same rows would be picked up again. Returns the `returning` columns of every updated row.
+    """
+    (key,) = model.__table__.primary_key.columns
+    updated = []
+    while True:
+        result = await session.execute(
+            update(model)
+            .where(key.in_(_batch_keys(model, where, batch_size)))
+            .values(**values)
+            .returning(key, *returning)
+        )
+        rows = result.all()
+        await session.commit()
+        updated.extend(rows)
+        if len(rows) < batch_size:
+            return updated
+
+
+async def delete_in_batches(session: AsyncSession, model, where: Sequence, batch_size: int = 1000) -> int:
+    """DELETE the rows of `model` matching `where`, `batch_size` rows per statement, returning how many went"""
+    (key,) = model.__table__.primary_key.columns
+    deleted = 0
+    while True:
+        result = await session.execute(
+            delete(model).where(key.in_(_batch_keys(model, where, batch_size))).returning(key)
+        )
+        count = len(result.all())
+        await session.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
 
 class AgentDataRetentionPolicy:
     """Configuration for agent data retention policies."""
@@ -81,20 +136,24 @@ class AgentDataRetentionPolicy:
 
 
 class AgentDataCleanupService:
-    """Service for managing agent communication data lifecycle and cleanup."""
+    """Service for managing agent communication data lifecycle and cleanup.
 
-    def __init__(self, session: Session, policy: AgentDataRetentionPolicy | None = None):
+    Every cleanup is a set-based UPDATE or DELETE run in batches of `policy.batch_size` rows, each batch in
+    its own transaction, so no rows are loaded into Python and the event loop is never blocked on the database.
+    """
+
+    def __init__(self, session: AsyncSession, policy: AgentDataRetentionPolicy | None = None):
         """
         Initialize cleanup service.
 
         Args:
-            session: Database session for cleanup operations
+            session: Async database session for cleanup operations
             policy: Retention policy configuration (defaults to scientific compliance)
         """
         self.session = session
         self.policy = policy or AgentDataRetentionPolicy.scientific_compliance()
 
-    def cleanup_stale_connections(self) -> dict[str, int]:
+    async def cleanup_stale_connections(self) -> dict[str, int]:
         """
         Clean up stale agent connections that haven't had heartbeats recently.
 
@@ -103,134 +162,105 @@ class AgentDataCleanupService:
         """
         cutoff_time = datetime.now() - timedelta(hours=self.policy.connection_cleanup_hours)
 
-        # Find stale connections
-        stale_query = select(AgentConnection).where(
-            and_(
-                AgentConnection.status == "active",
-                AgentConnection.last_heartbeat_at < cutoff_time,
-            )
+        # Mark as closed rather than deleting for audit trail
+        closed = await update_in_batches(
+            self.session,
+            AgentConnection,
+            where=(AgentConnection.status == "active", AgentConnection.last_heartbeat_at < cutoff_time),
+            values={
+                "status": "timeout",
+                "closed_at": datetime.now(),
+                "close_reason": f"Stale connection cleanup after {self.policy.connection_cleanup_hours}h",
+            },
+            batch_size=self.policy.batch_size,
         )
 
-        stale_connections = self.session.exec(stale_query).all()
-        cleaned_count = 0
-
-        for conn in stale_connections:
-            # Mark as closed rather than deleting for audit trail
-            conn.status = "timeout"
-            conn.closed_at = datetime.now()
-            conn.close_reason = f"Stale connection cleanup after {self.policy.connection_cleanup_hours}h"
-            cleaned_count += 1
-
-            if cleaned_count % self.policy.batch_size == 0:
-                self.session.commit()
-                logger.info(f"Marked {cleaned_count} stale connections as closed")
-
-        self.session.commit()
-
-        logger.info(f"Cleanup completed: {cleaned_count} stale connections marked as closed")
+        logger.info(f"Cleanup completed: {len(closed)} stale connections marked as closed")
         return {
-            "stale_connections_closed": cleaned_count,
+            "stale_connections_closed": len(closed),
             "cutoff_time": cutoff_time.isoformat(),
         }
 
-    def cleanup_old_instructions(self) -> dict[str, int]:
+    async def cleanup_old_instructions(self) -> dict[str, int]:
         """
         Clean up old instruction records beyond retention period.
 
         Maintains acknowledgement audit trail while removing instruction payload data.
         """
         cutoff_time = datetime.now() - timedelta(days=self.policy.instruction_retention_days)
-
-        # Find old instructions that can be archived
-        old_instructions_query = select(AgentInstruction).where(
-            and_(
-                AgentInstruction.created_at < cutoff_time,
-                AgentInstruction.status.in_(["completed", "failed", "expired"]),
-            )
+        old_instruction = (
+            AgentInstruction.created_at < cutoff_time,
+            AgentInstruction.status.in_(["completed", "failed", "expired"]),
+        )
+        acknowledged = exists().where(AgentInstructionAcknowledgement.instruction_id == AgentInstruction.instruction_id)
+
+        # Archive: clear sensitive payload but keep metadata for audit trail
+        archived = await update_in_batches(
+            self.session,
+            AgentInstruction,
+            where=(*old_instruction, acknowledged, ~AgentInstruction.payload.has_key("archived")),
+            values={
+                "payload": {"archived": True, "archived_at": datetime.now().isoformat()},
+                "instruction_metadata": func.coalesce(AgentInstruction.instruction_metadata, _EMPTY_JSONB).op("||")(
+                    func.jsonb_build_object(
+                        "archived", True, "original_payload_size", func.length(cast(AgentInstruction.payload, String))
+                    )
+                ),
+            },
+            batch_size=self.policy.batch_size,
+        )
+        # Safe to delete instructions without acknowledgements
+        deleted_count = await delete_in_batches(
+            self.session, AgentInstruction, where=(*old_instruction, ~acknowledged), batch_size=self.policy.batch_size
         )
 
-        old_instructions = self.session.exec(old_instructions_query).all()
-        archived_count = 0
-        deleted_count = 0
-
-        for instruction in old_instructions:
-            # Check if this instruction has acknowledgements (preserve audit trail)
-            ack_query = select(AgentInstructionAcknowledgement).where(
-                AgentInstructionAcknowledgement.instruction_id == instruction.instruction_id
-            )
-            has_acknowledgements = self.session.exec(ack_query).first() is not None
-
-            if has_acknowledgements:
-                # Archive: clear sensitive payload but keep metadata for audit trail
-                instruction.payload = {"archived": True, "archived_at": datetime.now().isoformat()}
-                instruction.metadata = {
-                    **(instruction.metadata or {}),
-                    "archived": True,
-                    "original_payload_size": len(str(instruction.payload)),
-                }
-                archived_count += 1
-            else:
-                # Safe to delete instructions without acknowledgements
-                self.session.delete(instruction)
-                deleted_count += 1
-
-            if (archived_count + deleted_count) % self.policy.batch_size == 0:
-                self.session.commit()
-                logger.info(f"Processed {archived_count + deleted_count} old instructions")
-
-        self.session.commit()
-
-        logger.info(f"Instruction cleanup completed: {archived_count} archived, {deleted_count} deleted")
+        logger.info(f"Instruction cleanup completed: {len(archived)} archived, {deleted_count} deleted")
         return {
-            "instructions_archived": archived_count,
+            "instructions_archived": len(archived),
             "instructions_deleted": deleted_count,
             "cutoff_time": cutoff_time.isoformat(),
         }
 
-    def cleanup_completed_sessions(self) -> dict[str, int]:
+    async def cleanup_completed_sessions(self) -> dict[str, int]:
         """
         Clean up old completed sessions beyond retention period.
 
         Maintains session metadata but removes detailed experimental parameters.
         """
         cutoff_time = datetime.now() - timedelta(days=self.policy.completed_session_retention_days)
+        parameter_count = (
+            select(func.count())
+            .select_from(func.jsonb_object_keys(AgentSession.experimental_parameters).table_valued("key"))
+            .scalar_subquery()
+        )
 
-        # Find old completed sessions
-        old_sessions_query = select(AgentSession).where(
-            and_(
+        # Archive sensitive experimental parameters
+        archived = await update_in_batches(
+            self.session,
+            AgentSession,
+            where=(
                 AgentSession.ended_at.isnot(None),
                 AgentSession.ended_at < cutoff_time,
                 AgentSession.status.in_(["completed", "terminated", "error"]),
-            )
+                AgentSession.experimental_parameters.isnot(None),
+                AgentSession.experimental_parameters != _EMPTY_JSONB,
+                ~AgentSession.experimental_parameters.has_key("archived"),
+            ),
+            values={
+                "experimental_parameters": func.jsonb_build_object(
+                    "archived", True, "archived_at", datetime.now().isoformat(), "parameter_count", parameter_count
+                )
+            },
+            batch_size=self.policy.batch_size,
         )
 
-        old_sessions = self.session.exec(old_sessions_query).all()
-        archived_count = 0
-
-        for session in old_sessions:
-            # Archive sensitive experimental parameters
-            if session.experimental_parameters:
-                archived_params = {
-                    "archived": True,
-                    "archived_at": datetime.now().isoformat(),
-                    "parameter_count": len(session.experimental_parameters),
-                }
-                session.experimental_parameters = archived_params
-                archived_count += 1
-
-            if archived_count % self.policy.batch_size == 0:
-                self.session.commit()
-                logger.info(f"Archived {archived_count} completed sessions")
-
-        self.session.commit()
-
-        logger.info(f"Session cleanup completed: {archived_count} sessions archived")
+        logger.info(f"Session cleanup completed: {len(archived)} sessions archived")
         return {
-            "sessions_archived": archived_count,
+            "sessions_archived": len(archived),
             "cutoff_time": cutoff_time.isoformat(),
         }
 
-    def cleanup_old_acknowledgements(self) -> dict[str, int]:
+    async def cleanup_old_acknowledgements(self) -> dict[str, int]:
         """
         Clean up very old acknowledgement records beyond regulatory retention period.
 
@@ -238,22 +268,12 @@ class AgentDataCleanupService:
         """
         cutoff_time = datetime.now() - timedelta(days=self.policy.acknowledgement_retention_days)
 
-        # Count acknowledgements to be deleted
-        count_query = select(AgentInstructionAcknowledgement).where(
-            AgentInstructionAcknowledgement.created_at < cutoff_time
+        deleted_count = await delete_in_batches(
+            self.session,
+            AgentInstructionAcknowledgement,
+            where=(AgentInstructionAcknowledgement.created_at < cutoff_time,),
+            batch_size=self.policy.batch_size,
         )
-        old_acknowledgements = self.session.exec(count_query).all()
-
-        deleted_count = 0
-        for ack in old_acknowledgements:
-            self.session.delete(ack)
-            deleted_count += 1
-
-            if deleted_count % self.policy.batch_size == 0:
-                self.session.commit()
-                logger.info(f"Deleted {deleted_count} old acknowledgements")
-
-        self.session.commit()
 
         logger.warning(
             f"Acknowledgement cleanup completed: {deleted_count} records deleted (affects audit trail completeness)"
@@ -263,7 +283,7 @@ class AgentDataCleanupService:
             "cutoff_time": cutoff_time.isoformat(),
         }
 
-    def run_full_cleanup(self) -> dict[str, any]:
+    async def run_full_cleanup(self) -> dict[str, any]:
         """
         Run complete cleanup process across all agent communication data.
 
@@ -276,18 +296,18 @@ class AgentDataCleanupService:
         results = {}
         try:
             # Run cleanup in order of increasing importance/sensitivity
-            results["connections"] = self.cleanup_stale_connections()
-            results["instructions"] = self.cleanup_old_instructions()
-            results["sessions"] = self.cleanup_completed_sessions()
+            results["connections"] = await self.cleanup_stale_connections()
+            results["instructions"] = await self.cleanup_old_instructions()
+            results["sessions"] = await self.cleanup_completed_sessions()
 
             # Only cleanup acknowledgements if explicitly configured (affects audit trail)
             if self.policy.acknowledgement_retention_days < 2555:  # Less than 7 years
                 logger.warning("Cleaning up acknowledgements - this affects scientific audit trail")
-                results["acknowledgements"] = self.cleanup_old_acknowledgements()
+                results["acknowledgements"] = await self.cleanup_old_acknowledgements()
 
         except Exception as e:
             logger.error(f"Error during cleanup process: {e}")
-            self.session.rollback()
+            await self.session.rollback()
             raise
 
         end_time = datetime.now()
@@ -308,7 +328,7 @@ class AgentDataCleanupService:
         logger.info(f"Full cleanup completed in {duration.total_seconds():.2f} seconds")
         return results
 
-    def get_data_usage_statistics(self) -> dict[str, any]:
+    async def get_data_usage_statistics(self) -> dict[str, any]:
         """
         Get current data usage statistics for agent communication tables.
 
@@ -319,10 +339,13 @@ class AgentDataCleanupService:
 
         # Get record counts
         stats["record_counts"] = {
-            "sessions": len(self.session.exec(select(AgentSession)).all()),
-            "instructions": len(self.session.exec(select(AgentInstruction)).all()),
-            "connections": len(self.session.exec(select(AgentConnection)).all()),
-            "acknowledgements": len(self.session.exec(select(AgentInstructionAcknowledgement)).all()),
+            name: await self.session.scalar(select(func.count()).select_from(model))
+            for name, model in (
+                ("sessions", AgentSession),
+                ("instructions", AgentInstruction),
+                ("connections", AgentConnection),
+                ("acknowledgements", AgentInstructionAcknowledgement),
+            )
         }
 
         # Get table sizes using PostgreSQL system tables
@@ -339,7 +362,7 @@ class AgentDataCleanupService:
                 ORDER BY pg_total_relation_size(schemaname||'.'||tablename) DESC;
             """)
 
-            result = self.session.execute(size_query)
+            result = await self.session.execute(size_query)
             table_sizes = []
             total_bytes = 0
 
@@ -361,14 +384,12 @@ class AgentDataCleanupService:
 
         # Get oldest records
         try:
-            oldest_session = self.session.exec(select(AgentSession).order_by(AgentSession.created_at).limit(1)).first()
-            oldest_instruction = self.session.exec(
-                select(AgentInstruction).order_by(AgentInstruction.created_at).limit(1)
-            ).first()
+            oldest_session = await self.session.scalar(select(func.min(AgentSession.created_at)))
+            oldest_instruction = await self.session.scalar(select(func.min(AgentInstruction.created_at)))
 
             stats["oldest_records"] = {
-                "session": oldest_session.created_at.isoformat() if oldest_session else None,
-                "instruction": oldest_instruction.created_at.isoformat() if oldest_instruction else None,
+                "session": oldest_session.isoformat() if oldest_session else None,
+                "instruction": oldest_instruction.isoformat() if oldest_instruction else None,
             }
         except Exception as e:
             logger.error(f"Could not retrieve oldest record statistics: {e}")
@@ -405,9 +426,14 @@ def main():
     # Set up logging
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+    asyncio.run(_run(args))
+
+
+async def _run(args):
     # Create database session
-    engine = setup_postgres_connection()
-    with Session(engine) as session:
+    engine = setup_postgres_async_connection()
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
         # Select policy
         if args.policy == "development":
             policy = AgentDataRetentionPolicy.development()
@@ -421,7 +447,7 @@ def main():
 
         # Execute requested operation
         if args.operation == "stats":
-            stats = cleanup_service.get_data_usage_statistics()
+            stats = await cleanup_service.get_data_usage_statistics()
             print("Agent Communication Data Statistics:")
             print(f"Record counts: {stats['record_counts']}")
             if "table_sizes" in stats and stats["table_sizes"] != "unavailable":
@@ -435,7 +461,7 @@ def main():
             if args.dry_run:
                 logger.info("Would run full cleanup with policy: %s", args.policy)
             else:
-                results = cleanup_service.run_full_cleanup()
+                results = await cleanup_service.run_full_cleanup()
                 print("Cleanup Results:")
                 for category, result in results.items():
                     print(f"{category}: {result}")
@@ -444,21 +470,21 @@ def main():
             if args.dry_run:
                 logger.info("Would cleanup stale connections")
             else:
-                result = cleanup_service.cleanup_stale_connections()
+                result = await cleanup_service.cleanup_stale_connections()
                 print(f"Connection cleanup: {result}")
 
         elif args.operation == "instructions":
             if args.dry_run:
                 logger.info("Would cleanup old instructions")
             else:
-                result = cleanup_service.cleanup_old_instructions()
+                result = await cleanup_service.cleanup_old_instructions()
                 print(f"Instruction cleanup: {result}")
 
         elif args.operation == "sessions":
             if args.dry_run:
                 logger.info("Would cleanup completed sessions")
             else:
-                result = cleanup_service.cleanup_completed_sessions()
+                result = await cleanup_service.cleanup_completed_sessions()
                 print(f"Session cleanup: {result}")
 
 
@@ -0,0 +1,143 @@
+"""Bulk ingestion and retention of agent logs.
+
+Agents ship logs as gzip-compressed NDJSON, one `AgentLogEntry` per line (a
+JSON `{"logs": [...]}` body is still accepted). The entries are written with a
+single asyncpg `COPY` rather than one ORM object per entry.
+
+`agentlog` is range-partitioned by `created_at`, one partition per day plus a
+default partition for rows outside them. `ensure_log_partitions` creates the
+partitions for the coming days ahead of time and `drop_expired_log_partitions`
+drops whole days once they are past the retention cutoff, so retention never
+has to `DELETE` from the busy daily partitions.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Sequence
+from datetime import UTC, date, datetime, timedelta
+
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import Session
+
+from smartem_backend.model.database import AgentLog
+from smartem_backend.model.frontend_sse_event import (
+    AGENT_LOG_NDJSON_MEDIA_TYPE,
+    AgentLogBatchRequest,
+    AgentLogEntry,
+)
+
+logger = logging.getLogger(__name__)
+
+AGENT_LOG_COLUMNS = ("agent_id", "session_id", "timestamp", "level", "logger_name", "message", "created_at")
+
+_TABLE = AgentLog.__tablename__
+_DEFAULT_PARTITION = f"{_TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{_TABLE}_(\d{{8}})$")
+_ndjson_entries = TypeAdapter(list[AgentLogEntry])
+
+
+def parse_log_entries(body: bytes, content_type: str) -> list[AgentLogEntry]:
+    """Decode an NDJSON or `{"logs": [...]}` JSON request body. Raises pydantic's ValidationError if malformed."""
+    if content_type.split(";")[0].strip() == AGENT_LOG_NDJSON_MEDIA_TYPE:
+        return _ndjson_entries.validate_json(
+            b"[" + b",".join(line for line in body.splitlines() if line.strip()) + b"]"
+        )
+    return AgentLogBatchRequest.model_validate_json(body).logs
+
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(UTC).replace(tzinfo=None) if value.tzinfo else value
+
+
+async def copy_agent_logs(db: AsyncSession, agent_id: str, session_id: str, entries: Sequence[AgentLogEntry]) -> int:
+    """COPY `entries` into agentlog in the session's transaction, returning the number written. The caller commits."""
+    if not entries:
+        return 0
+    created_at = datetime.now()
+    records = [
+        (agent_id, session_id, _naive_utc(entry.timestamp), entry.level, entry.logger_name, entry.message, created_at)
+        for entry in entries
+    ]
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(_TABLE, records=records, columns=AGENT_LOG_COLUMNS)
+    return len(records)
+
+
+def partition_name(day: date) -> str:
+    return f"{_TABLE}_{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> date | None:
+    match = _PARTITION_NAME.match(name)
+    return datetime.strptime(match.group(1), "%Y%m%d").date() if match else None
+
+
+def expired_partitions(names: Sequence[str], cutoff: datetime) -> list[str]:
+    """Daily partitions whose whole day is before `cutoff`"""
+    return sorted(
+        name
+        for name in names
+        if (day := partition_day(name)) is not None
+        and datetime.combine(day + timedelta(days=1), datetime.min.time()) <= cutoff
+    )
+
+
+def list_log_partitions(session: Session) -> list[str]:
+    rows = session.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = :table
+            """
+        ),
+        {"table": _TABLE},
+    )
+    return [row[0] for row in rows]
+
+
+def ensure_log_partitions(session: Session, today: date | None = None, days_ahead: int = 2) -> list[str]:
+    """Create the default partition and the daily partitions from `today` to `days_ahead` days on, if missing
+
+    Returns the names of the partitions created. A day whose rows already landed in the default partition
+    cannot be split out of it and is skipped with a warning; those rows are purged by the retention DELETE.
+    """
+    today = today or date.today()
+    existing = set(list_log_partitions(session))
+    created = []
+    if _DEFAULT_PARTITION not in existing:
+        session.execute(text(f"CREATE TABLE IF NOT EXISTS {_DEFAULT_PARTITION} PARTITION OF {_TABLE} DEFAULT"))
+        created.append(_DEFAULT_PARTITION)
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        name = partition_name(day)
+        if name in existing:
+            continue
+        try:
+            with session.begin_nested():
+                session.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {_TABLE} "
+                        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"Could not create agent log partition {name}: {e}")
+            continue
+        created.append(name)
+    return created
+
+
+def drop_expired_log_partitions(session: Session, cutoff: datetime) -> list[str]:
+    """Drop the daily partitions entirely older than `cutoff`, returning their names"""
+    dropped = expired_partitions(list_log_partitions(session), cutoff)
+    for name in dropped:
+        session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    return dropped
@@ -1,19 +1,30 @@
 import asyncio
+import gzip
 import json
 import logging
 import random
+import threading
 import time
 import traceback
-from collections.abc import Callable
+from collections import deque
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlencode
 
+import httpx
+import numpy as np
 import requests
 import sseclient
 from pydantic import BaseModel
 
+from smartem_backend.columnar import COLUMNAR_MEDIA_TYPE, concatenate_series, decode_columns
+from smartem_backend.model.frontend_sse_event import AGENT_LOG_NDJSON_MEDIA_TYPE
 from smartem_backend.model.http_request import (
     AcquisitionCreateRequest,
     AgentInstructionAcknowledgement,
+    AgentInstructionAcknowledgementBatchRequest,
+    AgentInstructionBatchAcknowledgement,
     AtlasCreateRequest,
     AtlasTileCreateRequest,
     FoilHoleCreateRequest,
@@ -24,6 +35,7 @@ from smartem_backend.model.http_request import (
 )
 from smartem_backend.model.http_response import (
     AcquisitionResponse,
+    AgentInstructionAcknowledgementBatchResponse,
     AgentInstructionAcknowledgementResponse,
     AtlasResponse,
     AtlasTileGridSquarePositionResponse,
@@ -254,22 +266,29 @@ class SmartEMAPIClient:
 
         self._logger.info(f"Initialized SmartEM API client with base URL: {base_url}")
 
-    def _send_with_auth(self, method: str, url: str, json_data=None):
+    def _send_with_auth(
+        self,
+        method: str,
+        url: str,
+        json_data=None,
+        headers: dict[str, str] | None = None,
+        data: bytes | None = None,
+    ):
         """Send a request through the shared session. If a KeycloakClient is configured,
         attach a Bearer token; on a 401 response, invalidate the cached token, fetch a
         fresh one, and retry the request once before returning.
         """
-        headers: dict[str, str] = {}
+        headers = dict(headers or {})
         if self._keycloak_client:
             headers["Authorization"] = f"Bearer {self._keycloak_client.get_token()}"
 
-        response = self._session.request(method, url, json=json_data, headers=headers or None)
+        response = self._session.request(method, url, json=json_data, data=data, headers=headers or None)
 
         if response.status_code == 401 and self._keycloak_client:
             self._logger.warning("Received 401 from %s %s; refreshing token and retrying once", method.upper(), url)
             self._keycloak_client.invalidate()
             headers["Authorization"] = f"Bearer {self._keycloak_client.get_token()}"
-            response = self._session.request(method, url, json=json_data, headers=headers)
+            response = self._session.request(method, url, json=json_data, data=data, headers=headers)
 
         return response
 
@@ -382,12 +401,50 @@ class SmartEMAPIClient:
             self._logger.debug(f"Error details: {traceback.format_exc()}")
             raise
 
+    def _request_columns(self, endpoint: str, params: dict | None = None) -> dict[str, np.ndarray]:
+        """
+        GET an endpoint in the columnar encoding and decode it into one NumPy array per column
+
+        Missing values come back in-band: "" for strings, NaN for floats, NaT for timestamps and -1 for integers.
+        """
+        return self._request_columns_with_headers(endpoint, params)[0]
+
+    def _request_columns_with_headers(
+        self, endpoint: str, params: dict | None = None
+    ) -> tuple[dict[str, np.ndarray], Mapping[str, str]]:
+        """`_request_columns`, also returning the response headers"""
+        query = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in (params or {}).items() if v is not None}
+        url = f"{self.base_url}/{endpoint}"
+        if query:
+            url = f"{url}?{urlencode(query)}"
+        self._logger.debug(f"Making columnar GET request to {url}")
+        response = self._send_with_auth("get", url, headers={"Accept": COLUMNAR_MEDIA_TYPE})
+        response.raise_for_status()
+        if not response.headers.get("content-type", "").startswith(COLUMNAR_MEDIA_TYPE):
+            raise ValueError(f"Expected {COLUMNAR_MEDIA_TYPE} from {url}, got {response.headers.get('content-type')}")
+        return decode_columns(response.content), response.headers
+
     # Entity-specific methods
 
     # Agent log shipping
-    def send_logs(self, agent_id: str, session_id: str, logs: list[dict]) -> bool:
+    def send_logs(self, agent_id: str, session_id: str, logs: list[dict], compress: bool = True) -> bool:
+        """POST a batch of log entries as gzipped NDJSON, or as plain JSON if `compress` is False
+
+        Returns whether the batch was stored.
+        """
         try:
-            self._request("post", f"agent/{agent_id}/session/{session_id}/logs", {"logs": logs})
+            if not compress:
+                self._request("post", f"agent/{agent_id}/session/{session_id}/logs", {"logs": logs})
+                return True
+            url = f"{self.base_url}/agent/{agent_id}/session/{session_id}/logs"
+            ndjson = b"".join(json.dumps(entry).encode() + b"\n" for entry in logs)
+            response = self._send_with_auth(
+                "post",
+                url,
+                headers={"Content-Type": AGENT_LOG_NDJSON_MEDIA_TYPE, "Content-Encoding": "gzip"},
+                data=gzip.compress(ndjson, compresslevel=6),
+            )
+            response.raise_for_status()
             return True
         except Exception as e:
             self._logger.debug(f"Failed to ship logs: {e}")
@@ -645,6 +702,54 @@ class SmartEMAPIClient:
         )
         return response
 
+    # Predictions (columnar)
+    def get_grid_prediction_arrays(self, prediction_model_name: str, grid_uuid: str) -> dict[str, np.ndarray]:
+        """Get the latest prediction per square (or per foil hole) for a grid as column arrays"""
+        return self._request_columns(f"prediction_model/{prediction_model_name}/grid/{grid_uuid}/prediction")
+
+    def get_grid_latent_representation_arrays(
+        self, prediction_model_name: str, grid_uuid: str
+    ) -> dict[str, np.ndarray]:
+        """Get the latent representation coordinates and cluster indices for a grid as column arrays"""
+        return self._request_columns(f"prediction_model/{prediction_model_name}/grid/{grid_uuid}/latent_representation")
+
+    def get_grid_quality_prediction_time_series_arrays(
+        self,
+        grid_uuid: str,
+        after: int | None = None,
+        since: datetime | None = None,
+        prediction_model_name: str | None = None,
+        metric_name: str | None = None,
+    ) -> tuple[dict[str, np.ndarray], int | None]:
+        """
+        Get every prediction point for a grid inserted after the `after` cursor, grouped into series
+
+        The model, metric, square and hole arrays hold one entry per series and `timestamp` and `value` one
+        entry per point, with the points of series `i` at `offsets[i]:offsets[i + 1]`. Follows the server's
+        pages and returns the arrays with the cursor to pass as `after` on the next refresh. `since` further
+        restricts the points by timestamp.
+        """
+        pages = []
+        while True:
+            arrays, headers = self._request_columns_with_headers(
+                f"grids/{grid_uuid}/quality_prediction_time_series",
+                {
+                    "after": after,
+                    "since": since,
+                    "prediction_model_name": prediction_model_name,
+                    "metric_name": metric_name,
+                },
+            )
+            pages.append(arrays)
+            if "x-cursor" in headers:
+                after = int(headers["x-cursor"])
+            if headers.get("x-has-more") != "true":
+                break
+        if len(pages) == 1:
+            return pages[0], after
+        key_names = ("prediction_model_name", "metric_name", "gridsquare_uuid", "foilhole_uuid")
+        return concatenate_series(pages, key_names), after
+
     # ============ Agent Communication Methods ============
 
     def acknowledge_instruction(
@@ -658,6 +763,21 @@ class SmartEMAPIClient:
             AgentInstructionAcknowledgementResponse,
         )
 
+    def acknowledge_instructions(
+        self, agent_id: str, session_id: str, acknowledgements: list[AgentInstructionBatchAcknowledgement]
+    ) -> AgentInstructionAcknowledgementBatchResponse:
+        """Acknowledge several instructions of a session in one request, with a result per acknowledgement"""
+        return self._request(
+            "post",
+            f"agent/{agent_id}/session/{session_id}/instructions/ack:batch",
+            AgentInstructionAcknowledgementBatchRequest(acknowledgements=acknowledgements),
+            AgentInstructionAcknowledgementBatchResponse,
+        )
+
+    def buffered_acknowledger(self, agent_id: str, session_id: str, **kwargs) -> "BufferedAcknowledger":
+        """A `BufferedAcknowledger` sending this session's acknowledgements through this client"""
+        return BufferedAcknowledger(self, agent_id, session_id, **kwargs)
+
     def get_active_connections(self) -> dict:
         """Get active agent connections (debug endpoint)"""
         return self._request("get", "debug/agent-connections")
@@ -667,6 +787,133 @@ class SmartEMAPIClient:
         return self._request("get", f"debug/session/{session_id}/instructions")
 
 
+class BufferedAcknowledger:
+    """
+    Coalesce instruction acknowledgements into batch requests.
+
+    `acknowledge` only queues the acknowledgement. A background thread waits `window` seconds after the first
+    one arrives, so acknowledgements made in quick succession (e.g. for an instruction batch) are sent in a
+    single `ack:batch` request of at most `max_batch`. A request that fails on the network or with a server
+    error is retried with exponential backoff up to `max_retries` times; one the backend refuses is dropped.
+    """
+
+    def __init__(
+        self,
+        api_client: SmartEMAPIClient,
+        agent_id: str,
+        session_id: str,
+        window: float = 0.2,
+        max_batch: int = 100,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5,
+    ):
+        self._api_client = api_client
+        self.agent_id = agent_id
+        self.session_id = session_id
+        self.window = window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.logger = logging.getLogger(f"BufferedAcknowledger-{agent_id}")
+        self._pending: list[AgentInstructionBatchAcknowledgement] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self.acknowledged_count = 0
+        self.rejected_count = 0
+        self.failed_count = 0
+        self._thread = threading.Thread(target=self._run, name="instruction-acknowledger", daemon=True)
+        self._thread.start()
+
+    def acknowledge(
+        self,
+        instruction_id: str,
+        status: str,
+        result: str | None = None,
+        error_message: str | None = None,
+        processing_time_ms: int | None = None,
+    ) -> None:
+        acknowledgement = AgentInstructionBatchAcknowledgement(
+            instruction_id=instruction_id,
+            status=status,
+            result=result,
+            error_message=error_message,
+            processing_time_ms=processing_time_ms,
+            processed_at=datetime.now(),
+        )
+        with self._lock:
+            self._pending.append(acknowledgement)
+        self._wake.set()
+
+    def _take_batch(self) -> list[AgentInstructionBatchAcknowledgement]:
+        with self._lock:
+            batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch :]
+            self._in_flight += bool(batch)
+            return batch
+
+    def _send(self, batch: list[AgentInstructionBatchAcknowledgement]) -> None:
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self._api_client.acknowledge_instructions(self.agent_id, self.session_id, batch)
+                except requests.HTTPError as e:
+                    if e.response is not None and e.response.status_code < 500:
+                        with self._lock:
+                            self.failed_count += len(batch)
+                        self.logger.error(f"Backend refused {len(batch)} acknowledgements: {e}")
+                        return
+                    error = e
+                except requests.RequestException as e:
+                    error = e
+                else:
+                    for item in response.results:
+                        if item.status != "success":
+                            self.logger.warning(f"Acknowledgement of {item.instruction_id} rejected: {item.error}")
+                    with self._lock:
+                        self.acknowledged_count += response.acknowledged
+                        self.rejected_count += len(response.results) - response.acknowledged
+                    return
+                if attempt < self.max_retries:
+                    delay = self.retry_base_delay * 2**attempt
+                    self.logger.warning(f"Failed to send {len(batch)} acknowledgements, retrying in {delay:.2f}s")
+                    self._stop_event.wait(delay)
+            with self._lock:
+                self.failed_count += len(batch)
+            self.logger.error(f"Dropped {len(batch)} acknowledgements after {self.max_retries + 1} attempts: {error}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    def _send_pending(self) -> None:
+        while batch := self._take_batch():
+            self._send(batch)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake.wait()
+            with self._lock:
+                batch_full = len(self._pending) >= self.max_batch
+            if not batch_full:
+                self._stop_event.wait(self.window)
+            self._wake.clear()
+            self._send_pending()
+        self._send_pending()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Send everything queued now and wait for requests in progress; returns whether all were sent"""
+        self._send_pending()
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._pending and not self._in_flight, timeout=timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        self._stop_event.set()
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+
+
 class SSEAgentClient:
     """
     SSE client for agents to receive real-time instructions from the backend.
@@ -683,6 +930,7 @@ class SSEAgentClient:
         initial_retry_delay: float = 1.0,
         max_retry_delay: float = 60.0,
         keycloak_client=None,
+        batch_instructions: bool = False,
     ):
         """
         Initialize SSE client for agent communication
@@ -699,6 +947,8 @@ class SSEAgentClient:
                 acknowledgement/heartbeat POST gains a Bearer Authorization header. Mid-stream
                 token expiry is handled by the auto-reconnect path, which fetches a fresh
                 token on the next connection attempt.
+            batch_instructions: Ask the server to deliver instructions that are ready together as one
+                `instruction_batch` event. The instruction callback is still called once per instruction.
         """
         self.base_url = base_url.rstrip("/")
         self.agent_id = agent_id
@@ -708,6 +958,7 @@ class SSEAgentClient:
         self.initial_retry_delay = initial_retry_delay
         self.max_retry_delay = max_retry_delay
         self._keycloak_client = keycloak_client
+        self.batch_instructions = batch_instructions
         self.logger = logging.getLogger(f"SSEAgentClient-{agent_id}")
         self._is_running = False
         self._connection_id: str | None = None
@@ -728,6 +979,10 @@ class SSEAgentClient:
             headers["Authorization"] = f"Bearer {self._keycloak_client.get_token()}"
         return headers
 
+    def _stream_url(self) -> str:
+        stream_url = f"{self.base_url}/agent/{self.agent_id}/session/{self.session_id}/instructions/stream"
+        return f"{stream_url}?batch=true" if self.batch_instructions else stream_url
+
     def stream_instructions(
         self,
         instruction_callback: Callable[[dict], None],
@@ -742,7 +997,7 @@ class SSEAgentClient:
             connection_callback: Called when connection events occur (optional)
             error_callback: Called when errors occur (optional)
         """
-        stream_url = f"{self.base_url}/agent/{self.agent_id}/session/{self.session_id}/instructions/stream"
+        stream_url = self._stream_url()
 
         self.logger.info(f"Starting SSE stream for agent {self.agent_id}, session {self.session_id}")
         self._is_running = True
@@ -788,6 +1043,14 @@ class SSEAgentClient:
                             )
                             instruction_callback(data)
 
+                        case "instruction_batch":
+                            instructions = data.get("instructions", [])
+                            self._stats["instructions_received"] += len(instructions)
+                            self._stats["last_instruction_time"] = datetime.now().isoformat()
+                            self.logger.info(f"Instruction batch received: {len(instructions)} instructions")
+                            for instruction in instructions:
+                                instruction_callback(instruction)
+
                         case "error":
                             error_msg = data.get("message", "Unknown error")
                             error = ConnectionError(f"Server error: {error_msg}")
@@ -1043,3 +1306,241 @@ class SSEAgentClient:
         """Stop the SSE stream"""
         self.logger.info("Stopping SSE stream...")
         self._is_running = False
+
+
+class AsyncSSEAgentClient(SSEAgentClient):
+    """
+    Asyncio SSE client for agents that keeps one pooled HTTP connection across reconnects.
+
+    The stream is read with httpx. When it drops, the client reconnects over the same connection pool and
+    sends `Last-Event-ID`, so the backend resends the instructions that may have been missed; instructions
+    already handed over are skipped. Instructions are queued (at most `queue_size`) for a pool of `workers`
+    threads, so a slow instruction callback never holds up reading the stream. Callbacks run concurrently
+    when `workers` is above one. Acknowledgements and heartbeats are inherited from `SSEAgentClient`.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        agent_id: str,
+        session_id: str,
+        timeout: int = 30,
+        max_retries: int = 10,
+        initial_retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+        keycloak_client=None,
+        batch_instructions: bool = False,
+        workers: int = 4,
+        queue_size: int = 100,
+        read_timeout: float = 90.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """
+        Initialize the async SSE client
+
+        Args:
+            workers: Number of threads running the instruction callback
+            queue_size: Maximum number of instructions waiting for a worker before reading pauses
+            read_timeout: Seconds without any data (the backend sends a heartbeat every 30s) before reconnecting
+            transport: Optional httpx transport, e.g. to mount a proxy or a mock
+
+        The other arguments are as for `SSEAgentClient`.
+        """
+        super().__init__(
+            base_url,
+            agent_id,
+            session_id,
+            timeout=timeout,
+            max_retries=max_retries,
+            initial_retry_delay=initial_retry_delay,
+            max_retry_delay=max_retry_delay,
+            keycloak_client=keycloak_client,
+            batch_instructions=batch_instructions,
+        )
+        self.workers = workers
+        self.queue_size = queue_size
+        self.read_timeout = read_timeout
+        self._transport = transport
+        self.last_event_id: str | None = None
+        self._handed_over: deque[str] = deque(maxlen=1000)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    async def _read_events(response: httpx.Response):
+        """Yield (event id or None, data) for each event in an SSE response, skipping comments"""
+        event_id, data = None, []
+        async for line in response.aiter_lines():
+            if not line:
+                if data:
+                    yield event_id, "\n".join(data)
+                event_id, data = None, []
+                continue
+            if line.startswith(":"):
+                continue
+            field, _, value = line.partition(":")
+            value = value.removeprefix(" ")
+            if field == "data":
+                data.append(value)
+            elif field == "id":
+                event_id = value
+
+    async def _hand_over(self, instruction: dict, queue: asyncio.Queue) -> None:
+        instruction_id = instruction.get("instruction_id")
+        if instruction_id in self._handed_over:
+            self.logger.debug(f"Skipping instruction {instruction_id} resent on resume")
+            return
+        self._handed_over.append(instruction_id)
+        self._stats["instructions_received"] += 1
+        self._stats["last_instruction_time"] = datetime.now().isoformat()
+        await queue.put(instruction)
+
+    async def _handle_event(self, data: dict, queue: asyncio.Queue, connection_callback, error_callback) -> None:
+        match data.get("type"):
+            case "connection":
+                self._connection_id = data.get("connection_id")
+                self.logger.info(f"Connected with connection_id: {self._connection_id}")
+                if connection_callback:
+                    connection_callback(data)
+            case "heartbeat":
+                self.logger.debug(f"Heartbeat received at {data.get('timestamp')}")
+            case "instruction":
+                self.logger.info(f"Instruction received: {data.get('instruction_id')} - {data.get('instruction_type')}")
+                await self._hand_over(data, queue)
+            case "instruction_batch":
+                instructions = data.get("instructions", [])
+                self.logger.info(f"Instruction batch received: {len(instructions)} instructions")
+                for instruction in instructions:
+                    await self._hand_over(instruction, queue)
+            case "error":
+                # the backend refuses the stream (unknown or inactive session); reconnecting would not help
+                error_msg = data.get("message", "Unknown error")
+                self.logger.error(f"Server error received: {error_msg}")
+                self._is_running = False
+                if error_callback:
+                    error_callback(ConnectionError(f"Server error: {error_msg}"))
+            case event_type:
+                self.logger.warning(f"Unknown event type: {event_type}")
+
+    async def _stream_once(self, http: httpx.AsyncClient, queue: asyncio.Queue, connection_callback, error_callback):
+        """Read one connection's events until it ends; returns whether the connection was established"""
+        headers = await asyncio.to_thread(self._auth_headers, {"Accept": "text/event-stream"})
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+        self._stats["total_connections"] += 1
+        try:
+            async with http.stream("GET", self._stream_url(), headers=headers) as response:
+                if response.status_code == 401 and self._keycloak_client:
+                    self._keycloak_client.invalidate()
+                response.raise_for_status()
+                self._stats["successful_connections"] += 1
+                self._stats["last_connection_time"] = datetime.now().isoformat()
+                async for event_id, raw in self._read_events(response):
+                    if event_id is not None:
+                        self.last_event_id = event_id
+                    try:
+                        data = json.loads(raw)
+                    except json.JSONDecodeError as e:
+                        self.logger.error(f"Failed to parse SSE data: {e}")
+                        if error_callback:
+                            error_callback(e)
+                        continue
+                    await self._handle_event(data, queue, connection_callback, error_callback)
+                    if not self._is_running:
+                        break
+            return True
+        finally:
+            self._connection_id = None
+
+    async def _run_worker(self, queue: asyncio.Queue, instruction_callback, executor, error_callback) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            instruction = await queue.get()
+            try:
+                await loop.run_in_executor(executor, instruction_callback, instruction)
+            except Exception as e:
+                self.logger.error(f"Instruction callback failed for {instruction.get('instruction_id')}: {e}")
+                if error_callback:
+                    error_callback(e)
+            finally:
+                queue.task_done()
+
+    async def stream_instructions_async(
+        self,
+        instruction_callback: Callable[[dict], None],
+        connection_callback: Callable[[dict], None] | None = None,
+        error_callback: Callable[[Exception], None] | None = None,
+        auto_retry: bool = True,
+    ) -> None:
+        """
+        Stream instructions until `stop` is called, the backend refuses the stream, or retries run out
+
+        Args:
+            instruction_callback: Called from a worker thread for each instruction
+            connection_callback: Called when connection events occur (optional)
+            error_callback: Called when errors occur (optional)
+            auto_retry: Whether to reconnect when the stream drops
+        """
+        self._is_running = True
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=self.queue_size)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"sse-instructions-{self.agent_id}")
+        workers = [
+            asyncio.create_task(self._run_worker(queue, instruction_callback, executor, error_callback))
+            for _ in range(self.workers)
+        ]
+        retry_count = 0
+        try:
+            async with httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, read=self.read_timeout), transport=self._transport
+            ) as http:
+                while self._is_running:
+                    try:
+                        await self._stream_once(http, queue, connection_callback, error_callback)
+                        retry_count = 0
+                    except httpx.HTTPError as e:
+                        self._stats["failed_connections"] += 1
+                        retry_count += 1
+                        self.logger.error(f"SSE connection error (attempt {retry_count}): {e}")
+                        if error_callback:
+                            error_callback(e)
+                    if not auto_retry or not self._is_running:
+                        break
+                    if retry_count > self.max_retries:
+                        self.logger.error("Max retries reached, giving up")
+                        break
+                    delay = self._calculate_backoff_delay(retry_count)
+                    self.logger.info(f"Reconnecting in {delay:.2f} seconds...")
+                    await asyncio.sleep(delay)
+                # let the workers finish the instructions already handed over
+                await queue.join()
+        except asyncio.CancelledError:
+            if self._is_running:
+                raise
+            # cancelled by stop()
+            self._task.uncancel()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            executor.shutdown(wait=False)
+            self._is_running = False
+            self._task = None
+            self.logger.info("SSE stream ended")
+
+    def stream_instructions(
+        self,
+        instruction_callback: Callable[[dict], None],
+        connection_callback: Callable[[dict], None] | None = None,
+        error_callback: Callable[[Exception], None] | None = None,
+    ) -> None:
+        """Stream instructions, blocking the calling thread until the stream ends (see `stream_instructions_async`)"""
+        asyncio.run(self.stream_instructions_async(instruction_callback, connection_callback, error_callback))
+
+    def stop(self):
+        """Stop the SSE stream; safe to call from any thread"""
+        super().stop()
+        task, loop = self._task, self._loop
+        if task is not None and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
@@ -1,33 +1,29 @@
 import asyncio
-import hashlib
-import io
 import itertools
 import json
 import logging
 import os
-import tempfile
 import uuid
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import asyncpg
-import mrcfile
-import tifffile
-from fastapi import Depends, FastAPI, HTTPException, Request, status
-from fastapi.concurrency import run_in_threadpool
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from PIL import Image
-from pydantic import BaseModel
-from sqlalchemy import and_, desc, or_, select, text
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import and_, desc, func, insert, or_, select, text, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
 from sse_starlette.sse import EventSourceResponse
 
 from smartem_backend import mq_publisher as mq_publisher_module
 from smartem_backend.agent_connection_manager import get_connection_manager
+from smartem_backend.agent_logs import copy_agent_logs, parse_log_entries
 from smartem_backend.auth import verify_token
+from smartem_backend.columnar import columnar_response, encode_columns, encode_series, wants_columnar
 from smartem_backend.frontend_stream import (
     query_acquisition_progress,
     query_agent_logs,
@@ -35,13 +31,27 @@ from smartem_backend.frontend_stream import (
     query_instruction_updates,
     query_processing_metrics,
 )
-from smartem_backend.instruction_notify import INSTRUCTION_CHANNEL, notify_instruction_pending
+from smartem_backend.gzip_request import GzipRequestMiddleware
+from smartem_backend.heartbeats import (
+    HEARTBEAT_FLUSH_SECONDS,
+    HeartbeatBuffer,
+    get_heartbeat_buffer,
+    record_heartbeat,
+    set_heartbeat_buffer,
+    touch_connection,
+)
+from smartem_backend.image_cache import get_image_cache
+from smartem_backend.instruction_notify import (
+    InstructionListener,
+    get_instruction_listener,
+    notify_instruction_pending,
+    set_instruction_listener,
+)
 from smartem_backend.model.database import (
     Acquisition,
     AgentConnection,
     AgentInstruction,
     AgentInstructionAcknowledgement,
-    AgentLog,
     AgentSession,
     Atlas,
     AtlasTile,
@@ -65,13 +75,15 @@ from smartem_backend.model.entity_status import (
     MicrographStatus,
 )
 from smartem_backend.model.frontend_sse_event import (
-    AgentLogBatchRequest,
+    AGENT_LOG_NDJSON_MEDIA_TYPE,
     AgentLogBatchResponse,
+    AgentLogEntry,
     FrontendEventType,
 )
 from smartem_backend.model.http_request import (
     AcquisitionCreateRequest,
     AcquisitionUpdateRequest,
+    AgentInstructionAcknowledgementBatchRequest,
     AtlasCreateRequest,
     AtlasTileCreateRequest,
     AtlasTileUpdateRequest,
@@ -98,11 +110,14 @@ from smartem_backend.model.http_request import AgentInstructionAcknowledgement a
 from smartem_backend.model.http_response import (
     AcquisitionGridCountResponse,
     AcquisitionResponse,
+    AgentInstructionAcknowledgementBatchResponse,
     AgentInstructionAcknowledgementResponse,
+    AgentInstructionAcknowledgementResult,
     AtlasResponse,
     AtlasTileGridSquarePositionResponse,
     AtlasTileResponse,
     FoilHoleResponse,
+    GridQualityPredictionTimeSeriesResponse,
     GridResponse,
     GridSquareBatchCreateResponse,
     GridSquareResponse,
@@ -112,6 +127,7 @@ from smartem_backend.model.http_response import (
     QualityMetricsResponse,
     QualityPredictionModelResponse,
     QualityPredictionResponse,
+    QualityPredictionTimeSeries,
 )
 from smartem_backend.mq_publisher import (
     publish_acquisition_created,
@@ -125,9 +141,9 @@ from smartem_backend.mq_publisher import (
     publish_atlas_updated,
     publish_ctf_estimation_completed,
     publish_ctf_estimation_registered,
-    publish_foilhole_created,
     publish_foilhole_deleted,
     publish_foilhole_updated,
+    publish_foilholes_created_batch,
     publish_grid_created,
     publish_grid_deleted,
     publish_grid_registered,
@@ -145,8 +161,10 @@ from smartem_backend.mq_publisher import (
     publish_motion_correction_completed,
     publish_motion_correction_registered,
 )
+from smartem_backend.outbox import OutboxRelay, set_outbox_relay, transactional_publish
 from smartem_backend.rmq import AioPikaPublisher
 from smartem_backend.rmq.config import load_rmq_connection_url, load_rmq_topology
+from smartem_backend.serialisation import json_response
 from smartem_backend.utils import app_config, get_asyncpg_dsn, setup_postgres_async_connection
 from smartem_common._version import __version__
 
@@ -177,6 +195,31 @@ DB_DEPENDENCY = Depends(get_db)
 # Get connection manager instance
 connection_manager = get_connection_manager()
 
+# Rendered atlas / grid square PNGs, bounded on disk and in memory
+image_cache = get_image_cache()
+
+# Column layouts for endpoints that also serve the columnar encoding (see smartem_backend.columnar)
+PREDICTION_COLUMNS = {
+    "id": "int",
+    "prediction_model_name": "str",
+    "value": "float",
+    "timestamp": "datetime",
+    "gridsquare_uuid": "str",
+    "foilhole_uuid": "str",
+}
+LATENT_REPRESENTATION_COLUMNS = {"gridsquare_uuid": "str", "x": "float", "y": "float", "index": "int"}
+# Most prediction points returned by one page of /grids/{uuid}/quality_prediction_time_series
+TIME_SERIES_PAGE_SIZE = 50_000
+
+# The time series is served as one row per (model, metric, square, hole) series plus its points
+PREDICTION_TIME_SERIES_KEY_COLUMNS = {
+    "prediction_model_name": "str",
+    "metric_name": "str",
+    "gridsquare_uuid": "str",
+    "foilhole_uuid": "str",
+}
+PREDICTION_TIME_SERIES_POINT_COLUMNS = {"timestamp": "datetime", "value": "float"}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -192,16 +235,38 @@ async def lifespan(app: FastAPI):
                 exchange_name=exchange_name,
                 routing_key=routing_key,
             )
-            await publisher.connect()
-            mq_publisher_module.set_publisher(publisher)
-            app.state.rmq_publisher = publisher
-            logger.info("aio-pika publisher connected")
         except Exception as e:
-            logger.error(f"Failed to start aio-pika publisher: {e}")
-            app.state.rmq_publisher = None
+            logger.error(f"Failed to configure aio-pika publisher: {e}")
+        if publisher is not None:
+            # Bound even if the broker is down: the outbox relay keeps trying to connect it
+            mq_publisher_module.set_publisher(publisher)
+            try:
+                await publisher.connect()
+                logger.info("aio-pika publisher connected")
+            except Exception as e:
+                logger.error(f"Failed to connect aio-pika publisher, the outbox relay will retry: {e}")
+        app.state.rmq_publisher = publisher
     else:
         app.state.rmq_publisher = None
 
+    instruction_listener: InstructionListener | None = None
+    if os.getenv("SKIP_DB_INIT", "false").lower() != "true":
+        instruction_listener = InstructionListener(get_asyncpg_dsn())
+        await instruction_listener.start()
+        set_instruction_listener(instruction_listener)
+
+    heartbeat_buffer: HeartbeatBuffer | None = None
+    if SessionLocal is not None and HEARTBEAT_FLUSH_SECONDS > 0:
+        heartbeat_buffer = HeartbeatBuffer(SessionLocal, flush_seconds=HEARTBEAT_FLUSH_SECONDS)
+        heartbeat_buffer.start()
+        set_heartbeat_buffer(heartbeat_buffer)
+
+    outbox_relay: OutboxRelay | None = None
+    if SessionLocal is not None and app.state.rmq_publisher is not None:
+        outbox_relay = OutboxRelay(SessionLocal, app.state.rmq_publisher)
+        outbox_relay.start()
+        set_outbox_relay(outbox_relay)
+
     try:
         await connection_manager.start()
         logger.info("Connection manager started successfully")
@@ -217,6 +282,22 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to stop connection manager: {e}")
 
+    if heartbeat_buffer is not None:
+        set_heartbeat_buffer(None)
+        await heartbeat_buffer.stop()
+
+    if outbox_relay is not None:
+        set_outbox_relay(None)
+        await outbox_relay.stop()
+
+    if instruction_listener is not None:
+        try:
+            await instruction_listener.stop()
+            set_instruction_listener(None)
+            logger.info("Instruction listener stopped")
+        except Exception as e:
+            logger.error(f"Failed to stop instruction listener: {e}")
+
     if publisher is not None:
         try:
             await publisher.close()
@@ -252,6 +333,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GzipRequestMiddleware)
 
 
 # Configure logging based on environment variable
@@ -436,17 +518,17 @@ async def create_acquisition(acquisition: AcquisitionCreateRequest, db: AsyncSes
     }
     db_acquisition = Acquisition(**acquisition_data)
     db.add(db_acquisition)
+    with transactional_publish(db):
+        success = await publish_acquisition_created(
+            uuid=db_acquisition.uuid,
+            id=db_acquisition.id,
+            name=db_acquisition.name,
+            status=db_acquisition.status.value,
+            start_time=db_acquisition.start_time,
+            end_time=db_acquisition.end_time,
+            metadata=db_acquisition.metadata,
+        )
     await db.commit()
-
-    success = await publish_acquisition_created(
-        uuid=db_acquisition.uuid,
-        id=db_acquisition.id,
-        name=db_acquisition.name,
-        status=db_acquisition.status.value,
-        start_time=db_acquisition.start_time,
-        end_time=db_acquisition.end_time,
-        metadata=db_acquisition.metadata,
-    )
     if not success:
         logger.error(f"Failed to publish acquisition created event for UUID: {db_acquisition.uuid}")
 
@@ -482,12 +564,12 @@ async def update_acquisition(
     update_data = acquisition.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_acquisition, key, value)
+    with transactional_publish(db):
+        success = await publish_acquisition_updated(
+            uuid=db_acquisition.uuid,
+            id=db_acquisition.id,
+        )
     await db.commit()
-
-    success = await publish_acquisition_updated(
-        uuid=db_acquisition.uuid,
-        id=db_acquisition.id,
-    )
     if not success:
         logger.error(f"Failed to publish acquisition updated event for UUID: {db_acquisition.uuid}")
 
@@ -521,9 +603,9 @@ async def delete_acquisition(acquisition_uuid: str, db: AsyncSession = DB_DEPEND
     if not db_acquisition:
         raise HTTPException(status_code=404, detail="Acquisition not found")
     await db.delete(db_acquisition)
+    with transactional_publish(db):
+        success = await publish_acquisition_deleted(uuid=acquisition_uuid)
     await db.commit()
-
-    success = await publish_acquisition_deleted(uuid=acquisition_uuid)
     if not success:
         logger.error(f"Failed to publish acquisition deleted event for UUID: {acquisition_uuid}")
 
@@ -558,9 +640,9 @@ async def update_grid(grid_uuid: str, grid: GridUpdateRequest, db: AsyncSession
     update_data = grid.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_grid, key, value)
+    with transactional_publish(db):
+        success = await publish_grid_updated(uuid=db_grid.uuid, acquisition_uuid=db_grid.acquisition_uuid)
     await db.commit()
-
-    success = await publish_grid_updated(uuid=db_grid.uuid, acquisition_uuid=db_grid.acquisition_uuid)
     if not success:
         logger.error(f"Failed to publish grid updated event for UUID: {db_grid.uuid}")
 
@@ -586,7 +668,9 @@ async def delete_grid(grid_uuid: str, db: AsyncSession = DB_DEPENDENCY):
     if not db_grid:
         raise HTTPException(status_code=404, detail="Grid not found")
 
-    success = await publish_grid_deleted(uuid=grid_uuid)
+    with transactional_publish(db):
+        success = await publish_grid_deleted(uuid=grid_uuid)
+    await db.commit()
     if not success:
         logger.error(f"Failed to publish grid deleted event for ID: {grid_uuid}")
 
@@ -611,9 +695,9 @@ async def create_acquisition_grid(acquisition_uuid: str, grid: GridCreateRequest
     }
     db_grid = Grid(**grid_data)
     db.add(db_grid)
+    with transactional_publish(db):
+        success = await publish_grid_created(uuid=db_grid.uuid, acquisition_uuid=db_grid.acquisition_uuid)
     await db.commit()
-
-    success = await publish_grid_created(uuid=db_grid.uuid, acquisition_uuid=db_grid.acquisition_uuid)
     if not success:
         logger.error(f"Failed to publish grid created event for UUID: {db_grid.uuid}")
 
@@ -628,9 +712,11 @@ async def create_acquisition_grid(acquisition_uuid: str, grid: GridCreateRequest
 
 
 @app.post("/grids/{grid_uuid}/registered")
-async def grid_registered(grid_uuid: str) -> bool:
+async def grid_registered(grid_uuid: str, db: AsyncSession = DB_DEPENDENCY) -> bool:
     """All squares on a grid have been registered at low mag"""
-    success = await publish_grid_registered(grid_uuid)
+    with transactional_publish(db):
+        success = await publish_grid_registered(grid_uuid)
+    await db.commit()
     if not success:
         logger.error(f"Failed to publish grid created event for UUID: {grid_uuid}")
     return success
@@ -664,9 +750,9 @@ async def update_atlas(atlas_uuid: str, atlas: AtlasUpdateRequest, db: AsyncSess
     update_data = atlas.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_atlas, key, value)
+    with transactional_publish(db):
+        success = await publish_atlas_updated(uuid=db_atlas.uuid, id=db_atlas.atlas_id, grid_uuid=db_atlas.grid_uuid)
     await db.commit()
-
-    success = await publish_atlas_updated(uuid=db_atlas.uuid, id=db_atlas.atlas_id, grid_uuid=db_atlas.grid_uuid)
     if not success:
         logger.error(f"Failed to publish atlas updated event for UUID: {db_atlas.uuid}")
 
@@ -691,7 +777,9 @@ async def delete_atlas(atlas_uuid: str, db: AsyncSession = DB_DEPENDENCY):
     if not db_atlas:
         raise HTTPException(status_code=404, detail="Atlas not found")
 
-    success = await publish_atlas_deleted(uuid=atlas_uuid)
+    with transactional_publish(db):
+        success = await publish_atlas_deleted(uuid=atlas_uuid)
+    await db.commit()
     if not success:
         logger.error(f"Failed to publish atlas deleted event for ID: {atlas_uuid}")
 
@@ -720,10 +808,10 @@ async def create_grid_atlas(grid_uuid: str, atlas: AtlasCreateRequest, db: Async
     atlas_dict["grid_uuid"] = grid_uuid
     db_atlas = Atlas(**atlas_dict)
     db.add(db_atlas)
+    with transactional_publish(db):
+        success = await publish_atlas_created(uuid=db_atlas.uuid, id=db_atlas.atlas_id, grid_uuid=db_atlas.grid_uuid)
     await db.commit()
     db_atlas, tiles_data = db_atlas, tiles_data_local
-
-    success = await publish_atlas_created(uuid=db_atlas.uuid, id=db_atlas.atlas_id, grid_uuid=db_atlas.grid_uuid)
     if not success:
         logger.error(f"Failed to publish atlas created event for UUID: {db_atlas.uuid}")
 
@@ -732,11 +820,11 @@ async def create_grid_atlas(grid_uuid: str, atlas: AtlasCreateRequest, db: Async
             tile_data["atlas_uuid"] = db_atlas.uuid
             db_tile = AtlasTile(**tile_data)
             db.add(db_tile)
+            with transactional_publish(db):
+                tile_success = await publish_atlas_tile_created(
+                    uuid=db_tile.uuid, id=db_tile.tile_id, atlas_uuid=db_tile.atlas_uuid
+                )
             await db.commit()
-
-            tile_success = await publish_atlas_tile_created(
-                uuid=db_tile.uuid, id=db_tile.tile_id, atlas_uuid=db_tile.atlas_uuid
-            )
             if not tile_success:
                 logger.error(f"Failed to publish atlas tile created event for UUID: {db_tile.uuid}")
 
@@ -781,9 +869,9 @@ async def update_atlas_tile(tile_uuid: str, tile: AtlasTileUpdateRequest, db: As
     update_data = tile.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_tile, key, value)
+    with transactional_publish(db):
+        success = await publish_atlas_tile_updated(uuid=db_tile.uuid, id=db_tile.tile_id, atlas_uuid=db_tile.atlas_uuid)
     await db.commit()
-
-    success = await publish_atlas_tile_updated(uuid=db_tile.uuid, id=db_tile.tile_id, atlas_uuid=db_tile.atlas_uuid)
     if not success:
         logger.error(f"Failed to publish atlas tile updated event for UUID: {db_tile.uuid}")
 
@@ -810,7 +898,9 @@ async def delete_atlas_tile(tile_uuid: str, db: AsyncSession = DB_DEPENDENCY):
     if not db_tile:
         raise HTTPException(status_code=404, detail="Atlas tile not found")
 
-    success = await publish_atlas_tile_deleted(uuid=tile_uuid)
+    with transactional_publish(db):
+        success = await publish_atlas_tile_deleted(uuid=tile_uuid)
+    await db.commit()
     if not success:
         logger.error(f"Failed to publish atlas tile deleted event for ID: {tile_uuid}")
 
@@ -831,9 +921,9 @@ async def create_atlas_tile_for_atlas(atlas_uuid: str, tile: AtlasTileCreateRequ
     tile_data["atlas_uuid"] = atlas_uuid
     db_tile = AtlasTile(**tile_data)
     db.add(db_tile)
+    with transactional_publish(db):
+        success = await publish_atlas_tile_created(uuid=db_tile.uuid, id=db_tile.tile_id, atlas_uuid=db_tile.atlas_uuid)
     await db.commit()
-
-    success = await publish_atlas_tile_created(uuid=db_tile.uuid, id=db_tile.tile_id, atlas_uuid=db_tile.atlas_uuid)
     if not success:
         logger.error(f"Failed to publish atlas tile created event for UUID: {db_tile.uuid}")
 
@@ -947,19 +1037,25 @@ async def update_gridsquare(
     update_data = gridsquare.model_dump(exclude_unset=True)
     if update_data.get("status", GridSquareStatus.NONE) == GridSquareStatus.NONE:
         update_data["status"] = db_gridsquare.status
+    new_image_path = update_data.get("image_path")
+    if new_image_path == db_gridsquare.image_path:
+        new_image_path = None
     for key, value in update_data.items():
         if hasattr(db_gridsquare, key):
             setattr(db_gridsquare, key, value)
+    with transactional_publish(db):
+        if gridsquare.lowmag:
+            success = await publish_gridsquare_lowmag_updated(
+                uuid=db_gridsquare.uuid, grid_uuid=db_gridsquare.grid_uuid, gridsquare_id=db_gridsquare.gridsquare_id
+            )
+        else:
+            success = await publish_gridsquare_updated(
+                uuid=db_gridsquare.uuid,
+                grid_uuid=db_gridsquare.grid_uuid,
+                gridsquare_id=db_gridsquare.gridsquare_id,
+                image_path=new_image_path,
+            )
     await db.commit()
-
-    if gridsquare.lowmag:
-        success = await publish_gridsquare_lowmag_updated(
-            uuid=db_gridsquare.uuid, grid_uuid=db_gridsquare.grid_uuid, gridsquare_id=db_gridsquare.gridsquare_id
-        )
-    else:
-        success = await publish_gridsquare_updated(
-            uuid=db_gridsquare.uuid, grid_uuid=db_gridsquare.grid_uuid, gridsquare_id=db_gridsquare.gridsquare_id
-        )
     if not success:
         logger.error(f"Failed to publish gridsquare updated event for UUID: {db_gridsquare.uuid}")
 
@@ -1003,7 +1099,9 @@ async def delete_gridsquare(gridsquare_uuid: str, db: AsyncSession = DB_DEPENDEN
     if not db_gridsquare:
         raise HTTPException(status_code=404, detail="Grid Square not found")
 
-    success = await publish_gridsquare_deleted(uuid=gridsquare_uuid)
+    with transactional_publish(db):
+        success = await publish_gridsquare_deleted(uuid=gridsquare_uuid)
+    await db.commit()
     if not success:
         logger.error(f"Failed to publish grid square deleted event for ID: {gridsquare_uuid}")
 
@@ -1013,7 +1111,8 @@ async def delete_gridsquare(gridsquare_uuid: str, db: AsyncSession = DB_DEPENDEN
 @app.get("/grids/{grid_uuid}/gridsquares", response_model=list[GridSquareResponse])
 async def get_grid_gridsquares(grid_uuid: str, db: AsyncSession = DB_DEPENDENCY):
     """Get all grid squares for a specific grid"""
-    return (await db.execute(select(GridSquare).where(GridSquare.grid_uuid == grid_uuid))).scalars().all()
+    gridsquares = (await db.execute(select(GridSquare).where(GridSquare.grid_uuid == grid_uuid))).scalars().all()
+    return json_response(list[GridSquareResponse], gridsquares, from_attributes=True)
 
 
 @app.post("/grids/{grid_uuid}/gridsquares", response_model=GridSquareResponse, status_code=status.HTTP_201_CREATED)
@@ -1028,16 +1127,16 @@ async def create_grid_gridsquare(grid_uuid: str, gridsquare: GridSquareCreateReq
     }
     db_gridsquare = GridSquare(**gridsquare_data)
     db.add(db_gridsquare)
+    with transactional_publish(db):
+        if gridsquare.lowmag:
+            success = await publish_gridsquare_lowmag_created(
+                uuid=db_gridsquare.uuid, grid_uuid=db_gridsquare.grid_uuid, gridsquare_id=db_gridsquare.gridsquare_id
+            )
+        else:
+            success = await publish_gridsquare_created(
+                uuid=db_gridsquare.uuid, grid_uuid=db_gridsquare.grid_uuid, gridsquare_id=db_gridsquare.gridsquare_id
+            )
     await db.commit()
-
-    if gridsquare.lowmag:
-        success = await publish_gridsquare_lowmag_created(
-            uuid=db_gridsquare.uuid, grid_uuid=db_gridsquare.grid_uuid, gridsquare_id=db_gridsquare.gridsquare_id
-        )
-    else:
-        success = await publish_gridsquare_created(
-            uuid=db_gridsquare.uuid, grid_uuid=db_gridsquare.grid_uuid, gridsquare_id=db_gridsquare.gridsquare_id
-        )
     if not success:
         logger.error(f"Failed to publish gridsquare created event for UUID: {db_gridsquare.uuid}")
 
@@ -1078,43 +1177,27 @@ async def create_grid_gridsquares_batch(
 
     if not (await db.execute(select(Grid).where(Grid.uuid == grid_uuid))).scalars().first():
         raise HTTPException(status_code=404, detail="Grid not found")
-    db_gridsquares = [
-        GridSquare(
-            **{
-                "uuid": gs.uuid,
-                "grid_uuid": grid_uuid,
-                "status": GridSquareStatus.NONE,
-                **gs.model_dump(),
-            }
-        )
-        for gs in items
-    ]
+    rows = []
+    for gs in items:
+        row = {"uuid": gs.uuid, "grid_uuid": grid_uuid, **gs.model_dump()}
+        if row["status"] is None:
+            row["status"] = GridSquareStatus.NONE
+        rows.append(row)
+    db_gridsquares = [GridSquare(**row) for row in rows]
     db.add_all(db_gridsquares)
+    publish_entries = [(gs.uuid, grid_uuid, gs.gridsquare_id, gs.lowmag) for gs in items]
+    with transactional_publish(db):
+        success = await publish_gridsquares_created_batch(publish_entries)
     try:
         await db.commit()
     except IntegrityError as e:
         await db.rollback()
         logger.error(f"Integrity error inserting gridsquare batch for grid {grid_uuid}: {e}")
         raise HTTPException(status_code=409, detail="gridsquare batch conflicts with existing data") from None
-
-    publish_entries = [(gs.uuid, grid_uuid, gs.gridsquare_id, gs.lowmag) for gs in items]
-    success = await publish_gridsquares_created_batch(publish_entries)
     if not success:
         logger.error(f"Failed to publish gridsquare batch created events for grid {grid_uuid} ({len(items)} items)")
 
-    responses: list[GridSquareResponse] = []
-    for gs in items:
-        response_data = {
-            "uuid": gs.uuid,
-            "grid_uuid": grid_uuid,
-            "status": GridSquareStatus.NONE,
-            **gs.model_dump(),
-        }
-        if "status" not in response_data or response_data["status"] is None:
-            response_data["status"] = GridSquareStatus.NONE
-        responses.append(GridSquareResponse(**response_data))
-
-    return GridSquareBatchCreateResponse(gridsquares=responses)
+    return json_response(GridSquareBatchCreateResponse, {"gridsquares": rows}, status_code=status.HTTP_201_CREATED)
 
 
 @app.post("/gridsquares/{gridsquare_uuid}/registered")
@@ -1128,9 +1211,9 @@ async def gridsquare_registered(
         raise HTTPException(status_code=404, detail="Grid Square not found")
     db_gridsquare.status = GridSquareStatus.REGISTERED
     db.add(db_gridsquare)
+    with transactional_publish(db):
+        success = await publish_gridsquare_registered(gridsquare_uuid, count=count)
     await db.commit()
-
-    success = await publish_gridsquare_registered(gridsquare_uuid, count=count)
     if not success:
         logger.error(f"Failed to publish grid square created event for UUID: {gridsquare_uuid}")
     return success
@@ -1164,14 +1247,14 @@ async def update_foilhole(foilhole_uuid: str, foilhole: FoilHoleUpdateRequest, d
     update_data = foilhole.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_foilhole, key, value)
+    with transactional_publish(db):
+        success = await publish_foilhole_updated(
+            uuid=db_foilhole.uuid,
+            foilhole_id=db_foilhole.foilhole_id,
+            gridsquare_uuid=db_foilhole.gridsquare_uuid,
+            gridsquare_id=db_foilhole.gridsquare_id,
+        )
     await db.commit()
-
-    success = await publish_foilhole_updated(
-        uuid=db_foilhole.uuid,
-        foilhole_id=db_foilhole.foilhole_id,
-        gridsquare_uuid=db_foilhole.gridsquare_uuid,
-        gridsquare_id=db_foilhole.gridsquare_id,
-    )
     if not success:
         logger.error(f"Failed to publish foilhole updated event for UUID: {db_foilhole.uuid}")
 
@@ -1206,7 +1289,9 @@ async def delete_foilhole(foilhole_uuid: str, db: AsyncSession = DB_DEPENDENCY):
     if not db_foilhole:
         raise HTTPException(status_code=404, detail="Foil Hole not found")
 
-    success = await publish_foilhole_deleted(uuid=foilhole_uuid)
+    with transactional_publish(db):
+        success = await publish_foilhole_deleted(uuid=foilhole_uuid)
+    await db.commit()
     if not success:
         logger.error(f"Failed to publish foil hole deleted event for ID: {foilhole_uuid}")
 
@@ -1219,14 +1304,11 @@ async def get_gridsquare_foilholes(
 ):
     """Get all foil holes for a specific grid square"""
 
+    query = select(FoilHole).where(FoilHole.gridsquare_uuid == gridsquare_uuid)
     if on_square_only:
-        result = await db.execute(
-            select(FoilHole)
-            .where(FoilHole.gridsquare_uuid == gridsquare_uuid)
-            .where(FoilHole.is_near_grid_bar == False)  # noqa: E712
-        )
-        return result.scalars().all()
-    return (await db.execute(select(FoilHole).where(FoilHole.gridsquare_uuid == gridsquare_uuid))).scalars().all()
+        query = query.where(FoilHole.is_near_grid_bar == False)  # noqa: E712
+    foilholes = (await db.execute(query)).scalars().all()
+    return json_response(list[FoilHoleResponse], foilholes, from_attributes=True)
 
 
 @app.post(
@@ -1239,37 +1321,25 @@ async def create_gridsquare_foilhole(
 ):
     """Create a new foil hole for a specific grid square"""
 
-    added_holes = []
+    rows = []
     for foilhole in foilholes:
-        foilhole_data = {"gridsquare_uuid": gridsquare_uuid, "status": FoilHoleStatus.NONE, **foilhole.model_dump()}
-        db_foilhole = FoilHole(**foilhole_data)
-        db.add(db_foilhole)
-        added_holes.append(FoilHole(**foilhole_data))
-    await db.commit()
-
-    response = []
-    for foilhole in added_holes:
-        success = await publish_foilhole_created(
-            uuid=foilhole.uuid,
-            foilhole_id=foilhole.foilhole_id,
-            gridsquare_uuid=foilhole.gridsquare_uuid,
-            gridsquare_id=foilhole.gridsquare_id,
-        )
+        row = {"gridsquare_uuid": gridsquare_uuid, **foilhole.model_dump()}
+        if row["status"] is None:
+            row["status"] = FoilHoleStatus.NONE
+        rows.append(row)
+    db.add_all([FoilHole(**row) for row in rows])
+
+    # A created event per hole, plus one batch event per parent square that seeds predictions for all its holes
+    if rows:
+        with transactional_publish(db):
+            success = await publish_foilholes_created_batch(
+                [(row["uuid"], row["foilhole_id"], row["gridsquare_uuid"], row["gridsquare_id"]) for row in rows]
+            )
         if not success:
-            logger.error(f"Failed to publish foilhole created event for UUID: {foilhole.uuid}")
-
-        data = {
-            "gridsquare_uuid": gridsquare_uuid,
-            "status": FoilHoleStatus.NONE.value,
-            **foilhole.model_dump(),
-        }
-
-        if "status" not in data or data["status"] is None:
-            data["status"] = FoilHoleStatus.NONE.value
-
-        response.append(FoilHoleResponse(**data))
+            logger.error(f"Failed to publish foilhole created events for {len(rows)} holes on {gridsquare_uuid}")
+    await db.commit()
 
-    return response
+    return json_response(list[FoilHoleResponse], rows, status_code=status.HTTP_201_CREATED)
 
 
 # ============ Micrograph CRUD Operations ============
@@ -1302,14 +1372,14 @@ async def update_micrograph(
     update_data = micrograph.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_micrograph, key, value)
+    with transactional_publish(db):
+        success = await publish_micrograph_updated(
+            uuid=db_micrograph.uuid,
+            foilhole_uuid=db_micrograph.foilhole_uuid,
+            foilhole_id=db_micrograph.foilhole_id,
+            micrograph_id=db_micrograph.micrograph_id,
+        )
     await db.commit()
-
-    success = await publish_micrograph_updated(
-        uuid=db_micrograph.uuid,
-        foilhole_uuid=db_micrograph.foilhole_uuid,
-        foilhole_id=db_micrograph.foilhole_id,
-        micrograph_id=db_micrograph.micrograph_id,
-    )
     if not success:
         logger.error(f"Failed to publish micrograph updated event for UUID: {db_micrograph.uuid}")
 
@@ -1352,7 +1422,9 @@ async def delete_micrograph(micrograph_uuid: str, db: AsyncSession = DB_DEPENDEN
     if not db_micrograph:
         raise HTTPException(status_code=404, detail="Micrograph not found")
 
-    success = await publish_micrograph_deleted(uuid=micrograph_uuid)
+    with transactional_publish(db):
+        success = await publish_micrograph_deleted(uuid=micrograph_uuid)
+    await db.commit()
     if not success:
         logger.error(f"Failed to publish micrograph deleted event for ID: {micrograph_uuid}")
 
@@ -1365,13 +1437,6 @@ async def _require_micrograph(micrograph_uuid: str, db: AsyncSession) -> None:
         raise HTTPException(status_code=404, detail="Micrograph not found")
 
 
-def _publish_or_502(success: bool, event_name: str, micrograph_uuid: str) -> ProcessingFeedbackPublishResponse:
-    if not success:
-        logger.error(f"Failed to publish {event_name} event for micrograph UUID: {micrograph_uuid}")
-        raise HTTPException(status_code=502, detail=f"Failed to publish {event_name} event to message queue")
-    return ProcessingFeedbackPublishResponse(published=True)
-
-
 @app.post(
     "/micrographs/{micrograph_uuid}/motion_correction/completed",
     response_model=ProcessingFeedbackPublishResponse,
@@ -1384,12 +1449,14 @@ async def publish_micrograph_motion_correction_completed(
 ):
     """Publish a motion-correction-completed event for a micrograph to RabbitMQ."""
     await _require_micrograph(micrograph_uuid, db)
-    success = await publish_motion_correction_completed(
-        micrograph_uuid=micrograph_uuid,
-        total_motion=payload.total_motion,
-        average_motion=payload.average_motion,
-    )
-    return _publish_or_502(success, "motion_correction_completed", micrograph_uuid)
+    with transactional_publish(db):
+        await publish_motion_correction_completed(
+            micrograph_uuid=micrograph_uuid,
+            total_motion=payload.total_motion,
+            average_motion=payload.average_motion,
+        )
+    await db.commit()
+    return ProcessingFeedbackPublishResponse(published=True)
 
 
 @app.post(
@@ -1404,12 +1471,14 @@ async def publish_micrograph_motion_correction_registered(
 ):
     """Publish a motion-correction-registered event for a micrograph to RabbitMQ."""
     await _require_micrograph(micrograph_uuid, db)
-    success = await publish_motion_correction_registered(
-        micrograph_uuid=micrograph_uuid,
-        quality=payload.quality,
-        metric_name=payload.metric_name,
-    )
-    return _publish_or_502(success, "motion_correction_registered", micrograph_uuid)
+    with transactional_publish(db):
+        await publish_motion_correction_registered(
+            micrograph_uuid=micrograph_uuid,
+            quality=payload.quality,
+            metric_name=payload.metric_name,
+        )
+    await db.commit()
+    return ProcessingFeedbackPublishResponse(published=True)
 
 
 @app.post(
@@ -1424,11 +1493,13 @@ async def publish_micrograph_ctf_estimation_completed(
 ):
     """Publish a CTF-estimation-completed event for a micrograph to RabbitMQ."""
     await _require_micrograph(micrograph_uuid, db)
-    success = await publish_ctf_estimation_completed(
-        micrograph_uuid=micrograph_uuid,
-        ctf_max_res=payload.ctf_max_res,
-    )
-    return _publish_or_502(success, "ctf_estimation_completed", micrograph_uuid)
+    with transactional_publish(db):
+        await publish_ctf_estimation_completed(
+            micrograph_uuid=micrograph_uuid,
+            ctf_max_res=payload.ctf_max_res,
+        )
+    await db.commit()
+    return ProcessingFeedbackPublishResponse(published=True)
 
 
 @app.post(
@@ -1443,12 +1514,14 @@ async def publish_micrograph_ctf_estimation_registered(
 ):
     """Publish a CTF-estimation-registered event for a micrograph to RabbitMQ."""
     await _require_micrograph(micrograph_uuid, db)
-    success = await publish_ctf_estimation_registered(
-        micrograph_uuid=micrograph_uuid,
-        quality=payload.quality,
-        metric_name=payload.metric_name,
-    )
-    return _publish_or_502(success, "ctf_estimation_registered", micrograph_uuid)
+    with transactional_publish(db):
+        await publish_ctf_estimation_registered(
+            micrograph_uuid=micrograph_uuid,
+            quality=payload.quality,
+            metric_name=payload.metric_name,
+        )
+    await db.commit()
+    return ProcessingFeedbackPublishResponse(published=True)
 
 
 @app.get("/foilholes/{foilhole_uuid}/micrographs", response_model=list[MicrographResponse])
@@ -1473,14 +1546,14 @@ async def create_foilhole_micrograph(
     }
     db_micrograph = Micrograph(**micrograph_data)
     db.add(db_micrograph)
+    with transactional_publish(db):
+        success = await publish_micrograph_created(
+            uuid=db_micrograph.uuid,
+            foilhole_uuid=db_micrograph.foilhole_uuid,
+            foilhole_id=db_micrograph.foilhole_id,
+            micrograph_id=db_micrograph.micrograph_id,
+        )
     await db.commit()
-
-    success = await publish_micrograph_created(
-        uuid=db_micrograph.uuid,
-        foilhole_uuid=db_micrograph.foilhole_uuid,
-        foilhole_id=db_micrograph.foilhole_id,
-        micrograph_id=db_micrograph.micrograph_id,
-    )
     if not success:
         logger.error(f"Failed to publish micrograph created event for UUID: {db_micrograph.uuid}")
 
@@ -1592,7 +1665,15 @@ async def create_quality_prediction(request: QualityPredictionCreateRequest, db:
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Prediction model {request.prediction_model_name} not found",
         )
-    prediction = QualityPrediction(**request.model_dump())
+    if request.gridsquare_uuid:
+        grid_uuid = gridsquare.grid_uuid
+    elif request.foilhole_uuid:
+        grid_uuid = (
+            await db.execute(select(GridSquare.grid_uuid).where(GridSquare.uuid == foilhole.gridsquare_uuid))
+        ).scalar()
+    else:
+        grid_uuid = None
+    prediction = QualityPrediction(**request.model_dump(), grid_uuid=grid_uuid)
     db.add(prediction)
     await db.commit()
     return QualityPredictionResponse.model_validate(prediction)
@@ -1622,81 +1703,183 @@ async def get_quality_metrics(db: AsyncSession = DB_DEPENDENCY):
 _SSE_HEARTBEAT_INTERVAL_SECONDS = 30
 
 
-async def _drain_pending_instructions(db: AsyncSession, agent_id: str, session_id: str):
-    """Yield SSE events for any pending+unexpired instructions, marking each as sent.
+def _instruction_event_data(instruction: AgentInstruction, agent_id: str, session_id: str) -> dict:
+    return {
+        "type": "instruction",
+        "instruction_id": instruction.instruction_id,
+        "agent_id": agent_id,
+        "session_id": session_id,
+        "instruction_type": instruction.instruction_type,
+        "payload": instruction.payload,
+        "sequence_number": instruction.sequence_number,
+        "priority": instruction.priority,
+        "created_at": instruction.created_at.isoformat(),
+        "expires_at": instruction.expires_at.isoformat() if instruction.expires_at else None,
+        "metadata": instruction.instruction_metadata,
+    }
+
+
+async def _claim_pending_instructions(db: AsyncSession, session_id: str) -> list[AgentInstruction]:
+    """Mark every pending, unexpired instruction for the session as sent in one statement and commit
 
-    A single transaction per dispatched instruction (status -> sent + sent_at).
+    The rows are locked with `SKIP LOCKED`, so two streams for the same session never claim the same
+    instruction. Returns the claimed instructions in dispatch order.
     """
-    pending = (
+    now = datetime.now()
+    deliverable = (
+        select(AgentInstruction.instruction_id)
+        .where(
+            AgentInstruction.session_id == session_id,
+            AgentInstruction.status == "pending",
+            or_(AgentInstruction.expires_at.is_(None), AgentInstruction.expires_at > now),
+        )
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    claimed = (
+        update(AgentInstruction)
+        .where(AgentInstruction.instruction_id.in_(deliverable))
+        .values(status="sent", sent_at=now)
+        .returning(*AgentInstruction.__table__.c)
+        .cte("claimed")
+    )
+    claimed_instruction = aliased(AgentInstruction, claimed)
+    instructions = (
         (
             await db.execute(
-                select(AgentInstruction)
-                .where(
-                    and_(
-                        AgentInstruction.session_id == session_id,
-                        AgentInstruction.status == "pending",
-                        or_(
-                            AgentInstruction.expires_at.is_(None),
-                            AgentInstruction.expires_at > datetime.now(),
-                        ),
-                    )
-                )
-                .order_by(
-                    AgentInstruction.priority.desc(),
-                    AgentInstruction.sequence_number.asc(),
-                    AgentInstruction.created_at.asc(),
+                select(claimed_instruction).order_by(
+                    claimed_instruction.priority.desc(),
+                    claimed_instruction.sequence_number.asc(),
+                    claimed_instruction.created_at.asc(),
                 )
             )
         )
         .scalars()
         .all()
     )
+    await db.commit()
+    return instructions
 
-    for instruction in pending:
-        if instruction.status == "pending":
-            instruction.status = "sent"
-            instruction.sent_at = datetime.now()
-            await db.commit()
 
+def _instruction_events(instructions: list[AgentInstruction], agent_id: str, session_id: str, batch: bool):
+    """SSE events delivering `instructions`, each carrying the id of its (last) instruction for Last-Event-ID"""
+    if not instructions:
+        return
+    if batch:
         yield {
-            "event": "instruction",
+            "event": "instruction_batch",
+            "id": instructions[-1].instruction_id,
             "data": json.dumps(
                 {
-                    "type": "instruction",
-                    "instruction_id": instruction.instruction_id,
-                    "agent_id": agent_id,
-                    "session_id": session_id,
-                    "instruction_type": instruction.instruction_type,
-                    "payload": instruction.payload,
-                    "sequence_number": instruction.sequence_number,
-                    "priority": instruction.priority,
-                    "created_at": instruction.created_at.isoformat(),
-                    "expires_at": instruction.expires_at.isoformat() if instruction.expires_at else None,
-                    "metadata": instruction.instruction_metadata,
+                    "type": "instruction_batch",
+                    "instructions": [_instruction_event_data(i, agent_id, session_id) for i in instructions],
                 }
             ),
         }
+        logger.info(f"Sent {len(instructions)} instructions to agent {agent_id} in one batch")
+        return
+
+    for instruction in instructions:
+        yield {
+            "event": "instruction",
+            "id": instruction.instruction_id,
+            "data": json.dumps(_instruction_event_data(instruction, agent_id, session_id)),
+        }
         logger.info(f"Sent instruction {instruction.instruction_id} to agent {agent_id}")
 
 
+async def _requeue_instructions(db: AsyncSession, instruction_ids: list[str]) -> None:
+    """Return claimed instructions that were never delivered to pending, so the next stream sends them"""
+    await db.execute(
+        update(AgentInstruction)
+        .where(AgentInstruction.instruction_id.in_(instruction_ids), AgentInstruction.status == "sent")
+        .values(status="pending", sent_at=None)
+    )
+    await db.commit()
+
+
+async def _drain_pending_instructions(db: AsyncSession, agent_id: str, session_id: str, batch: bool = False):
+    """Yield SSE events for any pending+unexpired instructions, marking them as sent.
+
+    All deliverable instructions are claimed in a single transaction. With `batch` they are delivered as
+    one `instruction_batch` event rather than one `instruction` event each. An event counts as delivered
+    once the stream asks for the next one; if the generator is closed first, the instructions not yet
+    delivered are put back to pending. Callers should close it with `aclosing` so this happens promptly.
+    """
+    instructions = await _claim_pending_instructions(db, session_id)
+    delivered = 0
+    try:
+        for event in _instruction_events(instructions, agent_id, session_id, batch):
+            yield event
+            delivered = len(instructions) if batch else delivered + 1
+    finally:
+        if delivered < len(instructions):
+            undelivered = [instruction.instruction_id for instruction in instructions[delivered:]]
+            try:
+                await _requeue_instructions(db, undelivered)
+                logger.info(f"Requeued {len(undelivered)} undelivered instructions for session {session_id}")
+            except Exception as e:
+                logger.error(f"Failed to requeue undelivered instructions for session {session_id}: {e}")
+
+
+async def _unacknowledged_since(db: AsyncSession, session_id: str, last_event_id: str) -> list[AgentInstruction]:
+    """Instructions sent to the session but not acknowledged, from the claim that included `last_event_id` on
+
+    A stream that dropped may have lost the events after `last_event_id`. Those instructions were claimed
+    together with it or later, so everything still unacknowledged from that claim on is sent again; the
+    client skips the ones it already has. An unknown `last_event_id` resends every unacknowledged instruction.
+    """
+    last_sent = aliased(AgentInstruction)
+    anchor = (
+        select(last_sent.sent_at)
+        .where(last_sent.instruction_id == last_event_id, last_sent.session_id == session_id)
+        .scalar_subquery()
+    )
+    return (
+        (
+            await db.execute(
+                select(AgentInstruction)
+                .where(
+                    AgentInstruction.session_id == session_id,
+                    AgentInstruction.status == "sent",
+                    or_(anchor.is_(None), AgentInstruction.sent_at >= anchor),
+                )
+                .order_by(
+                    AgentInstruction.sent_at.asc(),
+                    AgentInstruction.priority.desc(),
+                    AgentInstruction.sequence_number.asc(),
+                    AgentInstruction.created_at.asc(),
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+
 @app.get("/agent/{agent_id}/session/{session_id}/instructions/stream")
-async def stream_instructions(agent_id: str, session_id: str, db: AsyncSession = DB_DEPENDENCY) -> EventSourceResponse:
+async def stream_instructions(
+    agent_id: str,
+    session_id: str,
+    batch: bool = False,
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+    db: AsyncSession = DB_DEPENDENCY,
+) -> EventSourceResponse:
     """SSE endpoint for streaming instructions to agents for a specific session.
 
     Uses PostgreSQL LISTEN/NOTIFY (channel `agent_instructions`, payload = session_id)
-    instead of polling: a dedicated asyncpg connection holds a LISTEN, the main loop
-    awaits the next notification or a heartbeat timeout, and only queries the
-    database when a notification arrives or on initial connect.
+    instead of polling: the stream subscribes to the process-wide instruction listener,
+    the main loop awaits the next notification for its session or a heartbeat timeout,
+    and only queries the database when woken or on initial connect. With `batch=true`
+    the instructions claimed together are sent as a single `instruction_batch` event.
+    Instruction events carry the instruction id as their SSE id; a client reconnecting
+    with `Last-Event-ID` first gets the instructions it may have missed sent again.
     """
 
     async def event_generator():
         connection_id = str(uuid.uuid4())
-        listen_conn: asyncpg.Connection | None = None
-        notif_queue: asyncio.Queue[str] = asyncio.Queue()
-
-        def _on_notify(_conn, _pid, _channel, payload: str) -> None:
-            if payload == session_id:
-                notif_queue.put_nowait(payload)
+        listener = get_instruction_listener()
+        notif_queue: asyncio.Queue[None] | None = None
 
         try:
             try:
@@ -1760,14 +1943,11 @@ async def stream_instructions(agent_id: str, session_id: str, db: AsyncSession =
                 ),
             }
 
-            # Open the dedicated LISTEN connection BEFORE the initial drain so
-            # any instruction created concurrently with the SELECT shows up as
-            # a queued notification we'll process on the next loop iteration.
-            try:
-                listen_conn = await asyncpg.connect(get_asyncpg_dsn())
-                await listen_conn.add_listener(INSTRUCTION_CHANNEL, _on_notify)
-            except Exception as e:
-                logger.error(f"Failed to set up LISTEN for session {session_id}: {e}")
+            # Subscribe BEFORE the initial drain so any instruction created
+            # concurrently with the SELECT shows up as a queued notification
+            # we'll process on the next loop iteration.
+            if listener is None:
+                logger.error(f"No instruction listener running for session {session_id}")
                 yield {
                     "event": "error",
                     "data": json.dumps(
@@ -1775,9 +1955,17 @@ async def stream_instructions(agent_id: str, session_id: str, db: AsyncSession =
                     ),
                 }
                 return
+            notif_queue = listener.subscribe(session_id)
+
+            if last_event_id:
+                missed = await _unacknowledged_since(db, session_id, last_event_id)
+                logger.info(f"Resuming session {session_id} after {last_event_id}: resending {len(missed)}")
+                for event in _instruction_events(missed, agent_id, session_id, batch):
+                    yield event
 
-            async for event in _drain_pending_instructions(db, agent_id, session_id):
-                yield event
+            async with aclosing(_drain_pending_instructions(db, agent_id, session_id, batch)) as events:
+                async for event in events:
+                    yield event
 
             session.last_activity_at = datetime.now()
             await db.commit()
@@ -1785,28 +1973,16 @@ async def stream_instructions(agent_id: str, session_id: str, db: AsyncSession =
             while True:
                 try:
                     await asyncio.wait_for(notif_queue.get(), timeout=_SSE_HEARTBEAT_INTERVAL_SECONDS)
-                    while not notif_queue.empty():
-                        notif_queue.get_nowait()
                     try:
-                        async for event in _drain_pending_instructions(db, agent_id, session_id):
-                            yield event
+                        async with aclosing(_drain_pending_instructions(db, agent_id, session_id, batch)) as events:
+                            async for event in events:
+                                yield event
                     except Exception as e:
                         logger.error(f"Error processing instructions for session {session_id}: {e}")
                     session.last_activity_at = datetime.now()
                     await db.commit()
                 except TimeoutError:
-                    connection_obj = (
-                        (
-                            await db.execute(
-                                select(AgentConnection).where(AgentConnection.connection_id == connection_id)
-                            )
-                        )
-                        .scalars()
-                        .first()
-                    )
-                    if connection_obj and connection_obj.status == "active":
-                        connection_obj.last_heartbeat_at = datetime.now()
-                        await db.commit()
+                    await touch_connection(db, connection_id, datetime.now())
                     yield {
                         "event": "heartbeat",
                         "data": json.dumps(
@@ -1847,19 +2023,52 @@ async def stream_instructions(agent_id: str, session_id: str, db: AsyncSession =
                 logger.info(f"Closed connection {connection_id} with reason: error: {str(e)}")
             raise
         finally:
-            if listen_conn is not None:
-                try:
-                    await listen_conn.remove_listener(INSTRUCTION_CHANNEL, _on_notify)
-                except Exception as e:
-                    logger.warning(f"Failed to remove LISTEN listener for session {session_id}: {e}")
-                try:
-                    await listen_conn.close()
-                except Exception as e:
-                    logger.warning(f"Failed to close LISTEN connection for session {session_id}: {e}")
+            if notif_queue is not None:
+                listener.unsubscribe(session_id, notif_queue)
+            if heartbeat_buffer := get_heartbeat_buffer():
+                heartbeat_buffer.forget(agent_id, session_id)
 
     return EventSourceResponse(event_generator())
 
 
+async def _acknowledging_session(
+    db: AsyncSession, agent_id: str, session_id: str
+) -> tuple[AgentSession, AgentConnection]:
+    """The active session and its active connection that acknowledgements are accepted on
+
+    Raises HTTPException if the session is missing, belongs to another agent or is not active, or if the agent
+    has no active connection for it.
+    """
+    session = (await db.execute(select(AgentSession).where(AgentSession.session_id == session_id))).scalars().first()
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    if session.agent_id != agent_id:
+        raise HTTPException(status_code=403, detail=f"Session {session_id} does not belong to agent {agent_id}")
+    if session.status != "active":
+        raise HTTPException(status_code=400, detail=f"Session {session_id} is not active")
+
+    # Validate agent has an active connection
+    active_connections = (
+        (
+            await db.execute(
+                select(AgentConnection)
+                .where(and_(AgentConnection.agent_id == agent_id, AgentConnection.status == "active"))
+                .order_by(desc(AgentConnection.last_heartbeat_at))
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if not active_connections:
+        raise HTTPException(status_code=404, detail="Agent not connected")
+
+    # Find matching connection for this session
+    session_connection = next((conn for conn in active_connections if conn.session_id == session_id), None)
+    if not session_connection:
+        raise HTTPException(status_code=400, detail="No active connection for this session")
+    return session, session_connection
+
+
 @app.post(
     "/agent/{agent_id}/session/{session_id}/instructions/{instruction_id}/ack",
     response_model=AgentInstructionAcknowledgementResponse,
@@ -1874,36 +2083,7 @@ async def acknowledge_instruction(
     """HTTP endpoint for instruction acknowledgements with database persistence"""
 
     try:
-        # Validate session exists and belongs to agent
-        session = (
-            (await db.execute(select(AgentSession).where(AgentSession.session_id == session_id))).scalars().first()
-        )
-        if not session:
-            raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
-        if session.agent_id != agent_id:
-            raise HTTPException(status_code=403, detail=f"Session {session_id} does not belong to agent {agent_id}")
-        if session.status != "active":
-            raise HTTPException(status_code=400, detail=f"Session {session_id} is not active")
-
-        # Validate agent has an active connection
-        active_connections = (
-            (
-                await db.execute(
-                    select(AgentConnection)
-                    .where(and_(AgentConnection.agent_id == agent_id, AgentConnection.status == "active"))
-                    .order_by(desc(AgentConnection.last_heartbeat_at))
-                )
-            )
-            .scalars()
-            .all()
-        )
-        if not active_connections:
-            raise HTTPException(status_code=404, detail="Agent not connected")
-
-        # Find matching connection for this session
-        session_connection = next((conn for conn in active_connections if conn.session_id == session_id), None)
-        if not session_connection:
-            raise HTTPException(status_code=400, detail="No active connection for this session")
+        session, session_connection = await _acknowledging_session(db, agent_id, session_id)
 
         # Get and validate instruction
         instruction = (
@@ -1967,52 +2147,165 @@ async def acknowledge_instruction(
         raise HTTPException(status_code=500, detail="Internal server error") from None
 
 
-@app.post("/agent/{agent_id}/session/{session_id}/heartbeat")
-async def agent_heartbeat(agent_id: str, session_id: str, db: AsyncSession = DB_DEPENDENCY):
-    """
-    Agent heartbeat endpoint to update connection health status.
+_ACK_BATCH_MAX = 500
 
-    Args:
-        agent_id: The agent identifier
-        session_id: The session identifier
-        db: Database session
 
-    Returns:
-        Heartbeat response with status and timestamp
+def _ack_rejection(instruction_id: str, session_id: str, agent_id: str, found: AgentInstruction | None) -> str:
+    if found is None:
+        return "Instruction not found"
+    if found.session_id != session_id:
+        return "Instruction does not belong to this session"
+    if found.agent_id != agent_id:
+        return "Instruction does not belong to this agent"
+    return "Instruction cannot be acknowledged (invalid status)"
+
+
+@app.post(
+    "/agent/{agent_id}/session/{session_id}/instructions/ack:batch",
+    response_model=AgentInstructionAcknowledgementBatchResponse,
+)
+async def acknowledge_instructions(
+    agent_id: str,
+    session_id: str,
+    batch: AgentInstructionAcknowledgementBatchRequest,
+    db: AsyncSession = DB_DEPENDENCY,
+) -> AgentInstructionAcknowledgementBatchResponse:
+    """Acknowledge several instructions of a session in one transaction.
+
+    The session and connection are validated once, every acknowledgeable instruction is marked acknowledged
+    with one UPDATE and the acknowledgement records are inserted together. An acknowledgement that cannot be
+    applied (unknown instruction, another session's or agent's, not in `sent` status, or repeated in the
+    batch) is reported in its result without failing the rest.
     """
+    acknowledgements = batch.acknowledgements
+    if not acknowledgements:
+        raise HTTPException(status_code=422, detail="acknowledgements must not be empty")
+    if len(acknowledgements) > _ACK_BATCH_MAX:
+        raise HTTPException(
+            status_code=422, detail=f"batch size {len(acknowledgements)} exceeds limit of {_ACK_BATCH_MAX}"
+        )
+
     try:
-        # Find active connection for this agent and session
-        connection = (
+        session, session_connection = await _acknowledging_session(db, agent_id, session_id)
+
+        first_ack: dict[str, int] = {}
+        for index, ack in enumerate(acknowledgements):
+            first_ack.setdefault(ack.instruction_id, index)
+
+        now = datetime.now()
+        acknowledged = set(
             (
                 await db.execute(
-                    select(AgentConnection).where(
-                        and_(
-                            AgentConnection.agent_id == agent_id,
-                            AgentConnection.session_id == session_id,
-                            AgentConnection.status == "active",
-                        )
+                    update(AgentInstruction)
+                    .where(
+                        AgentInstruction.instruction_id.in_(list(first_ack)),
+                        AgentInstruction.session_id == session_id,
+                        AgentInstruction.agent_id == agent_id,
+                        AgentInstruction.status == "sent",
                     )
+                    .values(status="acknowledged", acknowledged_at=now)
+                    .returning(AgentInstruction.instruction_id)
+                    .execution_options(synchronize_session=False)
                 )
             )
             .scalars()
-            .first()
+            .all()
         )
 
-        if not connection:
-            raise HTTPException(status_code=404, detail="No active connection found for agent and session")
+        rejected = [instruction_id for instruction_id in first_ack if instruction_id not in acknowledged]
+        found = {}
+        if rejected:
+            found = {
+                instruction.instruction_id: instruction
+                for instruction in (
+                    await db.execute(select(AgentInstruction).where(AgentInstruction.instruction_id.in_(rejected)))
+                )
+                .scalars()
+                .all()
+            }
 
-        # Update heartbeat timestamp
-        now = datetime.now()
-        connection.last_heartbeat_at = now
+        applied = [
+            acknowledgements[index] for instruction_id, index in first_ack.items() if instruction_id in acknowledged
+        ]
+        if applied:
+            await db.execute(
+                insert(AgentInstructionAcknowledgement),
+                [
+                    {
+                        "instruction_id": ack.instruction_id,
+                        "agent_id": agent_id,
+                        "session_id": session_id,
+                        "status": ack.status,
+                        "result": ack.result,
+                        "error_message": ack.error_message,
+                        "processing_time_ms": ack.processing_time_ms,
+                        "acknowledgement_metadata": {},
+                        "created_at": now,
+                        "processed_at": now if ack.status in ["processed", "failed"] else None,
+                    }
+                    for ack in applied
+                ],
+            )
+
+        session.last_activity_at = now
+        session_connection.last_heartbeat_at = now
         await db.commit()
 
-        # Also update session activity
-        session = (
-            (await db.execute(select(AgentSession).where(AgentSession.session_id == session_id))).scalars().first()
+        results = []
+        for index, ack in enumerate(acknowledgements):
+            if first_ack[ack.instruction_id] != index:
+                error = "Duplicate acknowledgement in batch"
+            elif ack.instruction_id in acknowledged:
+                error = None
+            else:
+                error = _ack_rejection(ack.instruction_id, session_id, agent_id, found.get(ack.instruction_id))
+            results.append(
+                AgentInstructionAcknowledgementResult(
+                    instruction_id=ack.instruction_id,
+                    status="error" if error else "success",
+                    acknowledged_at=None if error else now.isoformat(),
+                    error=error,
+                )
+            )
+
+        logger.info(
+            f"Agent {agent_id} acknowledged {len(acknowledged)} of {len(acknowledgements)} instructions "
+            f"in session {session_id}"
         )
-        if session:
-            session.last_activity_at = now
-            await db.commit()
+        return AgentInstructionAcknowledgementBatchResponse(
+            agent_id=agent_id, session_id=session_id, acknowledged=len(acknowledged), results=results
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch acknowledgement processing error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error") from None
+
+
+@app.post("/agent/{agent_id}/session/{session_id}/heartbeat")
+async def agent_heartbeat(agent_id: str, session_id: str, db: AsyncSession = DB_DEPENDENCY):
+    """
+    Agent heartbeat endpoint to update connection health status.
+
+    Args:
+        agent_id: The agent identifier
+        session_id: The session identifier
+        db: Database session
+
+    Returns:
+        Heartbeat response with status and timestamp
+    """
+    try:
+        now = datetime.now()
+        heartbeat_buffer = get_heartbeat_buffer()
+        connection_id = heartbeat_buffer.record(agent_id, session_id, now) if heartbeat_buffer else None
+        if connection_id is None:
+            connection_id = await record_heartbeat(db, agent_id, session_id, now)
+            if connection_id is None:
+                raise HTTPException(status_code=404, detail="No active connection found for agent and session")
+            if heartbeat_buffer:
+                heartbeat_buffer.remember(agent_id, session_id, connection_id)
 
         logger.info(f"Heartbeat received from agent {agent_id} session {session_id}")
 
@@ -2021,7 +2314,7 @@ async def agent_heartbeat(agent_id: str, session_id: str, db: AsyncSession = DB_
             "agent_id": agent_id,
             "session_id": session_id,
             "heartbeat_timestamp": now.isoformat(),
-            "connection_id": connection.connection_id,
+            "connection_id": connection_id,
         }
 
     except HTTPException:
@@ -2386,50 +2679,128 @@ async def get_foilhole_quality_prediction_time_series_for_gridsquare_for_metric(
     }
 
 
+@app.get(
+    "/grids/{grid_uuid}/quality_prediction_time_series",
+    response_model=GridQualityPredictionTimeSeriesResponse,
+)
+async def get_grid_quality_prediction_time_series(
+    grid_uuid: str,
+    request: Request,
+    after: int | None = None,
+    since: datetime | None = None,
+    limit: int = TIME_SERIES_PAGE_SIZE,
+    prediction_model_name: str | None = None,
+    metric_name: str | None = None,
+    db: AsyncSession = DB_DEPENDENCY,
+):
+    """Get every square and foil hole prediction history for a grid in one columnar response
+
+    Points are paged in the order they were inserted, up to `limit` at a time. Pass the `cursor` of the
+    previous response back as `after` to fetch the next page, or, once `has_more` is false, to refresh
+    incrementally later. `since` only restricts which points are returned by their timestamp and is not a
+    cursor: timestamps are set by the writer, so a point can commit after a later-stamped one. Columnar
+    clients get one row per series plus its points (see `encode_series`), with the cursor in the X-Cursor
+    header and X-Has-More set.
+    """
+
+    grid = (await db.execute(select(Grid.uuid).where(Grid.uuid == grid_uuid))).scalar()
+    if not grid:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Grid {grid_uuid} not found")
+    limit = max(1, min(limit, TIME_SERIES_PAGE_SIZE))
+
+    query = (
+        select(
+            QualityPrediction.id,
+            QualityPrediction.prediction_model_name,
+            QualityPrediction.metric_name,
+            func.coalesce(QualityPrediction.gridsquare_uuid, FoilHole.gridsquare_uuid),
+            QualityPrediction.foilhole_uuid,
+            QualityPrediction.timestamp,
+            QualityPrediction.value,
+        )
+        .outerjoin(FoilHole, QualityPrediction.foilhole_uuid == FoilHole.uuid)
+        .where(QualityPrediction.grid_uuid == grid_uuid)
+        .order_by(QualityPrediction.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(QualityPrediction.id > after)
+    if since is not None:
+        query = query.where(QualityPrediction.timestamp > since)
+    if prediction_model_name is not None:
+        query = query.where(QualityPrediction.prediction_model_name == prediction_model_name)
+    if metric_name is not None:
+        query = query.where(QualityPrediction.metric_name == metric_name)
+
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = rows[-1][0] if rows else after
+    points: dict[tuple, list[tuple]] = {}
+    for _, model_name, metric, gridsquare_uuid, foilhole_uuid, timestamp, value in rows:
+        points.setdefault((model_name, metric, gridsquare_uuid, foilhole_uuid), []).append((timestamp, value))
+    if wants_columnar(request):
+        headers = {"X-Has-More": "true" if has_more else "false"}
+        if cursor is not None:
+            headers["X-Cursor"] = str(cursor)
+        payload = encode_series(
+            points.items(), PREDICTION_TIME_SERIES_KEY_COLUMNS, PREDICTION_TIME_SERIES_POINT_COLUMNS
+        )
+        return columnar_response(payload, headers=headers)
+
+    series = [
+        QualityPredictionTimeSeries(
+            prediction_model_name=model_name,
+            metric_name=metric,
+            gridsquare_uuid=gridsquare_uuid,
+            foilhole_uuid=foilhole_uuid,
+            timestamps=[timestamp for timestamp, _ in series_points],
+            values=[value for _, value in series_points],
+        )
+        for (model_name, metric, gridsquare_uuid, foilhole_uuid), series_points in points.items()
+    ]
+    return GridQualityPredictionTimeSeriesResponse(grid_uuid=grid_uuid, cursor=cursor, has_more=has_more, series=series)
+
+
 @app.get(
     "/prediction_model/{prediction_model_name}/grid/{grid_uuid}/prediction",
     response_model=list[QualityPredictionResponse],
 )
-async def get_prediction_for_grid(prediction_model_name: str, grid_uuid: str, db: AsyncSession = DB_DEPENDENCY):
-    squares = (await db.execute(select(GridSquare).where(GridSquare.grid_uuid == grid_uuid))).scalars().all()
-    predictions = [
-        (
-            await db.execute(
-                select(QualityPrediction)
-                .where(QualityPrediction.gridsquare_uuid == gs.uuid)
-                .where(QualityPrediction.prediction_model_name == prediction_model_name)
-                .order_by(QualityPrediction.timestamp.desc())
-            )
+async def get_prediction_for_grid(
+    prediction_model_name: str, grid_uuid: str, request: Request, db: AsyncSession = DB_DEPENDENCY
+):
+    """Latest prediction per square, falling back to the latest per foil hole for hole-level models"""
+
+    columns = (
+        QualityPrediction.id,
+        QualityPrediction.prediction_model_name,
+        QualityPrediction.value,
+        QualityPrediction.timestamp,
+    )
+    rows = (
+        await db.execute(
+            select(*columns, QualityPrediction.gridsquare_uuid, QualityPrediction.foilhole_uuid)
+            .distinct(QualityPrediction.gridsquare_uuid)
+            .where(QualityPrediction.grid_uuid == grid_uuid)
+            .where(QualityPrediction.prediction_model_name == prediction_model_name)
+            .where(QualityPrediction.gridsquare_uuid.is_not(None))
+            .order_by(QualityPrediction.gridsquare_uuid, QualityPrediction.timestamp.desc())
         )
-        .scalars()
-        .all()
-        for gs in squares
-    ]
-    predictions = [p[0] for p in predictions if p]
-    if not predictions:
-        holes = (
+    ).all()
+    if not rows:
+        rows = (
             await db.execute(
-                select(GridSquare, FoilHole)
-                .where(GridSquare.grid_uuid == grid_uuid)
-                .where(FoilHole.gridsquare_uuid == GridSquare.uuid)
+                select(*columns, FoilHole.gridsquare_uuid, QualityPrediction.foilhole_uuid)
+                .join(FoilHole, QualityPrediction.foilhole_uuid == FoilHole.uuid)
+                .distinct(QualityPrediction.foilhole_uuid)
+                .where(QualityPrediction.grid_uuid == grid_uuid)
+                .where(QualityPrediction.prediction_model_name == prediction_model_name)
+                .order_by(QualityPrediction.foilhole_uuid, QualityPrediction.timestamp.desc())
             )
         ).all()
-        predictions = [
-            (
-                await db.execute(
-                    select(QualityPrediction)
-                    .where(QualityPrediction.foilhole_uuid == fh[1].uuid)
-                    .where(QualityPrediction.prediction_model_name == prediction_model_name)
-                    .order_by(QualityPrediction.timestamp.desc())
-                )
-            )
-            .scalars()
-            .first()
-            for fh in holes
-        ]
-        for i in range(len(predictions)):
-            predictions[i].gridsquare_uuid = holes[i][0].uuid
-    return predictions
+    if wants_columnar(request):
+        return columnar_response(encode_columns(rows, PREDICTION_COLUMNS))
+    return [dict(zip(PREDICTION_COLUMNS, row, strict=True)) for row in rows]
 
 
 @app.get(
@@ -2567,78 +2938,35 @@ async def get_suggested_hole_collections(
     "/prediction_model/{prediction_model_name}/grid/{grid_uuid}/latent_representation",
     response_model=list[LatentRepresentationResponse],
 )
-async def get_latent_rep(prediction_model_name: str, grid_uuid: str, db: AsyncSession = DB_DEPENDENCY):
-    xs = (
-        (
-            await db.execute(
-                select(QualityPredictionModelParameter)
-                .where(QualityPredictionModelParameter.prediction_model_name == prediction_model_name)
-                .where(QualityPredictionModelParameter.grid_uuid == grid_uuid)
-                .where(QualityPredictionModelParameter.group.like("coordinates:%"))
-                .where(QualityPredictionModelParameter.key == "x")
-                .order_by(QualityPredictionModelParameter.timestamp.desc())
-            )
-        )
-        .scalars()
-        .all()
-    )
-    ys = (
-        (
-            await db.execute(
-                select(QualityPredictionModelParameter)
-                .where(QualityPredictionModelParameter.prediction_model_name == prediction_model_name)
-                .where(QualityPredictionModelParameter.grid_uuid == grid_uuid)
-                .where(QualityPredictionModelParameter.group.like("coordinates:%"))
-                .where(QualityPredictionModelParameter.key == "y")
-                .order_by(QualityPredictionModelParameter.timestamp.desc())
-            )
-        )
-        .scalars()
-        .all()
-    )
-    cluster_indices = (
-        (
-            await db.execute(
-                select(QualityPredictionModelParameter)
-                .where(QualityPredictionModelParameter.prediction_model_name == prediction_model_name)
-                .where(QualityPredictionModelParameter.grid_uuid == grid_uuid)
-                .where(QualityPredictionModelParameter.group == "cluster_indices")
-                .order_by(QualityPredictionModelParameter.timestamp.desc())
+async def get_latent_rep(
+    prediction_model_name: str, grid_uuid: str, request: Request, db: AsyncSession = DB_DEPENDENCY
+):
+    def _parameters(*conditions):
+        return (
+            select(
+                QualityPredictionModelParameter.group,
+                QualityPredictionModelParameter.key,
+                QualityPredictionModelParameter.value,
             )
+            .where(QualityPredictionModelParameter.prediction_model_name == prediction_model_name)
+            .where(QualityPredictionModelParameter.grid_uuid == grid_uuid)
+            .where(*conditions)
+            .order_by(QualityPredictionModelParameter.timestamp.desc())
         )
-        .scalars()
-        .all()
-    )
-
-    class LatentRep(BaseModel):
-        x: float | None = None
-        y: float | None = None
-        index: int | None = None
 
-        def complete(self):
-            return all(a is not None for a in (self.x, self.y, self.index))
+    coordinates = QualityPredictionModelParameter.group.like("coordinates:%")
+    xs = (await db.execute(_parameters(coordinates, QualityPredictionModelParameter.key == "x"))).all()
+    ys = (await db.execute(_parameters(coordinates, QualityPredictionModelParameter.key == "y"))).all()
+    cluster_indices = (await db.execute(_parameters(QualityPredictionModelParameter.group == "cluster_indices"))).all()
 
-    rep = {
-        p.uuid: LatentRep()
-        for p in (await db.execute(select(GridSquare).where(GridSquare.grid_uuid == grid_uuid))).scalars().all()
-    }
-    if not set(rep.keys()).intersection({ci.key for ci in cluster_indices}):
-        grid_square_foilholes = (
-            await db.execute(
-                select(GridSquare, FoilHole)
-                .where(GridSquare.grid_uuid == grid_uuid)
-                .where(FoilHole.gridsquare_uuid == GridSquare.uuid)
-            )
-        ).all()
-        rep = {p[1].uuid: LatentRep() for p in grid_square_foilholes}
-    indices = {ci.key: ci.value for ci in cluster_indices}
-    res = []
+    indices = {key: value for _, key, value in cluster_indices}
+    rows = []
     for x, y in zip(xs, ys, strict=True):
         uuid_str = x.group.replace("coordinates:", "")
-        res.append(
-            LatentRepresentationResponse(gridsquare_uuid=uuid_str, x=x.value, y=y.value, index=indices[uuid_str])
-        )
-    return res
+        rows.append((uuid_str, x.value, y.value, indices[uuid_str]))
+    if wants_columnar(request):
+        return columnar_response(encode_columns(rows, LATENT_REPRESENTATION_COLUMNS))
+    return [dict(zip(LATENT_REPRESENTATION_COLUMNS, row, strict=True)) for row in rows]
 
 
 @app.get(
@@ -2715,37 +3043,11 @@ async def get_square_latent_rep(prediction_model_name: str, gridsquare_uuid: str
     return [LatentRepresentationResponse(foilhole_uuid=k, x=v.x, y=v.y, index=v.index) for k, v in rep.items() if v]
 
 
-IMAGE_CACHE_DIR = Path(os.getenv("SMARTEM_IMAGE_CACHE_DIR", str(Path(tempfile.gettempdir()) / "smartem_image_cache")))
-
-
-def _render_image_png(source_path: Path, crop: tuple[int, int, int, int] | None) -> bytes:
-    if source_path.suffix == ".mrc":
-        data = mrcfile.read(source_path)
-    else:
-        data = tifffile.imread(source_path)
-    data = data - data.min()
-    data = data * (255 / data.max())
-    data = data.astype("uint8")
-    if crop is not None:
-        x, y, w, h = crop
-        data = data[y - h // 2 : y + h // 2, x - w // 2 : x + w // 2]
-    image = Image.fromarray(data)
-    with io.BytesIO() as buf:
-        image.save(buf, format="PNG")
-        return buf.getvalue()
-
-
-async def _cached_image_response(source_path: Path, crop: tuple[int, int, int, int] | None) -> FileResponse:
-    stat = source_path.stat()
-    cache_key = hashlib.sha256(f"{source_path}:{stat.st_mtime_ns}:{stat.st_size}:{crop}".encode()).hexdigest()
-    cache_path = IMAGE_CACHE_DIR / f"{cache_key}.png"
-    if not cache_path.exists():
-        png_bytes = await run_in_threadpool(_render_image_png, source_path, crop)
-        IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        tmp_path = cache_path.with_name(f"{cache_key}.{os.getpid()}.tmp")
-        tmp_path.write_bytes(png_bytes)
-        os.replace(tmp_path, cache_path)
-    return FileResponse(cache_path, media_type="image/png", headers={"Cache-Control": "private, max-age=3600"})
+async def _cached_image_response(
+    source_path: Path, crop: tuple[int, int, int, int] | None, max_size: int | None = None
+) -> Response:
+    png_bytes = await image_cache.get(source_path, crop, max_size)
+    return Response(png_bytes, media_type="image/png", headers={"Cache-Control": "private, max-age=3600"})
 
 
 @app.get("/grids/{grid_uuid}/atlas_image", responses={200: {"content": {"image/png": {}}}})
@@ -2755,6 +3057,7 @@ async def get_grid_atlas_image(
     y: int | None = None,
     w: int | None = None,
     h: int | None = None,
+    max_size: int | None = None,
     db: AsyncSession = DB_DEPENDENCY,
 ):
     """Get a single grid by ID"""
@@ -2768,12 +3071,13 @@ async def get_grid_atlas_image(
     else:
         atlas_img_path = Path(grid.atlas_dir)
     crop = (x, y, w, h) if x is not None and y is not None and w is not None and h is not None else None
-    return await _cached_image_response(atlas_img_path, crop)
+    return await _cached_image_response(atlas_img_path, crop, max_size)
 
 
 @app.get("/gridsquares/{gridsquare_uuid}/gridsquare_image", responses={200: {"content": {"image/png": {}}}})
 async def get_gridsquare_image(
     gridsquare_uuid: str,
+    max_size: int | None = None,
     db: AsyncSession = DB_DEPENDENCY,
 ):
     """Get a single grid square by ID"""
@@ -2783,42 +3087,57 @@ async def get_gridsquare_image(
         raise HTTPException(status_code=404, detail="Grid square not found")
     if not gridsquare.image_path:
         raise HTTPException(status_code=404, detail="Grid square image unknown")
-    return await _cached_image_response(Path(gridsquare.image_path), None)
+    return await _cached_image_response(Path(gridsquare.image_path), None, max_size)
 
 
 _frontend_sse_connections = 0
 _frontend_sse_max_connections = int(os.getenv("FRONTEND_SSE_MAX_CONNECTIONS", "50"))
 
 
-@app.post("/agent/{agent_id}/session/{session_id}/logs")
+@app.post(
+    "/agent/{agent_id}/session/{session_id}/logs",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                AGENT_LOG_NDJSON_MEDIA_TYPE: {"schema": AgentLogEntry.model_json_schema()},
+                "application/json": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"logs": {"type": "array", "items": AgentLogEntry.model_json_schema()}},
+                        "required": ["logs"],
+                    }
+                },
+            },
+        }
+    },
+)
 async def ingest_agent_logs(
     agent_id: str,
     session_id: str,
-    request: AgentLogBatchRequest,
+    request: Request,
     db: AsyncSession = DB_DEPENDENCY,
 ) -> AgentLogBatchResponse:
+    """Store a batch of agent log entries, sent as NDJSON (one entry per line) or as `{"logs": [...]}` JSON.
+
+    Entries are written with a single COPY; at most 500 are stored per request.
+    """
     session = (await db.execute(select(AgentSession).where(AgentSession.session_id == session_id))).scalars().first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     if session.agent_id != agent_id:
         raise HTTPException(status_code=403, detail="Session does not belong to agent")
 
+    try:
+        entries = parse_log_entries(await request.body(), request.headers.get("content-type", ""))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors()) from None
+
     max_batch = 500
-    logs_to_store = request.logs[:max_batch]
-    for entry in logs_to_store:
-        db.add(
-            AgentLog(
-                agent_id=agent_id,
-                session_id=session_id,
-                timestamp=entry.timestamp,
-                level=entry.level,
-                logger_name=entry.logger_name,
-                message=entry.message,
-            )
-        )
+    stored = await copy_agent_logs(db, agent_id, session_id, entries[:max_batch])
     await db.commit()
 
-    return AgentLogBatchResponse(stored=len(logs_to_store))
+    return AgentLogBatchResponse(stored=stored)
 
 
 @app.get("/frontend/events/stream")
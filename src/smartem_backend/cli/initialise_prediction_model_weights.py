@@ -1,6 +1,8 @@
 import asyncio
+from datetime import datetime
 
 import typer
+from sqlalchemy import Float, cast, exists, func, insert, literal, true
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlmodel import select
 
@@ -20,55 +22,82 @@ def _make_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSessio
     )
 
 
-async def initialise_all_models_for_grid(grid_uuid: str, engine: AsyncEngine | None = None) -> None:
+def _seed_weights_statement(grid_uuids: list[str] | None):
+    model_count = select(func.count()).select_from(QualityPredictionModel).scalar_subquery()
+    default_weight = literal(1.0) / cast(model_count, Float)
+    source = (
+        select(
+            Grid.uuid,
+            QualityPredictionModel.name,
+            QualityMetric.name,
+            default_weight,
+            literal(datetime.now()),
+        )
+        .select_from(Grid)
+        .join(QualityPredictionModel, true())
+        .join(QualityMetric, true())
+        .where(
+            ~exists().where(
+                QualityPredictionModelWeight.grid_uuid == Grid.uuid,
+                QualityPredictionModelWeight.prediction_model_name == QualityPredictionModel.name,
+                QualityPredictionModelWeight.metric_name == QualityMetric.name,
+            )
+        )
+    )
+    if grid_uuids is not None:
+        source = source.where(Grid.uuid.in_(grid_uuids))
+    seeded = (
+        insert(QualityPredictionModelWeight)
+        .from_select(["grid_uuid", "prediction_model_name", "metric_name", "weight", "timestamp"], source)
+        .returning(
+            QualityPredictionModelWeight.grid_uuid,
+            QualityPredictionModelWeight.prediction_model_name,
+            QualityPredictionModelWeight.metric_name,
+            QualityPredictionModelWeight.weight,
+        )
+        .cte("seeded")
+    )
+    current = select(seeded.c.grid_uuid, seeded.c.prediction_model_name, seeded.c.metric_name, seeded.c.weight).where(
+        ~exists().where(
+            CurrentQualityPredictionModelWeight.grid_uuid == seeded.c.grid_uuid,
+            CurrentQualityPredictionModelWeight.prediction_model_name == seeded.c.prediction_model_name,
+            CurrentQualityPredictionModelWeight.metric_name == seeded.c.metric_name,
+        )
+    )
+    return insert(CurrentQualityPredictionModelWeight).from_select(
+        ["grid_uuid", "prediction_model_name", "metric_name", "weight"], current
+    )
+
+
+async def initialise_all_models_for_grids(
+    grid_uuids: list[str] | None = None, engine: AsyncEngine | None = None
+) -> int:
+    """Seed default model weights on every grid in `grid_uuids`, or on all grids if it is None
+
+    Each (grid, model, metric) combination without a weight row gets one at `1 / number of models`, and a
+    matching current-weight row. Both tables are written by a single statement: the weight rows come from
+    an INSERT ... SELECT over grids x models x metrics with a NOT EXISTS anti-join, and the current-weight
+    insert reads the rows it returned, so the cost does not grow with the number of models or metrics.
+    Returns the number of current-weight rows inserted.
+    """
+    if grid_uuids is not None and not grid_uuids:
+        return 0
     if engine is None:
         engine = setup_postgres_async_connection()
     session_factory = _make_session_factory(engine)
 
     async with session_factory() as sess:
-        models = (await sess.execute(select(QualityPredictionModel))).scalars().all()
-        metrics = (await sess.execute(select(QualityMetric))).scalars().all()
-
-        if not models:
-            logger.warning(f"No prediction models found to initialise for grid {grid_uuid}")
-            return
-
-        default_weight = 1 / len(models)
-        for metric in metrics:
-            for model in models:
-                existing_weight = (
-                    (
-                        await sess.execute(
-                            select(QualityPredictionModelWeight).where(
-                                QualityPredictionModelWeight.grid_uuid == grid_uuid,
-                                QualityPredictionModelWeight.prediction_model_name == model.name,
-                                QualityPredictionModelWeight.metric_name == metric.name,
-                            )
-                        )
-                    )
-                    .scalars()
-                    .first()
-                )
-
-                if existing_weight is None:
-                    weight_entry = QualityPredictionModelWeight(
-                        grid_uuid=grid_uuid,
-                        prediction_model_name=model.name,
-                        weight=default_weight,
-                        metric_name=metric.name,
-                    )
-                    current_weight_entry = CurrentQualityPredictionModelWeight(
-                        grid_uuid=grid_uuid,
-                        prediction_model_name=model.name,
-                        weight=default_weight,
-                    )
-                    sess.add(weight_entry)
-                    sess.add(current_weight_entry)
-                    logger.info(f"Initialised weight {default_weight} for model '{model.name}' on grid {grid_uuid}")
-                else:
-                    logger.debug(f"Weight already exists for model '{model.name}' on grid {grid_uuid}")
-
+        result = await sess.execute(_seed_weights_statement(grid_uuids))
         await sess.commit()
+    inserted = result.rowcount
+    target = "all grids" if grid_uuids is None else f"{len(grid_uuids)} grids"
+    logger.info(f"Initialised {inserted} default model weights on {target}")
+    return inserted
+
+
+async def initialise_all_models_for_grid(grid_uuid: str, engine: AsyncEngine | None = None) -> None:
+    if not await initialise_all_models_for_grids([grid_uuid], engine):
+        logger.debug(f"No missing model weights to initialise for grid {grid_uuid}")
 
 
 async def initialise_prediction_model_for_grid(
@@ -1,8 +1,10 @@
 import asyncio
 import random
+from datetime import datetime
 from typing import Annotated
 
 import typer
+from sqlalchemy import exists, func, insert, literal, true
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlmodel import select
 
@@ -51,6 +53,7 @@ async def generate_random_predictions(
                     value=random.uniform(random_range[0], random_range[1]),
                     prediction_model_name=model_name,
                     foilhole_uuid=h[0].uuid,
+                    grid_uuid=grid_uuid,
                 )
                 for h in holes
             ]
@@ -63,6 +66,7 @@ async def generate_random_predictions(
                     value=random.uniform(random_range[0], random_range[1]),
                     prediction_model_name=model_name,
                     gridsquare_uuid=s.uuid,
+                    grid_uuid=grid_uuid,
                 )
                 for s in squares
             ]
@@ -72,119 +76,87 @@ async def generate_random_predictions(
     return None
 
 
-async def generate_predictions_for_gridsquare(
-    gridsquare_uuid: str, grid_uuid: str | None = None, engine: AsyncEngine | None = None
-) -> None:
-    if engine is None:
-        engine = setup_postgres_async_connection()
-    session_factory = _make_session_factory(engine)
+def _random_value():
+    low, high = DEFAULT_PREDICTION_RANGE
+    return low + (high - low) * func.random()
 
-    async with session_factory() as sess:
-        models = (await sess.execute(select(QualityPredictionModel))).scalars().all()
-
-        if not models:
-            logger.warning(f"No prediction models found to generate predictions for gridsquare {gridsquare_uuid}")
-            return
-
-        if grid_uuid is None:
-            gridsquare = await sess.get(GridSquare, gridsquare_uuid)
-            if gridsquare is None:
-                logger.error(f"GridSquare {gridsquare_uuid} not found in database")
-                return
-            grid_uuid = gridsquare.grid_uuid
-
-        predictions = []
-        for model in models:
-            existing_prediction = (
-                (
-                    await sess.execute(
-                        select(QualityPrediction).where(
-                            QualityPrediction.gridsquare_uuid == gridsquare_uuid,
-                            QualityPrediction.prediction_model_name == model.name,
-                        )
-                    )
-                )
-                .scalars()
-                .first()
-            )
-
-            if existing_prediction is None:
-                prediction = QualityPrediction(
-                    value=random.uniform(DEFAULT_PREDICTION_RANGE[0], DEFAULT_PREDICTION_RANGE[1]),
-                    prediction_model_name=model.name,
-                    gridsquare_uuid=gridsquare_uuid,
-                )
-                predictions.append(prediction)
-                logger.info(
-                    f"Generated prediction {prediction.value:.3f} for model '{model.name}' "
-                    f"on gridsquare {gridsquare_uuid}"
-                )
-            else:
-                logger.debug(f"Prediction already exists for model '{model.name}' on gridsquare {gridsquare_uuid}")
-
-        if predictions:
-            sess.add_all(predictions)
-            await sess.commit()
-            logger.info(f"Generated {len(predictions)} predictions for gridsquare {gridsquare_uuid}")
 
-
-async def generate_predictions_for_foilhole(
-    foilhole_uuid: str, gridsquare_uuid: str | None = None, engine: AsyncEngine | None = None
-) -> None:
+async def _insert_seed_rows(source, entity_column: str, engine: AsyncEngine | None) -> int:
     if engine is None:
         engine = setup_postgres_async_connection()
     session_factory = _make_session_factory(engine)
-
+    statement = insert(QualityPrediction).from_select(
+        ["value", "prediction_model_name", entity_column, "grid_uuid", "timestamp"], source
+    )
     async with session_factory() as sess:
-        models = (await sess.execute(select(QualityPredictionModel))).scalars().all()
-
-        if not models:
-            logger.warning(f"No prediction models found to generate predictions for foilhole {foilhole_uuid}")
-            return
-
-        if gridsquare_uuid is not None:
-            foilhole = await sess.get(FoilHole, foilhole_uuid)
-            if foilhole is None:
-                logger.error(f"FoilHole {foilhole_uuid} not found in database")
-                return
-            if foilhole.gridsquare_uuid != gridsquare_uuid:
-                logger.error(
-                    f"FoilHole {foilhole_uuid} belongs to gridsquare {foilhole.gridsquare_uuid}, not {gridsquare_uuid}"
-                )
-                return
-
-        predictions = []
-        for model in models:
-            existing_prediction = (
-                (
-                    await sess.execute(
-                        select(QualityPrediction).where(
-                            QualityPrediction.foilhole_uuid == foilhole_uuid,
-                            QualityPrediction.prediction_model_name == model.name,
-                        )
-                    )
-                )
-                .scalars()
-                .first()
+        result = await sess.execute(statement)
+        await sess.commit()
+    return result.rowcount
+
+
+async def seed_gridsquare_predictions(gridsquare_uuids: list[str], engine: AsyncEngine | None = None) -> int:
+    """Give every grid square in `gridsquare_uuids` a random prediction from each model it lacks one for
+
+    Existing predictions are excluded with one anti-join and the missing rows are written in a single
+    INSERT ... SELECT, whatever the number of squares and models. Returns the number of rows inserted.
+    """
+    if not gridsquare_uuids:
+        return 0
+    source = (
+        select(
+            _random_value(),
+            QualityPredictionModel.name,
+            GridSquare.uuid,
+            GridSquare.grid_uuid,
+            literal(datetime.now()),
+        )
+        .join(QualityPredictionModel, true())
+        .where(GridSquare.uuid.in_(gridsquare_uuids))
+        .where(
+            ~exists().where(
+                QualityPrediction.gridsquare_uuid == GridSquare.uuid,
+                QualityPrediction.prediction_model_name == QualityPredictionModel.name,
             )
-
-            if existing_prediction is None:
-                prediction = QualityPrediction(
-                    value=random.uniform(DEFAULT_PREDICTION_RANGE[0], DEFAULT_PREDICTION_RANGE[1]),
-                    prediction_model_name=model.name,
-                    foilhole_uuid=foilhole_uuid,
-                )
-                predictions.append(prediction)
-                logger.info(
-                    f"Generated prediction {prediction.value:.3f} for model '{model.name}' on foilhole {foilhole_uuid}"
-                )
-            else:
-                logger.debug(f"Prediction already exists for model '{model.name}' on foilhole {foilhole_uuid}")
-
-        if predictions:
-            sess.add_all(predictions)
-            await sess.commit()
-            logger.info(f"Generated {len(predictions)} predictions for foilhole {foilhole_uuid}")
+        )
+    )
+    inserted = await _insert_seed_rows(source, "gridsquare_uuid", engine)
+    logger.info(f"Seeded {inserted} predictions for {len(gridsquare_uuids)} gridsquares")
+    return inserted
+
+
+async def seed_foilhole_predictions(
+    foilhole_uuids: list[str], gridsquare_uuid: str | None = None, engine: AsyncEngine | None = None
+) -> int:
+    """Give every foil hole in `foilhole_uuids` a random prediction from each model it lacks one for
+
+    If `gridsquare_uuid` is given, holes that belong to a different square are skipped. Returns the number
+    of rows inserted; see `seed_gridsquare_predictions`.
+    """
+    if not foilhole_uuids:
+        return 0
+    source = (
+        select(
+            _random_value(),
+            QualityPredictionModel.name,
+            FoilHole.uuid,
+            GridSquare.grid_uuid,
+            literal(datetime.now()),
+        )
+        .join(GridSquare, FoilHole.gridsquare_uuid == GridSquare.uuid)
+        .join(QualityPredictionModel, true())
+        .where(FoilHole.uuid.in_(foilhole_uuids))
+        .where(
+            ~exists().where(
+                QualityPrediction.foilhole_uuid == FoilHole.uuid,
+                QualityPrediction.prediction_model_name == QualityPredictionModel.name,
+            )
+        )
+    )
+    if gridsquare_uuid is not None:
+        source = source.where(FoilHole.gridsquare_uuid == gridsquare_uuid)
+    inserted = await _insert_seed_rows(source, "foilhole_uuid", engine)
+    logger.info(f"Seeded {inserted} predictions for {len(foilhole_uuids)} foilholes")
+    return inserted
 
 
 def _typer_entry(
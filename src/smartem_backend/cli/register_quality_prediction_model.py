@@ -1,15 +1,20 @@
+import asyncio
+
 import typer
 from sqlmodel import Session
 
+from smartem_backend.cli.initialise_prediction_model_weights import initialise_all_models_for_grids
 from smartem_backend.model.database import QualityPredictionModel
 from smartem_backend.utils import setup_postgres_connection
 
 
-def register(name: str, description: str) -> None:
+def register(name: str, description: str, backfill_weights: bool = True) -> None:
     engine = setup_postgres_connection()
     with Session(engine) as sess:
         sess.add(QualityPredictionModel(name=name, description=description))
         sess.commit()
+    if backfill_weights:
+        asyncio.run(initialise_all_models_for_grids())
     return None
 
 
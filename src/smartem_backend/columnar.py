@@ -0,0 +1,166 @@
+"""Columnar binary encoding for large tabular API responses.
+
+Endpoints that can return one row per square or foil hole (latest predictions,
+latent representations, prediction time series) also offer a columnar
+encoding when the client sends `Accept: application/vnd.smartem.columnar+npz`.
+The payload is a compressed NumPy `.npz` archive with one array per column,
+built straight from query rows without constructing a Pydantic model per row,
+so it avoids repeating every key for every row and decodes directly into arrays.
+
+String columns are dictionary-encoded: each is stored as `<name>__codes`, an
+int32 index per row, plus its distinct values as UTF-8 bytes in `<name>__utf8`
+split by `<name>__offsets`, so a model name or square uuid shared by many rows
+is written once. `decode_columns` turns them back into plain string arrays.
+
+Only fixed-width numeric dtypes are written and archives are always loaded with
+`allow_pickle=False`. Missing values are encoded in-band: `""` for strings,
+NaN for floats, NaT for timestamps and -1 for integers. Timestamps are
+written as naive UTC.
+"""
+
+from __future__ import annotations
+
+import io
+from collections.abc import Iterable, Sequence
+from datetime import UTC, datetime
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.smartem.columnar+npz"
+
+# Column kinds understood by `encode_columns`.
+COLUMN_KINDS = ("str", "float", "int", "datetime")
+
+
+def wants_columnar(request: Request) -> bool:
+    """True if the client listed the columnar media type in its Accept header."""
+    return COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _datetime64(value: datetime | None) -> np.datetime64:
+    if value is None:
+        return np.datetime64("NaT")
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return np.datetime64(value, "us")
+
+
+def _string_arrays(name: str, values: Sequence) -> dict[str, np.ndarray]:
+    codes: dict[str, int] = {}
+    indices = np.array([codes.setdefault("" if v is None else v, len(codes)) for v in values], dtype=np.int32)
+    encoded = [value.encode() for value in codes]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return {
+        f"{name}__codes": indices,
+        f"{name}__utf8": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        f"{name}__offsets": offsets,
+    }
+
+
+def _decode_strings(codes: np.ndarray, utf8: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    data = utf8.tobytes()
+    uniques = np.array(
+        [data[start:end].decode() for start, end in zip(offsets[:-1], offsets[1:], strict=True)], dtype=np.str_
+    )
+    return uniques[codes] if len(uniques) else np.array([], dtype=np.str_)
+
+
+def _column(values: Sequence, kind: str) -> np.ndarray:
+    if kind == "float":
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if kind == "int":
+        return np.array([-1 if v is None else v for v in values], dtype=np.int64)
+    if kind == "datetime":
+        return np.array([_datetime64(v) for v in values], dtype="datetime64[us]")
+    raise ValueError(f"Unknown column kind {kind!r}, expected one of {COLUMN_KINDS}")
+
+
+def _arrays(rows: Iterable[Sequence], schema: dict[str, str]) -> dict[str, np.ndarray]:
+    rows = list(rows)
+    columns = list(zip(*rows, strict=True)) if rows else [()] * len(schema)
+    arrays: dict[str, np.ndarray] = {}
+    for (name, kind), values in zip(schema.items(), columns, strict=True):
+        if kind == "str":
+            arrays.update(_string_arrays(name, values))
+        else:
+            arrays[name] = _column(values, kind)
+    return arrays
+
+
+def _write(arrays: dict[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def encode_columns(rows: Iterable[Sequence], schema: dict[str, str]) -> bytes:
+    """Encode row tuples as an `.npz` archive with one column per `schema` entry, in order."""
+    return _write(_arrays(rows, schema))
+
+
+def encode_series(
+    series: Iterable[tuple[Sequence, Sequence[Sequence]]], key_schema: dict[str, str], point_schema: dict[str, str]
+) -> bytes:
+    """
+    Encode `(key, points)` pairs as one row per series plus the points of every series back to back
+
+    The `key_schema` columns hold one entry per series and the `point_schema` columns one entry per point,
+    with the points of series `i` at `offsets[i]:offsets[i + 1]`.
+    """
+    series = list(series)
+    offsets = np.zeros(len(series) + 1, dtype=np.int64)
+    np.cumsum([len(points) for _, points in series], out=offsets[1:])
+    arrays = _arrays((key for key, _ in series), key_schema)
+    arrays.update(_arrays((point for _, points in series for point in points), point_schema))
+    arrays["offsets"] = offsets
+    return _write(arrays)
+
+
+def decode_columns(payload: bytes) -> dict[str, np.ndarray]:
+    """Decode an archive produced by `encode_columns` or `encode_series` into a dict of column arrays."""
+    columns: dict[str, np.ndarray] = {}
+    with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+        for name in archive.files:
+            if name.endswith("__codes"):
+                column = name.removesuffix("__codes")
+                columns[column] = _decode_strings(
+                    archive[name], archive[f"{column}__utf8"], archive[f"{column}__offsets"]
+                )
+            elif not name.endswith(("__utf8", "__offsets")):
+                columns[name] = archive[name]
+    return columns
+
+
+def concatenate_series(pages: Sequence[dict[str, np.ndarray]], key_names: Sequence[str]) -> dict[str, np.ndarray]:
+    """
+    Join decoded `encode_series` pages, merging a series split across pages back into one
+
+    The `key_names` columns must be string columns. Points keep their page order within each series and
+    series are ordered by their first appearance.
+    """
+    point_names = [name for name in pages[0] if name not in key_names and name != "offsets"]
+    slices: dict[tuple, list[tuple[int, int, int]]] = {}
+    for page_index, page in enumerate(pages):
+        offsets = page["offsets"]
+        for i in range(len(offsets) - 1):
+            key = tuple(str(page[name][i]) for name in key_names)
+            slices.setdefault(key, []).append((page_index, int(offsets[i]), int(offsets[i + 1])))
+
+    columns: dict[str, np.ndarray] = {
+        name: np.array([key[k] for key in slices], dtype=np.str_) for k, name in enumerate(key_names)
+    }
+    for name in point_names:
+        parts = [pages[p][name][start:end] for parts in slices.values() for p, start, end in parts]
+        columns[name] = np.concatenate(parts) if parts else pages[0][name][:0]
+    offsets = np.zeros(len(slices) + 1, dtype=np.int64)
+    np.cumsum([sum(end - start for _, start, end in parts) for parts in slices.values()], out=offsets[1:])
+    columns["offsets"] = offsets
+    return columns
+
+
+def columnar_response(payload: bytes, headers: dict[str, str] | None = None) -> Response:
+    """Wrap an encoded archive in an HTTP response, with `headers` such as a paging cursor if given."""
+    return Response(payload, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
@@ -2,30 +2,38 @@
 
 import argparse
 import asyncio
-import json
 import logging
 import os
 import signal
 import uuid
 from collections.abc import Awaitable, Callable
 from datetime import datetime
+from pathlib import Path
 from typing import Any
 
-import numpy as np
-import scipy.stats
 from aio_pika.abc import AbstractIncomingMessage
 from dotenv import load_dotenv
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlmodel import select
 
 from smartem_backend import mq_publisher as mq_publisher_module
 from smartem_backend.cli.initialise_prediction_model_weights import initialise_all_models_for_grid
 from smartem_backend.cli.random_model_predictions import (
-    generate_predictions_for_foilhole,
-    generate_predictions_for_gridsquare,
+    seed_foilhole_predictions,
+    seed_gridsquare_predictions,
 )
 from smartem_backend.cli.random_prior_updates import simulate_processing_pipeline_async
+from smartem_backend.consumer_batching import CONSUMER_BATCH_SIZE, BatchEventHandler, MicroBatchDispatcher
+from smartem_backend.consumer_metrics import (
+    CONSUMER_METRICS_HOST,
+    CONSUMER_METRICS_PORT,
+    ConsumerMetrics,
+    record_handler_failure,
+    serve_metrics,
+)
+from smartem_backend.image_cache import get_image_cache
 from smartem_backend.instruction_notify import notify_instruction_pending
 from smartem_backend.log_manager import LogConfig, LogManager
 from smartem_backend.model.database import (
@@ -39,7 +47,6 @@ from smartem_backend.model.database import (
     GridSquare,
     Micrograph,
     QualityGroupPrediction,
-    QualityMetricStatistics,
     QualityPrediction,
     QualityPredictionModelParameter,
 )
@@ -59,6 +66,7 @@ from smartem_backend.model.mq_event import (
     FoilHoleDeletedEvent,
     FoilHoleGroupModelPredictionEvent,
     FoilHoleModelPredictionEvent,
+    FoilHolesCreatedEvent,
     FoilHoleUpdatedEvent,
     GridCreatedEvent,
     GridDeletedEvent,
@@ -67,6 +75,7 @@ from smartem_backend.model.mq_event import (
     GridSquareDeletedEvent,
     GridSquareModelPredictionEvent,
     GridSquareRegisteredEvent,
+    GridSquaresCreatedEvent,
     GridSquareUpdatedEvent,
     GridUpdatedEvent,
     MessageQueueEventType,
@@ -86,8 +95,11 @@ from smartem_backend.mq_publisher import (
     publish_particle_picking_registered,
 )
 from smartem_backend.predictions.acquisition import ordered_holes
+from smartem_backend.predictions.statistics import record_metric_values
 from smartem_backend.predictions.update import overall_predictions_update, prior_update
+from smartem_backend.refresh_scheduler import RefreshScheduler
 from smartem_backend.rmq import AioPikaConsumer, AioPikaPublisher, decode_event_body
+from smartem_backend.rmq.codec import EventData
 from smartem_backend.rmq.config import load_rmq_connection_url, load_rmq_topology
 from smartem_backend.utils import load_conf, setup_logger, setup_postgres_async_connection
 
@@ -109,492 +121,562 @@ else:
     async_db_engine = None  # type: ignore[assignment]
     SessionLocal = None  # type: ignore[assignment]
 
-EventHandler = Callable[[dict[str, Any]], Awaitable[None]]
+EventHandler = Callable[[EventData], Awaitable[None]]
+
+# Set in amain(); handlers mark grids dirty here rather than recomputing overall predictions inline
+refresh_scheduler: RefreshScheduler | None = None
 
+# The handler table, resolved once in amain(); _on_message falls back to get_event_handlers() when unset
+event_handlers: dict[str, EventHandler] | None = None
+consumer_metrics = ConsumerMetrics()
 
-async def handle_acquisition_created(event_data: dict[str, Any]) -> None:
+
+async def handle_acquisition_created(event_data: EventData) -> None:
     try:
-        event = AcquisitionCreatedEvent(**event_data)
+        event = AcquisitionCreatedEvent.model_validate(event_data)
         logger.info(f"Acquisition created event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing acquisition created event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing acquisition created event: {e}")
 
 
-async def handle_acquisition_updated(event_data: dict[str, Any]) -> None:
+async def handle_acquisition_updated(event_data: EventData) -> None:
     try:
-        event = AcquisitionUpdatedEvent(**event_data)
+        event = AcquisitionUpdatedEvent.model_validate(event_data)
         logger.info(f"Acquisition updated event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing acquisition updated event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing acquisition updated event: {e}")
 
 
-async def handle_acquisition_deleted(event_data: dict[str, Any]) -> None:
+async def handle_acquisition_deleted(event_data: EventData) -> None:
     try:
-        event = AcquisitionDeletedEvent(**event_data)
+        event = AcquisitionDeletedEvent.model_validate(event_data)
         logger.info(f"Acquisition deleted event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing acquisition deleted event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing acquisition deleted event: {e}")
 
 
-async def handle_atlas_created(event_data: dict[str, Any]) -> None:
+async def handle_atlas_created(event_data: EventData) -> None:
     try:
-        event = AtlasCreatedEvent(**event_data)
+        event = AtlasCreatedEvent.model_validate(event_data)
         logger.info(f"Atlas created event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing atlas created event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing atlas created event: {e}")
 
 
-async def handle_atlas_updated(event_data: dict[str, Any]) -> None:
+async def handle_atlas_updated(event_data: EventData) -> None:
     try:
-        event = AtlasUpdatedEvent(**event_data)
+        event = AtlasUpdatedEvent.model_validate(event_data)
         logger.info(f"Atlas updated event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing atlas updated event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing atlas updated event: {e}")
 
 
-async def handle_atlas_deleted(event_data: dict[str, Any]) -> None:
+async def handle_atlas_deleted(event_data: EventData) -> None:
     try:
-        event = AtlasDeletedEvent(**event_data)
+        event = AtlasDeletedEvent.model_validate(event_data)
         logger.info(f"Atlas deleted event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing atlas deleted event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing atlas deleted event: {e}")
 
 
-async def handle_grid_created(event_data: dict[str, Any]) -> None:
+async def handle_grid_created(event_data: EventData) -> None:
     try:
-        event = GridCreatedEvent(**event_data)
+        event = GridCreatedEvent.model_validate(event_data)
         logger.info(f"Grid created event: {event.model_dump()}")
         try:
             await initialise_all_models_for_grid(event.uuid)
             logger.info(f"Successfully initialised prediction model weights for grid {event.uuid}")
         except Exception as weight_init_error:
+            record_handler_failure()
             logger.error(f"Failed to initialise prediction model weights for grid {event.uuid}: {weight_init_error}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing grid created event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing grid created event: {e}")
 
 
-async def handle_grid_updated(event_data: dict[str, Any]) -> None:
+async def handle_grid_updated(event_data: EventData) -> None:
     try:
-        event = GridUpdatedEvent(**event_data)
+        event = GridUpdatedEvent.model_validate(event_data)
         logger.info(f"Grid updated event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing grid updated event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing grid updated event: {e}")
 
 
-async def handle_grid_deleted(event_data: dict[str, Any]) -> None:
+async def handle_grid_deleted(event_data: EventData) -> None:
     try:
-        event = GridDeletedEvent(**event_data)
+        event = GridDeletedEvent.model_validate(event_data)
         logger.info(f"Grid deleted event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing grid deleted event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing grid deleted event: {e}")
 
 
-async def handle_grid_registered(event_data: dict[str, Any]) -> None:
+async def handle_grid_registered(event_data: EventData) -> None:
     try:
-        event = GridRegisteredEvent(**event_data)
+        event = GridRegisteredEvent.model_validate(event_data)
         logger.info(f"Grid registered event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing grid registered event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing grid registered event: {e}")
 
 
-async def handle_gridsquare_lowmag_created(event_data: dict[str, Any]) -> None:
+async def handle_gridsquare_lowmag_created(event_data: EventData) -> None:
     try:
-        event = GridSquareCreatedEvent(**event_data)
+        event = GridSquareCreatedEvent.model_validate(event_data)
         logger.info(f"GridSquare low mag created event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing gridsquare created event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing gridsquare created event: {e}")
 
 
-async def handle_gridsquare_created(event_data: dict[str, Any]) -> None:
+async def handle_gridsquare_created(event_data: EventData) -> None:
     try:
-        event = GridSquareCreatedEvent(**event_data)
+        event = GridSquareCreatedEvent.model_validate(event_data)
         logger.info(f"GridSquare created event: {event.model_dump()}")
+        if event.announced_in_batch:
+            # seeded by the gridsquares.created event published with it
+            return
         try:
-            await generate_predictions_for_gridsquare(event.uuid, event.grid_uuid)
+            await seed_gridsquare_predictions([event.uuid])
             logger.info(f"Successfully generated predictions for gridsquare {event.uuid}")
         except Exception as prediction_error:
+            record_handler_failure()
             logger.error(f"Failed to generate predictions for gridsquare {event.uuid}: {prediction_error}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing gridsquare created event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing gridsquare created event: {e}")
 
 
-async def handle_gridsquare_lowmag_updated(event_data: dict[str, Any]) -> None:
+async def handle_gridsquares_created(event_data: EventData) -> None:
     try:
-        event = GridSquareUpdatedEvent(**event_data)
+        event = GridSquaresCreatedEvent.model_validate(event_data)
+        logger.info(f"GridSquares created event: {len(event.uuids)} squares on grid {event.grid_uuid}")
+        try:
+            await seed_gridsquare_predictions(event.uuids)
+        except Exception as prediction_error:
+            record_handler_failure()
+            logger.error(
+                f"Failed to generate predictions for gridsquares on grid {event.grid_uuid}: {prediction_error}"
+            )
+    except ValidationError as e:
+        record_handler_failure()
+        logger.error(f"Validation error processing gridsquares created event: {e}")
+    except Exception as e:
+        record_handler_failure()
+        logger.error(f"Error processing gridsquares created event: {e}")
+
+
+async def handle_gridsquare_lowmag_updated(event_data: EventData) -> None:
+    try:
+        event = GridSquareUpdatedEvent.model_validate(event_data)
         logger.info(f"GridSquare low mag updated event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing gridsquare low mag updated event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing gridsquare low mag updated event: {e}")
 
 
-async def handle_gridsquare_updated(event_data: dict[str, Any]) -> None:
+async def handle_gridsquare_updated(event_data: EventData) -> None:
     try:
-        event = GridSquareUpdatedEvent(**event_data)
+        event = GridSquareUpdatedEvent.model_validate(event_data)
         logger.info(f"GridSquare updated event: {event.model_dump()}")
+        if event.image_path:
+            get_image_cache().schedule_prewarm(Path(event.image_path))
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing gridsquare updated event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing gridsquare updated event: {e}")
 
 
-async def handle_gridsquare_lowmag_deleted(event_data: dict[str, Any]) -> None:
+async def handle_gridsquare_lowmag_deleted(event_data: EventData) -> None:
     try:
-        event = GridSquareDeletedEvent(**event_data)
+        event = GridSquareDeletedEvent.model_validate(event_data)
         logger.info(f"GridSquare low mag deleted event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing low mag gridsquare deleted event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing low mag gridsquare deleted event: {e}")
 
 
-async def handle_gridsquare_deleted(event_data: dict[str, Any]) -> None:
+async def handle_gridsquare_deleted(event_data: EventData) -> None:
     try:
-        event = GridSquareDeletedEvent(**event_data)
+        event = GridSquareDeletedEvent.model_validate(event_data)
         logger.info(f"GridSquare deleted event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing gridsquare deleted event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing gridsquare deleted event: {e}")
 
 
-async def handle_gridsquare_registered(event_data: dict[str, Any]) -> None:
+async def handle_gridsquare_registered(event_data: EventData) -> None:
     try:
-        event = GridSquareRegisteredEvent(**event_data)
+        event = GridSquareRegisteredEvent.model_validate(event_data)
         logger.info(f"Grid square registered event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing grid square registered event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing grid square registered event: {e}")
 
 
-async def handle_foilhole_created(event_data: dict[str, Any]) -> None:
+async def handle_foilhole_created(event_data: EventData) -> None:
     try:
-        event = FoilHoleCreatedEvent(**event_data)
+        event = FoilHoleCreatedEvent.model_validate(event_data)
         logger.info(f"FoilHole created event: {event.model_dump()}")
+        if event.announced_in_batch:
+            # seeded by the foilholes.created event published with it
+            return
         try:
-            await generate_predictions_for_foilhole(event.uuid, event.gridsquare_uuid)
+            await seed_foilhole_predictions([event.uuid], event.gridsquare_uuid)
             logger.info(f"Successfully generated predictions for foilhole {event.uuid}")
         except Exception as prediction_error:
+            record_handler_failure()
             logger.error(f"Failed to generate predictions for foilhole {event.uuid}: {prediction_error}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing foilhole created event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing foilhole created event: {e}")
 
 
-async def handle_foilhole_updated(event_data: dict[str, Any]) -> None:
+async def handle_foilholes_created(event_data: EventData) -> None:
     try:
-        event = FoilHoleUpdatedEvent(**event_data)
+        event = FoilHolesCreatedEvent.model_validate(event_data)
+        logger.info(f"FoilHoles created event: {len(event.uuids)} holes on gridsquare {event.gridsquare_uuid}")
+        try:
+            await seed_foilhole_predictions(event.uuids, event.gridsquare_uuid)
+        except Exception as prediction_error:
+            record_handler_failure()
+            logger.error(f"Failed to generate predictions for foilholes on {event.gridsquare_uuid}: {prediction_error}")
+    except ValidationError as e:
+        record_handler_failure()
+        logger.error(f"Validation error processing foilholes created event: {e}")
+    except Exception as e:
+        record_handler_failure()
+        logger.error(f"Error processing foilholes created event: {e}")
+
+
+async def handle_foilholes_created_batch(events_data: list[EventData]) -> None:
+    events = [FoilHolesCreatedEvent.model_validate(event_data) for event_data in events_data]
+    uuids_by_square: dict[str, list[str]] = {}
+    for event in events:
+        uuids_by_square.setdefault(event.gridsquare_uuid, []).extend(event.uuids)
+    for gridsquare_uuid, uuids in uuids_by_square.items():
+        await seed_foilhole_predictions(uuids, gridsquare_uuid)
+    logger.info(f"Generated predictions for {len(events)} batches of created foilholes")
+
+
+async def handle_foilhole_updated(event_data: EventData) -> None:
+    try:
+        event = FoilHoleUpdatedEvent.model_validate(event_data)
         logger.info(f"FoilHole updated event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing foilhole updated event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing foilhole updated event: {e}")
 
 
-async def handle_foilhole_deleted(event_data: dict[str, Any]) -> None:
+async def handle_foilhole_deleted(event_data: EventData) -> None:
     try:
-        event = FoilHoleDeletedEvent(**event_data)
+        event = FoilHoleDeletedEvent.model_validate(event_data)
         logger.info(f"FoilHole deleted event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing foilhole deleted event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing foilhole deleted event: {e}")
 
 
-async def handle_micrograph_created(event_data: dict[str, Any]) -> None:
+async def handle_micrograph_created(event_data: EventData) -> None:
     try:
-        event = MicrographCreatedEvent(**event_data)
+        event = MicrographCreatedEvent.model_validate(event_data)
         logger.info(f"Micrograph created event: {event.model_dump()}")
         try:
             await simulate_processing_pipeline_async(event.uuid)
             logger.info(f"Started processing pipeline simulation for micrograph {event.uuid}")
         except Exception as simulation_error:
+            record_handler_failure()
             logger.error(f"Failed to start processing simulation for micrograph {event.uuid}: {simulation_error}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing micrograph created event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing micrograph created event: {e}")
 
 
-async def handle_micrograph_updated(event_data: dict[str, Any]) -> None:
+async def handle_micrograph_created_batch(events_data: list[EventData]) -> None:
+    events = [MicrographCreatedEvent.model_validate(event_data) for event_data in events_data]
+    for event in events:
+        await simulate_processing_pipeline_async(event.uuid)
+    logger.info(f"Started processing pipeline simulation for a batch of {len(events)} micrographs")
+
+
+async def handle_micrograph_updated(event_data: EventData) -> None:
     try:
-        event = MicrographUpdatedEvent(**event_data)
+        event = MicrographUpdatedEvent.model_validate(event_data)
         logger.info(f"Micrograph updated event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing micrograph updated event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing micrograph updated event: {e}")
 
 
-async def handle_micrograph_deleted(event_data: dict[str, Any]) -> None:
+async def handle_micrograph_deleted(event_data: EventData) -> None:
     try:
-        event = MicrographDeletedEvent(**event_data)
+        event = MicrographDeletedEvent.model_validate(event_data)
         logger.info(f"Micrograph deleted event: {event.model_dump()}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing micrograph deleted event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing micrograph deleted event: {e}")
 
 
-async def _check_against_statistics(
+async def _record_metric(
+    session: AsyncSession,
     metric_name: str,
     micrograph_uuid: str,
-    comparison_value: float,
+    value: float,
     larger_better: bool = False,
-) -> float:
-    async with SessionLocal() as session:
-        grid_row = (
+) -> tuple[str, float]:
+    grid_uuid = (
+        await session.execute(
+            select(GridSquare.grid_uuid)
+            .where(GridSquare.uuid == FoilHole.gridsquare_uuid)
+            .where(FoilHole.uuid == Micrograph.foilhole_uuid)
+            .where(Micrograph.uuid == micrograph_uuid)
+        )
+    ).scalar_one()
+    (quality,) = await record_metric_values(session, grid_uuid, metric_name, [value], larger_better=larger_better)
+    await session.commit()
+    return grid_uuid, float(quality)
+
+
+async def _touch_micrograph(session: AsyncSession, micrograph_uuid: str) -> None:
+    micrograph = (await session.execute(select(Micrograph).where(Micrograph.uuid == micrograph_uuid))).scalars().first()
+    if micrograph:
+        micrograph.updated_at = datetime.now()
+        await session.commit()
+
+
+async def _record_metric_batch(
+    session: AsyncSession,
+    metric_name: str,
+    micrograph_uuids: list[str],
+    values: list[float],
+    larger_better: bool = False,
+) -> list[tuple[str, float]]:
+    """Batch form of `_record_metric`, updating each grid's statistics once for all of its micrographs
+
+    Unlike `_record_metric` it does not commit, so the caller can commit the statistics with its other writes.
+    """
+    grid_uuids = dict(
+        (
             await session.execute(
-                select(GridSquare, FoilHole, Micrograph)
+                select(Micrograph.uuid, GridSquare.grid_uuid)
                 .where(GridSquare.uuid == FoilHole.gridsquare_uuid)
                 .where(FoilHole.uuid == Micrograph.foilhole_uuid)
-                .where(Micrograph.uuid == micrograph_uuid)
+                .where(Micrograph.uuid.in_(micrograph_uuids))
             )
-        ).one()
-        grid_uuid = grid_row[0].grid_uuid
-        metric_stats = (
-            (
-                await session.execute(
-                    select(QualityMetricStatistics)
-                    .where(QualityMetricStatistics.grid_uuid == grid_uuid)
-                    .where(QualityMetricStatistics.name == metric_name)
-                )
-            )
-            .scalars()
-            .all()
+        ).all()
+    )
+    if missing := set(micrograph_uuids) - grid_uuids.keys():
+        raise ValueError(f"No grid found for micrographs {sorted(missing)}")
+    indices_by_grid: dict[str, list[int]] = {}
+    for index, micrograph_uuid in enumerate(micrograph_uuids):
+        indices_by_grid.setdefault(grid_uuids[micrograph_uuid], []).append(index)
+    qualities = [0.0] * len(micrograph_uuids)
+    for grid_uuid, indices in indices_by_grid.items():
+        scored = await record_metric_values(
+            session, grid_uuid, metric_name, [values[i] for i in indices], larger_better=larger_better
         )
-    if not metric_stats:
-        return 1
-    elif metric_stats[0].count < 2:
-        if comparison_value == metric_stats[0].value_sum / metric_stats[0].count:
-            return 0.5
-        elif comparison_value > metric_stats[0].value_sum / metric_stats[0].count:
-            return 1 if larger_better else 0
-        else:
-            return 0 if larger_better else 1
-    else:
-        metric_mean = metric_stats[0].value_sum / metric_stats[0].count
-        metric_var = metric_stats[0].squared_value_sum / (metric_stats[0].count - 1)
-        cdf_value = float(scipy.stats.norm(metric_mean, np.sqrt(metric_var)).cdf(comparison_value))
-        return cdf_value if larger_better else 1 - cdf_value
+        for index, quality in zip(indices, scored, strict=True):
+            qualities[index] = float(quality)
+    return [
+        (grid_uuids[micrograph_uuid], quality)
+        for micrograph_uuid, quality in zip(micrograph_uuids, qualities, strict=True)
+    ]
+
+
+async def _processing_complete_batch(
+    metric_name: str,
+    micrograph_uuids: list[str],
+    values: list[float],
+    publish: Callable[..., Awaitable[bool]],
+    larger_better: bool = False,
+    touch_micrographs: bool = True,
+) -> None:
+    # Everything is committed together, so a batch that fails part way leaves nothing behind for the
+    # one-at-a-time fallback to record a second time
+    async with SessionLocal() as session:
+        scored = await _record_metric_batch(session, metric_name, micrograph_uuids, values, larger_better)
+        for micrograph_uuid, (_, quality) in zip(micrograph_uuids, scored, strict=True):
+            await prior_update(quality, micrograph_uuid, metric_name, session, commit=False)
+        if touch_micrographs:
+            await session.execute(
+                update(Micrograph).where(Micrograph.uuid.in_(micrograph_uuids)).values(updated_at=datetime.now())
+            )
+        await session.commit()
+    for grid_uuid in {grid_uuid for grid_uuid, _ in scored}:
+        _mark_grid_dirty(grid_uuid)
+    for micrograph_uuid, (_, quality) in zip(micrograph_uuids, scored, strict=True):
+        await publish(micrograph_uuid, quality >= 0.5, metric_name=metric_name)
 
 
-async def handle_motion_correction_complete(event_data: dict[str, Any]) -> None:
+async def handle_motion_correction_complete(event_data: EventData) -> None:
     try:
-        event = MotionCorrectionCompleteBody(**event_data)
-        quality = await _check_against_statistics("motioncorrection", event.micrograph_uuid, event.total_motion)
+        event = MotionCorrectionCompleteBody.model_validate(event_data)
         async with SessionLocal() as session:
-            grid_row = (
-                await session.execute(
-                    select(GridSquare, FoilHole, Micrograph)
-                    .where(GridSquare.uuid == FoilHole.gridsquare_uuid)
-                    .where(FoilHole.uuid == Micrograph.foilhole_uuid)
-                    .where(Micrograph.uuid == event.micrograph_uuid)
-                )
-            ).one()
-            grid_uuid = grid_row[0].grid_uuid
-            metric_stats = (
-                (
-                    await session.execute(
-                        select(QualityMetricStatistics)
-                        .where(QualityMetricStatistics.grid_uuid == grid_uuid)
-                        .where(QualityMetricStatistics.name == "motioncorrection")
-                    )
-                )
-                .scalars()
-                .all()
+            grid_uuid, quality = await _record_metric(
+                session, "motioncorrection", event.micrograph_uuid, event.total_motion
             )
-            if not metric_stats:
-                updated_metric_stats = QualityMetricStatistics(
-                    grid_uuid=grid_uuid,
-                    name="motioncorrection",
-                    count=1,
-                    value_sum=event.total_motion,
-                    squared_value_sum=0,
-                )
-            else:
-                updated_metric_stats = metric_stats[0]
-                old_diff = event.total_motion - (updated_metric_stats.value_sum / updated_metric_stats.count)
-                updated_metric_stats.count += 1
-                updated_metric_stats.value_sum += event.total_motion
-                updated_metric_stats.squared_value_sum += old_diff * (
-                    event.total_motion - (updated_metric_stats.value_sum / updated_metric_stats.count)
-                )
-            session.add(updated_metric_stats)
-            await session.commit()
             await prior_update(quality, event.micrograph_uuid, "motioncorrection", session)
-            micrograph = (
-                (await session.execute(select(Micrograph).where(Micrograph.uuid == event.micrograph_uuid)))
-                .scalars()
-                .first()
-            )
-            if micrograph:
-                micrograph.updated_at = datetime.now()
-                await session.commit()
+            _mark_grid_dirty(grid_uuid)
+            await _touch_micrograph(session, event.micrograph_uuid)
         await publish_motion_correction_registered(
             event.micrograph_uuid, quality >= 0.5, metric_name="motioncorrection"
         )
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing motion correction event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing motion correction event: {e}")
 
 
-async def handle_ctf_estimation_complete(event_data: dict[str, Any]) -> None:
+async def handle_ctf_estimation_complete(event_data: EventData) -> None:
     try:
-        event = CtfCompleteBody(**event_data)
-        quality = await _check_against_statistics(
-            "ctfmaxresolution", event.micrograph_uuid, event.ctf_max_resolution_estimate
-        )
+        event = CtfCompleteBody.model_validate(event_data)
         async with SessionLocal() as session:
-            grid_row = (
-                await session.execute(
-                    select(GridSquare, FoilHole, Micrograph)
-                    .where(GridSquare.uuid == FoilHole.gridsquare_uuid)
-                    .where(FoilHole.uuid == Micrograph.foilhole_uuid)
-                    .where(Micrograph.uuid == event.micrograph_uuid)
-                )
-            ).one()
-            grid_uuid = grid_row[0].grid_uuid
-            metric_stats = (
-                (
-                    await session.execute(
-                        select(QualityMetricStatistics)
-                        .where(QualityMetricStatistics.grid_uuid == grid_uuid)
-                        .where(QualityMetricStatistics.name == "ctfmaxresolution")
-                    )
-                )
-                .scalars()
-                .all()
+            grid_uuid, quality = await _record_metric(
+                session, "ctfmaxresolution", event.micrograph_uuid, event.ctf_max_resolution_estimate
             )
-            if not metric_stats:
-                updated_metric_stats = QualityMetricStatistics(
-                    grid_uuid=grid_uuid,
-                    name="ctfmaxresolution",
-                    count=1,
-                    value_sum=event.ctf_max_resolution_estimate,
-                    squared_value_sum=0,
-                )
-            else:
-                updated_metric_stats = metric_stats[0]
-                old_diff = event.ctf_max_resolution_estimate - (
-                    updated_metric_stats.value_sum / updated_metric_stats.count
-                )
-                updated_metric_stats.count += 1
-                updated_metric_stats.value_sum += event.ctf_max_resolution_estimate
-                updated_metric_stats.squared_value_sum += old_diff * (
-                    event.ctf_max_resolution_estimate - (updated_metric_stats.value_sum / updated_metric_stats.count)
-                )
-            session.add(updated_metric_stats)
-            await session.commit()
             await prior_update(quality, event.micrograph_uuid, "ctfmaxresolution", session)
-            micrograph = (
-                (await session.execute(select(Micrograph).where(Micrograph.uuid == event.micrograph_uuid)))
-                .scalars()
-                .first()
-            )
-            if micrograph:
-                micrograph.updated_at = datetime.now()
-                await session.commit()
+            _mark_grid_dirty(grid_uuid)
+            await _touch_micrograph(session, event.micrograph_uuid)
         await publish_ctf_estimation_registered(event.micrograph_uuid, quality >= 0.5, metric_name="ctfmaxresolution")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing ctf event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing ctf event: {e}")
 
 
-async def handle_particle_picking_complete(event_data: dict[str, Any]) -> None:
+async def handle_particle_picking_complete(event_data: EventData) -> None:
     try:
-        event = ParticlePickingCompleteBody(**event_data)
-        quality = await _check_against_statistics(
-            "numparticles", event.micrograph_uuid, event.number_of_particles_picked, larger_better=True
-        )
+        event = ParticlePickingCompleteBody.model_validate(event_data)
         async with SessionLocal() as session:
-            grid_row = (
-                await session.execute(
-                    select(GridSquare, FoilHole, Micrograph)
-                    .where(GridSquare.uuid == FoilHole.gridsquare_uuid)
-                    .where(FoilHole.uuid == Micrograph.foilhole_uuid)
-                    .where(Micrograph.uuid == event.micrograph_uuid)
-                )
-            ).one()
-            grid_uuid = grid_row[0].grid_uuid
-            metric_stats = (
-                (
-                    await session.execute(
-                        select(QualityMetricStatistics)
-                        .where(QualityMetricStatistics.grid_uuid == grid_uuid)
-                        .where(QualityMetricStatistics.name == "numparticles")
-                    )
-                )
-                .scalars()
-                .all()
+            grid_uuid, quality = await _record_metric(
+                session, "numparticles", event.micrograph_uuid, event.number_of_particles_picked, larger_better=True
             )
-            if not metric_stats:
-                updated_metric_stats = QualityMetricStatistics(
-                    grid_uuid=grid_uuid,
-                    name="numparticles",
-                    count=1,
-                    value_sum=event.number_of_particles_picked,
-                    squared_value_sum=0,
-                )
-            else:
-                updated_metric_stats = metric_stats[0]
-                old_diff = event.number_of_particles_picked - (
-                    updated_metric_stats.value_sum / updated_metric_stats.count
-                )
-                updated_metric_stats.count += 1
-                updated_metric_stats.value_sum += event.number_of_particles_picked
-                updated_metric_stats.squared_value_sum += old_diff * (
-                    event.number_of_particles_picked - (updated_metric_stats.value_sum / updated_metric_stats.count)
-                )
-            session.add(updated_metric_stats)
-            await session.commit()
             await prior_update(quality, event.micrograph_uuid, "numparticles", session)
+            _mark_grid_dirty(grid_uuid)
         await publish_particle_picking_registered(event.micrograph_uuid, quality >= 0.5, metric_name="numparticles")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing particle picking event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing particle picking event: {e}")
 
 
-async def handle_gridsquare_model_prediction(event_data: dict[str, Any]) -> None:
+async def handle_motion_correction_complete_batch(events_data: list[EventData]) -> None:
+    events = [MotionCorrectionCompleteBody.model_validate(event_data) for event_data in events_data]
+    await _processing_complete_batch(
+        "motioncorrection",
+        [event.micrograph_uuid for event in events],
+        [event.total_motion for event in events],
+        publish_motion_correction_registered,
+    )
+
+
+async def handle_ctf_estimation_complete_batch(events_data: list[EventData]) -> None:
+    events = [CtfCompleteBody.model_validate(event_data) for event_data in events_data]
+    await _processing_complete_batch(
+        "ctfmaxresolution",
+        [event.micrograph_uuid for event in events],
+        [event.ctf_max_resolution_estimate for event in events],
+        publish_ctf_estimation_registered,
+    )
+
+
+async def handle_particle_picking_complete_batch(events_data: list[EventData]) -> None:
+    events = [ParticlePickingCompleteBody.model_validate(event_data) for event_data in events_data]
+    await _processing_complete_batch(
+        "numparticles",
+        [event.micrograph_uuid for event in events],
+        [event.number_of_particles_picked for event in events],
+        publish_particle_picking_registered,
+        larger_better=True,
+        touch_micrographs=False,
+    )
+
+
+async def handle_gridsquare_model_prediction(event_data: EventData) -> None:
     try:
-        event = GridSquareModelPredictionEvent(**event_data)
-        quality_prediction = QualityPrediction(
-            gridsquare_uuid=event.gridsquare_uuid,
-            prediction_model_name=event.prediction_model_name,
-            value=event.prediction_value,
-            metric_name=event.metric,
-        )
+        event = GridSquareModelPredictionEvent.model_validate(event_data)
         async with SessionLocal() as session:
-            session.add(quality_prediction)
             current_quality_prediction = (
                 (
                     await session.execute(
@@ -623,25 +705,30 @@ async def handle_gridsquare_model_prediction(event_data: dict[str, Any]) -> None
                 )
             else:
                 current_quality_prediction.value = event.prediction_value
+            session.add(
+                QualityPrediction(
+                    grid_uuid=current_quality_prediction.grid_uuid,
+                    gridsquare_uuid=event.gridsquare_uuid,
+                    prediction_model_name=event.prediction_model_name,
+                    value=event.prediction_value,
+                    metric_name=event.metric,
+                )
+            )
             session.add(current_quality_prediction)
             await session.commit()
+        _mark_grid_dirty(current_quality_prediction.grid_uuid)
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing grid square model prediction event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing grid square model prediction event: {e}")
 
 
-async def handle_foilhole_model_prediction(event_data: dict[str, Any]) -> None:
+async def handle_foilhole_model_prediction(event_data: EventData) -> None:
     try:
-        event = FoilHoleModelPredictionEvent(**event_data)
-        quality_prediction = QualityPrediction(
-            foilhole_uuid=event.foilhole_uuid,
-            prediction_model_name=event.prediction_model_name,
-            value=event.prediction_value,
-            metric_name=event.metric,
-        )
+        event = FoilHoleModelPredictionEvent.model_validate(event_data)
         async with SessionLocal() as session:
-            session.add(quality_prediction)
             current_quality_prediction = (
                 (
                     await session.execute(
@@ -673,28 +760,100 @@ async def handle_foilhole_model_prediction(event_data: dict[str, Any]) -> None:
                 )
             else:
                 current_quality_prediction.value = event.prediction_value
+            session.add(
+                QualityPrediction(
+                    grid_uuid=current_quality_prediction.grid_uuid,
+                    foilhole_uuid=event.foilhole_uuid,
+                    prediction_model_name=event.prediction_model_name,
+                    value=event.prediction_value,
+                    metric_name=event.metric,
+                )
+            )
             session.add(current_quality_prediction)
             await session.commit()
+        _mark_grid_dirty(current_quality_prediction.grid_uuid)
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing foil hole model prediction event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing foil hole model prediction event: {e}")
 
 
-async def handle_multi_foilhole_model_prediction(event_data: dict[str, Any]) -> None:
-    try:
-        event = MultiFoilHoleModelPredictionEvent(**event_data)
-        quality_predictions = [
-            QualityPrediction(
-                foilhole_uuid=fhuuid,
-                prediction_model_name=event.prediction_model_name,
-                value=event.prediction_value,
-                metric_name=event.metric,
+async def handle_foilhole_model_prediction_batch(events_data: list[EventData]) -> None:
+    events = [FoilHoleModelPredictionEvent.model_validate(event_data) for event_data in events_data]
+    async with SessionLocal() as session:
+        current = {
+            (prediction.foilhole_uuid, prediction.prediction_model_name, prediction.metric_name): prediction
+            for prediction in (
+                await session.execute(
+                    select(CurrentQualityPrediction)
+                    .where(CurrentQualityPrediction.foilhole_uuid.in_({event.foilhole_uuid for event in events}))
+                    .where(
+                        CurrentQualityPrediction.prediction_model_name.in_(
+                            {event.prediction_model_name for event in events}
+                        )
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        }
+        unseen = {
+            event.foilhole_uuid
+            for event in events
+            if (event.foilhole_uuid, event.prediction_model_name, event.metric) not in current
+        }
+        squares = {}
+        if unseen:
+            squares = {
+                foilhole_uuid: (gridsquare_uuid, grid_uuid)
+                for foilhole_uuid, gridsquare_uuid, grid_uuid in (
+                    await session.execute(
+                        select(FoilHole.uuid, GridSquare.uuid, GridSquare.grid_uuid)
+                        .where(GridSquare.uuid == FoilHole.gridsquare_uuid)
+                        .where(FoilHole.uuid.in_(unseen))
+                    )
+                ).all()
+            }
+        if missing := unseen - squares.keys():
+            raise ValueError(f"No grid square found for foilholes {sorted(missing)}")
+        touched = {}
+        for event in events:
+            key = (event.foilhole_uuid, event.prediction_model_name, event.metric)
+            current_quality_prediction = current.get(key)
+            if current_quality_prediction is None:
+                gridsquare_uuid, grid_uuid = squares[event.foilhole_uuid]
+                current_quality_prediction = current[key] = CurrentQualityPrediction(
+                    grid_uuid=grid_uuid,
+                    gridsquare_uuid=gridsquare_uuid,
+                    foilhole_uuid=event.foilhole_uuid,
+                    prediction_model_name=event.prediction_model_name,
+                    value=event.prediction_value,
+                    metric_name=event.metric,
+                )
+            else:
+                current_quality_prediction.value = event.prediction_value
+            touched[key] = current_quality_prediction
+            session.add(
+                QualityPrediction(
+                    grid_uuid=current_quality_prediction.grid_uuid,
+                    foilhole_uuid=event.foilhole_uuid,
+                    prediction_model_name=event.prediction_model_name,
+                    value=event.prediction_value,
+                    metric_name=event.metric,
+                )
             )
-            for fhuuid in event.foilhole_uuids
-        ]
+        session.add_all(list(touched.values()))
+        await session.commit()
+    for grid_uuid in {prediction.grid_uuid for prediction in touched.values()}:
+        _mark_grid_dirty(grid_uuid)
+
+
+async def handle_multi_foilhole_model_prediction(event_data: EventData) -> None:
+    try:
+        event = MultiFoilHoleModelPredictionEvent.model_validate(event_data)
         async with SessionLocal() as session:
-            session.add_all(quality_predictions)
             current_quality_predictions = list(
                 (
                     await session.execute(
@@ -730,17 +889,45 @@ async def handle_multi_foilhole_model_prediction(event_data: dict[str, Any]) ->
             else:
                 for pred in current_quality_predictions:
                     pred.value = event.prediction_value
+            grid_lookup = {p.foilhole_uuid: p.grid_uuid for p in current_quality_predictions}
+            missing = [fhuuid for fhuuid in event.foilhole_uuids if fhuuid not in grid_lookup]
+            if missing:
+                grid_lookup.update(
+                    (
+                        await session.execute(
+                            select(FoilHole.uuid, GridSquare.grid_uuid)
+                            .where(GridSquare.uuid == FoilHole.gridsquare_uuid)
+                            .where(FoilHole.uuid.in_(missing))
+                        )
+                    ).all()
+                )
+            session.add_all(
+                [
+                    QualityPrediction(
+                        grid_uuid=grid_lookup.get(fhuuid),
+                        foilhole_uuid=fhuuid,
+                        prediction_model_name=event.prediction_model_name,
+                        value=event.prediction_value,
+                        metric_name=event.metric,
+                    )
+                    for fhuuid in event.foilhole_uuids
+                ]
+            )
             session.add_all(current_quality_predictions)
             await session.commit()
+        for grid_uuid in set(grid_lookup.values()) - {None}:
+            _mark_grid_dirty(grid_uuid)
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing multiple foil hole model prediction event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing multiple foil hole model prediction event: {e}")
 
 
-async def handle_create_foilhole_group(event_data: dict[str, Any]) -> None:
+async def handle_create_foilhole_group(event_data: EventData) -> None:
     try:
-        event = CreateFoilHoleGroupEvent(**event_data)
+        event = CreateFoilHoleGroupEvent.model_validate(event_data)
         async with SessionLocal() as session:
             group = (
                 (await session.execute(select(FoilHoleGroup).where(FoilHoleGroup.uuid == event.group_uuid)))
@@ -781,14 +968,16 @@ async def handle_create_foilhole_group(event_data: dict[str, Any]) -> None:
                 session.add_all(new_memberships)
             await session.commit()
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing create foil hole group event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing create foil hole group event: {e}")
 
 
-async def handle_foilhole_group_model_prediction(event_data: dict[str, Any]) -> None:
+async def handle_foilhole_group_model_prediction(event_data: EventData) -> None:
     try:
-        event = FoilHoleGroupModelPredictionEvent(**event_data)
+        event = FoilHoleGroupModelPredictionEvent.model_validate(event_data)
         async with SessionLocal() as session:
             group = (
                 (await session.execute(select(FoilHoleGroup).where(FoilHoleGroup.uuid == event.group_uuid)))
@@ -829,27 +1018,44 @@ async def handle_foilhole_group_model_prediction(event_data: dict[str, Any]) ->
             else:
                 existing.value = event.prediction_value
             await session.commit()
+        _mark_grid_dirty(group.grid_uuid)
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing foil hole group model prediction event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing foil hole group model prediction event: {e}")
 
 
-async def handle_refresh_predictions(event_data: dict[str, Any]) -> None:
+async def _refresh_grid_predictions(grid_uuid: str) -> None:
+    async with SessionLocal() as session:
+        await overall_predictions_update(grid_uuid, session)
+        await ordered_holes(grid_uuid, session)
+
+
+def _mark_grid_dirty(grid_uuid: str) -> None:
+    if refresh_scheduler is not None:
+        refresh_scheduler.mark_dirty(grid_uuid)
+
+
+async def handle_refresh_predictions(event_data: EventData) -> None:
     try:
-        event = RefreshPredictionsEvent(**event_data)
-        async with SessionLocal() as session:
-            await overall_predictions_update(event.grid_uuid, session)
-            await ordered_holes(event.grid_uuid, session)
+        event = RefreshPredictionsEvent.model_validate(event_data)
+        if refresh_scheduler is not None:
+            refresh_scheduler.mark_dirty(event.grid_uuid)
+        else:
+            await _refresh_grid_predictions(event.grid_uuid)
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing refresh predictions event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing refresh predictions event: {e}")
 
 
-async def handle_model_parameter_update(event_data: dict[str, Any]) -> None:
+async def handle_model_parameter_update(event_data: EventData) -> None:
     try:
-        event = ModelParameterUpdateEvent(**event_data)
+        event = ModelParameterUpdateEvent.model_validate(event_data)
         model_parameter = QualityPredictionModelParameter(
             grid_uuid=event.grid_uuid,
             prediction_model_name=event.prediction_model_name,
@@ -862,8 +1068,10 @@ async def handle_model_parameter_update(event_data: dict[str, Any]) -> None:
             session.add(model_parameter)
             await session.commit()
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing model parameter update event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing model parameter update event: {e}")
 
 
@@ -917,6 +1125,7 @@ async def handle_external_gridsquare_model_prediction(event_data: dict[str, Any]
             else:
                 logger.error(f"Failed to generate instruction for agent {session.agent_id}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing external gridsquare model prediction: {e}")
 
 
@@ -955,6 +1164,7 @@ async def handle_external_foilhole_model_prediction(event_data: dict[str, Any])
         else:
             logger.info(f"No high quality foilholes found for gridsquare {gridsquare_id}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing external foilhole model prediction: {e}")
 
 
@@ -977,9 +1187,9 @@ async def handle_foilhole_model_prediction_router(event_data: dict[str, Any]) ->
 # ============ Agent Communication Events ============
 
 
-async def handle_agent_instruction_created(event_data: dict[str, Any]) -> None:
+async def handle_agent_instruction_created(event_data: EventData) -> None:
     try:
-        event = AgentInstructionCreatedEvent(**event_data)
+        event = AgentInstructionCreatedEvent.model_validate(event_data)
         logger.info(f"Agent instruction created event: {event.model_dump()}")
 
         async with SessionLocal() as session:
@@ -1009,14 +1219,16 @@ async def handle_agent_instruction_created(event_data: dict[str, Any]) -> None:
             await session.commit()
         logger.info(f"Successfully persisted instruction {event.instruction_id} to database")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing agent instruction created event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing agent instruction created event: {e}")
 
 
-async def handle_agent_instruction_updated(event_data: dict[str, Any]) -> None:
+async def handle_agent_instruction_updated(event_data: EventData) -> None:
     try:
-        event = AgentInstructionUpdatedEvent(**event_data)
+        event = AgentInstructionUpdatedEvent.model_validate(event_data)
         logger.info(f"Agent instruction updated event: {event.model_dump()}")
 
         async with SessionLocal() as session:
@@ -1038,14 +1250,16 @@ async def handle_agent_instruction_updated(event_data: dict[str, Any]) -> None:
             await session.commit()
         logger.info(f"Updated instruction {event.instruction_id} status to {event.status}")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing agent instruction updated event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing agent instruction updated event: {e}")
 
 
-async def handle_agent_instruction_expired(event_data: dict[str, Any]) -> None:
+async def handle_agent_instruction_expired(event_data: EventData) -> None:
     try:
-        event = AgentInstructionExpiredEvent(**event_data)
+        event = AgentInstructionExpiredEvent.model_validate(event_data)
         logger.info(f"Agent instruction expired event: {event.model_dump()}")
 
         async with SessionLocal() as session:
@@ -1075,8 +1289,10 @@ async def handle_agent_instruction_expired(event_data: dict[str, Any]) -> None:
         else:
             logger.info(f"Instruction {event.instruction_id} reset for retry ({event.retry_count})")
     except ValidationError as e:
+        record_handler_failure()
         logger.error(f"Validation error processing agent instruction expired event: {e}")
     except Exception as e:
+        record_handler_failure()
         logger.error(f"Error processing agent instruction expired event: {e}")
 
 
@@ -1092,12 +1308,14 @@ def get_event_handlers() -> dict[str, EventHandler]:
         MessageQueueEventType.GRID_UPDATED.value: handle_grid_updated,
         MessageQueueEventType.GRID_DELETED.value: handle_grid_deleted,
         MessageQueueEventType.GRIDSQUARE_CREATED.value: handle_gridsquare_created,
+        MessageQueueEventType.GRIDSQUARES_CREATED.value: handle_gridsquares_created,
         MessageQueueEventType.GRIDSQUARE_UPDATED.value: handle_gridsquare_updated,
         MessageQueueEventType.GRIDSQUARE_DELETED.value: handle_gridsquare_deleted,
         MessageQueueEventType.GRIDSQUARE_LOWMAG_CREATED.value: handle_gridsquare_lowmag_created,
         MessageQueueEventType.GRIDSQUARE_LOWMAG_UPDATED.value: handle_gridsquare_lowmag_updated,
         MessageQueueEventType.GRIDSQUARE_LOWMAG_DELETED.value: handle_gridsquare_lowmag_deleted,
         MessageQueueEventType.FOILHOLE_CREATED.value: handle_foilhole_created,
+        MessageQueueEventType.FOILHOLES_CREATED.value: handle_foilholes_created,
         MessageQueueEventType.FOILHOLE_UPDATED.value: handle_foilhole_updated,
         MessageQueueEventType.FOILHOLE_DELETED.value: handle_foilhole_deleted,
         MessageQueueEventType.MICROGRAPH_CREATED.value: handle_micrograph_created,
@@ -1119,36 +1337,69 @@ def get_event_handlers() -> dict[str, EventHandler]:
     }
 
 
-async def _on_message(consumer: AioPikaConsumer, message: AbstractIncomingMessage) -> None:
-    """Dispatch an incoming message to its handler and manage ack/retry."""
+def get_batch_event_handlers() -> dict[str, BatchEventHandler]:
+    """Batch variants of the handlers for high-volume event types, used when micro-batching is enabled
+
+    Unlike the per-message handlers they raise on failure, so the batch can be retried one message at a time.
+    """
+    return {
+        MessageQueueEventType.FOILHOLES_CREATED.value: handle_foilholes_created_batch,
+        MessageQueueEventType.MICROGRAPH_CREATED.value: handle_micrograph_created_batch,
+        MessageQueueEventType.FOILHOLE_MODEL_PREDICTION.value: handle_foilhole_model_prediction_batch,
+        MessageQueueEventType.MOTION_CORRECTION_COMPLETE.value: handle_motion_correction_complete_batch,
+        MessageQueueEventType.CTF_COMPLETE.value: handle_ctf_estimation_complete_batch,
+        MessageQueueEventType.PARTICLE_PICKING_COMPLETE.value: handle_particle_picking_complete_batch,
+    }
+
+
+async def _on_message(
+    consumer: AioPikaConsumer, message: AbstractIncomingMessage, dispatcher: MicroBatchDispatcher | None = None
+) -> None:
+    """Dispatch an incoming message to its handler, or to `dispatcher` to batch, and manage ack/retry."""
     retry_count = 0
     if message.headers and "x-retry-count" in message.headers:
         retry_count = int(message.headers["x-retry-count"])
     event_type = "unknown"
 
     try:
-        event_data = decode_event_body(message)
-        logger.info(f"Received message: {event_data}")
-
-        if "event_type" not in event_data:
+        try:
+            event_data = decode_event_body(message)
+        except ValueError as e:
+            logger.error(f"Failed to decode message ({message.content_type}, {message.type}): {e}")
+            consumer_metrics.record_rejected(event_type)
+            await message.reject(requeue=False)
+            return
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Received message: {event_data}")
+
+        # a decoded model was chosen by the message's type; a generic JSON body names its own
+        if isinstance(event_data, BaseModel):
+            event_type = message.type
+        elif "event_type" in event_data:
+            event_type = event_data["event_type"]
+        else:
             logger.warning(f"Message missing 'event_type' field: {event_data}")
+            consumer_metrics.record_rejected(event_type)
             await message.reject(requeue=False)
             return
 
-        event_type = event_data["event_type"]
-        handlers = get_event_handlers()
+        if dispatcher is not None and dispatcher.accepts(event_type):
+            # acked, or handed back to this function without a dispatcher, when its batch is flushed
+            await dispatcher.submit(event_type, event_data, message)
+            return
+
+        handlers = event_handlers if event_handlers is not None else get_event_handlers()
         handler = handlers.get(event_type)
         if handler is None:
             logger.warning(f"No handler registered for event type: {event_type}")
+            consumer_metrics.record_rejected(event_type)
             await message.reject(requeue=False)
             return
 
-        await handler(event_data)
+        with consumer_metrics.track(event_type):
+            await handler(event_data)
         await message.ack()
         logger.debug(f"Successfully processed {event_type} event")
-    except json.JSONDecodeError:
-        logger.error(f"Failed to decode JSON message: {message.body!r}")
-        await message.reject(requeue=False)
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         if retry_count >= 3:
@@ -1164,11 +1415,13 @@ async def _on_message(consumer: AioPikaConsumer, message: AbstractIncomingMessag
             await message.reject(requeue=True)
 
 
-async def _run(consumer: AioPikaConsumer, stop_event: asyncio.Event) -> None:
+async def _run(
+    consumer: AioPikaConsumer, stop_event: asyncio.Event, dispatcher: MicroBatchDispatcher | None = None
+) -> None:
     """Consume until stop_event is set, reconnecting on transport errors."""
 
     async def handler(message: AbstractIncomingMessage) -> None:
-        await _on_message(consumer, message)
+        await _on_message(consumer, message, dispatcher)
 
     while not stop_event.is_set():
         try:
@@ -1215,9 +1468,36 @@ async def amain(verbosity: int) -> None:
     await publisher.connect()
     mq_publisher_module.set_publisher(publisher)
 
-    consumer = AioPikaConsumer(url=url, queue_name=queue_name, exchange_name=exchange_name, prefetch_count=1)
+    # a batch can only fill up if the broker lets that many messages go unacked
+    batching = CONSUMER_BATCH_SIZE > 1
+    consumer = AioPikaConsumer(
+        url=url,
+        queue_name=queue_name,
+        exchange_name=exchange_name,
+        prefetch_count=CONSUMER_BATCH_SIZE if batching else 1,
+    )
     await consumer.connect()
 
+    async def process_one(message: AbstractIncomingMessage) -> None:
+        await _on_message(consumer, message)
+
+    dispatcher = (
+        MicroBatchDispatcher(get_batch_event_handlers(), process_one, metrics=consumer_metrics) if batching else None
+    )
+
+    global event_handlers
+    event_handlers = get_event_handlers()
+    metrics_server = (
+        await serve_metrics(consumer_metrics, CONSUMER_METRICS_HOST, CONSUMER_METRICS_PORT)
+        if CONSUMER_METRICS_PORT
+        else None
+    )
+
+    global refresh_scheduler
+    refresh_scheduler = RefreshScheduler(_refresh_grid_predictions)
+    consumer_metrics.add_section("prediction_refresh", refresh_scheduler.summary)
+    refresh_scheduler.start()
+
     stop_event = asyncio.Event()
     loop = asyncio.get_running_loop()
 
@@ -1233,8 +1513,18 @@ async def amain(verbosity: int) -> None:
             signal.signal(sig, lambda *_: _request_stop())
 
     try:
-        await _run(consumer, stop_event)
+        await _run(consumer, stop_event, dispatcher)
     finally:
+        if dispatcher is not None:
+            try:
+                await dispatcher.stop()
+            except Exception as e:
+                logger.error(f"Error flushing batched messages: {e}")
+        try:
+            await refresh_scheduler.stop()
+        except Exception as e:
+            logger.error(f"Error stopping prediction refresh scheduler: {e}")
+        refresh_scheduler = None
         try:
             await consumer.close()
         except Exception as e:
@@ -1244,6 +1534,9 @@ async def amain(verbosity: int) -> None:
         except Exception as e:
             logger.error(f"Error closing publisher: {e}")
         mq_publisher_module.set_publisher(None)
+        if metrics_server is not None:
+            metrics_server.close()
+            await metrics_server.wait_closed()
 
 
 def main() -> None:
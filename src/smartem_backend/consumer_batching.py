@@ -0,0 +1,105 @@
+"""Micro-batched dispatch of high-volume consumer events.
+
+The consumer handles most messages one at a time, each in its own database
+session and commit. For event types that arrive in bursts, such as foil holes
+and micrographs being created or processing results coming back, a
+`MicroBatchDispatcher` holds decoded messages of the same type until it has
+`max_items` of them or the oldest has waited `max_wait_seconds`, then passes
+their payloads to that type's batch handler in one call.
+
+If the batch handler succeeds every message in the batch is acked. If it
+raises, the batch is processed again one message at a time through the
+consumer's normal per-message path, so a poison message is retried or dropped
+on its own instead of taking the rest of the batch with it. A batch that fails
+after committing part of its work is therefore partly applied twice; batch
+handlers should do their writes in as few commits as possible.
+
+The consumer's prefetch count has to allow at least `max_items` unacked
+messages, otherwise batches are only ever flushed by the timer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable
+
+from aio_pika.abc import AbstractIncomingMessage
+
+from smartem_backend.consumer_metrics import ConsumerMetrics
+from smartem_backend.rmq.codec import EventData
+from smartem_backend.utils import app_config
+
+logger = logging.getLogger(__name__)
+
+_APP_CFG = (app_config or {}).get("app", {}) if isinstance(app_config, dict) else {}
+
+CONSUMER_BATCH_SIZE = int(os.getenv("SMARTEM_CONSUMER_BATCH_SIZE", _APP_CFG.get("consumer_batch_size", 0)))
+CONSUMER_BATCH_WAIT_MS = float(os.getenv("SMARTEM_CONSUMER_BATCH_WAIT_MS", _APP_CFG.get("consumer_batch_wait_ms", 50)))
+
+BatchEventHandler = Callable[[list[EventData]], Awaitable[None]]
+MessageProcessor = Callable[[AbstractIncomingMessage], Awaitable[None]]
+
+
+class MicroBatchDispatcher:
+    def __init__(
+        self,
+        batch_handlers: dict[str, BatchEventHandler],
+        fallback: MessageProcessor,
+        max_items: int = CONSUMER_BATCH_SIZE,
+        max_wait_seconds: float = CONSUMER_BATCH_WAIT_MS / 1e3,
+        metrics: ConsumerMetrics | None = None,
+    ) -> None:
+        self._batch_handlers = batch_handlers
+        self._fallback = fallback
+        self._metrics = metrics or ConsumerMetrics()
+        self.max_items = max(max_items, 1)
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: dict[str, list[tuple[EventData, AbstractIncomingMessage]]] = {}
+        self._timers: dict[str, asyncio.Task] = {}
+
+    def accepts(self, event_type: str) -> bool:
+        return event_type in self._batch_handlers
+
+    async def submit(self, event_type: str, event_data: EventData, message: AbstractIncomingMessage) -> None:
+        """Add a decoded message to its type's batch, flushing the batch once it is full"""
+        batch = self._pending.setdefault(event_type, [])
+        batch.append((event_data, message))
+        if len(batch) >= self.max_items:
+            await self.flush(event_type)
+        elif event_type not in self._timers:
+            self._timers[event_type] = asyncio.create_task(self._flush_later(event_type))
+
+    async def _flush_later(self, event_type: str) -> None:
+        await asyncio.sleep(self.max_wait_seconds)
+        self._timers.pop(event_type, None)
+        await self.flush(event_type)
+
+    async def flush(self, event_type: str) -> None:
+        """Run the batch handler on everything pending for `event_type`, then ack or fall back"""
+        timer = self._timers.pop(event_type, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        batch = self._pending.pop(event_type, [])
+        if not batch:
+            return
+        try:
+            with self._metrics.track(event_type, messages=len(batch), replayed_on_failure=True):
+                await self._batch_handlers[event_type]([event_data for event_data, _ in batch])
+        except Exception as e:
+            logger.warning(f"Batch of {len(batch)} {event_type} events failed ({e}), processing them one at a time")
+            for _, message in batch:
+                await self._fallback(message)
+            return
+        for _, message in batch:
+            try:
+                await message.ack()
+            except Exception as e:
+                logger.error(f"Failed to ack {event_type} message after its batch was processed: {e}")
+        logger.debug(f"Processed batch of {len(batch)} {event_type} events")
+
+    async def stop(self) -> None:
+        """Flush every pending batch"""
+        for event_type in list(self._pending):
+            await self.flush(event_type)
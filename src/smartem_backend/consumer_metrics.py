@@ -0,0 +1,159 @@
+"""Per-event-type instrumentation of the message bus consumer.
+
+`ConsumerMetrics` counts the messages each event type's handler has processed
+and failed, how many are being handled right now, and keeps a latency
+histogram of the handler calls, a call being either one message or one
+micro-batch. `summary()` orders the event types by the total time spent in
+their handlers, so the ones that dominate the consumer's time come first.
+Other consumer components can add their own summary to it with `add_section`.
+
+Most handlers log their errors instead of raising them, so the message is
+still acked. They call `record_handler_failure()` where they do, which counts
+the call being tracked as failed. A micro-batch whose handler raises is
+replayed one message at a time, and only the replayed messages are counted as
+handled or failed, not the batch.
+
+The consumer has no web server of its own; `serve_metrics` answers
+`GET /metrics` on a plain asyncio socket with the summary as JSON. It is
+enabled by setting `consumer_metrics_port`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from smartem_backend.utils import app_config
+from smartem_common.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+_APP_CFG = (app_config or {}).get("app", {}) if isinstance(app_config, dict) else {}
+
+CONSUMER_METRICS_PORT = int(os.getenv("SMARTEM_CONSUMER_METRICS_PORT", _APP_CFG.get("consumer_metrics_port", 0)))
+CONSUMER_METRICS_HOST = os.getenv("SMARTEM_CONSUMER_METRICS_HOST", _APP_CFG.get("consumer_metrics_host", "127.0.0.1"))
+
+
+class _TrackedCall:
+    __slots__ = ("failed",)
+
+    def __init__(self) -> None:
+        self.failed = False
+
+
+_tracked_call: ContextVar[_TrackedCall | None] = ContextVar("consumer_tracked_call", default=None)
+
+
+def record_handler_failure() -> None:
+    """Count the handler call being tracked as failed, for a handler that logs an error instead of raising it"""
+    if (call := _tracked_call.get()) is not None:
+        call.failed = True
+
+
+class ConsumerMetrics:
+    def __init__(self) -> None:
+        self._latency: defaultdict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self._handled: Counter[str] = Counter()
+        self._failed: Counter[str] = Counter()
+        self._in_flight: Counter[str] = Counter()
+        self._rejected: Counter[str] = Counter()
+        self._replayed: Counter[str] = Counter()
+        self._sections: dict[str, Callable[[], dict]] = {}
+        self._start_time = time.time()
+
+    @contextmanager
+    def track(self, event_type: str, messages: int = 1, replayed_on_failure: bool = False) -> Iterator[None]:
+        """Time one handler call for `messages` messages of `event_type`
+
+        The call counts as failed if it raises or reports a failure with `record_handler_failure()`. With
+        `replayed_on_failure`, a call that raises is not counted as handled at all, as its messages are
+        processed again and counted one at a time.
+        """
+        self._in_flight[event_type] += messages
+        call = _TrackedCall()
+        token = _tracked_call.set(call)
+        start = time.perf_counter()
+        replayed = False
+        try:
+            yield
+        except BaseException:
+            replayed = replayed_on_failure
+            call.failed = True
+            raise
+        finally:
+            _tracked_call.reset(token)
+            self._latency[event_type].record((time.perf_counter() - start) * 1e3)
+            self._in_flight[event_type] -= messages
+            if replayed:
+                self._replayed[event_type] += messages
+            else:
+                self._handled[event_type] += messages
+                if call.failed:
+                    self._failed[event_type] += messages
+
+    def record_rejected(self, event_type: str) -> None:
+        self._rejected[event_type] += 1
+
+    def add_section(self, name: str, summary: Callable[[], dict]) -> None:
+        """Include `summary()` under `name` in this summary"""
+        self._sections[name] = summary
+
+    def summary(self) -> dict:
+        # an event type whose first call is still running has no latency yet but is shown in flight
+        histograms = {event_type: LatencyHistogram() for event_type in self._in_flight}
+        histograms.update(self._latency)
+        by_time = sorted(histograms.items(), key=lambda item: item[1].total, reverse=True)
+        return {
+            "uptime_seconds": time.time() - self._start_time,
+            "event_types": {
+                event_type: {
+                    "handled": self._handled[event_type],
+                    "failed": self._failed[event_type],
+                    "replayed": self._replayed[event_type],
+                    "in_flight": self._in_flight[event_type],
+                    "calls": histogram.count,
+                    "total_ms": histogram.total,
+                    "latency_ms": histogram.summary(),
+                }
+                for event_type, histogram in by_time
+            },
+            "rejected": dict(self._rejected),
+            **{name: summary() for name, summary in self._sections.items()},
+        }
+
+
+async def serve_metrics(metrics: ConsumerMetrics, host: str, port: int) -> asyncio.Server:
+    """Serve `metrics.summary()` as JSON at GET /metrics on `host`:`port`"""
+
+    async def respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            # the request headers are read and ignored
+            while (await reader.readline()).strip():
+                pass
+            method, path, *_ = request_line.decode("latin-1").split() or ("", "")
+            if method == "GET" and path.split("?")[0] == "/metrics":
+                status, body = "200 OK", json.dumps(metrics.summary()).encode()
+            else:
+                status, body = "404 Not Found", b'{"detail": "Not Found"}'
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(respond, host, port)
+    logger.info(f"Serving consumer metrics at http://{host}:{port}/metrics")
+    return server
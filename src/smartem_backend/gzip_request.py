@@ -0,0 +1,94 @@
+"""Accept gzip-compressed request bodies.
+
+Starlette's `GZipMiddleware` only compresses responses. `GzipRequestMiddleware`
+handles the other direction: a request sent with `Content-Encoding: gzip` is
+decompressed before it reaches the route, so endpoints and their request
+models are unaware of the encoding. Agents use this to ship log batches, which
+are repetitive text and compress well.
+
+The body is decompressed chunk by chunk as it is received. A request whose
+compressed or decompressed size passes its limit is answered with 413 without
+reading the rest of it.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bounds on a compressed body and on what it decompresses to, so neither a large request nor a
+# small one that expands can make the server buffer an unbounded amount before the route runs
+MAX_COMPRESSED_BYTES = 4 * 1024 * 1024
+MAX_DECOMPRESSED_BYTES = 16 * 1024 * 1024
+
+
+class GzipRequestMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_compressed_bytes: int = MAX_COMPRESSED_BYTES,
+        max_decompressed_bytes: int = MAX_DECOMPRESSED_BYTES,
+    ) -> None:
+        self.app = app
+        self.max_compressed_bytes = max_compressed_bytes
+        self.max_decompressed_bytes = max_decompressed_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if headers.get(b"content-encoding", b"").lower() != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        async def reject(status_code: int, detail: str) -> None:
+            await PlainTextResponse(detail, status_code=status_code)(scope, receive, send)
+
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_compressed_bytes:
+            await reject(413, "Compressed request body too large")
+            return
+
+        # Decompress each chunk as it arrives, stopping as soon as either limit is passed
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        body = bytearray()
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunk = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            received += len(chunk)
+            if received > self.max_compressed_bytes:
+                await reject(413, "Compressed request body too large")
+                return
+            try:
+                # one byte over the remaining budget is enough to tell the limit was passed
+                body += decompressor.decompress(chunk, self.max_decompressed_bytes - len(body) + 1)
+            except zlib.error:
+                await reject(400, "Invalid gzip request body")
+                return
+            if len(body) > self.max_decompressed_bytes:
+                await reject(413, "Decompressed request body too large")
+                return
+        if not decompressor.eof:
+            await reject(400, "Invalid gzip request body")
+            return
+
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"] if name not in (b"content-encoding", b"content-length")
+        ] + [(b"content-length", str(len(body)).encode())]
+        body_sent = False
+
+        async def receive_decompressed() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": bytes(body), "more_body": False}
+
+        await self.app(scope, receive_decompressed, send)
@@ -0,0 +1,192 @@
+"""Agent heartbeats as single set-based statements.
+
+A heartbeat refreshes the agent's active connection and its session. Both are
+updated by one statement: a data-modifying CTE that touches the connection and
+then the session it belongs to, returning the connection id (none if the agent
+has no active connection for the session). The SSE stream's own keep-alive
+tick is a single UPDATE of its connection.
+
+With `heartbeat_flush_seconds` set, a `HeartbeatBuffer` absorbs heartbeats for
+connections it has already seen and writes the latest timestamp of each to
+Postgres in one statement every `flush_seconds`, so thousands of heartbeats a
+minute cost a handful of writes. The first heartbeat for a connection still
+goes straight to the database so a missing connection is reported at once; a
+connection that has closed stops being absorbed after the next flush finds it
+gone. Heartbeat timestamps lag by up to `flush_seconds`, which must stay well
+below the stale-connection timeout.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from smartem_backend.model.database import AgentConnection, AgentSession
+from smartem_backend.utils import app_config
+
+logger = logging.getLogger(__name__)
+
+_APP_CFG = (app_config or {}).get("app", {}) if isinstance(app_config, dict) else {}
+
+HEARTBEAT_FLUSH_SECONDS = float(
+    os.getenv("SMARTEM_HEARTBEAT_FLUSH_SECONDS", _APP_CFG.get("heartbeat_flush_seconds", 0))
+)
+
+
+def _touch_sessions(touched_connections, beat_at):
+    return (
+        update(AgentSession)
+        .where(AgentSession.session_id == touched_connections.c.session_id)
+        .values(last_activity_at=beat_at)
+        .returning(AgentSession.session_id)
+        .cte("touched_sessions")
+    )
+
+
+def heartbeat_statement(agent_id: str, session_id: str, beat_at: datetime):
+    """Statement that touches the active connection and session, returning the connection id"""
+    touched_connections = (
+        update(AgentConnection)
+        .where(
+            AgentConnection.agent_id == agent_id,
+            AgentConnection.session_id == session_id,
+            AgentConnection.status == "active",
+        )
+        .values(last_heartbeat_at=beat_at)
+        .returning(AgentConnection.connection_id, AgentConnection.session_id)
+        .cte("touched_connections")
+    )
+    return select(touched_connections.c.connection_id).add_cte(_touch_sessions(touched_connections, beat_at))
+
+
+def heartbeat_batch_statement(beats: Sequence[tuple[str, str, datetime]]):
+    """Statement applying many (agent_id, session_id, beat_at) heartbeats, returning the (agent_id, session_id)
+    pairs that still had an active connection"""
+    beat_values = values(
+        column("agent_id", String), column("session_id", String), column("beat_at", DateTime), name="beats"
+    ).data(list(beats))
+    touched_connections = (
+        update(AgentConnection)
+        .where(
+            AgentConnection.agent_id == beat_values.c.agent_id,
+            AgentConnection.session_id == beat_values.c.session_id,
+            AgentConnection.status == "active",
+        )
+        .values(last_heartbeat_at=beat_values.c.beat_at)
+        .returning(AgentConnection.agent_id, AgentConnection.session_id, beat_values.c.beat_at)
+        .cte("touched_connections")
+    )
+    return select(touched_connections.c.agent_id, touched_connections.c.session_id).add_cte(
+        _touch_sessions(touched_connections, touched_connections.c.beat_at)
+    )
+
+
+async def record_heartbeat(db: AsyncSession, agent_id: str, session_id: str, beat_at: datetime) -> str | None:
+    """Apply a heartbeat and commit, returning the active connection's id or None if there is none"""
+    connection_id = (await db.execute(heartbeat_statement(agent_id, session_id, beat_at))).scalars().first()
+    await db.commit()
+    return connection_id
+
+
+async def touch_connection(db: AsyncSession, connection_id: str, beat_at: datetime) -> None:
+    """Refresh the heartbeat of one connection if it is still active, and commit"""
+    await db.execute(
+        update(AgentConnection)
+        .where(AgentConnection.connection_id == connection_id, AgentConnection.status == "active")
+        .values(last_heartbeat_at=beat_at)
+    )
+    await db.commit()
+
+
+class HeartbeatBuffer:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        flush_seconds: float = HEARTBEAT_FLUSH_SECONDS,
+    ) -> None:
+        self._session_factory = session_factory
+        self.flush_seconds = flush_seconds
+        # (agent_id, session_id) -> connection id of connections known to be active
+        self._connections: dict[tuple[str, str], str] = {}
+        # (agent_id, session_id) -> latest heartbeat not yet written
+        self._pending: dict[tuple[str, str], datetime] = {}
+        self._task: asyncio.Task | None = None
+        self.flushed_count = 0
+
+    def record(self, agent_id: str, session_id: str, beat_at: datetime) -> str | None:
+        """Absorb a heartbeat for a known connection, returning its id, or None if it must be written directly"""
+        connection_id = self._connections.get((agent_id, session_id))
+        if connection_id is not None:
+            self._pending[(agent_id, session_id)] = beat_at
+        return connection_id
+
+    def remember(self, agent_id: str, session_id: str, connection_id: str) -> None:
+        self._connections[(agent_id, session_id)] = connection_id
+
+    def forget(self, agent_id: str, session_id: str) -> None:
+        self._connections.pop((agent_id, session_id), None)
+        self._pending.pop((agent_id, session_id), None)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Write the buffered heartbeats in one statement, returning how many were applied"""
+        if not self._pending:
+            return 0
+        beats, self._pending = self._pending, {}
+        try:
+            async with self._session_factory() as session:
+                result = await session.execute(
+                    heartbeat_batch_statement([(*key, beat_at) for key, beat_at in beats.items()])
+                )
+                live = {tuple(row) for row in result.all()}
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to write {len(beats)} buffered heartbeats: {e}")
+            for key, beat_at in beats.items():
+                self._pending.setdefault(key, beat_at)
+            return 0
+        for key in beats.keys() - live:
+            self._connections.pop(key, None)
+        self.flushed_count += len(live)
+        return len(live)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background task and write any heartbeats still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+_buffer: HeartbeatBuffer | None = None
+
+
+def set_heartbeat_buffer(buffer: HeartbeatBuffer | None) -> None:
+    """Bind the process-wide heartbeat buffer. Called by FastAPI lifespan on startup and shutdown."""
+    global _buffer
+    _buffer = buffer
+
+
+def get_heartbeat_buffer() -> HeartbeatBuffer | None:
+    return _buffer
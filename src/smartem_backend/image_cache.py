@@ -0,0 +1,228 @@
+"""Bounded two-tier cache for rendered atlas and grid square PNGs.
+
+Rendered images live on disk under a byte budget with LRU eviction, and the
+most recently served ones are also kept in a small in-memory hot tier so
+repeat requests skip the filesystem entirely. Concurrent requests for the same
+image share one render (single-flight), so a burst of first requests from the
+dashboard costs a single decode of the source frame.
+
+The disk tier may be shared between processes (the API server serves from it,
+the consumer pre-warms it on GRIDSQUARE_UPDATED). Each process tracks the files
+it has seen; files written by another process are adopted into the index the
+first time they are hit, and files evicted by another process are dropped
+from the index when found missing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from smartem_backend.image_rendering import render_image_png
+from smartem_backend.utils import app_config
+
+logger = logging.getLogger(__name__)
+
+Crop = tuple[int, int, int, int]
+
+_APP_CFG = (app_config or {}).get("app", {}) if isinstance(app_config, dict) else {}
+
+IMAGE_CACHE_DIR = Path(os.getenv("SMARTEM_IMAGE_CACHE_DIR", str(Path(tempfile.gettempdir()) / "smartem_image_cache")))
+IMAGE_CACHE_MAX_BYTES = int(
+    os.getenv("SMARTEM_IMAGE_CACHE_MAX_BYTES", _APP_CFG.get("image_cache_max_bytes", 2 * 1024**3))
+)
+IMAGE_CACHE_MEMORY_MAX_BYTES = int(
+    os.getenv("SMARTEM_IMAGE_CACHE_MEMORY_MAX_BYTES", _APP_CFG.get("image_cache_memory_max_bytes", 64 * 1024**2))
+)
+
+
+class ImageCache:
+    """Disk + memory LRU cache of rendered PNGs keyed on source file identity and render options."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int, memory_max_bytes: int = 0) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self._lock = threading.Lock()
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_scanned = False
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._inflight: dict[str, asyncio.Task[bytes]] = {}
+        self._background: set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def cache_key(source_path: Path, crop: Crop | None = None, max_size: int | None = None) -> str:
+        stat = source_path.stat()
+        return hashlib.sha256(f"{source_path}:{stat.st_mtime_ns}:{stat.st_size}:{crop}:{max_size}".encode()).hexdigest()
+
+    async def get(self, source_path: Path, crop: Crop | None = None, max_size: int | None = None) -> bytes:
+        """Return the PNG for `source_path`, rendering it at most once across concurrent callers."""
+        key = self.cache_key(source_path, crop, max_size)
+        png = self._memory_get(key)
+        if png is not None:
+            return png
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(asyncio.to_thread(self._load_or_render, key, source_path, crop, max_size))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a disconnecting client does not cancel a render other callers are waiting on.
+        png = await asyncio.shield(task)
+        self._memory_put(key, png)
+        return png
+
+    def schedule_prewarm(self, source_path: Path, crop: Crop | None = None, max_size: int | None = None) -> None:
+        """Render `source_path` into the cache in the background; failures are logged, not raised."""
+
+        async def _prewarm() -> None:
+            try:
+                await self.get(source_path, crop, max_size)
+                logger.debug(f"Pre-warmed image cache for {source_path}")
+            except Exception as e:
+                logger.warning(f"Failed to pre-warm image cache for {source_path}: {e}")
+
+        task = asyncio.create_task(_prewarm())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.png"
+
+    def _load_or_render(self, key: str, source_path: Path, crop: Crop | None, max_size: int | None) -> bytes:
+        self._scan_disk()
+        cache_path = self._cache_path(key)
+        try:
+            png = cache_path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_discard(key)
+        else:
+            with self._lock:
+                self.hits += 1
+                self._disk_touch(key, len(png))
+            return png
+
+        with self._lock:
+            self.misses += 1
+        png = render_image_png(source_path, crop, max_size)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(png)
+        os.replace(tmp_path, cache_path)
+        with self._lock:
+            self._disk_touch(key, len(png))
+            evicted = self._disk_evict()
+        for path in evicted:
+            path.unlink(missing_ok=True)
+        return png
+
+    def _scan_disk(self) -> None:
+        """Seed the disk index from files left by earlier runs, oldest access first."""
+        if self._disk_scanned:
+            return
+        entries = []
+        if self.cache_dir.is_dir():
+            for path in self.cache_dir.glob("*.png"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, path.stem, stat.st_size))
+        entries.sort(reverse=True)
+        with self._lock:
+            if self._disk_scanned:
+                return
+            # Newest first, each pushed to the LRU end, so the oldest file ends up evicted first.
+            for _, key, size in entries:
+                if key not in self._disk:
+                    self._disk[key] = size
+                    self._disk_bytes += size
+                    self._disk.move_to_end(key, last=False)
+            self._disk_scanned = True
+            evicted = self._disk_evict()
+        for path in evicted:
+            path.unlink(missing_ok=True)
+
+    def _disk_touch(self, key: str, size: int) -> None:
+        previous = self._disk.pop(key, None)
+        if previous is not None:
+            self._disk_bytes -= previous
+        self._disk[key] = size
+        self._disk_bytes += size
+
+    def _disk_discard(self, key: str) -> None:
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _disk_evict(self) -> list[Path]:
+        """Pop least recently used entries until within budget; caller unlinks the returned paths."""
+        evicted = []
+        while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.evictions += 1
+            evicted.append(self._cache_path(key))
+            self._memory_discard(key)
+        return evicted
+
+    def _memory_get(self, key: str) -> bytes | None:
+        with self._lock:
+            png = self._memory.get(key)
+            if png is not None:
+                self.hits += 1
+                self._memory.move_to_end(key)
+            return png
+
+    def _memory_put(self, key: str, png: bytes) -> None:
+        if len(png) > self.memory_max_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = png
+            self._memory_bytes += len(png)
+            while self._memory_bytes > self.memory_max_bytes:
+                _, dropped = self._memory.popitem(last=False)
+                self._memory_bytes -= len(dropped)
+
+    def _memory_discard(self, key: str) -> None:
+        png = self._memory.pop(key, None)
+        if png is not None:
+            self._memory_bytes -= len(png)
+
+
+_image_cache: ImageCache | None = None
+
+
+def get_image_cache() -> ImageCache:
+    """Get the process-wide image cache, configured from env vars and appconfig.yml."""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_MEMORY_MAX_BYTES)
+    return _image_cache
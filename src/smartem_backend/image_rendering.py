@@ -0,0 +1,127 @@
+"""Low-memory PNG rendering for atlas and grid square images.
+
+Source frames are opened memory-mapped (MRC via `mrcfile.mmap`, TIFF via
+`tifffile.memmap`) so only the pages covering the requested crop are paged
+in. The crop is applied before any arithmetic, an optional `max_size` reduces
+the region by block-mean or striding, and contrast is stretched between robust
+percentiles in place on a single float32 buffer. Peak memory is therefore
+bounded by the rendered output rather than by the full source frame.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Literal
+
+import mrcfile
+import numpy as np
+import tifffile
+from PIL import Image
+
+DownsampleMethod = Literal["mean", "stride"]
+
+# Percentiles used for contrast stretching; clipping the tails stops a few hot or
+# dead pixels from flattening the rest of the image to a single grey level.
+CONTRAST_PERCENTILES: tuple[float, float] = (0.5, 99.5)
+
+# Upper bound on the number of pixels fed to np.percentile. Larger images are
+# sampled on a regular stride, which is plenty for a display contrast estimate.
+_PERCENTILE_SAMPLE_PIXELS = 1_000_000
+
+
+@contextmanager
+def open_image_memmap(source_path: Path) -> Iterator[np.ndarray]:
+    """Yield the 2D image data of `source_path` without reading it into RAM.
+
+    TIFFs whose pages are compressed or tiled cannot be mapped directly; those
+    are decoded into a temporary file-backed memmap instead.
+    """
+    if source_path.suffix == ".mrc":
+        with mrcfile.mmap(source_path, mode="r", permissive=True) as mrc:
+            yield mrc.data
+        return
+    try:
+        data = tifffile.memmap(source_path, mode="r")
+    except ValueError:
+        data = tifffile.imread(source_path, out="memmap")
+    try:
+        yield data
+    finally:
+        del data
+
+
+def crop_region(data: np.ndarray, crop: tuple[int, int, int, int] | None) -> np.ndarray:
+    """Return a view of `data` for a centre-based `(x, y, w, h)` crop, clamped to the frame."""
+    if crop is None:
+        return data
+    x, y, w, h = crop
+    height, width = data.shape[:2]
+    top = min(max(y - h // 2, 0), height)
+    left = min(max(x - w // 2, 0), width)
+    bottom = min(max(y + h // 2, top), height)
+    right = min(max(x + w // 2, left), width)
+    return data[top:bottom, left:right]
+
+
+def downsample_factor(shape: tuple[int, ...], max_size: int | None) -> int:
+    """Smallest integer reduction that brings the longest edge to at most `max_size`."""
+    if not max_size or max_size <= 0:
+        return 1
+    longest = max(shape[:2])
+    return max(1, math.ceil(longest / max_size))
+
+
+def downsample(data: np.ndarray, factor: int, method: DownsampleMethod = "mean") -> np.ndarray:
+    """Reduce `data` by `factor` along both axes into a new float32 array.
+
+    "stride" picks every `factor`-th pixel and only touches those rows of a
+    memmap. "mean" averages `factor` x `factor` blocks, processing one output row
+    at a time so the float working set stays at `factor` source rows.
+    """
+    factor = min(factor, *data.shape[:2]) if data.size else 1
+    if factor <= 1:
+        return np.array(data, dtype=np.float32)
+    if method == "stride":
+        return np.array(data[::factor, ::factor], dtype=np.float32)
+
+    out_h, out_w = data.shape[0] // factor, data.shape[1] // factor
+    out = np.empty((out_h, out_w), dtype=np.float32)
+    for row in range(out_h):
+        band = data[row * factor : (row + 1) * factor, : out_w * factor]
+        out[row] = band.reshape(factor, out_w, factor).mean(axis=(0, 2), dtype=np.float32)
+    return out
+
+
+def stretch_contrast(data: np.ndarray, percentiles: tuple[float, float] = CONTRAST_PERCENTILES) -> np.ndarray:
+    """Map the `percentiles` range of float `data` onto 0-255 in place and return it as uint8."""
+    if data.size == 0:
+        return data.astype(np.uint8)
+    step = max(1, math.isqrt(data.size // _PERCENTILE_SAMPLE_PIXELS))
+    lo, hi = np.percentile(data[::step, ::step], percentiles)
+    np.subtract(data, lo, out=data)
+    if hi > lo:
+        np.multiply(data, 255.0 / (hi - lo), out=data)
+    else:
+        data.fill(0)
+    np.clip(data, 0, 255, out=data)
+    return data.astype(np.uint8)
+
+
+def render_image_png(
+    source_path: Path,
+    crop: tuple[int, int, int, int] | None = None,
+    max_size: int | None = None,
+    method: DownsampleMethod = "mean",
+) -> bytes:
+    """Render an MRC or TIFF frame (optionally cropped and downscaled) to PNG bytes."""
+    with open_image_memmap(source_path) as data:
+        region = crop_region(data, crop)
+        pixels = downsample(region, downsample_factor(region.shape, max_size), method)
+    image = Image.fromarray(stretch_contrast(pixels))
+    with io.BytesIO() as buf:
+        image.save(buf, format="PNG")
+        return buf.getvalue()
@@ -1,16 +1,30 @@
 """PostgreSQL LISTEN/NOTIFY plumbing for agent instruction delivery.
 
 Replaces the steady-state polling that the SSE instruction stream used to do.
-Writers issue NOTIFY in the same transaction as the INSERT/UPDATE; the SSE
-handler holds a dedicated asyncpg connection LISTENing on this channel and
-wakes only when a notification for its session arrives.
+Writers issue NOTIFY in the same transaction as the INSERT/UPDATE, with the
+agent session id as the payload.
+
+One `InstructionListener` per process holds the only LISTEN connection and
+routes each notification to the queues of the streams subscribed to that
+session, so an SSE stream costs a queue rather than a database connection and
+a notification is only handed to the streams it concerns. If the connection
+is lost the listener reconnects with backoff and then wakes every subscriber,
+since notifications sent while it was down are gone and the streams have to
+re-read their pending instructions.
 """
 
 from __future__ import annotations
 
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+import asyncpg
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+logger = logging.getLogger(__name__)
+
 INSTRUCTION_CHANNEL = "agent_instructions"
 
 
@@ -25,3 +39,162 @@ async def notify_instruction_pending(session: AsyncSession, agent_session_id: st
         text("SELECT pg_notify(:channel, :payload)"),
         {"channel": INSTRUCTION_CHANNEL, "payload": agent_session_id},
     )
+
+
+class InstructionListener:
+    def __init__(
+        self,
+        dsn: str,
+        connect: Callable[[str], Awaitable[asyncpg.Connection]] = asyncpg.connect,
+        reconnect_base_delay: float = 1.0,
+        reconnect_max_delay: float = 30.0,
+        health_check_interval: float = 30.0,
+    ) -> None:
+        self._dsn = dsn
+        self._connect = connect
+        self.reconnect_base_delay = reconnect_base_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.health_check_interval = health_check_interval
+        self._subscribers: dict[str, set[asyncio.Queue[None]]] = {}
+        self._connection: asyncpg.Connection | None = None
+        self._connection_lost = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._was_connected = False
+        self.reconnect_count = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    def subscribe(self, session_id: str) -> asyncio.Queue[None]:
+        """Register a stream for `session_id`, returning the queue it is woken through
+
+        The queue holds at most one wake-up: a stream that is busy while several notifications arrive
+        re-reads its pending instructions once, not once per notification.
+        """
+        queue: asyncio.Queue[None] = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue[None]) -> None:
+        queues = self._subscribers.get(session_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[session_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @staticmethod
+    def _wake(queue: asyncio.Queue[None]) -> None:
+        try:
+            queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    def _on_notify(self, _connection, _pid, _channel, payload: str) -> None:
+        for queue in self._subscribers.get(payload, ()):
+            self._wake(queue)
+
+    def _wake_all(self) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._wake(queue)
+
+    def _on_termination(self, _connection) -> None:
+        self._connection_lost.set()
+
+    async def _open(self) -> None:
+        connection = await self._connect(self._dsn)
+        try:
+            connection.add_termination_listener(self._on_termination)
+            await connection.add_listener(INSTRUCTION_CHANNEL, self._on_notify)
+        except BaseException:
+            await self._close_connection(connection)
+            raise
+        self._connection_lost.clear()
+        self._connection = connection
+        self._was_connected = True
+
+    @staticmethod
+    async def _close_connection(connection: asyncpg.Connection) -> None:
+        try:
+            await connection.close(timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to close instruction LISTEN connection cleanly: {e}")
+            connection.terminate()
+
+    async def _wait_until_lost(self) -> None:
+        # the termination callback is the usual signal; the periodic check covers a connection closed without it
+        while self.connected:
+            try:
+                await asyncio.wait_for(self._connection_lost.wait(), timeout=self.health_check_interval)
+                return
+            except TimeoutError:
+                continue
+
+    async def _run(self) -> None:
+        attempts = 0
+        while True:
+            if not self.connected:
+                reconnecting = self._was_connected
+                try:
+                    await self._open()
+                except Exception as e:
+                    delay = min(self.reconnect_base_delay * 2**attempts, self.reconnect_max_delay)
+                    attempts += 1
+                    logger.error(f"Failed to LISTEN on {INSTRUCTION_CHANNEL}, retrying in {delay:.0f}s: {e}")
+                    await asyncio.sleep(delay)
+                    continue
+                attempts = 0
+                if reconnecting:
+                    self.reconnect_count += 1
+                    logger.info(f"Reconnected instruction listener, waking {self.subscriber_count()} streams")
+                    self._wake_all()
+            await self._wait_until_lost()
+            logger.warning("Instruction LISTEN connection lost, reconnecting")
+            connection, self._connection = self._connection, None
+            if connection is not None and not connection.is_closed():
+                connection.terminate()
+
+    async def start(self) -> None:
+        """Connect, then keep the LISTEN connection up in the background
+
+        The first connection is attempted before returning so streams opened straight after startup are
+        notified; if it fails the background task keeps retrying.
+        """
+        if self._task is not None:
+            return
+        try:
+            await self._open()
+            logger.info(f"Listening for instruction notifications on {INSTRUCTION_CHANNEL}")
+        except Exception as e:
+            logger.error(f"Failed to LISTEN on {INSTRUCTION_CHANNEL}, will retry: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await self._close_connection(connection)
+
+
+_listener: InstructionListener | None = None
+
+
+def set_instruction_listener(listener: InstructionListener | None) -> None:
+    """Bind the process-wide listener. Called by FastAPI lifespan on startup and shutdown."""
+    global _listener
+    _listener = listener
+
+
+def get_instruction_listener() -> InstructionListener | None:
+    return _listener
@@ -0,0 +1,48 @@
+"""Add grid_uuid to qualityprediction with a (grid, model, metric, timestamp) index
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "d5e6f7a8b9c0"
+down_revision = "c4d5e6f7a8b9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("qualityprediction", sa.Column("grid_uuid", sa.String(), nullable=True))
+    op.create_foreign_key("qualityprediction_grid_uuid_fkey", "qualityprediction", "grid", ["grid_uuid"], ["uuid"])
+    op.execute(
+        """
+        UPDATE qualityprediction qp
+        SET grid_uuid = gs.grid_uuid
+        FROM gridsquare gs
+        WHERE qp.gridsquare_uuid = gs.uuid
+        """
+    )
+    op.execute(
+        """
+        UPDATE qualityprediction qp
+        SET grid_uuid = gs.grid_uuid
+        FROM foilhole fh
+        JOIN gridsquare gs ON fh.gridsquare_uuid = gs.uuid
+        WHERE qp.foilhole_uuid = fh.uuid AND qp.grid_uuid IS NULL
+        """
+    )
+    op.create_index(
+        "ix_qualityprediction_grid_model_metric_timestamp",
+        "qualityprediction",
+        ["grid_uuid", "prediction_model_name", "metric_name", "timestamp"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_qualityprediction_grid_model_metric_timestamp", table_name="qualityprediction")
+    op.drop_constraint("qualityprediction_grid_uuid_fkey", "qualityprediction", type_="foreignkey")
+    op.drop_column("qualityprediction", "grid_uuid")
@@ -0,0 +1,28 @@
+"""Add (parent, model) indexes on qualityprediction for bulk prediction seeding
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "e6f7a8b9c0d1"
+down_revision = "d5e6f7a8b9c0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_qualityprediction_foilhole_model", "qualityprediction", ["foilhole_uuid", "prediction_model_name"]
+    )
+    op.create_index(
+        "ix_qualityprediction_gridsquare_model", "qualityprediction", ["gridsquare_uuid", "prediction_model_name"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_qualityprediction_gridsquare_model", table_name="qualityprediction")
+    op.drop_index("ix_qualityprediction_foilhole_model", table_name="qualityprediction")
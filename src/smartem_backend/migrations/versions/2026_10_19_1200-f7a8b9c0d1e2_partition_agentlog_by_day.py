@@ -0,0 +1,74 @@
+"""Partition agentlog by day of created_at
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from datetime import date, timedelta
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "f7a8b9c0d1e2"
+down_revision = "e6f7a8b9c0d1"
+branch_labels = None
+depends_on = None
+
+_COLUMNS = "id, agent_id, session_id, timestamp, level, logger_name, message, created_at"
+_INDEXES = (
+    ("ix_agentlog_agent_id", ["agent_id"]),
+    ("ix_agentlog_session_id", ["session_id"]),
+    ("ix_agentlog_timestamp", ["timestamp"]),
+    ("ix_agentlog_level", ["level"]),
+    ("ix_agentlog_agent_id_id", ["agent_id", "id"]),
+)
+
+
+def _create_agentlog(primary_key: list[str], **kwargs) -> None:
+    op.create_table(
+        "agentlog",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("agent_id", sa.String(), nullable=False),
+        sa.Column("session_id", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("level", sa.String(), nullable=False),
+        sa.Column("logger_name", sa.String(), nullable=False),
+        sa.Column("message", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint(*primary_key),
+        **kwargs,
+    )
+    for name, columns in _INDEXES:
+        op.create_index(name, "agentlog", columns)
+
+
+def _replace_agentlog(primary_key: list[str], **kwargs) -> None:
+    """Rebuild agentlog with a new definition, carrying its rows and id sequence across"""
+    for name, _ in _INDEXES:
+        op.drop_index(name, table_name="agentlog")
+    op.rename_table("agentlog", "agentlog_previous")
+    op.execute("ALTER TABLE agentlog_previous RENAME CONSTRAINT agentlog_pkey TO agentlog_previous_pkey")
+    op.execute("ALTER SEQUENCE agentlog_id_seq RENAME TO agentlog_previous_id_seq")
+    _create_agentlog(primary_key, **kwargs)
+    if kwargs.get("postgresql_partition_by"):
+        # today and the next two days, as AgentConnectionManager keeps them; older rows go to the default partition
+        op.execute("CREATE TABLE agentlog_default PARTITION OF agentlog DEFAULT")
+        for offset in range(3):
+            day = date.today() + timedelta(days=offset)
+            op.execute(
+                f"CREATE TABLE agentlog_{day:%Y%m%d} PARTITION OF agentlog "
+                f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+            )
+    op.execute(f"INSERT INTO agentlog ({_COLUMNS}) SELECT {_COLUMNS} FROM agentlog_previous")
+    op.execute("SELECT setval('agentlog_id_seq', GREATEST((SELECT max(id) FROM agentlog), 1))")
+    op.drop_table("agentlog_previous")
+
+
+def upgrade() -> None:
+    _replace_agentlog(["id", "created_at"], postgresql_partition_by="RANGE (created_at)")
+
+
+def downgrade() -> None:
+    _replace_agentlog(["id"])
@@ -0,0 +1,22 @@
+"""Add a (grid_uuid, id) index to qualityprediction for cursor-paged time series
+
+Revision ID: b9c0d1e2f3a4
+Revises: a8b9c0d1e2f3
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "b9c0d1e2f3a4"
+down_revision = "a8b9c0d1e2f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_qualityprediction_grid_id", "qualityprediction", ["grid_uuid", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_qualityprediction_grid_id", table_name="qualityprediction")
@@ -0,0 +1,45 @@
+"""Give every model weight a per-metric current-weight row and drop the legacy NULL-metric ones
+
+Before per-metric seeding, initialising a grid wrote its weight rows with a metric_name but the
+matching current-weight rows with metric_name NULL. Those grids already have weight rows, so the
+seeding anti-join never revisits them, and prior updates, which look the current weight up by
+metric, find nothing. Each (grid, model, metric) with a weight but no current weight gets one at
+its latest weight, then the NULL-metric current-weight rows are deleted.
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "c0d1e2f3a4b5"
+down_revision = "b9c0d1e2f3a4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        INSERT INTO currentqualitypredictionmodelweight (grid_uuid, prediction_model_name, metric_name, weight)
+        SELECT DISTINCT ON (w.grid_uuid, w.prediction_model_name, w.metric_name)
+            w.grid_uuid, w.prediction_model_name, w.metric_name, w.weight
+        FROM qualitypredictionmodelweight w
+        WHERE w.metric_name IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM currentqualitypredictionmodelweight c
+            WHERE c.grid_uuid = w.grid_uuid
+            AND c.prediction_model_name = w.prediction_model_name
+            AND c.metric_name = w.metric_name
+        )
+        ORDER BY w.grid_uuid, w.prediction_model_name, w.metric_name, w.timestamp DESC, w.id DESC
+        """
+    )
+    op.execute("DELETE FROM currentqualitypredictionmodelweight WHERE metric_name IS NULL")
+
+
+def downgrade() -> None:
+    # The deleted rows duplicated the per-metric ones and nothing reads them, so they are not restored
+    pass
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, Index, text
+from sqlalchemy import BigInteger, Column, Index, LargeBinary, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlmodel import Field, Relationship, SQLModel
 from sqlmodel import Session as SQLModelSession
@@ -324,7 +324,21 @@ class CurrentQualityPredictionModelWeight(SQLModel, table=True):
 
 
 class QualityPrediction(SQLModel, table=True):
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index(
+            "ix_qualityprediction_grid_model_metric_timestamp",
+            "grid_uuid",
+            "prediction_model_name",
+            "metric_name",
+            "timestamp",
+        ),
+        # Cursor paging of a grid's time series, in insertion order
+        Index("ix_qualityprediction_grid_id", "grid_uuid", "id"),
+        # Parent lookups used by the bulk seeding anti-join
+        Index("ix_qualityprediction_foilhole_model", "foilhole_uuid", "prediction_model_name"),
+        Index("ix_qualityprediction_gridsquare_model", "gridsquare_uuid", "prediction_model_name"),
+        {"extend_existing": True},
+    )
     id: int | None = Field(default=None, primary_key=True)
     timestamp: datetime = Field(default_factory=datetime.now)
     value: float
@@ -332,6 +346,8 @@ class QualityPrediction(SQLModel, table=True):
     metric_name: str | None = Field(foreign_key="qualitymetric.name", default=None)
     foilhole_uuid: str | None = Field(default=None, foreign_key="foilhole.uuid")
     gridsquare_uuid: str | None = Field(default=None, foreign_key="gridsquare.uuid")
+    # Denormalised owning grid so whole-grid time series can be range-scanned without joins
+    grid_uuid: str | None = Field(default=None, foreign_key="grid.uuid")
     foilhole: FoilHole | None = Relationship(back_populates="prediction")
     gridsquare: GridSquare | None = Relationship(back_populates="prediction")
     model: QualityPredictionModel | None = Relationship(back_populates="predictions")
@@ -542,18 +558,42 @@ class AgentInstructionAcknowledgement(SQLModel, table=True):
 
 
 class AgentLog(SQLModel, table=True):
+    # Partitioned by day of created_at, see smartem_backend.agent_logs; the partition key has to be in the primary key
     __table_args__ = (
         Index("ix_agentlog_agent_id_id", "agent_id", "id"),
-        {"extend_existing": True},
+        {"extend_existing": True, "postgresql_partition_by": "RANGE (created_at)"},
     )
-    id: int | None = Field(default=None, primary_key=True)
+    id: int | None = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
     agent_id: str = Field(index=True)
     session_id: str = Field(index=True)
     timestamp: datetime = Field(index=True)
     level: str = Field(index=True)
     logger_name: str = Field(default="")
     message: str = Field(default="")
+    created_at: datetime = Field(default_factory=datetime.now, primary_key=True)
+
+
+class MessageOutbox(SQLModel, table=True):
+    # Bus events written in the transaction of the change they announce, relayed to RabbitMQ by smartem_backend.outbox
+    __table_args__ = {"extend_existing": True}
+    id: int | None = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
+    event_type: str
+    content_type: str
+    body: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
     created_at: datetime = Field(default_factory=datetime.now)
+    attempts: int = Field(default=0)
+
+
+class MessageOutboxDeadLetter(SQLModel, table=True):
+    # Outbox events that kept failing to publish, kept with their original id for inspection or replay
+    __table_args__ = {"extend_existing": True}
+    id: int = Field(sa_column=Column(BigInteger, primary_key=True, autoincrement=False))
+    event_type: str
+    content_type: str
+    body: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    created_at: datetime
+    attempts: int
+    failed_at: datetime = Field(default_factory=datetime.now)
 
 
 def _create_db_and_tables(engine):
@@ -861,6 +901,10 @@ def _create_db_and_tables(engine):
             sess.execute(text("CREATE INDEX IF NOT EXISTS ix_agentlog_timestamp ON agentlog (timestamp);"))
             sess.execute(text("CREATE INDEX IF NOT EXISTS ix_agentlog_level ON agentlog (level);"))
             sess.execute(text("CREATE INDEX IF NOT EXISTS ix_agentlog_agent_id_id ON agentlog (agent_id, id);"))
+            # agentlog is partitioned and takes no rows until it has partitions
+            from smartem_backend.agent_logs import ensure_log_partitions
+
+            ensure_log_partitions(sess)
 
             # Micrograph updated_at index
             sess.execute(text("CREATE INDEX IF NOT EXISTS ix_micrograph_updated_at ON micrograph (updated_at);"))
@@ -62,6 +62,10 @@ class AgentLogData(BaseModel):
     message: str
 
 
+# Agents ship log batches as newline-delimited AgentLogEntry JSON objects
+AGENT_LOG_NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
 class AgentLogEntry(BaseModel):
     timestamp: datetime
     level: str
@@ -380,3 +380,17 @@ class AgentInstructionAcknowledgement(BaseModel):
         validate_assignment=True,
         extra="forbid",
     )
+
+
+class AgentInstructionBatchAcknowledgement(AgentInstructionAcknowledgement):
+    """One acknowledgement in a batch, naming the instruction it acknowledges"""
+
+    instruction_id: str
+
+
+class AgentInstructionAcknowledgementBatchRequest(BaseModel):
+    """Request model for acknowledging several instructions of one session at once"""
+
+    acknowledgements: list[AgentInstructionBatchAcknowledgement]
+
+    model_config = ConfigDict(extra="forbid")
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, field_serializer
 
@@ -228,6 +229,26 @@ class QualityPredictionResponse(BaseModel):
         return v
 
 
+class QualityPredictionTimeSeries(BaseModel):
+    """One prediction history in columnar form; `timestamps` and `values` are parallel arrays."""
+
+    prediction_model_name: str
+    metric_name: str | None = None
+    gridsquare_uuid: str | None = None
+    foilhole_uuid: str | None = None
+    timestamps: list[datetime]
+    values: list[float]
+
+
+class GridQualityPredictionTimeSeriesResponse(BaseModel):
+    """One page of the prediction histories for a grid; pass `cursor` back as `after` to fetch the next points."""
+
+    grid_uuid: str
+    cursor: int | None = None
+    has_more: bool = False
+    series: list[QualityPredictionTimeSeries]
+
+
 class QualityPredictionModelParameterResponse(BaseModel):
     id: int
     grid_uuid: str
@@ -299,8 +320,26 @@ class AgentInstructionAcknowledgementResponse(BaseModel):
     )
 
 
+class AgentInstructionAcknowledgementResult(BaseModel):
+    """Outcome of one acknowledgement in a batch; `error` says why it was rejected"""
+
+    instruction_id: str
+    status: Literal["success", "error"]
+    acknowledged_at: str | None = None
+    error: str | None = None
+
+
+class AgentInstructionAcknowledgementBatchResponse(BaseModel):
+    """Response model for batch acknowledgements, with one result per acknowledgement in request order"""
+
+    agent_id: str
+    session_id: str
+    acknowledged: int
+    results: list[AgentInstructionAcknowledgementResult]
+
+
 class ProcessingFeedbackPublishResponse(BaseModel):
-    """Confirmation that a processing-feedback event was published to RabbitMQ."""
+    """Confirmation that a processing-feedback event was committed to the outbox, which relays it to RabbitMQ."""
 
     published: bool
 
@@ -33,6 +33,8 @@ class MessageQueueEventType(str, Enum):
     GRIDSQUARE_DELETED = "gridsquare.deleted"
     GRIDSQUARE_REGISTERED = "gridsquare.registered"  # all foil holes on gridsquare have been registered
 
+    GRIDSQUARES_CREATED = "gridsquares.created"  # batch of grid squares created in one request
+
     GRIDSQUARE_LOWMAG_CREATED = "gridsquare_lowmag.created"
     GRIDSQUARE_LOWMAG_UPDATED = "gridsquare_lowmag.updated"
     GRIDSQUARE_LOWMAG_DELETED = "gridsquare_lowmag.deleted"
@@ -40,6 +42,7 @@ class MessageQueueEventType(str, Enum):
     FOILHOLE_CREATED = "foilhole.created"
     FOILHOLE_UPDATED = "foilhole.updated"
     FOILHOLE_DELETED = "foilhole.deleted"
+    FOILHOLES_CREATED = "foilholes.created"  # batch of foil holes created in one request
 
     MICROGRAPH_CREATED = "micrograph.created"
     MICROGRAPH_UPDATED = "micrograph.updated"
@@ -236,6 +239,15 @@ class GridSquareCreatedEvent(GridSquareEventBase):
     uuid: str
     grid_uuid: str | None = None
     gridsquare_id: str | None = None
+    # Set when the square is also in a gridsquares.created event, which seeds its predictions
+    announced_in_batch: bool = False
+
+
+class GridSquaresCreatedEvent(GridSquareEventBase):
+    """Event emitted when a batch of grid squares is created for a grid"""
+
+    grid_uuid: str
+    uuids: list[str]
 
 
 class GridSquareUpdatedEvent(GridSquareEventBase):
@@ -244,6 +256,7 @@ class GridSquareUpdatedEvent(GridSquareEventBase):
     uuid: str
     grid_uuid: str | None = None
     gridsquare_id: str | None = None
+    image_path: str | None = None  # set only when the update assigned a new image
 
 
 class GridSquareDeletedEvent(GridSquareEventBase):
@@ -274,6 +287,15 @@ class FoilHoleCreatedEvent(FoilHoleEventBase):
     foilhole_id: str | None = None
     gridsquare_uuid: str | None = None
     gridsquare_id: str | None = None
+    # Set when the hole is also in a foilholes.created event, which seeds its predictions
+    announced_in_batch: bool = False
+
+
+class FoilHolesCreatedEvent(FoilHoleEventBase):
+    """Event emitted when a batch of foil holes is created for a grid square"""
+
+    gridsquare_uuid: str
+    uuids: list[str]
 
 
 class FoilHoleUpdatedEvent(FoilHoleEventBase):
@@ -516,3 +538,54 @@ class AgentInstructionExpiredEvent(GenericEventMessageBody):
     agent_id: str
     expires_at: datetime
     retry_count: int
+
+
+# Payload model of each event type the consumer handles; the bus codec validates message bodies straight into these
+EVENT_MODELS: dict[MessageQueueEventType, type[BaseModel]] = {
+    MessageQueueEventType.ACQUISITION_CREATED: AcquisitionCreatedEvent,
+    MessageQueueEventType.ACQUISITION_UPDATED: AcquisitionUpdatedEvent,
+    MessageQueueEventType.ACQUISITION_DELETED: AcquisitionDeletedEvent,
+    MessageQueueEventType.ATLAS_CREATED: AtlasCreatedEvent,
+    MessageQueueEventType.ATLAS_UPDATED: AtlasUpdatedEvent,
+    MessageQueueEventType.ATLAS_DELETED: AtlasDeletedEvent,
+    MessageQueueEventType.ATLAS_TILE_CREATED: AtlasTileCreatedEvent,
+    MessageQueueEventType.ATLAS_TILE_UPDATED: AtlasTileUpdatedEvent,
+    MessageQueueEventType.ATLAS_TILE_DELETED: AtlasTileDeletedEvent,
+    MessageQueueEventType.GRID_CREATED: GridCreatedEvent,
+    MessageQueueEventType.GRID_UPDATED: GridUpdatedEvent,
+    MessageQueueEventType.GRID_DELETED: GridDeletedEvent,
+    MessageQueueEventType.GRID_REGISTERED: GridRegisteredEvent,
+    MessageQueueEventType.GRIDSQUARE_CREATED: GridSquareCreatedEvent,
+    MessageQueueEventType.GRIDSQUARE_UPDATED: GridSquareUpdatedEvent,
+    MessageQueueEventType.GRIDSQUARE_DELETED: GridSquareDeletedEvent,
+    MessageQueueEventType.GRIDSQUARE_REGISTERED: GridSquareRegisteredEvent,
+    MessageQueueEventType.GRIDSQUARES_CREATED: GridSquaresCreatedEvent,
+    MessageQueueEventType.GRIDSQUARE_LOWMAG_CREATED: GridSquareCreatedEvent,
+    MessageQueueEventType.GRIDSQUARE_LOWMAG_UPDATED: GridSquareUpdatedEvent,
+    MessageQueueEventType.GRIDSQUARE_LOWMAG_DELETED: GridSquareDeletedEvent,
+    MessageQueueEventType.FOILHOLE_CREATED: FoilHoleCreatedEvent,
+    MessageQueueEventType.FOILHOLE_UPDATED: FoilHoleUpdatedEvent,
+    MessageQueueEventType.FOILHOLE_DELETED: FoilHoleDeletedEvent,
+    MessageQueueEventType.FOILHOLES_CREATED: FoilHolesCreatedEvent,
+    MessageQueueEventType.MICROGRAPH_CREATED: MicrographCreatedEvent,
+    MessageQueueEventType.MICROGRAPH_UPDATED: MicrographUpdatedEvent,
+    MessageQueueEventType.MICROGRAPH_DELETED: MicrographDeletedEvent,
+    MessageQueueEventType.MOTION_CORRECTION_COMPLETE: MotionCorrectionCompleteBody,
+    MessageQueueEventType.MOTION_CORRECTION_REGISTERED: MotionCorrectionRegisteredBody,
+    MessageQueueEventType.CTF_COMPLETE: CtfCompleteBody,
+    MessageQueueEventType.CTF_REGISTERED: CtfRegisteredBody,
+    MessageQueueEventType.PARTICLE_PICKING_COMPLETE: ParticlePickingCompleteBody,
+    MessageQueueEventType.PARTICLE_PICKING_REGISTERED: ParticlePickingRegisteredBody,
+    MessageQueueEventType.PARTICLE_SELECTION_COMPLETE: ParticleSelectionCompleteBody,
+    MessageQueueEventType.ATLAS_MODEL_PREDICTION: AtlasPredictionEvent,
+    MessageQueueEventType.GRIDSQUARE_MODEL_PREDICTION: GridSquareModelPredictionEvent,
+    MessageQueueEventType.FOILHOLE_MODEL_PREDICTION: FoilHoleModelPredictionEvent,
+    MessageQueueEventType.MULTI_FOILHOLE_MODEL_PREDICTION: MultiFoilHoleModelPredictionEvent,
+    MessageQueueEventType.CREATE_FOILHOLE_GROUP: CreateFoilHoleGroupEvent,
+    MessageQueueEventType.FOILHOLE_GROUP_MODEL_PREDICTION: FoilHoleGroupModelPredictionEvent,
+    MessageQueueEventType.MODEL_PARAMETER_UPDATE: ModelParameterUpdateEvent,
+    MessageQueueEventType.REFRESH_PREDICTIONS: RefreshPredictionsEvent,
+    MessageQueueEventType.AGENT_INSTRUCTION_CREATED: AgentInstructionCreatedEvent,
+    MessageQueueEventType.AGENT_INSTRUCTION_UPDATED: AgentInstructionUpdatedEvent,
+    MessageQueueEventType.AGENT_INSTRUCTION_EXPIRED: AgentInstructionExpiredEvent,
+}
@@ -21,6 +21,7 @@ from smartem_backend.model.mq_event import (
     FoilHoleDeletedEvent,
     FoilHoleGroupModelPredictionEvent,
     FoilHoleModelPredictionEvent,
+    FoilHolesCreatedEvent,
     FoilHoleUpdatedEvent,
     GridCreatedEvent,
     GridDeletedEvent,
@@ -29,6 +30,7 @@ from smartem_backend.model.mq_event import (
     GridSquareDeletedEvent,
     GridSquareModelPredictionEvent,
     GridSquareRegisteredEvent,
+    GridSquaresCreatedEvent,
     GridSquareUpdatedEvent,
     GridUpdatedEvent,
     MessageQueueEventType,
@@ -43,6 +45,7 @@ from smartem_backend.model.mq_event import (
     ParticlePickingRegisteredBody,
     RefreshPredictionsEvent,
 )
+from smartem_backend.outbox import stage_events, staging_session
 from smartem_backend.rmq import AioPikaPublisher
 
 logger = logging.getLogger(__name__)
@@ -62,6 +65,9 @@ def get_publisher() -> AioPikaPublisher | None:
 
 
 async def _publish(event_type: MessageQueueEventType, payload) -> bool:
+    if (session := staging_session()) is not None:
+        stage_events(session, [(event_type, payload)])
+        return True
     if _publisher is None:
         logger.error("Publish attempted before publisher bound: %s", event_type.value)
         return False
@@ -69,6 +75,9 @@ async def _publish(event_type: MessageQueueEventType, payload) -> bool:
 
 
 async def _publish_batch(items) -> bool:
+    if (session := staging_session()) is not None:
+        stage_events(session, items)
+        return True
     if _publisher is None:
         logger.error("Batch publish attempted before publisher bound: %d items", len(items))
         return False
@@ -160,9 +169,13 @@ async def publish_gridsquare_created(uuid, grid_uuid=None, gridsquare_id=None) -
     return await _publish(MessageQueueEventType.GRIDSQUARE_CREATED, event)
 
 
-async def publish_gridsquare_updated(uuid, grid_uuid=None, gridsquare_id=None) -> bool:
+async def publish_gridsquare_updated(uuid, grid_uuid=None, gridsquare_id=None, image_path=None) -> bool:
     event = GridSquareUpdatedEvent(
-        event_type=MessageQueueEventType.GRIDSQUARE_UPDATED, uuid=uuid, grid_uuid=grid_uuid, gridsquare_id=gridsquare_id
+        event_type=MessageQueueEventType.GRIDSQUARE_UPDATED,
+        uuid=uuid,
+        grid_uuid=grid_uuid,
+        gridsquare_id=gridsquare_id,
+        image_path=image_path,
     )
     return await _publish(MessageQueueEventType.GRIDSQUARE_UPDATED, event)
 
@@ -200,7 +213,10 @@ async def publish_gridsquare_lowmag_updated(uuid, grid_uuid=None, gridsquare_id=
 async def publish_gridsquares_created_batch(
     entries: list[tuple[str, str | None, str | None, bool]],
 ) -> bool:
-    items: list[tuple[MessageQueueEventType, GridSquareCreatedEvent]] = []
+    """Publish a GRIDSQUARE_CREATED or GRIDSQUARE_LOWMAG_CREATED event per entry and one GRIDSQUARES_CREATED
+    event per grid for the square-mag entries, as a single batch."""
+    items: list[tuple[MessageQueueEventType, GridSquareCreatedEvent | GridSquaresCreatedEvent]] = []
+    uuids_by_grid: dict[str | None, list[str]] = {}
     for uuid, grid_uuid, gridsquare_id, lowmag in entries:
         event_type = (
             MessageQueueEventType.GRIDSQUARE_LOWMAG_CREATED if lowmag else MessageQueueEventType.GRIDSQUARE_CREATED
@@ -209,7 +225,22 @@ async def publish_gridsquares_created_batch(
             (
                 event_type,
                 GridSquareCreatedEvent(
-                    event_type=event_type, uuid=uuid, grid_uuid=grid_uuid, gridsquare_id=gridsquare_id
+                    event_type=event_type,
+                    uuid=uuid,
+                    grid_uuid=grid_uuid,
+                    gridsquare_id=gridsquare_id,
+                    announced_in_batch=not lowmag,
+                ),
+            )
+        )
+        if not lowmag:
+            uuids_by_grid.setdefault(grid_uuid, []).append(uuid)
+    for grid_uuid, uuids in uuids_by_grid.items():
+        items.append(
+            (
+                MessageQueueEventType.GRIDSQUARES_CREATED,
+                GridSquaresCreatedEvent(
+                    event_type=MessageQueueEventType.GRIDSQUARES_CREATED, grid_uuid=grid_uuid, uuids=uuids
                 ),
             )
         )
@@ -222,15 +253,36 @@ async def publish_gridsquare_lowmag_deleted(uuid) -> bool:
 
 
 # ========== Foil Hole DB Entity Mutations ==========
-async def publish_foilhole_created(uuid, foilhole_id=None, gridsquare_uuid=None, gridsquare_id=None) -> bool:
-    event = FoilHoleCreatedEvent(
-        event_type=MessageQueueEventType.FOILHOLE_CREATED,
-        uuid=uuid,
-        foilhole_id=foilhole_id,
-        gridsquare_uuid=gridsquare_uuid,
-        gridsquare_id=gridsquare_id,
-    )
-    return await _publish(MessageQueueEventType.FOILHOLE_CREATED, event)
+async def publish_foilholes_created_batch(entries: list[tuple[str, str | None, str, str | None]]) -> bool:
+    """Publish a FOILHOLE_CREATED event per (uuid, foilhole_id, gridsquare_uuid, gridsquare_id) entry and one
+    FOILHOLES_CREATED event per grid square, as a single batch."""
+    items: list[tuple[MessageQueueEventType, FoilHoleCreatedEvent | FoilHolesCreatedEvent]] = []
+    uuids_by_gridsquare: dict[str, list[str]] = {}
+    for uuid, foilhole_id, gridsquare_uuid, gridsquare_id in entries:
+        items.append(
+            (
+                MessageQueueEventType.FOILHOLE_CREATED,
+                FoilHoleCreatedEvent(
+                    event_type=MessageQueueEventType.FOILHOLE_CREATED,
+                    uuid=uuid,
+                    foilhole_id=foilhole_id,
+                    gridsquare_uuid=gridsquare_uuid,
+                    gridsquare_id=gridsquare_id,
+                    announced_in_batch=True,
+                ),
+            )
+        )
+        uuids_by_gridsquare.setdefault(gridsquare_uuid, []).append(uuid)
+    for gridsquare_uuid, uuids in uuids_by_gridsquare.items():
+        items.append(
+            (
+                MessageQueueEventType.FOILHOLES_CREATED,
+                FoilHolesCreatedEvent(
+                    event_type=MessageQueueEventType.FOILHOLES_CREATED, gridsquare_uuid=gridsquare_uuid, uuids=uuids
+                ),
+            )
+        )
+    return await _publish_batch(items)
 
 
 async def publish_foilhole_updated(uuid, foilhole_id=None, gridsquare_uuid=None, gridsquare_id=None) -> bool:
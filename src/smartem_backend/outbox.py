@@ -0,0 +1,275 @@
+"""Transactional outbox for message bus events published by API handlers.
+
+Handlers used to commit an entity change and then publish its event to
+RabbitMQ inline, so every request waited for a broker confirm and an event
+was lost if the broker failed after the commit. Inside
+`transactional_publish(db)` the `publish_*` functions of `mq_publisher`
+instead add the encoded event to `messageoutbox` in the handler's session, so
+the event is committed, or rolled back, with the change it announces.
+
+An `OutboxRelay` in each API process drains the outbox to RabbitMQ in batches
+of up to `batch_size`, published through the pipelined confirm window. Every
+batch is relayed under a transaction-level advisory lock, so however many
+processes run a relay only one publishes at a time and events reach the broker
+in outbox order. The oldest rows are read, published, and deleted once the
+broker has confirmed them, all in the lock's transaction. Each message carries
+its outbox id as `message_id`.
+
+If a batch fails part way, the events the broker confirmed before the first
+failure are deleted, the first unconfirmed event's `attempts` is incremented
+and it and the rest stay for the next try after a backoff. Events sent after
+the failure in the same confirm window, or whose confirm was lost, are sent
+again, so delivery is at-least-once and consumers can drop repeats by
+`message_id`. An event that has failed `max_attempts` times while the broker
+was connected is moved to `messageoutboxdeadletter`, so one poison event
+cannot hold up the outbox forever. The relay is woken as soon as a session that staged events commits,
+and otherwise checks the outbox every `poll_seconds` for rows left by other
+processes or a restart.
+
+The relay runs whether or not the broker was reachable when it started; while
+the publisher is not connected it tries to connect it, backing off between
+attempts, and events accumulate in the outbox until it succeeds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import delete, event, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from smartem_backend.model.database import MessageOutbox, MessageOutboxDeadLetter
+from smartem_backend.model.mq_event import MessageQueueEventType
+from smartem_backend.rmq import AioPikaPublisher
+from smartem_backend.rmq.codec import encode_event
+from smartem_backend.utils import app_config
+
+logger = logging.getLogger(__name__)
+
+_APP_CFG = (app_config or {}).get("app", {}) if isinstance(app_config, dict) else {}
+
+OUTBOX_BATCH_SIZE = int(os.getenv("SMARTEM_OUTBOX_BATCH_SIZE", _APP_CFG.get("outbox_batch_size", 1000)))
+OUTBOX_POLL_SECONDS = float(os.getenv("SMARTEM_OUTBOX_POLL_SECONDS", _APP_CFG.get("outbox_poll_seconds", 5)))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("SMARTEM_OUTBOX_MAX_ATTEMPTS", _APP_CFG.get("outbox_max_attempts", 10)))
+
+# Advisory lock key held by the relay publishing a batch ("outbox" in ASCII)
+OUTBOX_RELAY_LOCK_KEY = 0x6F7574626F78
+
+_STAGED = "messageoutbox_staged"
+
+_staging_session: ContextVar[AsyncSession | None] = ContextVar("outbox_staging_session", default=None)
+
+
+@contextmanager
+def transactional_publish(db: AsyncSession) -> Iterator[None]:
+    """Stage events published in this block into `db`'s transaction instead of sending them to the broker
+
+    The caller commits `db` afterwards; the events are relayed once that commit succeeds.
+    """
+    token = _staging_session.set(db)
+    try:
+        yield
+    finally:
+        _staging_session.reset(token)
+
+
+def staging_session() -> AsyncSession | None:
+    return _staging_session.get()
+
+
+def stage_events(
+    session: AsyncSession, items: Sequence[tuple[MessageQueueEventType, BaseModel | dict[str, Any]]]
+) -> None:
+    """Add encoded events to the outbox in `session`. They are relayed after the session commits."""
+    rows = []
+    for event_type, payload in items:
+        body, content_type = encode_event(event_type, payload)
+        rows.append(MessageOutbox(event_type=event_type.value, content_type=content_type, body=body))
+    session.add_all(rows)
+    session.info[_STAGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay(session: Session) -> None:
+    if session.info.pop(_STAGED, False) and _relay is not None:
+        _relay.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_staged(session: Session) -> None:
+    session.info.pop(_STAGED, None)
+
+
+def relay_lock_statement():
+    """Statement waiting for the relay advisory lock, held until the end of the transaction"""
+    return select(func.pg_advisory_xact_lock(OUTBOX_RELAY_LOCK_KEY))
+
+
+def claim_statement(limit: int):
+    """Statement selecting up to `limit` of the oldest outbox rows, in id order"""
+    return (
+        select(
+            MessageOutbox.id,
+            MessageOutbox.event_type,
+            MessageOutbox.body,
+            MessageOutbox.content_type,
+            MessageOutbox.attempts,
+        )
+        .order_by(MessageOutbox.id)
+        .limit(limit)
+    )
+
+
+def dead_letter_statements(outbox_id: int):
+    """Statements moving one outbox row to the dead-letter table"""
+    columns = ["id", "event_type", "content_type", "body", "created_at", "attempts"]
+    moved = select(
+        *(getattr(MessageOutbox, column) for column in columns[:-1]),
+        MessageOutbox.attempts + 1,
+        literal(datetime.now()),
+    ).where(MessageOutbox.id == outbox_id)
+    return (
+        insert(MessageOutboxDeadLetter).from_select([*columns, "failed_at"], moved),
+        delete(MessageOutbox).where(MessageOutbox.id == outbox_id),
+    )
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        publisher: AioPikaPublisher,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    ) -> None:
+        self._session_factory = session_factory
+        self._publisher = publisher
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.max_attempts = max(max_attempts, 1)
+        self._wake_event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.relayed_count = 0
+        self.dead_lettered_count = 0
+
+    def wake(self) -> None:
+        self._wake_event.set()
+
+    async def relay_once(self) -> int | None:
+        """Publish one batch, returning how many events were relayed, or None if an event failed to publish"""
+        async with self._session_factory() as session:
+            await session.execute(relay_lock_statement())
+            rows = sorted((await session.execute(claim_statement(self.batch_size))).all(), key=lambda row: row[0])
+            if not rows:
+                await session.rollback()
+                return 0
+            published = await self._publisher.publish_encoded(
+                [
+                    (event_type, body, content_type, str(outbox_id))
+                    for outbox_id, event_type, body, content_type, _ in rows
+                ]
+            )
+            if published:
+                await session.execute(
+                    delete(MessageOutbox).where(MessageOutbox.id.in_([r[0] for r in rows[:published]]))
+                )
+            failed = rows[published] if published < len(rows) else None
+            dead_lettered = False
+            # a failure while the broker is down says nothing about the event itself
+            if failed is not None and self._publisher.is_connected:
+                failed_id, event_type, _, _, attempts = failed
+                if attempts + 1 >= self.max_attempts:
+                    for statement in dead_letter_statements(failed_id):
+                        await session.execute(statement)
+                    dead_lettered = True
+                    logger.error(
+                        f"Moved outbox event {failed_id} ({event_type}) to the dead-letter table "
+                        f"after {attempts + 1} failed publishes"
+                    )
+                else:
+                    await session.execute(
+                        update(MessageOutbox).where(MessageOutbox.id == failed_id).values(attempts=attempts + 1)
+                    )
+            await session.commit()
+        self.relayed_count += published
+        if failed is None:
+            return published
+        if dead_lettered:
+            self.dead_lettered_count += 1
+            # carry on with the events behind it straight away
+            self.wake()
+            return published
+        logger.error(f"Failed to relay outbox event {failed[0]}, keeping it and {len(rows) - published - 1} after it")
+        return None
+
+    async def _loop(self) -> None:
+        failures = 0
+        while True:
+            self._wake_event.clear()
+            try:
+                if not self._publisher.is_connected:
+                    await self._publisher.connect()
+                    logger.info("Outbox relay connected to the message broker")
+                relayed = await self.relay_once()
+            except Exception as e:
+                logger.error(f"Error relaying outbox events: {e}")
+                relayed = None
+            if relayed is None:
+                failures += 1
+                await asyncio.sleep(min(self.retry_base_delay * 2 ** (failures - 1), self.retry_max_delay))
+                continue
+            failures = 0
+            if relayed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=self.poll_seconds)
+            except TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background task and relay whatever is still in the outbox, one batch at a time"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if not self._publisher.is_connected:
+            return
+        try:
+            while (relayed := await self.relay_once()) is not None and relayed >= self.batch_size:
+                pass
+        except Exception as e:
+            logger.error(f"Error relaying outbox events on shutdown: {e}")
+
+
+_relay: OutboxRelay | None = None
+
+
+def set_outbox_relay(relay: OutboxRelay | None) -> None:
+    """Bind the process-wide outbox relay. Called by FastAPI lifespan on startup and shutdown."""
+    global _relay
+    _relay = relay
+
+
+def get_outbox_relay() -> OutboxRelay | None:
+    return _relay
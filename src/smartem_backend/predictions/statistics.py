@@ -0,0 +1,141 @@
+"""Running per-grid statistics for micrograph quality metrics.
+
+Each `QualityMetricStatistics` row keeps the moments of one metric on one grid:
+the number of values seen, their sum and the sum of squared deviations from
+their mean (`squared_value_sum`, Welford's M2). Incoming values are scored
+against the moments so far with a normal CDF and then folded in.
+
+`MetricMoments` does both steps on arrays, so a batch of values is scored and
+merged (Chan et al.'s pairwise update) in one pass. `record_metric_values`
+persists a batch with a single `INSERT ... ON CONFLICT DO UPDATE` that applies
+the same merge in SQL, so concurrent writers cannot lose each other's updates.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.special import erf
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from smartem_backend.model.database import QualityMetricStatistics
+
+
+@dataclass(frozen=True)
+class MetricMoments:
+    count: int = 0
+    value_sum: float = 0.0
+    squared_value_sum: float = 0.0
+
+    @classmethod
+    def from_values(cls, values: Sequence[float] | np.ndarray) -> MetricMoments:
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return cls()
+        return cls(
+            count=int(values.size),
+            value_sum=float(values.sum()),
+            squared_value_sum=float(np.square(values - values.mean()).sum()),
+        )
+
+    @property
+    def mean(self) -> float:
+        return self.value_sum / self.count
+
+    @property
+    def variance(self) -> float:
+        return self.squared_value_sum / (self.count - 1) if self.count > 1 else 0.0
+
+    def merge(self, other: MetricMoments) -> MetricMoments:
+        if not self.count:
+            return other
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return MetricMoments(
+            count=count,
+            value_sum=self.value_sum + other.value_sum,
+            squared_value_sum=self.squared_value_sum
+            + other.squared_value_sum
+            + delta * delta * self.count * other.count / count,
+        )
+
+    def quality(self, values: Sequence[float] | np.ndarray, larger_better: bool = False) -> np.ndarray:
+        """Score `values` in [0, 1] by where they fall in the normal distribution of the values seen so far
+
+        With no values seen every score is 1. Without any spread (a single value seen, or all equal) a
+        value scores 0.5 at the mean and 0 or 1 either side of it.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not self.count:
+            return np.ones_like(values)
+        variance = self.variance
+        if variance > 0:
+            cdf = 0.5 * (1 + erf((values - self.mean) / np.sqrt(2 * variance)))
+        else:
+            cdf = 0.5 * (1 + np.sign(values - self.mean))
+        return cdf if larger_better else 1 - cdf
+
+
+async def load_metric_moments(session: AsyncSession, grid_uuid: str, metric_name: str) -> MetricMoments:
+    stats = (
+        (
+            await session.execute(
+                select(QualityMetricStatistics)
+                .where(QualityMetricStatistics.grid_uuid == grid_uuid)
+                .where(QualityMetricStatistics.name == metric_name)
+            )
+        )
+        .scalars()
+        .first()
+    )
+    if stats is None:
+        return MetricMoments()
+    return MetricMoments(stats.count, stats.value_sum, stats.squared_value_sum)
+
+
+def upsert_metric_moments(grid_uuid: str, metric_name: str, batch: MetricMoments):
+    """Statement that adds `batch` to the stored moments for (grid, metric), creating the row if needed"""
+    statement = insert(QualityMetricStatistics).values(
+        grid_uuid=grid_uuid,
+        name=metric_name,
+        count=batch.count,
+        value_sum=batch.value_sum,
+        squared_value_sum=batch.squared_value_sum,
+    )
+    stored, new = QualityMetricStatistics.__table__.c, statement.excluded
+    delta = new.value_sum / new.count - stored.value_sum / stored.count
+    return statement.on_conflict_do_update(
+        index_elements=[stored.name, stored.grid_uuid],
+        set_={
+            "count": stored.count + new.count,
+            "value_sum": stored.value_sum + new.value_sum,
+            "squared_value_sum": stored.squared_value_sum
+            + new.squared_value_sum
+            + delta * delta * stored.count * new.count / (stored.count + new.count),
+        },
+    )
+
+
+async def record_metric_values(
+    session: AsyncSession,
+    grid_uuid: str,
+    metric_name: str,
+    values: Sequence[float] | np.ndarray,
+    larger_better: bool = False,
+) -> np.ndarray:
+    """Score `values` against the grid's statistics for `metric_name`, then add them to those statistics
+
+    Every value is scored against the moments as they were before the batch. The caller commits.
+    """
+    batch = MetricMoments.from_values(values)
+    if not batch.count:
+        return np.empty(0)
+    moments = await load_metric_moments(session, grid_uuid, metric_name)
+    await session.execute(upsert_metric_moments(grid_uuid, metric_name, batch))
+    return moments.quality(values, larger_better=larger_better)
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 from sqlalchemy import func
@@ -28,7 +28,10 @@ async def prior_update(
     micrograph_uuid: str,
     metric: str,
     session: AsyncSession,
+    commit: bool = True,
 ) -> None:
+    # with commit=False the updated weights are only flushed, for a caller that commits them with other writes
+
     # get the grid uuid from the micrograph
     # this should only ever produce a single response
     hierarchy_response = (
@@ -141,15 +144,16 @@ async def prior_update(
     for update in updates:
         update.weight = delta_missing * update.weight / posterior
         session.add(update)
-    await session.commit()
+    if commit:
+        await session.commit()
+    else:
+        await session.flush()
     return None
 
 
 async def overall_predictions_update(grid_uuid: str, session: AsyncSession) -> None:
-    # check grid to see if it has been long enough to refresh predictions
+    # callers are expected to rate limit refreshes (see smartem_backend.refresh_scheduler)
     grid = (await session.execute(select(Grid).where(Grid.uuid == grid_uuid))).scalars().one()
-    if grid.prediction_updated_time > datetime.now() - timedelta(seconds=60):
-        return None
 
     # seems easier to just collect the model name for future use here
     model_rows = (await session.execute(select(QualityPredictionModel))).scalars().all()
@@ -0,0 +1,159 @@
+"""Debounced background refresh of overall predictions, per grid.
+
+Handlers that change a grid's predictions, model weights or group predictions
+call `RefreshScheduler.mark_dirty(grid_uuid)` instead of recomputing the
+grid's overall predictions inline. A background task runs one refresh per
+dirty grid once the grid has been quiet for `debounce_seconds`, or once it has
+been dirty for `max_delay_seconds` under a continuous stream of changes, so a
+burst of updates costs a single recompute. A short debounce lowers latency; a
+longer one coalesces more updates per recompute.
+
+A grid marked dirty while its refresh is running is refreshed again
+afterwards. A grid whose refresh fails stays dirty and is retried after
+`retry_base_seconds`, doubling with each further failure up to
+`retry_max_seconds`. The time from a grid first being marked dirty to its
+refresh finishing is logged and recorded in the `lag` histogram, which
+`summary()` reports along with the grids still pending.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from smartem_backend.utils import app_config
+from smartem_common.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+_APP_CFG = (app_config or {}).get("app", {}) if isinstance(app_config, dict) else {}
+
+REFRESH_DEBOUNCE_SECONDS = float(
+    os.getenv("SMARTEM_REFRESH_DEBOUNCE_SECONDS", _APP_CFG.get("refresh_debounce_seconds", 5.0))
+)
+REFRESH_MAX_DELAY_SECONDS = float(
+    os.getenv("SMARTEM_REFRESH_MAX_DELAY_SECONDS", _APP_CFG.get("refresh_max_delay_seconds", 60.0))
+)
+REFRESH_RETRY_BASE_SECONDS = float(
+    os.getenv("SMARTEM_REFRESH_RETRY_BASE_SECONDS", _APP_CFG.get("refresh_retry_base_seconds", 5.0))
+)
+REFRESH_RETRY_MAX_SECONDS = float(
+    os.getenv("SMARTEM_REFRESH_RETRY_MAX_SECONDS", _APP_CFG.get("refresh_retry_max_seconds", 300.0))
+)
+
+
+class RefreshScheduler:
+    def __init__(
+        self,
+        refresh: Callable[[str], Awaitable[None]],
+        debounce_seconds: float = REFRESH_DEBOUNCE_SECONDS,
+        max_delay_seconds: float = REFRESH_MAX_DELAY_SECONDS,
+        retry_base_seconds: float = REFRESH_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = REFRESH_RETRY_MAX_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._refresh = refresh
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max(max_delay_seconds, debounce_seconds)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = max(retry_max_seconds, retry_base_seconds)
+        self._clock = clock
+        # grid uuid -> (first marked dirty, last marked dirty)
+        self._dirty: dict[str, tuple[float, float]] = {}
+        # grid uuid -> (consecutive failed refreshes, earliest retry)
+        self._failures: dict[str, tuple[int, float]] = {}
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.lag = LatencyHistogram()
+        self.failed_count = 0
+
+    def mark_dirty(self, grid_uuid: str) -> None:
+        now = self._clock()
+        first, _ = self._dirty.get(grid_uuid, (now, now))
+        self._dirty[grid_uuid] = (first, now)
+        self._wake.set()
+
+    def pending(self) -> list[str]:
+        return list(self._dirty)
+
+    def summary(self) -> dict:
+        return {
+            "pending": len(self._dirty),
+            "retrying": len(self._failures),
+            "failed": self.failed_count,
+            "lag_ms": self.lag.summary(),
+        }
+
+    def _due_at(self, grid_uuid: str) -> float:
+        first, last = self._dirty[grid_uuid]
+        due = min(last + self.debounce_seconds, first + self.max_delay_seconds)
+        _, retry_at = self._failures.get(grid_uuid, (0, due))
+        return max(due, retry_at)
+
+    async def _refresh_grid(self, grid_uuid: str) -> None:
+        first, _ = self._dirty.pop(grid_uuid)
+        try:
+            await self._refresh(grid_uuid)
+        except Exception as e:
+            self.failed_count += 1
+            failures = self._failures.get(grid_uuid, (0, 0.0))[0] + 1
+            backoff = min(self.retry_base_seconds * 2 ** (failures - 1), self.retry_max_seconds)
+            now = self._clock()
+            self._failures[grid_uuid] = (failures, now + backoff)
+            # keep the original first-dirty time, and any changes made while the refresh was running
+            self._dirty[grid_uuid] = (first, self._dirty.get(grid_uuid, (first, now))[1])
+            logger.error(
+                f"Failed to refresh predictions for grid {grid_uuid} ({failures} in a row), "
+                f"retrying in {backoff:.0f}s: {e}"
+            )
+            return
+        self._failures.pop(grid_uuid, None)
+        lag = self._clock() - first
+        self.lag.record(lag * 1e3)
+        logger.info(f"Refreshed predictions for grid {grid_uuid} {lag:.1f}s after they changed")
+
+    async def run_due(self) -> list[str]:
+        """Refresh every grid whose debounce or maximum delay has elapsed, returning their uuids"""
+        now = self._clock()
+        due = [grid_uuid for grid_uuid in self._dirty if self._due_at(grid_uuid) <= now]
+        for grid_uuid in due:
+            await self._refresh_grid(grid_uuid)
+        return due
+
+    async def flush(self) -> None:
+        """Refresh every dirty grid now"""
+        for grid_uuid in list(self._dirty):
+            await self._refresh_grid(grid_uuid)
+
+    async def _loop(self) -> None:
+        while True:
+            self._wake.clear()
+            if not self._dirty:
+                await self._wake.wait()
+                continue
+            delay = min(self._due_at(grid_uuid) for grid_uuid in self._dirty) - self._clock()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except TimeoutError:
+                    pass
+                continue
+            await self.run_due()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background task and refresh any grids still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
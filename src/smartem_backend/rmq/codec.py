@@ -0,0 +1,59 @@
+"""Single-pass encoding and decoding of message bus events.
+
+Events are written by pydantic-core straight from their payload model and,
+on the way in, validated from the raw body straight into that model, so an
+event is serialised once and parsed once. The consumer's handlers receive the
+validated model instead of a dict they validate again.
+
+The format is negotiated through the AMQP `content_type`. A message published
+with `EVENT_CONTENT_TYPE` carries its event type in the AMQP `type` property
+and a body that is exactly the payload model's JSON, and is decoded with the
+model registered for that type in `EVENT_MODELS`. Anything else, such as
+`application/json` messages from older publishers or external tools, is parsed
+as a JSON object and passed on as a dict, which the handlers still validate.
+Both bodies are JSON objects with an `event_type` field, so consumers that
+predate the codec read new messages as plain JSON.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel
+from pydantic_core import from_json, to_json
+
+from smartem_backend.model.mq_event import EVENT_MODELS, MessageQueueEventType
+
+LEGACY_CONTENT_TYPE = "application/json"
+EVENT_CONTENT_TYPE = "application/vnd.smartem.event+json"
+
+EventData = BaseModel | dict[str, Any]
+
+_models_by_type: dict[str, type[BaseModel]] = {event_type.value: model for event_type, model in EVENT_MODELS.items()}
+
+
+def encode_event(event_type: MessageQueueEventType, payload: EventData) -> tuple[bytes, str]:
+    """Encode an event, returning the body and the content type to publish it with"""
+    model = EVENT_MODELS.get(event_type)
+    if model is not None and isinstance(payload, model) and getattr(payload, "event_type", None) == event_type:
+        return to_json(payload), EVENT_CONTENT_TYPE
+    # dicts, and models whose body lacks the right event_type, get it spliced in front for the generic decoder
+    payload_dict = payload.model_dump(mode="json") if isinstance(payload, BaseModel) else payload
+    return to_json({"event_type": event_type.value, **payload_dict}), LEGACY_CONTENT_TYPE
+
+
+def decode_event(body: bytes, content_type: str | None = None, message_type: str | None = None) -> EventData:
+    """Decode a message body into its payload model, or a dict for messages in the generic JSON format
+
+    A model is only returned for a `message_type` registered in `EVENT_MODELS`, which is then the event type.
+
+    Raises ValueError if the body is not a JSON object, and pydantic's ValidationError (a ValueError) if a body
+    in the event format does not match its model.
+    """
+    model = _models_by_type.get(message_type) if content_type == EVENT_CONTENT_TYPE and message_type else None
+    if model is not None:
+        return model.model_validate_json(body)
+    data = from_json(body)
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    return data
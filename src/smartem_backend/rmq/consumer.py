@@ -1,4 +1,3 @@
-import json
 import logging
 from collections.abc import Awaitable, Callable
 
@@ -6,6 +5,8 @@ import aio_pika
 from aio_pika import DeliveryMode, Message
 from aio_pika.abc import AbstractChannel, AbstractIncomingMessage, AbstractQueue, AbstractRobustConnection
 
+from smartem_backend.rmq.codec import LEGACY_CONTENT_TYPE, EventData, decode_event
+
 logger = logging.getLogger(__name__)
 
 MessageHandler = Callable[[AbstractIncomingMessage], Awaitable[None]]
@@ -83,7 +84,8 @@ class AioPikaConsumer:
             body=message.body,
             headers=headers,
             delivery_mode=DeliveryMode.PERSISTENT,
-            content_type=message.content_type or "application/json",
+            content_type=message.content_type or LEGACY_CONTENT_TYPE,
+            type=message.type,
         )
         await self._channel.default_exchange.publish(reissue, routing_key=self._queue_name)
 
@@ -98,5 +100,6 @@ class AioPikaConsumer:
         logger.info("Closed aio-pika consumer")
 
 
-def decode_event_body(message: AbstractIncomingMessage) -> dict:
-    return json.loads(message.body.decode())
+def decode_event_body(message: AbstractIncomingMessage) -> EventData:
+    """Decode a message into its payload model or, for generic JSON messages, a dict. See `codec.decode_event`."""
+    return decode_event(message.body, message.content_type, message.type)
@@ -1,6 +1,5 @@
-import json
+import asyncio
 import logging
-from datetime import datetime
 from typing import Any
 
 import aio_pika
@@ -10,17 +9,11 @@ from aio_pika.exceptions import DeliveryError
 from pydantic import BaseModel
 
 from smartem_backend.model.mq_event import MessageQueueEventType
+from smartem_backend.rmq.codec import encode_event
 
 logger = logging.getLogger(__name__)
 
 
-class _DateTimeEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, datetime):
-            return o.isoformat()
-        return super().default(o)
-
-
 class AioPikaPublisher:
     """Async RabbitMQ publisher built on aio-pika.
 
@@ -28,13 +21,22 @@ class AioPikaPublisher:
     (publisher_confirms=True) give an ack-from-broker guarantee; mandatory=True
     surfaces misrouted messages as DeliveryError rather than silent drops.
     Thread-safe because a single event loop owns the connection.
+
+    publish_events keeps up to `confirm_window` publishes in flight and waits
+    for their confirms together, so a batch costs roughly
+    len(items) / confirm_window broker round trips instead of one per message.
+    publish_encoded reports how many messages from the start of a batch the
+    broker confirmed, so a caller can retry from the first one it did not.
     """
 
-    def __init__(self, url: str, exchange_name: str, routing_key: str, heartbeat: int = 60) -> None:
+    def __init__(
+        self, url: str, exchange_name: str, routing_key: str, heartbeat: int = 60, confirm_window: int = 100
+    ) -> None:
         self._url = url
         self._exchange_name = exchange_name
         self._routing_key = routing_key
         self._heartbeat = heartbeat
+        self._confirm_window = max(1, confirm_window)
         self._connection: AbstractRobustConnection | None = None
         self._channel: AbstractChannel | None = None
         self._exchange: AbstractExchange | None = None
@@ -43,13 +45,18 @@ class AioPikaPublisher:
         if self._connection is not None and not self._connection.is_closed:
             return
         self._connection = await aio_pika.connect_robust(self._url, heartbeat=self._heartbeat)
-        channel = await self._connection.channel(publisher_confirms=True)
-        self._channel = channel
-        await channel.declare_queue(self._routing_key, durable=True)
-        if self._exchange_name:
-            self._exchange = await channel.declare_exchange(self._exchange_name, durable=True)
-        else:
-            self._exchange = channel.default_exchange
+        try:
+            channel = await self._connection.channel(publisher_confirms=True)
+            self._channel = channel
+            await channel.declare_queue(self._routing_key, durable=True)
+            if self._exchange_name:
+                self._exchange = await channel.declare_exchange(self._exchange_name, durable=True)
+            else:
+                self._exchange = channel.default_exchange
+        except Exception:
+            # leave the publisher unconnected so a later connect() starts over
+            await self.close()
+            raise
         logger.info("Connected aio-pika publisher, routing_key='%s'", self._routing_key)
 
     @property
@@ -66,24 +73,20 @@ class AioPikaPublisher:
         self._exchange = None
         logger.info("Closed aio-pika publisher")
 
-    def _encode(self, event_type: MessageQueueEventType, payload: BaseModel | dict[str, Any]) -> bytes:
-        if isinstance(payload, BaseModel):
-            payload_dict = json.loads(payload.json())
-        else:
-            payload_dict = payload
-        body = {"event_type": event_type.value, **payload_dict}
-        return json.dumps(body, cls=_DateTimeEncoder).encode("utf-8")
-
-    def _message(self, body: bytes) -> Message:
-        return Message(body=body, delivery_mode=DeliveryMode.PERSISTENT, content_type="application/json")
+    def _message(self, event_type: MessageQueueEventType, payload: BaseModel | dict[str, Any]) -> Message:
+        body, content_type = encode_event(event_type, payload)
+        return Message(
+            body=body, delivery_mode=DeliveryMode.PERSISTENT, content_type=content_type, type=event_type.value
+        )
 
     async def publish_event(self, event_type: MessageQueueEventType, payload: BaseModel | dict[str, Any]) -> bool:
         if self._exchange is None:
             logger.error("Publisher not connected when publishing %s", event_type.value)
             return False
         try:
-            body = self._encode(event_type, payload)
-            await self._exchange.publish(self._message(body), routing_key=self._routing_key, mandatory=True)
+            await self._exchange.publish(
+                self._message(event_type, payload), routing_key=self._routing_key, mandatory=True
+            )
             return True
         except DeliveryError as exc:
             logger.error("Unroutable message for event %s: %s", event_type.value, exc)
@@ -99,13 +102,59 @@ class AioPikaPublisher:
             logger.error("Publisher not connected when publishing batch of %d", len(items))
             return False
         try:
-            for event_type, payload in items:
-                body = self._encode(event_type, payload)
-                await self._exchange.publish(self._message(body), routing_key=self._routing_key, mandatory=True)
-            return True
-        except DeliveryError as exc:
-            logger.error("Unroutable message during batch publish: %s", exc)
-            return False
+            messages = [self._message(event_type, payload) for event_type, payload in items]
         except Exception as exc:
-            logger.error("Failed to publish batch of %d events: %s", len(items), exc)
+            logger.error("Failed to encode batch of %d events: %s", len(items), exc)
             return False
+        return await self._publish_messages(messages) == len(messages)
+
+    async def publish_encoded(self, items: list[tuple[str, bytes, str, str]]) -> int:
+        """
+        Publish already encoded (event_type, body, content_type, message_id) messages, as relayed from the outbox
+
+        Returns how many messages from the start of `items` the broker confirmed; a failure ends the batch there.
+        """
+        if not items:
+            return 0
+        if self._exchange is None:
+            logger.error("Publisher not connected when publishing batch of %d", len(items))
+            return 0
+        return await self._publish_messages(
+            [
+                Message(
+                    body=body,
+                    delivery_mode=DeliveryMode.PERSISTENT,
+                    content_type=content_type,
+                    type=event_type,
+                    message_id=message_id,
+                )
+                for event_type, body, content_type, message_id in items
+            ]
+        )
+
+    async def _publish_messages(self, messages: list[Message]) -> int:
+        # Messages are written to the channel in order; only the waits for their confirms overlap. A window that
+        # has any failure ends the batch, though the rest of that window was sent. Returns how many messages from
+        # the start were confirmed: every earlier window, plus those in the failing window before its first failure.
+        for start in range(0, len(messages), self._confirm_window):
+            window = messages[start : start + self._confirm_window]
+            results = await asyncio.gather(
+                *(self._exchange.publish(message, routing_key=self._routing_key, mandatory=True) for message in window),
+                return_exceptions=True,
+            )
+            failures = [result for result in results if isinstance(result, BaseException)]
+            if failures:
+                exc = failures[0]
+                confirmed = start + next(i for i, result in enumerate(results) if isinstance(result, BaseException))
+                if isinstance(exc, DeliveryError):
+                    logger.error("Unroutable message during batch publish: %s", exc)
+                else:
+                    logger.error(
+                        "Failed to publish %d of %d events in batch of %d: %s",
+                        len(failures),
+                        len(window),
+                        len(messages),
+                        exc,
+                    )
+                return confirmed
+        return len(messages)
@@ -0,0 +1,39 @@
+"""Single-pass JSON serialisation for high-volume CRUD responses.
+
+For an endpoint declared with `response_model`, FastAPI re-validates whatever
+the handler returns into that model and then serialises it again to Python
+primitives before `json.dumps`. Handlers that had already built a response
+model per row therefore paid for each item three times. `json_response`
+instead validates the whole payload (plain dicts, or ORM rows with
+`from_attributes=True`) through one cached `TypeAdapter` and writes JSON
+bytes directly from pydantic-core. Handlers keep their `response_model`
+declaration, so the OpenAPI schema is unchanged.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@cache
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def dump_json(response_type: Any, value: Any, from_attributes: bool = False) -> bytes:
+    """Validate `value` as `response_type` (e.g. `list[FoilHoleResponse]`) and return its JSON encoding."""
+    adapter = _adapter(response_type)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=from_attributes))
+
+
+def json_response(response_type: Any, value: Any, status_code: int = 200, from_attributes: bool = False) -> Response:
+    """Build a JSON response for `value` without FastAPI's response_model round trip."""
+    return Response(
+        dump_json(response_type, value, from_attributes=from_attributes),
+        status_code=status_code,
+        media_type="application/json",
+    )
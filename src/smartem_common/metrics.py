@@ -0,0 +1,68 @@
+"""Metric primitives shared by the agent and the backend."""
+
+import math
+
+
+class LatencyHistogram:
+    """Fixed-memory histogram of latencies in milliseconds with logarithmic buckets
+
+    Bucket i holds values in [MIN_MS * GROWTH**i, MIN_MS * GROWTH**(i + 1)), so recording is a single
+    log and percentiles read back from the bucket counts are within 5% of the exact value. Values
+    outside the covered range (10 us to about 50 minutes) are clamped into the end buckets.
+    """
+
+    MIN_MS = 0.01
+    GROWTH = 1.05
+    BUCKETS = 400
+    _LOG_GROWTH = math.log(GROWTH)
+
+    __slots__ = ("_counts", "count", "total", "max")
+
+    def __init__(self):
+        self._counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value_ms: float) -> None:
+        if value_ms > self.MIN_MS:
+            index = min(int(math.log(value_ms / self.MIN_MS) / self._LOG_GROWTH), self.BUCKETS - 1)
+        else:
+            index = 0
+        self._counts[index] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """A new histogram holding the values recorded in both this one and `other`"""
+        merged = LatencyHistogram()
+        merged._counts = [a + b for a, b in zip(self._counts, other._counts, strict=True)]  # noqa: SLF001
+        merged.count = self.count + other.count
+        merged.total = self.total + other.total
+        merged.max = max(self.max, other.max)
+        return merged
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = min(int(self.count * p), self.count - 1)
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen > rank:
+                if index == self.BUCKETS - 1:
+                    return self.max
+                # geometric midpoint of the bucket, never above the largest value seen
+                return min(self.MIN_MS * self.GROWTH ** (index + 0.5), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
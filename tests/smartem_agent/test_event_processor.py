@@ -405,3 +405,60 @@ class TestEventProcessor:
         assert stats.total_processed == 1
         assert stats.failed == 1
         assert stats.successful == 0
+
+    def test_transient_failure_scheduled_for_retry_after_backoff(self, parser, datastore, orphan_manager, temp_dir):
+        from smartem_agent.error_handler import ErrorHandler
+        from smartem_agent.event_queue import EventQueue
+        from smartem_agent.metrics import ProcessingMetrics
+
+        queue = EventQueue()
+        metrics = ProcessingMetrics()
+        processor = EventProcessor(
+            parser, datastore, orphan_manager, ErrorHandler(base_delay=2.0), metrics, event_queue=queue
+        )
+        grid_path = temp_dir / "EpuSession.dm"
+        grid_path.touch()
+        processor.parser.parse_epu_session_manifest = Mock(side_effect=Exception("connection refused"))
+        event = ClassifiedEvent(EntityType.GRID, grid_path, None, 0, time.time(), "created")
+
+        stats = processor.process_batch([event])
+
+        assert stats.failed == 1
+        assert stats.retried == 1
+        assert queue.size() == 0
+        assert queue.pending_retry_count() == 1
+        assert 1.9 < queue.next_retry_delay() <= 2.0
+        assert metrics.get_retry_attempt_histogram() == {1: 1}
+        assert metrics.get_retry_delay_histogram()["<=2s"] == 1
+
+    def test_permanent_failure_not_retried(self, parser, datastore, orphan_manager, temp_dir):
+        from smartem_agent.event_queue import EventQueue
+
+        queue = EventQueue()
+        processor = EventProcessor(parser, datastore, orphan_manager, event_queue=queue)
+        grid_path = temp_dir / "EpuSession.dm"
+        grid_path.touch()
+        processor.parser.parse_epu_session_manifest = Mock(side_effect=Exception("file is corrupt"))
+        event = ClassifiedEvent(EntityType.GRID, grid_path, None, 0, time.time(), "created")
+
+        stats = processor.process_batch([event])
+
+        assert stats.failed == 1
+        assert stats.retried == 0
+        assert queue.pending_retry_count() == 0
+
+    def test_latency_recorded_per_entity_type_and_stage(self, parser, datastore, orphan_manager, temp_dir):
+        from smartem_agent.metrics import ProcessingMetrics
+
+        metrics = ProcessingMetrics()
+        processor = EventProcessor(parser, datastore, orphan_manager, metrics=metrics)
+        grid_path = temp_dir / "EpuSession.dm"
+        grid_path.touch()
+        processor.parser.parse_epu_session_manifest = Mock(side_effect=Exception("file is corrupt"))
+        event = ClassifiedEvent(EntityType.GRID, grid_path, None, 0, time.time(), "created")
+
+        processor.process_batch([event])
+
+        breakdown = metrics.get_latency_breakdown()
+        assert set(breakdown) == {"grid.parse", "grid.store", "grid.total"}
+        assert breakdown["grid.total"]["max"] >= breakdown["grid.parse"]["max"]
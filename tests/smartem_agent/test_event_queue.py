@@ -172,3 +172,30 @@ class TestEventQueue:
         actual_order = [event.entity_type for event in batch]
 
         assert actual_order == expected_order
+
+    def test_retry_released_after_delay(self, queue, sample_event):
+        queue.schedule_retry(sample_event, delay_seconds=0.05)
+
+        assert queue.release_due_retries() == 0
+        assert queue.size() == 0
+        assert queue.pending_retry_count() == 1
+        assert 0 < queue.next_retry_delay() <= 0.05
+
+        time.sleep(0.06)
+
+        assert queue.release_due_retries() == 1
+        assert queue.dequeue_batch() == [sample_event]
+        assert queue.pending_retry_count() == 0
+        assert queue.next_retry_delay() is None
+
+    def test_retries_released_in_due_order(self, queue):
+        events = [
+            ClassifiedEvent(EntityType.GRID, Path(f"/test/{i}.dm"), None, 0, time.time(), "created") for i in range(3)
+        ]
+        queue.schedule_retry(events[0], delay_seconds=60)
+        queue.schedule_retry(events[1], delay_seconds=0)
+        queue.schedule_retry(events[2], delay_seconds=0)
+
+        assert queue.release_due_retries() == 2
+        assert {e.file_path for e in queue.dequeue_batch()} == {events[1].file_path, events[2].file_path}
+        assert queue.pending_retry_count() == 1
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from smartem_agent.metrics import LatencyHistogram, ProcessingMetrics
+
+
+class TestLatencyHistogram:
+    def test_empty_histogram_reports_zeros(self):
+        assert LatencyHistogram().summary() == {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+
+    def test_percentiles_within_bucket_resolution(self):
+        rng = random.Random(42)
+        values = sorted(rng.lognormvariate(2.0, 1.0) for _ in range(10_000))
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        for p in (0.5, 0.95, 0.99):
+            exact = values[int(len(values) * p)]
+            assert histogram.percentile(p) == pytest.approx(exact, rel=0.05)
+        assert histogram.max == values[-1]
+        assert histogram.count == len(values)
+
+    def test_out_of_range_values_are_clamped(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0)
+        histogram.record(1e9)
+
+        assert histogram.percentile(0.0) < LatencyHistogram.MIN_MS * LatencyHistogram.GROWTH
+        assert histogram.percentile(1.0) == 1e9
+
+
+class TestProcessingMetrics:
+    def test_stage_latency_does_not_count_towards_overall(self):
+        metrics = ProcessingMetrics()
+        metrics.record_latency(10.0, "grid")
+        metrics.record_latency(4.0, "grid", stage="parse")
+        metrics.record_latency(6.0, "grid", stage="store")
+
+        assert metrics.get_latency_percentiles()["max"] == 10.0
+        assert list(metrics.get_latency_breakdown()) == ["grid.parse", "grid.store", "grid.total"]
+
+    def test_latency_covers_only_the_recent_window(self):
+        metrics = ProcessingMetrics(window_size=10)
+        metrics.record_latency(5000.0, "grid")
+        for _ in range(20):
+            metrics.record_latency(10.0, "grid")
+
+        assert metrics.get_latency_percentiles()["max"] == 10.0
+        assert metrics.get_latency_breakdown()["grid.total"]["max"] == 10.0
+
+    def test_clear_resets_histograms(self):
+        metrics = ProcessingMetrics()
+        metrics.record_latency(10.0, "foilhole")
+        metrics.clear()
+
+        assert metrics.get_latency_percentiles()["max"] == 0.0
+        assert metrics.get_latency_breakdown() == {}
@@ -255,3 +255,30 @@ class TestOrphanManager:
 
         stats = orphan_manager.get_orphan_stats()
         assert stats["total_orphans"] == 0
+
+    def test_timeouts_reported_once(self, orphan_manager, sample_foilhole_data):
+        orphan_manager.register_orphan(sample_foilhole_data, EntityType.FOILHOLE, "42", Path("/test/FoilHole_123.xml"))
+        time.sleep(0.1)
+
+        assert len(orphan_manager.check_timeouts(max_age_seconds=0.05)) == 1
+        assert orphan_manager.check_timeouts(max_age_seconds=0.05) == []
+        assert len(orphan_manager.resolve_orphans_for(EntityType.GRIDSQUARE, "42")) == 1
+
+    def test_resolved_orphans_do_not_time_out(self, orphan_manager):
+        for i in range(200):
+            orphan_manager.register_orphan(
+                FoilHoleData(id=str(i), gridsquare_id=str(i % 2)),
+                EntityType.FOILHOLE,
+                str(i % 2),
+                Path(f"/test/FoilHole_{i}.xml"),
+            )
+        orphan_manager.resolve_orphans_for(EntityType.GRIDSQUARE, "0")
+        time.sleep(0.1)
+
+        timed_out = orphan_manager.check_timeouts(max_age_seconds=0.05)
+
+        assert sorted(int(o.entity_data.id) for o in timed_out) == list(range(1, 200, 2))
+        stats = orphan_manager.get_orphan_stats()
+        assert stats["total_orphans"] == 100
+        assert stats["by_type"] == {"foilhole": 100}
+        assert stats["total_timed_out"] == 100
@@ -1,12 +1,26 @@
 import logging
+import threading
 import time
 from unittest.mock import MagicMock
 
 from smartem_agent.remote_log_handler import RemoteLogHandler
 
 
+def _record(msg: str = "test", level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(name="test", level=level, pathname="", lineno=0, msg=msg, args=None, exc_info=None)
+
+
+def _wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
 class TestRemoteLogHandler:
-    def _make_handler(self, api_client=None, buffer_size=10, flush_interval=60.0):
+    def _make_handler(self, api_client=None, buffer_size=10, flush_interval=60.0, **kwargs):
         client = api_client or MagicMock()
         handler = RemoteLogHandler(
             api_client=client,
@@ -14,6 +28,7 @@ class TestRemoteLogHandler:
             session_id="test-session",
             buffer_size=buffer_size,
             flush_interval=flush_interval,
+            **kwargs,
         )
         return handler, client
 
@@ -45,6 +60,7 @@ class TestRemoteLogHandler:
                 exc_info=None,
             )
             handler.emit(record)
+        assert _wait_for(lambda: client.send_logs.called)
         client.send_logs.assert_called_once()
         call_args = client.send_logs.call_args
         assert call_args[0][0] == "test-agent"
@@ -118,3 +134,59 @@ class TestRemoteLogHandler:
         time.sleep(0.4)
         client.send_logs.assert_called()
         handler.close()
+
+    def test_emit_does_not_wait_for_a_slow_backend(self):
+        client = MagicMock()
+        release = threading.Event()
+        client.send_logs.side_effect = lambda *args: release.wait(5) or True
+        handler, _ = self._make_handler(api_client=client, buffer_size=1)
+
+        start = time.monotonic()
+        for i in range(50):
+            handler.emit(_record(f"message {i}"))
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.5
+        release.set()
+        handler.close()
+
+    def test_full_buffer_drops_oldest_and_reports_it(self):
+        client = MagicMock()
+        handler, _ = self._make_handler(api_client=client, buffer_size=10, capacity=10)
+        # hold the shipper on a failing batch so the buffer overflows behind it
+        client.send_logs.return_value = False
+        for i in range(25):
+            handler.emit(_record(f"message {i}"))
+
+        assert handler.dropped_count >= 5
+        client.send_logs.return_value = True
+        client.send_logs.reset_mock()
+        handler.close()
+
+        shipped = [entry["message"] for call in client.send_logs.call_args_list for entry in call.args[2]]
+        assert any(message.startswith("Dropped ") for message in shipped)
+        assert shipped[-1] == "message 24"
+
+    def test_failed_batch_retried_with_backoff(self):
+        client = MagicMock()
+        client.send_logs.side_effect = [False, False, True]
+        handler, _ = self._make_handler(api_client=client, flush_interval=0.05, retry_base_delay=0.05)
+
+        handler.emit(_record("retried"))
+
+        assert _wait_for(lambda: handler.sent_count == 1)
+        assert client.send_logs.call_count == 3
+        assert all(call.args[2][0]["message"] == "retried" for call in client.send_logs.call_args_list)
+        assert handler.dropped_count == 0
+        handler.close()
+
+    def test_batch_dropped_after_max_retries(self):
+        client = MagicMock()
+        client.send_logs.return_value = False
+        handler, _ = self._make_handler(api_client=client, flush_interval=0.05, max_retries=2, retry_base_delay=0.01)
+
+        handler.emit(_record("lost"))
+
+        assert _wait_for(lambda: handler.dropped_count == 1)
+        assert client.send_logs.call_count == 2
+        handler.close()
@@ -0,0 +1,131 @@
+"""Set-based, batched cleanup in AgentConnectionManager and AgentDataCleanupService."""
+
+import asyncio
+from collections import namedtuple
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from smartem_backend import agent_connection_manager
+from smartem_backend.agent_connection_manager import AgentConnectionManager
+from smartem_backend.agent_data_cleanup import (
+    AgentDataCleanupService,
+    AgentDataRetentionPolicy,
+    update_in_batches,
+)
+from smartem_backend.model.database import AgentConnection
+
+Row = namedtuple("Row", ["id", "instruction_id", "session_id", "agent_id", "expires_at", "retry_count"])
+StatusRow = namedtuple("StatusRow", ["status"])
+
+
+class FakeSession:
+    """AsyncSession stand-in: each `execute` returns the next queued list of rows (or none once they run out)."""
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.statements = []
+        self.commit = AsyncMock()
+        self.rollback = AsyncMock()
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        result = MagicMock()
+        result.all.return_value = self.results.pop(0) if self.results else []
+        return result
+
+    def sql(self, index: int) -> str:
+        return str(self.statements[index].compile(dialect=postgresql.asyncpg.dialect()))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def _manager(session: FakeSession, batch_size: int = 2) -> AgentConnectionManager:
+    return AgentConnectionManager(db_engine=MagicMock(), session_factory=lambda: session, batch_size=batch_size)
+
+
+class TestUpdateInBatches:
+    def test_repeats_until_a_short_batch_and_commits_each(self):
+        session = FakeSession([[(1,), (2,)], [(3,), (4,)], [(5,)]])
+
+        rows = asyncio.run(
+            update_in_batches(
+                session,
+                AgentConnection,
+                where=(AgentConnection.status == "active",),
+                values={"status": "closed"},
+                batch_size=2,
+            )
+        )
+
+        assert [row[0] for row in rows] == [1, 2, 3, 4, 5]
+        assert len(session.statements) == 3
+        assert session.commit.await_count == 3
+        sql = session.sql(0)
+        assert sql.startswith("UPDATE agentconnection SET status=")
+        assert "LIMIT" in sql and "FOR UPDATE SKIP LOCKED" in sql and "RETURNING agentconnection.id" in sql
+
+
+class TestConnectionManagerCleanup:
+    def test_stale_connections_closed_with_one_statement_per_batch(self):
+        session = FakeSession([[(1, "conn-1")]])
+
+        asyncio.run(_manager(session)._cleanup_stale_connections())
+
+        assert len(session.statements) == 1
+        sql = session.sql(0)
+        assert sql.startswith("UPDATE agentconnection SET status=")
+        assert "RETURNING agentconnection.id, agentconnection.connection_id" in sql
+
+    def test_inactive_sessions_marked_in_one_statement(self):
+        session = FakeSession([[(1, "sess-1")]])
+
+        asyncio.run(_manager(session)._update_session_activity())
+
+        assert session.sql(0).startswith("UPDATE agentsession SET status=")
+
+    def test_expired_instructions_only_advance_once_published(self, monkeypatch):
+        expires_at = datetime(2026, 10, 19, 12, 0)
+        batch = [
+            Row(1, "ins-1", "sess-1", "agent-1", expires_at, 0),
+            Row(2, "ins-2", "sess-1", "agent-1", expires_at, 2),
+        ]
+        session = FakeSession([batch, [StatusRow("pending")], []])
+        published = []
+
+        async def _publish(**kwargs):
+            published.append(kwargs)
+            return kwargs["instruction_id"] == "ins-1"
+
+        monkeypatch.setattr(agent_connection_manager, "publish_agent_instruction_expired", _publish)
+
+        asyncio.run(_manager(session)._handle_expired_instructions())
+
+        assert [event["retry_count"] for event in published] == [1, 3]
+        assert "FOR UPDATE SKIP LOCKED" in session.sql(0)
+        update_statement = session.statements[1]
+        assert str(update_statement.compile(dialect=postgresql.dialect())).startswith("UPDATE agentinstruction SET")
+        assert update_statement.compile(dialect=postgresql.dialect()).params["id_1"] == [1]
+        # a full batch means there may be more: the next read starts after the last id seen
+        assert session.statements[2].compile().params["id_1"] == 2
+
+
+class TestAgentDataCleanupService:
+    def test_full_cleanup_runs_set_based_statements(self):
+        session = FakeSession()
+        policy = AgentDataRetentionPolicy.development()
+
+        results = asyncio.run(AgentDataCleanupService(session, policy).run_full_cleanup())
+
+        statements = [session.sql(i).split(" WHERE")[0] for i in range(len(session.statements))]
+        assert statements[0].startswith("UPDATE agentconnection SET")
+        assert statements[1].startswith("UPDATE agentinstruction SET payload=")
+        assert statements[2] == "DELETE FROM agentinstruction"
+        assert statements[3].startswith("UPDATE agentsession SET experimental_parameters=")
+        assert statements[4] == "DELETE FROM agentinstructionacknowledgement"
+        assert results["instructions"]["instructions_deleted"] == 0
@@ -0,0 +1,73 @@
+"""Unit coverage for agent log parsing, COPY records and partition retention."""
+
+import asyncio
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pydantic import ValidationError
+
+from smartem_backend.agent_logs import (
+    AGENT_LOG_COLUMNS,
+    copy_agent_logs,
+    expired_partitions,
+    parse_log_entries,
+    partition_day,
+    partition_name,
+)
+
+_LINE = b'{"timestamp": "2026-10-19T08:00:00+00:00", "level": "INFO", "logger_name": "x", "message": "%d"}'
+
+
+class TestParseLogEntries:
+    def test_ndjson_skips_blank_lines(self):
+        body = b"\n".join([_LINE % 1, b"", _LINE % 2, b""])
+        entries = parse_log_entries(body, "application/x-ndjson; charset=utf-8")
+        assert [entry.message for entry in entries] == ["1", "2"]
+
+    def test_json_batch(self):
+        body = b'{"logs": [' + (_LINE % 1) + b"]}"
+        assert [entry.message for entry in parse_log_entries(body, "application/json")] == ["1"]
+
+    def test_invalid_ndjson_line_raises(self):
+        with pytest.raises(ValidationError):
+            parse_log_entries(_LINE % 1 + b"\n{not json", "application/x-ndjson")
+
+
+class TestCopyAgentLogs:
+    def test_copies_naive_utc_records_in_one_call(self):
+        driver = MagicMock()
+        driver.copy_records_to_table = AsyncMock()
+        raw = MagicMock(driver_connection=driver)
+        connection = MagicMock(get_raw_connection=AsyncMock(return_value=raw))
+        db = MagicMock(connection=AsyncMock(return_value=connection))
+        entries = parse_log_entries(_LINE % 1 + b"\n" + _LINE % 2, "application/x-ndjson")
+
+        assert asyncio.run(copy_agent_logs(db, "agent-1", "sess-1", entries)) == 2
+
+        driver.copy_records_to_table.assert_awaited_once()
+        call = driver.copy_records_to_table.await_args
+        assert call.args == ("agentlog",)
+        assert call.kwargs["columns"] == AGENT_LOG_COLUMNS
+        first = dict(zip(AGENT_LOG_COLUMNS, call.kwargs["records"][0], strict=True))
+        assert first["timestamp"] == datetime(2026, 10, 19, 8, 0)
+        assert first["timestamp"].tzinfo is None
+        assert (first["agent_id"], first["session_id"], first["message"]) == ("agent-1", "sess-1", "1")
+
+    def test_empty_batch_skips_copy(self):
+        db = MagicMock(connection=AsyncMock())
+        assert asyncio.run(copy_agent_logs(db, "agent-1", "sess-1", [])) == 0
+        db.connection.assert_not_called()
+
+
+class TestPartitionRetention:
+    def test_partition_name_round_trips(self):
+        assert partition_name(date(2026, 10, 19)) == "agentlog_20261019"
+        assert partition_day("agentlog_20261019") == date(2026, 10, 19)
+        assert partition_day("agentlog_default") is None
+
+    def test_only_whole_days_before_cutoff_expire(self):
+        names = ["agentlog_default", "agentlog_20261010", "agentlog_20261011", "agentlog_20261012"]
+        cutoff = datetime(2026, 10, 12, 9, 30)
+        assert expired_partitions(names, cutoff) == ["agentlog_20261010", "agentlog_20261011"]
+        assert expired_partitions(names, datetime(2026, 10, 11, 23, 59)) == ["agentlog_20261010"]
@@ -1,23 +1,19 @@
 """TestClient coverage for agent/session endpoints — heartbeat, logs, instructions stream (issue #258)."""
 
+import gzip
+import json
 from datetime import datetime
 
+import pytest
+
 from ._async_db_stub import make_execute_result
 
 
 class TestAgentHeartbeat:
-    def test_happy_path_updates_connection_and_session(self, client):
-        from smartem_backend.model.database import AgentConnection, AgentSession
+    def test_happy_path_updates_connection_and_session_in_one_statement(self, client):
+        from sqlalchemy.dialects import postgresql
 
-        connection = AgentConnection(
-            connection_id="conn-1",
-            session_id="sess-1",
-            agent_id="agent-1",
-            status="active",
-        )
-        session = AgentSession(session_id="sess-1", agent_id="agent-1")
-        results = iter([make_execute_result(connection), make_execute_result(session)])
-        client._db.execute.side_effect = lambda *a, **kw: next(results)
+        client._db.execute.return_value = make_execute_result("conn-1")
 
         resp = client.post("/agent/agent-1/session/sess-1/heartbeat")
         assert resp.status_code == 200
@@ -25,7 +21,27 @@ class TestAgentHeartbeat:
         assert body["status"] == "success"
         assert body["agent_id"] == "agent-1"
         assert body["connection_id"] == "conn-1"
-        assert client._db.commit.await_count == 2
+        assert client._db.execute.await_count == 1
+        assert client._db.commit.await_count == 1
+        sql = str(client._db.execute.await_args.args[0].compile(dialect=postgresql.asyncpg.dialect()))
+        assert "UPDATE agentconnection SET last_heartbeat_at" in sql
+        assert "UPDATE agentsession SET last_activity_at" in sql
+
+    def test_buffered_heartbeat_skips_database_for_known_connection(self, client, monkeypatch):
+        from smartem_backend import api_server
+        from smartem_backend.heartbeats import HeartbeatBuffer
+
+        heartbeat_buffer = HeartbeatBuffer(session_factory=None, flush_seconds=60)
+        monkeypatch.setattr(api_server, "get_heartbeat_buffer", lambda: heartbeat_buffer)
+        client._db.execute.return_value = make_execute_result("conn-1")
+
+        for _ in range(3):
+            resp = client.post("/agent/agent-1/session/sess-1/heartbeat")
+            assert resp.status_code == 200
+            assert resp.json()["connection_id"] == "conn-1"
+
+        assert client._db.execute.await_count == 1
+        assert heartbeat_buffer.pending() == 1
 
     def test_404_when_no_active_connection(self, client):
         client._db.execute.return_value = make_execute_result(None)
@@ -44,15 +60,30 @@ class TestIngestAgentLogs:
             ]
         }
 
-    def test_happy_path_persists_each_log(self, client):
+    @pytest.fixture
+    def copied(self, client, monkeypatch) -> list:
+        """Stub the COPY into agentlog; returns the (agent_id, session_id, entries) of each call."""
+        from smartem_backend import api_server
         from smartem_backend.model.database import AgentSession
 
+        calls = []
+
+        async def _fake_copy(db, agent_id, session_id, entries):
+            calls.append((agent_id, session_id, list(entries)))
+            return len(entries)
+
+        monkeypatch.setattr(api_server, "copy_agent_logs", _fake_copy)
         client._db.execute.return_value = make_execute_result(AgentSession(session_id="sess-1", agent_id="agent-1"))
+        return calls
 
+    def test_happy_path_copies_each_log(self, client, copied):
         resp = client.post("/agent/agent-1/session/sess-1/logs", json=self._log_batch(3))
         assert resp.status_code == 200
         assert resp.json() == {"stored": 3}
-        assert client._db.add.call_count == 3
+        [(agent_id, session_id, entries)] = copied
+        assert (agent_id, session_id) == ("agent-1", "sess-1")
+        assert [entry.message for entry in entries] == ["msg-0", "msg-1", "msg-2"]
+        client._db.add.assert_not_called()
         client._db.commit.assert_called_once()
 
     def test_404_when_session_not_found(self, client):
@@ -70,16 +101,82 @@ class TestIngestAgentLogs:
         assert resp.status_code == 403
         assert "agent" in resp.json()["detail"].lower()
 
-    def test_caps_logs_to_500(self, client):
-        from smartem_backend.model.database import AgentSession
-
-        client._db.execute.return_value = make_execute_result(AgentSession(session_id="sess-1", agent_id="agent-1"))
-
+    def test_caps_logs_to_500(self, client, copied):
         big_batch = self._log_batch(600)
         resp = client.post("/agent/agent-1/session/sess-1/logs", json=big_batch)
         assert resp.status_code == 200
         assert resp.json() == {"stored": 500}
-        assert client._db.add.call_count == 500
+        assert len(copied[0][2]) == 500
+
+    def test_accepts_gzip_compressed_ndjson(self, client, copied):
+        ndjson = "".join(json.dumps(entry) + "\n" for entry in self._log_batch(3)["logs"])
+        resp = client.post(
+            "/agent/agent-1/session/sess-1/logs",
+            content=gzip.compress(ndjson.encode()),
+            headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {"stored": 3}
+        assert [entry.message for entry in copied[0][2]] == ["msg-0", "msg-1", "msg-2"]
+
+    def test_malformed_ndjson_line_returns_422(self, client, copied):
+        resp = client.post(
+            "/agent/agent-1/session/sess-1/logs",
+            content=b'{"timestamp": "2026-01-01T00:00:00", "level": "INFO"}\n',
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert resp.status_code == 422
+        assert copied == []
+
+    def test_invalid_gzip_body_rejected(self, client):
+        resp = client.post(
+            "/agent/agent-1/session/sess-1/logs",
+            content=b"not gzip",
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 400
+
+
+class TestGzipRequestLimits:
+    @staticmethod
+    def _client(**limits):
+        from starlette.applications import Starlette
+        from starlette.responses import PlainTextResponse
+        from starlette.routing import Route
+        from starlette.testclient import TestClient
+
+        from smartem_backend.gzip_request import GzipRequestMiddleware
+
+        async def echo(request):
+            return PlainTextResponse(str(len(await request.body())))
+
+        app = Starlette(routes=[Route("/", echo, methods=["POST"])])
+        app.add_middleware(GzipRequestMiddleware, **limits)
+        return TestClient(app)
+
+    def _post(self, client, content: bytes):
+        return client.post("/", content=content, headers={"Content-Encoding": "gzip"})
+
+    def test_body_within_limits_is_decompressed(self):
+        resp = self._post(
+            self._client(max_compressed_bytes=1024, max_decompressed_bytes=1000), gzip.compress(b"a" * 1000)
+        )
+        assert resp.status_code == 200
+        assert resp.text == "1000"
+
+    def test_compressed_body_over_limit_returns_413(self):
+        resp = self._post(self._client(max_compressed_bytes=64), gzip.compress(bytes(range(256)) * 4))
+        assert resp.status_code == 413
+        assert resp.text == "Compressed request body too large"
+
+    def test_decompressed_body_over_limit_returns_413(self):
+        resp = self._post(self._client(max_decompressed_bytes=1000), gzip.compress(b"a" * 1001))
+        assert resp.status_code == 413
+        assert resp.text == "Decompressed request body too large"
+
+    def test_truncated_gzip_body_returns_400(self):
+        resp = self._post(self._client(), gzip.compress(b"a" * 1000)[:-8])
+        assert resp.status_code == 400
 
 
 class TestStreamInstructionsValidation:
@@ -113,3 +210,232 @@ class TestStreamInstructionsValidation:
             assert resp.status_code == 200
             content = b"".join(resp.iter_bytes()).decode()
         assert "session_validation_failed" in content
+
+
+class TestDrainPendingInstructions:
+    @staticmethod
+    def _instruction(instruction_id: str, priority: str, sequence_number: int):
+        from smartem_backend.model.database import AgentInstruction
+
+        return AgentInstruction(
+            instruction_id=instruction_id,
+            session_id="sess-1",
+            agent_id="agent-1",
+            instruction_type="reorder",
+            payload={"n": sequence_number},
+            sequence_number=sequence_number,
+            priority=priority,
+            status="sent",
+            created_at=datetime(2026, 1, 1),
+        )
+
+    @staticmethod
+    def _drain(db, batch: bool) -> list[dict]:
+        import asyncio
+
+        from smartem_backend.api_server import _drain_pending_instructions
+
+        async def collect():
+            return [event async for event in _drain_pending_instructions(db, "agent-1", "sess-1", batch)]
+
+        return asyncio.run(collect())
+
+    def test_claims_all_instructions_in_one_statement_and_commit(self):
+        from sqlalchemy.dialects import postgresql
+
+        from ._async_db_stub import make_async_db
+
+        db = make_async_db()
+        db.execute.return_value = make_execute_result([self._instruction(f"i-{n}", "normal", n) for n in range(200)])
+
+        events = self._drain(db, batch=False)
+
+        assert len(events) == 200
+        assert db.execute.await_count == 1
+        assert db.commit.await_count == 1
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.asyncpg.dialect()))
+        assert "UPDATE agentinstruction SET status" in sql
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "RETURNING" in sql
+        assert "ORDER BY claimed.priority DESC" in sql
+
+    def test_batch_mode_yields_single_event(self):
+        from ._async_db_stub import make_async_db
+
+        db = make_async_db()
+        db.execute.return_value = make_execute_result(
+            [self._instruction("first", "normal", 1), self._instruction("second", "normal", 2)]
+        )
+
+        events = self._drain(db, batch=True)
+
+        assert len(events) == 1
+        assert events[0]["event"] == "instruction_batch"
+        data = json.loads(events[0]["data"])
+        assert [i["instruction_id"] for i in data["instructions"]] == ["first", "second"]
+        assert data["instructions"][0]["type"] == "instruction"
+
+    def test_instructions_not_delivered_before_the_stream_closes_are_requeued(self):
+        import asyncio
+        from contextlib import aclosing
+
+        from sqlalchemy.dialects import postgresql
+
+        from smartem_backend.api_server import _drain_pending_instructions
+
+        from ._async_db_stub import make_async_db
+
+        db = make_async_db()
+        db.execute.return_value = make_execute_result([self._instruction(f"i-{n}", "normal", n) for n in range(4)])
+
+        async def read_two_then_disconnect():
+            async with aclosing(_drain_pending_instructions(db, "agent-1", "sess-1")) as events:
+                seen = [await anext(events), await anext(events)]
+            return seen
+
+        seen = asyncio.run(read_two_then_disconnect())
+
+        assert [e["id"] for e in seen] == ["i-0", "i-1"]
+        requeue = db.execute.await_args.args[0].compile(dialect=postgresql.asyncpg.dialect())
+        assert str(requeue).startswith("UPDATE agentinstruction SET status")
+        # i-1 was handed to the stream but not confirmed by a request for the next event
+        assert requeue.params["instruction_id_1"] == ["i-1", "i-2", "i-3"]
+        assert requeue.params["status"] == "pending"
+        assert db.commit.await_count == 2
+
+    def test_instruction_events_carry_instruction_id_for_resume(self):
+        from ._async_db_stub import make_async_db
+
+        db = make_async_db()
+        db.execute.return_value = make_execute_result(
+            [self._instruction("first", "normal", 1), self._instruction("second", "normal", 2)]
+        )
+
+        assert [e["id"] for e in self._drain(db, batch=False)] == ["first", "second"]
+        assert [e["id"] for e in self._drain(db, batch=True)] == ["second"]
+
+    def test_resume_selects_unacknowledged_from_last_event_claim(self):
+        import asyncio
+
+        from sqlalchemy.dialects import postgresql
+
+        from smartem_backend.api_server import _unacknowledged_since
+
+        from ._async_db_stub import make_async_db
+
+        db = make_async_db()
+        db.execute.return_value = make_execute_result([self._instruction("second", "normal", 2)])
+
+        missed = asyncio.run(_unacknowledged_since(db, "sess-1", "first"))
+
+        assert [i.instruction_id for i in missed] == ["second"]
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.asyncpg.dialect()))
+        assert "agentinstruction.sent_at >= (SELECT agentinstruction_1.sent_at" in sql
+        assert "FROM agentinstruction AS agentinstruction_1" in sql
+        assert db.commit.await_count == 0
+
+    def test_nothing_pending_yields_nothing(self):
+        from ._async_db_stub import make_async_db
+
+        db = make_async_db()
+        db.execute.return_value = make_execute_result([])
+
+        assert self._drain(db, batch=True) == []
+
+
+class TestAcknowledgeInstructionsBatch:
+    URL = "/agent/agent-1/session/sess-1/instructions/ack:batch"
+
+    @staticmethod
+    def _results(client, acknowledged: list[str], rejected: list):
+        from smartem_backend.model.database import AgentConnection, AgentSession
+
+        session = AgentSession(session_id="sess-1", agent_id="agent-1", status="active")
+        connection = AgentConnection(connection_id="conn-1", session_id="sess-1", agent_id="agent-1", status="active")
+        results = iter(
+            [
+                make_execute_result(session),
+                make_execute_result([connection]),
+                make_execute_result(acknowledged),
+                make_execute_result(rejected),
+                make_execute_result(None),
+            ]
+        )
+        client._db.execute.side_effect = lambda *a, **kw: next(results)
+        return session, connection
+
+    def test_acknowledges_in_one_update_and_one_insert(self, client):
+        session, connection = self._results(client, ["i-1", "i-2"], [])
+
+        resp = client.post(
+            self.URL,
+            json={
+                "acknowledgements": [
+                    {"instruction_id": "i-1", "status": "processed", "result": "ok"},
+                    {"instruction_id": "i-2", "status": "failed", "error_message": "boom"},
+                ]
+            },
+        )
+
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["acknowledged"] == 2
+        assert [r["status"] for r in body["results"]] == ["success", "success"]
+        assert client._db.execute.await_count == 4
+        assert client._db.commit.await_count == 1
+        statement, rows = client._db.execute.await_args_list[3].args
+        assert str(statement).startswith("INSERT INTO agentinstructionacknowledgement")
+        assert [row["instruction_id"] for row in rows] == ["i-1", "i-2"]
+        assert session.last_activity_at is not None
+        assert connection.last_heartbeat_at is not None
+
+    def test_reports_rejections_per_item(self, client):
+        from smartem_backend.model.database import AgentInstruction
+
+        pending = AgentInstruction(
+            instruction_id="i-pending", session_id="sess-1", agent_id="agent-1", instruction_type="t", status="pending"
+        )
+        foreign = AgentInstruction(
+            instruction_id="i-foreign", session_id="sess-2", agent_id="agent-1", instruction_type="t", status="sent"
+        )
+        self._results(client, ["i-1"], [pending, foreign])
+
+        resp = client.post(
+            self.URL,
+            json={
+                "acknowledgements": [
+                    {"instruction_id": "i-1", "status": "processed"},
+                    {"instruction_id": "i-pending", "status": "processed"},
+                    {"instruction_id": "i-foreign", "status": "processed"},
+                    {"instruction_id": "i-missing", "status": "processed"},
+                    {"instruction_id": "i-1", "status": "processed"},
+                ]
+            },
+        )
+
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["acknowledged"] == 1
+        assert [(r["status"], r["error"]) for r in body["results"]] == [
+            ("success", None),
+            ("error", "Instruction cannot be acknowledged (invalid status)"),
+            ("error", "Instruction does not belong to this session"),
+            ("error", "Instruction not found"),
+            ("error", "Duplicate acknowledgement in batch"),
+        ]
+
+    def test_session_of_another_agent_is_forbidden(self, client):
+        from smartem_backend.model.database import AgentSession
+
+        client._db.execute.return_value = make_execute_result(
+            AgentSession(session_id="sess-1", agent_id="other-agent", status="active")
+        )
+
+        resp = client.post(self.URL, json={"acknowledgements": [{"instruction_id": "i-1", "status": "received"}]})
+
+        assert resp.status_code == 403
+        client._db.commit.assert_not_awaited()
+
+    def test_empty_batch_rejected(self, client):
+        resp = client.post(self.URL, json={"acknowledgements": []})
+        assert resp.status_code == 422
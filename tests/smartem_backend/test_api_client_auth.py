@@ -7,6 +7,7 @@ client is backwards compatible when no KeycloakClient is provided.
 
 from __future__ import annotations
 
+import time
 from unittest.mock import MagicMock
 
 import pytest
@@ -129,3 +130,171 @@ class TestRefreshOn401:
 
         # Only one call - no refresh-and-retry
         assert client._session.request.call_count == 1
+
+
+class TestCompressedLogShipping:
+    def test_send_logs_posts_gzip_ndjson_with_bearer(self):
+        import gzip
+        import json
+
+        kc = MagicMock()
+        kc.get_token.return_value = "abc.def.ghi"
+        client = SmartEMAPIClient("http://api.test", keycloak_client=kc)
+        client._session = MagicMock()
+        client._session.request.return_value = _ok_response({"stored": 1})
+        logs = [{"timestamp": "2026-01-01T00:00:00+00:00", "level": "INFO", "logger_name": "x", "message": "hi"}]
+
+        assert client.send_logs("agent-1", "sess-1", logs) is True
+
+        call = client._session.request.call_args
+        assert call.args[:2] == ("post", "http://api.test/agent/agent-1/session/sess-1/logs")
+        assert call.kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert call.kwargs["headers"]["Content-Type"] == "application/x-ndjson"
+        assert call.kwargs["headers"]["Authorization"] == "Bearer abc.def.ghi"
+        lines = gzip.decompress(call.kwargs["data"]).splitlines()
+        assert [json.loads(line) for line in lines] == logs
+
+    def test_send_logs_returns_false_on_http_error(self):
+        import requests
+
+        failed = _ok_response(status=503)
+        failed.raise_for_status.side_effect = requests.HTTPError("503", response=failed)
+        client = SmartEMAPIClient("http://api.test")
+        client._session = MagicMock()
+        client._session.request.return_value = failed
+
+        assert client.send_logs("agent-1", "sess-1", []) is False
+
+
+class TestSSEInstructionBatches:
+    @staticmethod
+    def _stream(monkeypatch, events, batch_instructions=True):
+        import json
+        from types import SimpleNamespace
+
+        from smartem_backend import api_client
+        from smartem_backend.api_client import SSEAgentClient
+
+        requested = []
+
+        def _get(url, **kwargs):
+            requested.append(url)
+            return _ok_response()
+
+        monkeypatch.setattr(api_client.requests, "get", _get)
+        monkeypatch.setattr(
+            api_client.sseclient,
+            "SSEClient",
+            lambda response: SimpleNamespace(events=lambda: [SimpleNamespace(data=json.dumps(e)) for e in events]),
+        )
+        client = SSEAgentClient("http://api", "agent-1", "sess-1", batch_instructions=batch_instructions)
+        received = []
+        client.stream_instructions(received.append)
+        return client, requested, received
+
+    def test_batch_event_invokes_callback_per_instruction(self, monkeypatch):
+        instructions = [{"type": "instruction", "instruction_id": f"i-{n}"} for n in range(3)]
+        client, requested, received = self._stream(
+            monkeypatch, [{"type": "instruction_batch", "instructions": instructions}]
+        )
+
+        assert requested == ["http://api/agent/agent-1/session/sess-1/instructions/stream?batch=true"]
+        assert received == instructions
+        assert client._stats["instructions_received"] == 3
+
+    def test_batching_is_opt_in(self, monkeypatch):
+        _, requested, received = self._stream(
+            monkeypatch, [{"type": "instruction", "instruction_id": "i-1"}], batch_instructions=False
+        )
+
+        assert requested == ["http://api/agent/agent-1/session/sess-1/instructions/stream"]
+        assert [i["instruction_id"] for i in received] == ["i-1"]
+
+
+class TestBufferedAcknowledger:
+    @staticmethod
+    def _response(acknowledgements, rejected=()):
+        from smartem_backend.model.http_response import (
+            AgentInstructionAcknowledgementBatchResponse,
+            AgentInstructionAcknowledgementResult,
+        )
+
+        results = [
+            AgentInstructionAcknowledgementResult(
+                instruction_id=ack.instruction_id,
+                status="error" if ack.instruction_id in rejected else "success",
+                error="Instruction not found" if ack.instruction_id in rejected else None,
+            )
+            for ack in acknowledgements
+        ]
+        return AgentInstructionAcknowledgementBatchResponse(
+            agent_id="agent-1",
+            session_id="sess-1",
+            acknowledged=sum(r.status == "success" for r in results),
+            results=results,
+        )
+
+    def test_coalesces_acknowledgements_within_window(self):
+        from smartem_backend.api_client import BufferedAcknowledger
+
+        api = MagicMock()
+        api.acknowledge_instructions.side_effect = lambda agent_id, session_id, acks: self._response(acks, {"i-2"})
+        acknowledger = BufferedAcknowledger(api, "agent-1", "sess-1", window=0.2)
+        for n in range(5):
+            acknowledger.acknowledge(f"i-{n}", "processed")
+
+        deadline = time.monotonic() + 5
+        while acknowledger.acknowledged_count + acknowledger.rejected_count < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        acknowledger.close()
+
+        assert api.acknowledge_instructions.call_count == 1
+        _, _, batch = api.acknowledge_instructions.call_args.args
+        assert [ack.instruction_id for ack in batch] == [f"i-{n}" for n in range(5)]
+        assert acknowledger.acknowledged_count == 4
+        assert acknowledger.rejected_count == 1
+
+    def test_splits_into_batches_of_max_batch(self):
+        from smartem_backend.api_client import BufferedAcknowledger
+
+        api = MagicMock()
+        api.acknowledge_instructions.side_effect = lambda agent_id, session_id, acks: self._response(acks)
+        acknowledger = BufferedAcknowledger(api, "agent-1", "sess-1", window=10, max_batch=2)
+        for n in range(5):
+            acknowledger.acknowledge(f"i-{n}", "received")
+        acknowledger.close()
+
+        assert [len(call.args[2]) for call in api.acknowledge_instructions.call_args_list] == [2, 2, 1]
+        assert acknowledger.acknowledged_count == 5
+
+    def test_retries_transient_failures_then_gives_up(self):
+        import requests
+
+        from smartem_backend.api_client import BufferedAcknowledger
+
+        api = MagicMock()
+        api.acknowledge_instructions.side_effect = requests.ConnectionError("down")
+        acknowledger = BufferedAcknowledger(api, "agent-1", "sess-1", window=0, max_retries=2, retry_base_delay=0)
+        acknowledger.acknowledge("i-1", "processed")
+
+        assert acknowledger.flush(timeout=5)
+        acknowledger.close()
+
+        assert api.acknowledge_instructions.call_count == 3
+        assert acknowledger.failed_count == 1
+
+    def test_refused_batch_is_not_retried(self):
+        import requests
+
+        from smartem_backend.api_client import BufferedAcknowledger
+
+        api = MagicMock()
+        api.acknowledge_instructions.side_effect = requests.HTTPError(response=_unauthorized_response())
+        acknowledger = BufferedAcknowledger(api, "agent-1", "sess-1", window=0, retry_base_delay=0)
+        acknowledger.acknowledge("i-1", "processed")
+
+        assert acknowledger.flush(timeout=5)
+        acknowledger.close()
+
+        assert api.acknowledge_instructions.call_count == 1
+        assert acknowledger.failed_count == 1
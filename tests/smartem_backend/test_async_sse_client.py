@@ -0,0 +1,128 @@
+"""AsyncSSEAgentClient: resume with Last-Event-ID, duplicate skipping and non-blocking instruction handling."""
+
+import json
+import threading
+import time
+
+import httpx
+
+from smartem_backend.api_client import AsyncSSEAgentClient
+
+
+def _event(data: dict, event_id: str | None = None) -> str:
+    lines = [f"event: {data['type']}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\r\n".join(lines) + "\r\n\r\n"
+
+
+def _instruction(instruction_id: str) -> dict:
+    return {"type": "instruction", "instruction_id": instruction_id, "instruction_type": "agent.status.request"}
+
+
+def _client(responses: list[str], requests_seen: list, **kwargs) -> AsyncSSEAgentClient:
+    """Client whose successive connections get `responses`; the connection after the last is refused"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        if len(requests_seen) > len(responses):
+            return httpx.Response(200, text=_event({"type": "error", "message": "session closed"}))
+        return httpx.Response(200, text=responses[len(requests_seen) - 1])
+
+    return AsyncSSEAgentClient(
+        "http://api",
+        "agent-1",
+        "sess-1",
+        initial_retry_delay=0.01,
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+class TestAsyncSSEAgentClient:
+    def test_resumes_with_last_event_id_and_skips_resent_instructions(self):
+        seen = []
+        first = _event({"type": "connection", "connection_id": "c-1"}) + _event(_instruction("i-1"), "i-1")
+        # on resume the backend resends i-1 (same claim) along with the missed i-2
+        second = _event(_instruction("i-1"), "i-1") + _event(_instruction("i-2"), "i-2")
+        client = _client([first, second], seen, batch_instructions=True)
+        received = []
+        errors = []
+
+        client.stream_instructions(lambda data: received.append(data["instruction_id"]), error_callback=errors.append)
+
+        assert [request.url.params.get("batch") for request in seen] == ["true", "true", "true"]
+        assert "last-event-id" not in seen[0].headers
+        assert seen[1].headers["last-event-id"] == "i-1"
+        assert seen[2].headers["last-event-id"] == "i-2"
+        assert received == ["i-1", "i-2"]
+        assert client.get_stats()["instructions_received"] == 2
+        assert len(errors) == 1 and "session closed" in str(errors[0])
+        assert not client.is_connected()
+
+    def test_expands_instruction_batches(self):
+        seen = []
+        batch = {"type": "instruction_batch", "instructions": [_instruction("i-1"), _instruction("i-2")]}
+        client = _client([_event(batch, "i-2")], seen)
+        received = []
+
+        client.stream_instructions(lambda data: received.append(data["instruction_id"]))
+
+        assert sorted(received) == ["i-1", "i-2"]
+        assert seen[1].headers["last-event-id"] == "i-2"
+
+    def test_slow_callback_does_not_block_reading(self):
+        seen = []
+        events = "".join(_event(_instruction(f"i-{n}"), f"i-{n}") for n in range(3))
+        client = _client([events], seen, workers=1)
+        read_while_blocked = []
+
+        def slow_callback(data):
+            if data["instruction_id"] == "i-0":
+                deadline = time.monotonic() + 5
+                while client.get_stats()["instructions_received"] < 3 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                read_while_blocked.append(client.get_stats()["instructions_received"])
+
+        client.stream_instructions(slow_callback)
+
+        assert read_while_blocked == [3]
+
+    def test_stop_from_another_thread_ends_stream(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, text=_event({"type": "heartbeat", "timestamp": "now"}))
+
+        client = AsyncSSEAgentClient(
+            "http://api", "agent-1", "sess-1", initial_retry_delay=0.05, transport=httpx.MockTransport(handler)
+        )
+        thread = threading.Thread(target=client.stream_instructions, args=(lambda data: None,))
+        thread.start()
+        time.sleep(0.2)
+
+        client.stop()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert client.get_stats()["total_connections"] >= 1
+
+    def test_gives_up_after_max_retries(self):
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request)
+            raise httpx.ConnectError("refused")
+
+        client = AsyncSSEAgentClient(
+            "http://api",
+            "agent-1",
+            "sess-1",
+            max_retries=2,
+            initial_retry_delay=0.01,
+            transport=httpx.MockTransport(handler),
+        )
+
+        client.stream_instructions(lambda data: None)
+
+        assert len(attempts) == 3
+        assert client.get_stats()["failed_connections"] == 3
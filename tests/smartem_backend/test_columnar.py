@@ -0,0 +1,221 @@
+import io
+import json
+import uuid
+from datetime import UTC, datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from smartem_backend.api_client import SmartEMAPIClient
+from smartem_backend.columnar import (
+    COLUMNAR_MEDIA_TYPE,
+    concatenate_series,
+    decode_columns,
+    encode_columns,
+    encode_series,
+)
+
+from ._async_db_stub import make_execute_result
+
+SCHEMA = {"uuid": "str", "value": "float", "index": "int", "timestamp": "datetime"}
+KEY_SCHEMA = {"model": "str", "foilhole_uuid": "str"}
+POINT_SCHEMA = {"timestamp": "datetime", "value": "float"}
+
+
+class TestEncodeColumns:
+    def test_round_trip(self):
+        t = datetime(2026, 1, 1, 12, 0, 0)
+        columns = decode_columns(encode_columns([("a", 0.5, 1, t), ("bb", 1.5, 2, t)], SCHEMA))
+        assert list(columns) == list(SCHEMA)
+        np.testing.assert_array_equal(columns["uuid"], ["a", "bb"])
+        np.testing.assert_array_equal(columns["value"], [0.5, 1.5])
+        assert columns["index"].dtype == np.int64
+        assert columns["timestamp"][0] == np.datetime64("2026-01-01T12:00:00")
+
+    def test_missing_values_are_encoded_in_band(self):
+        columns = decode_columns(encode_columns([(None, None, None, None)], SCHEMA))
+        assert columns["uuid"][0] == ""
+        assert np.isnan(columns["value"][0])
+        assert columns["index"][0] == -1
+        assert np.isnat(columns["timestamp"][0])
+
+    def test_aware_timestamps_are_written_as_utc(self):
+        t = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone(timedelta(hours=2)))
+        columns = decode_columns(encode_columns([(t,)], {"timestamp": "datetime"}))
+        assert columns["timestamp"][0] == np.datetime64(t.astimezone(UTC).replace(tzinfo=None))
+
+    def test_empty_rows_keep_schema(self):
+        columns = decode_columns(encode_columns([], SCHEMA))
+        assert {name: len(array) for name, array in columns.items()} == dict.fromkeys(SCHEMA, 0)
+
+    def test_unknown_kind_rejected(self):
+        with pytest.raises(ValueError):
+            encode_columns([(1,)], {"x": "complex"})
+
+    def test_strings_are_dictionary_encoded_as_utf8(self):
+        payload = encode_columns([("model-ä",), ("model-b",), ("model-ä",)], {"model": "str"})
+        with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+            np.testing.assert_array_equal(archive["model__codes"], [0, 1, 0])
+            assert archive["model__utf8"].tobytes() == "model-ämodel-b".encode()
+        np.testing.assert_array_equal(decode_columns(payload)["model"], ["model-ä", "model-b", "model-ä"])
+
+    def test_smaller_than_json_for_a_grid_of_predictions(self):
+        t = datetime(2026, 1, 1)
+        squares = [str(uuid.uuid4()) for _ in range(50)]
+        rows = [
+            (i, "model-a", 0.5 + i / 1e5, t + timedelta(seconds=i), squares[i % 50], str(uuid.uuid4()))
+            for i in range(5000)
+        ]
+        schema = {
+            "id": "int",
+            "prediction_model_name": "str",
+            "value": "float",
+            "timestamp": "datetime",
+            "gridsquare_uuid": "str",
+            "foilhole_uuid": "str",
+        }
+        as_json = json.dumps([dict(zip(schema, row, strict=True)) for row in rows], default=str).encode()
+        assert len(encode_columns(rows, schema)) < len(as_json) / 2
+
+
+class TestEncodeSeries:
+    def test_round_trip(self):
+        t1, t2 = datetime(2026, 1, 1, 0, 0, 1), datetime(2026, 1, 1, 0, 0, 2)
+        series = [(("model-a", "fh-1"), [(t1, 0.1), (t2, 0.2)]), (("model-a", None), [(t1, 0.3)])]
+        columns = decode_columns(encode_series(series, KEY_SCHEMA, POINT_SCHEMA))
+        np.testing.assert_array_equal(columns["foilhole_uuid"], ["fh-1", ""])
+        np.testing.assert_array_equal(columns["offsets"], [0, 2, 3])
+        np.testing.assert_array_equal(columns["value"], [0.1, 0.2, 0.3])
+
+    def test_empty(self):
+        columns = decode_columns(encode_series([], KEY_SCHEMA, POINT_SCHEMA))
+        assert len(columns["model"]) == len(columns["value"]) == 0
+        np.testing.assert_array_equal(columns["offsets"], [0])
+
+    def test_concatenate_merges_series_split_across_pages(self):
+        t = datetime(2026, 1, 1)
+        pages = [
+            decode_columns(encode_series(page, KEY_SCHEMA, POINT_SCHEMA))
+            for page in (
+                [(("m", "fh-1"), [(t, 0.1)]), (("m", "fh-2"), [(t, 0.2)])],
+                [(("m", "fh-1"), [(t, 0.3), (t, 0.4)])],
+            )
+        ]
+        columns = concatenate_series(pages, list(KEY_SCHEMA))
+        np.testing.assert_array_equal(columns["foilhole_uuid"], ["fh-1", "fh-2"])
+        np.testing.assert_array_equal(columns["offsets"], [0, 3, 4])
+        np.testing.assert_array_equal(columns["value"], [0.1, 0.3, 0.4, 0.2])
+
+
+class TestColumnarEndpoints:
+    def _time_series(self, client, rows, headers=None):
+        results = iter([make_execute_result("grid-1"), make_execute_result(rows)])
+        client._db.execute.side_effect = lambda *a, **kw: next(results)
+        return client.get("/grids/grid-1/quality_prediction_time_series", headers=headers or {})
+
+    def test_time_series_served_grouped_by_series(self, client):
+        t1, t2 = datetime(2026, 1, 1, 0, 0, 1), datetime(2026, 1, 1, 0, 0, 2)
+        rows = [
+            (1, "model-a", None, "gs-1", None, t1, 0.1),
+            (2, "model-a", None, "gs-1", "fh-1", t2, 0.5),
+            (3, "model-a", None, "gs-1", None, t2, 0.2),
+        ]
+        resp = self._time_series(client, rows, {"Accept": COLUMNAR_MEDIA_TYPE})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == COLUMNAR_MEDIA_TYPE
+        assert (resp.headers["x-cursor"], resp.headers["x-has-more"]) == ("3", "false")
+        columns = decode_columns(resp.content)
+        np.testing.assert_array_equal(columns["foilhole_uuid"], ["", "fh-1"])
+        np.testing.assert_array_equal(columns["offsets"], [0, 2, 3])
+        np.testing.assert_array_equal(columns["value"], [0.1, 0.2, 0.5])
+
+    def test_time_series_columnar_body_smaller_than_json(self, client):
+        t = datetime(2026, 1, 1)
+        holes = [(str(uuid.uuid4()), str(uuid.uuid4())) for _ in range(200)]
+        rows = [
+            (i, "model-a", metric, square, hole, t + timedelta(seconds=i), 0.5 + i / 1e5)
+            for i, (metric, (square, hole)) in enumerate(
+                (metric, holes[n % 200]) for n in range(2000) for metric in ("ctf", "motion")
+            )
+        ]
+        as_json = self._time_series(client, rows)
+        columnar = self._time_series(client, rows, {"Accept": COLUMNAR_MEDIA_TYPE})
+        assert len(columnar.content) < len(as_json.content) / 2
+
+    def test_grid_prediction_falls_back_to_foilholes(self, client):
+        t = datetime(2026, 1, 1)
+        results = iter([make_execute_result([]), make_execute_result([(7, "model-a", 0.3, t, "gs-1", "fh-1")])])
+        client._db.execute.side_effect = lambda *a, **kw: next(results)
+
+        resp = client.get("/prediction_model/model-a/grid/grid-1/prediction")
+        assert resp.status_code == 200
+        assert resp.json() == [
+            {
+                "id": 7,
+                "prediction_model_name": "model-a",
+                "value": 0.3,
+                "timestamp": t.isoformat(),
+                "gridsquare_uuid": "gs-1",
+                "foilhole_uuid": "fh-1",
+            }
+        ]
+
+
+class TestClientArrays:
+    def test_helper_sends_accept_header_and_decodes(self):
+        t = datetime(2026, 1, 1)
+        response = MagicMock()
+        response.headers = {"content-type": COLUMNAR_MEDIA_TYPE}
+        response.content = encode_columns(
+            [("gs-1", 1.0, 2.0, 3)], {"gridsquare_uuid": "str", "x": "float", "y": "float", "index": "int"}
+        )
+        api = SmartEMAPIClient("http://api.test")
+        api._session = MagicMock()
+        api._session.request.return_value = response
+
+        columns = api.get_grid_latent_representation_arrays("model-a", "grid-1")
+        np.testing.assert_array_equal(columns["index"], [3])
+        api.get_grid_quality_prediction_time_series_arrays("grid-1", since=t)
+
+        call = api._session.request.call_args
+        assert (
+            call.args[1]
+            == f"http://api.test/grids/grid-1/quality_prediction_time_series?since={t.isoformat().replace(':', '%3A')}"
+        )
+        assert call.kwargs["headers"]["Accept"] == COLUMNAR_MEDIA_TYPE
+
+    def test_time_series_client_follows_pages_and_returns_the_cursor(self):
+        t = datetime(2026, 1, 1)
+        key_schema = dict.fromkeys(("prediction_model_name", "metric_name", "gridsquare_uuid", "foilhole_uuid"), "str")
+        square, hole = ("m", None, "gs-1", None), ("m", None, "gs-1", "fh-1")
+        pages = []
+        for series, cursor, has_more in [
+            ([(square, [(t, 0.1)]), (hole, [(t, 0.2)])], "2", "true"),
+            ([(square, [(t, 0.3)])], "3", "false"),
+        ]:
+            response = MagicMock()
+            response.headers = {"content-type": COLUMNAR_MEDIA_TYPE, "x-cursor": cursor, "x-has-more": has_more}
+            response.content = encode_series(series, key_schema, {"timestamp": "datetime", "value": "float"})
+            pages.append(response)
+        api = SmartEMAPIClient("http://api.test")
+        api._session = MagicMock()
+        api._session.request.side_effect = pages
+
+        columns, cursor = api.get_grid_quality_prediction_time_series_arrays("grid-1", after=0)
+
+        np.testing.assert_array_equal(columns["foilhole_uuid"], ["", "fh-1"])
+        np.testing.assert_array_equal(columns["offsets"], [0, 2, 3])
+        np.testing.assert_array_equal(columns["value"], [0.1, 0.3, 0.2])
+        assert cursor == 3
+        assert api._session.request.call_args.args[1].endswith("?after=2")
+
+    def test_helper_rejects_json_fallback(self):
+        response = MagicMock()
+        response.headers = {"content-type": "application/json"}
+        api = SmartEMAPIClient("http://api.test")
+        api._session = MagicMock()
+        api._session.request.return_value = response
+
+        with pytest.raises(ValueError):
+            api.get_grid_prediction_arrays("model-a", "grid-1")
@@ -15,6 +15,7 @@ from unittest.mock import AsyncMock, MagicMock
 
 os.environ["SKIP_DB_INIT"] = "true"
 
+import numpy as np
 import pytest
 
 from smartem_backend import consumer
@@ -154,21 +155,19 @@ class TestMotionCorrectionComplete:
     }
 
     def test_publishes_registered_event(self, db, monkeypatch, stub_publisher):
-        grid_row = MagicMock()
-        grid_row.grid_uuid = "grid-1"
-        db.execute.return_value.one.return_value = (grid_row,)
-        db.execute.return_value.scalars.return_value.all.return_value = []
-
-        async def _stub_check(*args, **kwargs):
-            return 0.7
+        db.execute.return_value.scalar_one.return_value = "grid-1"
+        db.execute.return_value.scalars.return_value.first.return_value = None
+        record = AsyncMock(return_value=np.array([0.7]))
+        published: list[tuple] = []
 
         async def _stub_prior(*args, **kwargs):
             return None
 
         async def _stub_publish(*args, **kwargs):
+            published.append((args, kwargs))
             return True
 
-        monkeypatch.setattr(consumer, "_check_against_statistics", _stub_check)
+        monkeypatch.setattr(consumer, "record_metric_values", record)
         monkeypatch.setattr(consumer, "prior_update", _stub_prior)
         monkeypatch.setattr(consumer, "publish_motion_correction_registered", _stub_publish)
 
@@ -176,8 +175,9 @@ class TestMotionCorrectionComplete:
 
         asyncio.run(consumer.handle_motion_correction_complete(dict(self.base_event)))
 
-        assert db.add.call_count == 1
+        record.assert_awaited_once_with(db, "grid-1", "motioncorrection", [1.5], larger_better=False)
         assert db.commit.await_count == 1
+        assert published == [(("mic-1", True), {"metric_name": "motioncorrection"})]
 
 
 class TestRefreshPredictions:
@@ -205,6 +205,16 @@ class TestRefreshPredictions:
 
         assert called == ["overall:grid-1", "ordered:grid-1"]
 
+    def test_marks_grid_dirty_when_scheduler_running(self, monkeypatch):
+        scheduler = MagicMock()
+        monkeypatch.setattr(consumer, "refresh_scheduler", scheduler)
+
+        import asyncio
+
+        asyncio.run(consumer.handle_refresh_predictions(dict(self.base_event)))
+
+        scheduler.mark_dirty.assert_called_once_with("grid-1")
+
 
 class TestGridCreated:
     base_event = {
@@ -232,3 +242,116 @@ class TestGridCreated:
         asyncio.run(consumer.handle_grid_created(dict(self.base_event)))
 
         assert called == ["grid-1"]
+
+
+class TestGridSquareUpdated:
+    def test_prewarms_image_cache_only_for_new_image(self, monkeypatch):
+        cache = MagicMock()
+        monkeypatch.setattr(consumer, "get_image_cache", lambda: cache)
+
+        import asyncio
+
+        base = {"event_type": "gridsquare.updated", "uuid": "gs-1", "grid_uuid": "grid-1"}
+        asyncio.run(consumer.handle_gridsquare_updated(dict(base)))
+        asyncio.run(consumer.handle_gridsquare_updated({**base, "image_path": "/data/gs-1.mrc"}))
+
+        cache.schedule_prewarm.assert_called_once()
+        assert str(cache.schedule_prewarm.call_args.args[0]) == "/data/gs-1.mrc"
+
+
+class TestBatchCreatedSeeding:
+    def test_batch_events_seed_all_entities_in_one_call(self, monkeypatch):
+        import asyncio
+
+        seed_squares = AsyncMock(return_value=4)
+        seed_holes = AsyncMock(return_value=6)
+        monkeypatch.setattr(consumer, "seed_gridsquare_predictions", seed_squares)
+        monkeypatch.setattr(consumer, "seed_foilhole_predictions", seed_holes)
+
+        asyncio.run(
+            consumer.handle_gridsquares_created(
+                {"event_type": "gridsquares.created", "grid_uuid": "grid-1", "uuids": ["gs-1", "gs-2"]}
+            )
+        )
+        asyncio.run(
+            consumer.handle_foilholes_created(
+                {"event_type": "foilholes.created", "gridsquare_uuid": "gs-1", "uuids": ["fh-1", "fh-2", "fh-3"]}
+            )
+        )
+
+        seed_squares.assert_awaited_once_with(["gs-1", "gs-2"])
+        seed_holes.assert_awaited_once_with(["fh-1", "fh-2", "fh-3"], "gs-1")
+
+    def test_batch_events_are_routed(self):
+        handlers = consumer.get_event_handlers()
+        assert handlers["gridsquares.created"] is consumer.handle_gridsquares_created
+        assert handlers["foilholes.created"] is consumer.handle_foilholes_created
+
+    def test_publisher_groups_square_mag_entries_per_grid(self, stub_publisher):
+        import asyncio
+
+        stub_publisher.publish_events = AsyncMock(return_value=True)
+        asyncio.run(
+            mq_publisher_module.publish_gridsquares_created_batch(
+                [("u-1", "grid-1", "1", False), ("u-2", "grid-1", "2", True), ("u-3", "grid-1", "3", False)]
+            )
+        )
+
+        items = stub_publisher.publish_events.await_args.args[0]
+        assert [event_type.value for event_type, _ in items] == [
+            "gridsquare.created",
+            "gridsquare_lowmag.created",
+            "gridsquare.created",
+            "gridsquares.created",
+        ]
+        assert [event.announced_in_batch for _, event in items[:3]] == [True, False, True]
+        assert items[3][1].uuids == ["u-1", "u-3"]
+
+    def test_foilhole_publisher_keeps_per_hole_events_next_to_the_batch(self, stub_publisher):
+        import asyncio
+
+        stub_publisher.publish_events = AsyncMock(return_value=True)
+        asyncio.run(
+            mq_publisher_module.publish_foilholes_created_batch(
+                [("fh-1", "1", "gs-1", "10"), ("fh-2", "2", "gs-2", "20"), ("fh-3", "3", "gs-1", "10")]
+            )
+        )
+
+        items = stub_publisher.publish_events.await_args.args[0]
+        assert [event_type.value for event_type, _ in items] == ["foilhole.created"] * 3 + ["foilholes.created"] * 2
+        assert [(event.uuid, event.gridsquare_uuid) for _, event in items[:3]] == [
+            ("fh-1", "gs-1"),
+            ("fh-2", "gs-2"),
+            ("fh-3", "gs-1"),
+        ]
+        assert [(event.gridsquare_uuid, event.uuids) for _, event in items[3:]] == [
+            ("gs-1", ["fh-1", "fh-3"]),
+            ("gs-2", ["fh-2"]),
+        ]
+
+    def test_per_entity_events_announced_in_a_batch_are_not_seeded_again(self, monkeypatch):
+        import asyncio
+
+        seed_squares = AsyncMock()
+        seed_holes = AsyncMock()
+        monkeypatch.setattr(consumer, "seed_gridsquare_predictions", seed_squares)
+        monkeypatch.setattr(consumer, "seed_foilhole_predictions", seed_holes)
+
+        asyncio.run(
+            consumer.handle_gridsquare_created(
+                {"event_type": "gridsquare.created", "uuid": "gs-1", "announced_in_batch": True}
+            )
+        )
+        asyncio.run(
+            consumer.handle_foilhole_created(
+                {
+                    "event_type": "foilhole.created",
+                    "uuid": "fh-1",
+                    "gridsquare_uuid": "gs-1",
+                    "announced_in_batch": True,
+                }
+            )
+        )
+
+        seed_squares.assert_not_awaited()
+        seed_holes.assert_not_awaited()
@@ -0,0 +1,209 @@
+"""Micro-batched consumer dispatch and the batch handler variants."""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+os.environ["SKIP_DB_INIT"] = "true"
+
+import numpy as np
+
+from smartem_backend import consumer
+from smartem_backend.consumer_batching import MicroBatchDispatcher
+from smartem_backend.consumer_metrics import ConsumerMetrics
+from smartem_backend.model.database import CurrentQualityPrediction, QualityPrediction
+
+from ._async_db_stub import make_async_db, make_execute_result
+
+
+def _message(name: str = "m"):
+    message = MagicMock(name=name)
+    message.ack = AsyncMock()
+    return message
+
+
+def _dispatch(dispatcher: MicroBatchDispatcher, items, settle: float = 0.0):
+    async def run():
+        for event_type, event_data, message in items:
+            await dispatcher.submit(event_type, event_data, message)
+        await asyncio.sleep(settle)
+
+    asyncio.run(run())
+
+
+def _session_local(monkeypatch, db):
+    @asynccontextmanager
+    async def _session_factory():
+        yield db
+
+    monkeypatch.setattr(consumer, "SessionLocal", _session_factory)
+
+
+class TestMicroBatchDispatcher:
+    def test_full_batch_is_handled_in_one_call_and_acked(self):
+        handler = AsyncMock()
+        metrics = ConsumerMetrics()
+        dispatcher = MicroBatchDispatcher(
+            {"foilhole.created": handler}, AsyncMock(), max_items=3, max_wait_seconds=60, metrics=metrics
+        )
+        messages = [_message() for _ in range(3)]
+
+        _dispatch(dispatcher, [("foilhole.created", {"uuid": f"fh-{i}"}, m) for i, m in enumerate(messages)])
+
+        handler.assert_awaited_once_with([{"uuid": "fh-0"}, {"uuid": "fh-1"}, {"uuid": "fh-2"}])
+        assert all(m.ack.await_count == 1 for m in messages)
+        summary = metrics.summary()["event_types"]["foilhole.created"]
+        assert (summary["handled"], summary["calls"], summary["in_flight"]) == (3, 1, 0)
+
+    def test_partial_batch_is_flushed_after_the_wait(self):
+        handler = AsyncMock()
+        dispatcher = MicroBatchDispatcher(
+            {"foilhole.created": handler}, AsyncMock(), max_items=10, max_wait_seconds=0.01
+        )
+        message = _message()
+
+        _dispatch(dispatcher, [("foilhole.created", {"uuid": "fh-0"}, message)], settle=0.05)
+
+        handler.assert_awaited_once_with([{"uuid": "fh-0"}])
+        message.ack.assert_awaited_once()
+
+    def test_failed_batch_falls_back_to_one_message_at_a_time(self):
+        fallback = AsyncMock()
+        metrics = ConsumerMetrics()
+        dispatcher = MicroBatchDispatcher(
+            {"foilhole.created": AsyncMock(side_effect=ValueError("poison"))}, fallback, max_items=2, metrics=metrics
+        )
+        messages = [_message(), _message()]
+
+        _dispatch(dispatcher, [("foilhole.created", {}, m) for m in messages])
+
+        assert [call.args[0] for call in fallback.await_args_list] == messages
+        assert all(m.ack.await_count == 0 for m in messages)
+        # the fallback counts the messages it processes; the failed batch is only counted as replayed
+        summary = metrics.summary()["event_types"]["foilhole.created"]
+        assert (summary["handled"], summary["failed"], summary["replayed"]) == (0, 0, 2)
+
+    def test_stop_flushes_pending_batches(self):
+        handler = AsyncMock()
+        dispatcher = MicroBatchDispatcher(
+            {"micrograph.created": handler}, AsyncMock(), max_items=10, max_wait_seconds=60
+        )
+
+        async def run():
+            await dispatcher.submit("micrograph.created", {"uuid": "m-1"}, _message())
+            await dispatcher.stop()
+
+        asyncio.run(run())
+
+        handler.assert_awaited_once_with([{"uuid": "m-1"}])
+
+    def test_on_message_batches_only_the_types_it_has_batch_handlers_for(self, monkeypatch):
+        single = AsyncMock()
+        monkeypatch.setattr(consumer, "get_event_handlers", lambda: {"grid.updated": single})
+        dispatcher = MagicMock()
+        dispatcher.accepts = lambda event_type: event_type == "foilhole.created"
+        dispatcher.submit = AsyncMock()
+        batched = _message()
+        batched.body, batched.content_type, batched.headers = b'{"event_type": "foilhole.created"}', None, {}
+        other = _message()
+        other.body, other.content_type, other.headers = b'{"event_type": "grid.updated"}', None, {}
+
+        asyncio.run(consumer._on_message(MagicMock(), batched, dispatcher))
+        asyncio.run(consumer._on_message(MagicMock(), other, dispatcher))
+
+        dispatcher.submit.assert_awaited_once()
+        assert dispatcher.submit.await_args.args[0] == "foilhole.created"
+        batched.ack.assert_not_awaited()
+        single.assert_awaited_once()
+        other.ack.assert_awaited_once()
+
+
+class TestBatchHandlers:
+    def test_every_batch_handler_has_a_per_message_handler(self):
+        assert set(consumer.get_batch_event_handlers()) <= set(consumer.get_event_handlers())
+
+    def test_created_foilholes_are_seeded_once_per_gridsquare(self, monkeypatch):
+        seeded = []
+
+        async def seed(uuids, gridsquare_uuid):
+            seeded.append((gridsquare_uuid, uuids))
+
+        monkeypatch.setattr(consumer, "seed_foilhole_predictions", seed)
+        events = [
+            {"event_type": "foilholes.created", "gridsquare_uuid": "gs-1", "uuids": ["fh-1", "fh-2"]},
+            {"event_type": "foilholes.created", "gridsquare_uuid": "gs-2", "uuids": ["fh-3"]},
+            {"event_type": "foilholes.created", "gridsquare_uuid": "gs-1", "uuids": ["fh-4"]},
+        ]
+
+        asyncio.run(consumer.handle_foilholes_created_batch(events))
+
+        assert seeded == [("gs-1", ["fh-1", "fh-2", "fh-4"]), ("gs-2", ["fh-3"])]
+
+    def test_created_events_are_batched_by_their_batch_event_type(self):
+        batch_handlers = consumer.get_batch_event_handlers()
+
+        assert batch_handlers["foilholes.created"] is consumer.handle_foilholes_created_batch
+        assert "foilhole.created" not in batch_handlers
+
+    def test_foilhole_predictions_are_written_in_one_commit(self, monkeypatch):
+        existing = CurrentQualityPrediction(
+            grid_uuid="grid-1",
+            gridsquare_uuid="gs-1",
+            foilhole_uuid="fh-1",
+            prediction_model_name="model-a",
+            value=0.1,
+            metric_name=None,
+        )
+        db = make_async_db()
+        db.execute.side_effect = [make_execute_result([existing]), make_execute_result([("fh-2", "gs-2", "grid-2")])]
+        _session_local(monkeypatch, db)
+        dirty = []
+        monkeypatch.setattr(consumer, "_mark_grid_dirty", dirty.append)
+        events = [
+            {
+                "event_type": "foilhole.model_prediction",
+                "foilhole_uuid": uuid,
+                "prediction_model_name": "model-a",
+                "prediction_value": value,
+            }
+            for uuid, value in [("fh-1", 0.7), ("fh-2", 0.4)]
+        ]
+
+        asyncio.run(consumer.handle_foilhole_model_prediction_batch(events))
+
+        assert existing.value == 0.7
+        (current,) = [p for p in db.add_all.call_args.args[0] if p is not existing]
+        assert (current.grid_uuid, current.gridsquare_uuid, current.value) == ("grid-2", "gs-2", 0.4)
+        history = [call.args[0] for call in db.add.call_args_list]
+        assert [type(row) for row in history] == [QualityPrediction, QualityPrediction]
+        db.commit.assert_awaited_once()
+        assert sorted(dirty) == ["grid-1", "grid-2"]
+
+    def test_processing_results_share_one_statistics_update_per_grid(self, monkeypatch):
+        db = make_async_db()
+        db.execute.return_value = make_execute_result([("m-1", "grid-1"), ("m-2", "grid-1")])
+        _session_local(monkeypatch, db)
+        recorded = []
+
+        async def record(session, grid_uuid, metric_name, values, larger_better=False):
+            recorded.append((grid_uuid, list(values)))
+            return np.array([0.9, 0.2])
+
+        monkeypatch.setattr(consumer, "record_metric_values", record)
+        prior_update = AsyncMock()
+        monkeypatch.setattr(consumer, "prior_update", prior_update)
+        monkeypatch.setattr(consumer, "_mark_grid_dirty", lambda grid_uuid: None)
+        published = AsyncMock(return_value=True)
+        monkeypatch.setattr(consumer, "publish_particle_picking_registered", published)
+        events = [
+            {"event_type": "particle_picking.completed", "micrograph_uuid": uuid, "number_of_particles_picked": n}
+            for uuid, n in [("m-1", 100), ("m-2", 5)]
+        ]
+
+        asyncio.run(consumer.handle_particle_picking_complete_batch(events))
+
+        assert recorded == [("grid-1", [100, 5])]
+        assert all(call.kwargs == {"commit": False} for call in prior_update.await_args_list)
+        db.commit.assert_awaited_once()
+        assert [call.args[:2] for call in published.await_args_list] == [("m-1", True), ("m-2", False)]
@@ -0,0 +1,149 @@
+"""Consumer instrumentation: per-event-type counters and latency, and the metrics endpoint."""
+
+import asyncio
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+os.environ["SKIP_DB_INIT"] = "true"
+
+import pytest
+
+from smartem_backend import consumer
+from smartem_backend.consumer_metrics import ConsumerMetrics, record_handler_failure, serve_metrics
+
+
+def _message(body: bytes):
+    message = MagicMock()
+    message.body = body
+    message.content_type = "application/json"
+    message.type = None
+    message.headers = {}
+    message.ack = AsyncMock()
+    message.reject = AsyncMock()
+    return message
+
+
+class TestConsumerMetrics:
+    def test_track_counts_handled_failed_and_in_flight_messages(self):
+        metrics = ConsumerMetrics()
+
+        with metrics.track("grid.created"):
+            assert metrics.summary()["event_types"]["grid.created"]["in_flight"] == 1
+        with pytest.raises(RuntimeError), metrics.track("grid.created"):
+            raise RuntimeError("handler failed")
+        with metrics.track("foilhole.created", messages=50):
+            pass
+
+        summary = metrics.summary()["event_types"]
+        assert {key: summary["grid.created"][key] for key in ("handled", "failed", "in_flight", "calls")} == {
+            "handled": 2,
+            "failed": 1,
+            "in_flight": 0,
+            "calls": 2,
+        }
+        assert (summary["foilhole.created"]["handled"], summary["foilhole.created"]["calls"]) == (50, 1)
+
+    def test_handler_that_logs_its_error_is_counted_as_failed(self):
+        metrics = ConsumerMetrics()
+
+        with metrics.track("grid.created"):
+            record_handler_failure()
+        with metrics.track("grid.created"):
+            pass
+        record_handler_failure()
+
+        summary = metrics.summary()["event_types"]["grid.created"]
+        assert (summary["handled"], summary["failed"]) == (2, 1)
+
+    def test_replayed_batch_is_not_counted_as_handled(self):
+        metrics = ConsumerMetrics()
+
+        with pytest.raises(ValueError), metrics.track("foilholes.created", messages=5, replayed_on_failure=True):
+            raise ValueError("poison")
+
+        summary = metrics.summary()["event_types"]["foilholes.created"]
+        assert {key: summary[key] for key in ("handled", "failed", "replayed", "in_flight", "calls")} == {
+            "handled": 0,
+            "failed": 0,
+            "replayed": 5,
+            "in_flight": 0,
+            "calls": 1,
+        }
+
+    def test_summary_lists_the_event_types_taking_most_time_first(self):
+        metrics = ConsumerMetrics()
+        metrics._latency["grid.created"].record(1.0)
+        metrics._latency["ctf.completed"].record(400.0)
+
+        assert list(metrics.summary()["event_types"]) == ["ctf.completed", "grid.created"]
+
+    def test_added_sections_are_included_in_the_summary(self):
+        metrics = ConsumerMetrics()
+        metrics.add_section("prediction_refresh", lambda: {"pending": 2})
+
+        assert metrics.summary()["prediction_refresh"] == {"pending": 2}
+
+
+class TestOnMessageInstrumentation:
+    def test_uses_the_resolved_handler_table_and_records_each_message(self, monkeypatch):
+        handler = AsyncMock()
+        metrics = ConsumerMetrics()
+        monkeypatch.setattr(consumer, "event_handlers", {"grid.created": handler})
+        monkeypatch.setattr(consumer, "get_event_handlers", MagicMock(side_effect=AssertionError("rebuilt")))
+        monkeypatch.setattr(consumer, "consumer_metrics", metrics)
+        handled = _message(b'{"event_type": "grid.created", "uuid": "grid-1"}')
+        unknown = _message(b'{"event_type": "grid.exploded"}')
+
+        asyncio.run(consumer._on_message(MagicMock(), handled))
+        asyncio.run(consumer._on_message(MagicMock(), unknown))
+
+        handler.assert_awaited_once()
+        handled.ack.assert_awaited_once()
+        unknown.reject.assert_awaited_once_with(requeue=False)
+        summary = metrics.summary()
+        assert summary["event_types"]["grid.created"]["handled"] == 1
+        assert summary["rejected"] == {"grid.exploded": 1}
+
+    def test_swallowed_handler_error_is_counted_as_failed(self, monkeypatch):
+        metrics = ConsumerMetrics()
+        monkeypatch.setattr(consumer, "event_handlers", {"acquisition.created": consumer.handle_acquisition_created})
+        monkeypatch.setattr(consumer, "consumer_metrics", metrics)
+        message = _message(b'{"event_type": "acquisition.created"}')
+
+        asyncio.run(consumer._on_message(MagicMock(), message))
+
+        message.ack.assert_awaited_once()
+        assert metrics.summary()["event_types"]["acquisition.created"]["failed"] == 1
+
+
+class TestMetricsEndpoint:
+    @staticmethod
+    async def _get(port: int, path: str) -> tuple[str, bytes]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return head.split(b"\r\n")[0].decode(), body
+
+    def test_serves_the_summary_as_json(self):
+        metrics = ConsumerMetrics()
+        with metrics.track("grid.created"):
+            pass
+
+        async def run():
+            server = await serve_metrics(metrics, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await self._get(port, "/metrics"), await self._get(port, "/")
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        (status, body), (missing_status, _) = asyncio.run(run())
+
+        assert status == "HTTP/1.1 200 OK"
+        assert json.loads(body)["event_types"]["grid.created"]["handled"] == 1
+        assert missing_status == "HTTP/1.1 404 Not Found"
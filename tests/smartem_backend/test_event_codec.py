@@ -0,0 +1,120 @@
+"""Message bus codec: single-pass model encoding, content-type negotiation and consumer dispatch."""
+
+import asyncio
+import json
+import os
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+os.environ["SKIP_DB_INIT"] = "true"
+
+import pytest
+from pydantic import ValidationError
+
+from smartem_backend import consumer
+from smartem_backend.model.mq_event import (
+    EVENT_MODELS,
+    AgentInstructionExpiredEvent,
+    CtfCompleteBody,
+    GridSquareCreatedEvent,
+    MessageQueueEventType,
+)
+from smartem_backend.rmq.codec import EVENT_CONTENT_TYPE, LEGACY_CONTENT_TYPE, decode_event, encode_event
+
+
+def _message(body: bytes, content_type: str | None, message_type: str | None = None):
+    message = MagicMock()
+    message.body = body
+    message.content_type = content_type
+    message.type = message_type
+    message.headers = {}
+    message.ack = AsyncMock()
+    message.reject = AsyncMock()
+    return message
+
+
+class TestEventCodec:
+    def test_model_events_round_trip_in_the_event_format(self):
+        event = AgentInstructionExpiredEvent(
+            instruction_id="i-1", session_id="s-1", agent_id="a-1", expires_at=datetime.now(UTC), retry_count=2
+        )
+
+        body, content_type = encode_event(MessageQueueEventType.AGENT_INSTRUCTION_EXPIRED, event)
+        decoded = decode_event(body, content_type, MessageQueueEventType.AGENT_INSTRUCTION_EXPIRED.value)
+
+        assert content_type == EVENT_CONTENT_TYPE
+        assert decoded == event
+        # consumers that predate the codec parse the same body as plain JSON
+        assert json.loads(body)["event_type"] == "agent.instruction.expired"
+
+    def test_dicts_and_models_without_event_type_use_the_generic_format(self):
+        body, content_type = encode_event(MessageQueueEventType.GRIDSQUARE_CREATED, {"uuid": "gs-1", "x": 1})
+        ctf_body, ctf_content_type = encode_event(
+            MessageQueueEventType.CTF_COMPLETE, CtfCompleteBody(micrograph_uuid="m-1", ctf_max_resolution_estimate=3)
+        )
+
+        assert content_type == ctf_content_type == LEGACY_CONTENT_TYPE
+        assert decode_event(body, content_type, "gridsquare.created") == {
+            "event_type": "gridsquare.created",
+            "uuid": "gs-1",
+            "x": 1,
+        }
+        assert decode_event(ctf_body, ctf_content_type)["event_type"] == "ctf.completed"
+
+    def test_generic_json_is_decoded_to_a_dict_whatever_its_type_property(self):
+        body = b'{"event_type": "gridsquare.created", "uuid": "gs-1"}'
+
+        assert decode_event(body, LEGACY_CONTENT_TYPE, "gridsquare.created") == {
+            "event_type": "gridsquare.created",
+            "uuid": "gs-1",
+        }
+        assert isinstance(decode_event(body, EVENT_CONTENT_TYPE, "gridsquare.created"), GridSquareCreatedEvent)
+
+    def test_malformed_bodies_raise_value_error(self):
+        with pytest.raises(ValueError):
+            decode_event(b"not json", LEGACY_CONTENT_TYPE)
+        with pytest.raises(ValueError):
+            decode_event(b"[1, 2]", LEGACY_CONTENT_TYPE)
+        with pytest.raises(ValidationError):
+            decode_event(b'{"event_type": "gridsquare.created"}', EVENT_CONTENT_TYPE, "gridsquare.created")
+
+    def test_every_handled_event_type_has_a_model(self):
+        assert set(consumer.get_event_handlers()) <= {event_type.value for event_type in EVENT_MODELS}
+
+
+class TestConsumerDispatch:
+    def test_event_format_messages_reach_handlers_as_models(self, monkeypatch):
+        handler = AsyncMock()
+        monkeypatch.setattr(consumer, "get_event_handlers", lambda: {"gridsquare.created": handler})
+        event = GridSquareCreatedEvent(event_type=MessageQueueEventType.GRIDSQUARE_CREATED, uuid="gs-1")
+        body, content_type = encode_event(MessageQueueEventType.GRIDSQUARE_CREATED, event)
+        message = _message(body, content_type, "gridsquare.created")
+
+        asyncio.run(consumer._on_message(MagicMock(), message))
+
+        assert handler.await_args.args[0] == event
+        message.ack.assert_awaited_once()
+
+    def test_handlers_accept_decoded_models_and_legacy_dicts(self, monkeypatch):
+        seeded = []
+
+        async def seed(uuids):
+            seeded.extend(uuids)
+
+        monkeypatch.setattr(consumer, "seed_gridsquare_predictions", seed)
+        event = GridSquareCreatedEvent(event_type=MessageQueueEventType.GRIDSQUARE_CREATED, uuid="gs-1")
+
+        asyncio.run(consumer.handle_gridsquare_created(event))
+        asyncio.run(consumer.handle_gridsquare_created({"event_type": "gridsquare.created", "uuid": "gs-2"}))
+
+        assert seeded == ["gs-1", "gs-2"]
+
+    def test_undecodable_messages_are_rejected_without_retry(self):
+        message = _message(b'{"uuid": "gs-1"}', EVENT_CONTENT_TYPE, "gridsquare.created")
+        bus = MagicMock()
+        bus.requeue_with_retry = AsyncMock()
+
+        asyncio.run(consumer._on_message(bus, message))
+
+        message.reject.assert_awaited_once_with(requeue=False)
+        bus.requeue_with_retry.assert_not_awaited()
@@ -101,8 +101,8 @@ class TestListGridSquareFoilHoles:
 
 
 class TestCreateGridSquareFoilHoles:
-    def test_happy_path_publishes_each(self, client, stub_publisher):
-        calls = stub_publisher("publish_foilhole_created")
+    def test_happy_path_publishes_the_holes_in_one_batch(self, client, stub_publisher):
+        calls = stub_publisher("publish_foilholes_created_batch")
 
         resp = client.post(
             "/gridsquares/gs-1/foilholes",
@@ -113,17 +113,26 @@ class TestCreateGridSquareFoilHoles:
         assert len(body) == 2
         assert {item["uuid"] for item in body} == {"fh-1", "fh-2"}
         client._db.commit.assert_called_once()
-        assert len(calls) == 2
+        assert calls == [{"args": ([("fh-1", "fh-id-1", "gs-1", "gs-id-1"), ("fh-2", "fh-id-1", "gs-1", "gs-id-1")],)}]
+
+    def test_each_hole_added_once_with_default_status(self, client, stub_publisher):
+        stub_publisher("publish_foilholes_created_batch")
+
+        resp = client.post("/gridsquares/gs-1/foilholes", json=[_foilhole_payload("fh-1")])
+        assert resp.status_code == 201
+        assert resp.json()[0]["status"] == "none"
+        added = client._db.add_all.call_args.args[0]
+        assert [fh.uuid for fh in added] == ["fh-1"]
 
     def test_empty_list_returns_201_with_no_publishes(self, client, stub_publisher):
-        calls = stub_publisher("publish_foilhole_created")
+        calls = stub_publisher("publish_foilholes_created_batch")
         resp = client.post("/gridsquares/gs-1/foilholes", json=[])
         assert resp.status_code == 201
         assert resp.json() == []
         assert calls == []
 
     def test_missing_required_fields_returns_422(self, client, stub_publisher):
-        calls = stub_publisher("publish_foilhole_created")
+        calls = stub_publisher("publish_foilholes_created_batch")
         resp = client.post("/gridsquares/gs-1/foilholes", json=[{"uuid": "fh-1"}])
         assert resp.status_code == 422
         assert calls == []
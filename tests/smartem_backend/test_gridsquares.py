@@ -50,7 +50,17 @@ class TestUpdateGridSquare:
         resp = client.put("/gridsquares/gs-1", json={"defocus": 1.5})
         assert resp.status_code == 200
         client._db.commit.assert_called_once()
-        assert calls == [{"uuid": "gs-1", "grid_uuid": "grid-1", "gridsquare_id": "gs-id-1"}]
+        assert calls == [{"uuid": "gs-1", "grid_uuid": "grid-1", "gridsquare_id": "gs-id-1", "image_path": None}]
+
+    def test_new_image_path_is_published_for_prewarm(self, client, stub_publisher):
+        from smartem_backend.model.database import GridSquare
+
+        set_db_row(client, GridSquare(uuid="gs-1", grid_uuid="grid-1", gridsquare_id="gs-id-1", image_path="/a.mrc"))
+        calls = stub_publisher("publish_gridsquare_updated")
+
+        client.put("/gridsquares/gs-1", json={"image_path": "/a.mrc"})
+        client.put("/gridsquares/gs-1", json={"image_path": "/b.mrc"})
+        assert [c["image_path"] for c in calls] == [None, "/b.mrc"]
 
     def test_lowmag_publishes_lowmag_event(self, client, stub_publisher):
         from smartem_backend.model.database import GridSquare
@@ -184,10 +194,11 @@ class TestGetGridSquareImage:
         import tifffile
 
         from smartem_backend import api_server
+        from smartem_backend.image_cache import ImageCache
         from smartem_backend.model.database import GridSquare
 
         cache_dir = tmp_path / "cache"
-        monkeypatch.setattr(api_server, "IMAGE_CACHE_DIR", cache_dir)
+        monkeypatch.setattr(api_server, "image_cache", ImageCache(cache_dir, max_bytes=1024**2))
         source = tmp_path / "square.tiff"
         tifffile.imwrite(source, np.arange(16, dtype=np.uint16).reshape(4, 4))
 
@@ -0,0 +1,74 @@
+"""HeartbeatBuffer coalescing and the set-based heartbeat statements."""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from smartem_backend.heartbeats import HeartbeatBuffer, heartbeat_batch_statement
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.asyncpg.dialect()))
+
+
+def _session_factory(live_rows):
+    session = MagicMock()
+    result = MagicMock()
+    result.all.return_value = live_rows
+    session.execute = AsyncMock(return_value=result)
+    session.commit = AsyncMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session), session
+
+
+class TestHeartbeatBatchStatement:
+    def test_updates_connections_and_sessions_from_values(self):
+        sql = _sql(heartbeat_batch_statement([("a", "s1", datetime(2026, 1, 1)), ("b", "s2", datetime(2026, 1, 1))]))
+        assert "UPDATE agentconnection SET last_heartbeat_at=beats.beat_at FROM (VALUES" in sql
+        assert "UPDATE agentsession SET last_activity_at=touched_connections.beat_at" in sql
+
+
+class TestHeartbeatBuffer:
+    def test_unknown_connection_is_not_absorbed(self):
+        buffer = HeartbeatBuffer(session_factory=None, flush_seconds=5)
+        assert buffer.record("agent-1", "sess-1", datetime.now()) is None
+        assert buffer.pending() == 0
+
+    def test_flush_writes_latest_beat_per_connection_in_one_statement(self):
+        factory, session = _session_factory([("agent-1", "sess-1"), ("agent-2", "sess-2")])
+        buffer = HeartbeatBuffer(factory, flush_seconds=5)
+        buffer.remember("agent-1", "sess-1", "conn-1")
+        buffer.remember("agent-2", "sess-2", "conn-2")
+        for second in range(10):
+            buffer.record("agent-1", "sess-1", datetime(2026, 1, 1, 0, 0, second))
+            buffer.record("agent-2", "sess-2", datetime(2026, 1, 1, 0, 0, second))
+
+        assert asyncio.run(buffer.flush()) == 2
+
+        assert session.execute.await_count == 1
+        assert session.commit.await_count == 1
+        assert buffer.pending() == 0
+        assert "VALUES" in _sql(session.execute.await_args.args[0])
+
+    def test_closed_connection_stops_being_absorbed(self):
+        factory, _ = _session_factory([])
+        buffer = HeartbeatBuffer(factory, flush_seconds=5)
+        buffer.remember("agent-1", "sess-1", "conn-1")
+        buffer.record("agent-1", "sess-1", datetime.now())
+
+        assert asyncio.run(buffer.flush()) == 0
+        assert buffer.record("agent-1", "sess-1", datetime.now()) is None
+
+    def test_failed_flush_keeps_beats_for_next_time(self):
+        factory, session = _session_factory([])
+        session.execute.side_effect = ConnectionError("database down")
+        buffer = HeartbeatBuffer(factory, flush_seconds=5)
+        buffer.remember("agent-1", "sess-1", "conn-1")
+        buffer.record("agent-1", "sess-1", datetime.now())
+
+        assert asyncio.run(buffer.flush()) == 0
+        assert buffer.pending() == 1
+        assert buffer.record("agent-1", "sess-1", datetime.now()) == "conn-1"
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import threading
+
+import numpy as np
+import pytest
+import tifffile
+
+from smartem_backend import image_cache as image_cache_module
+from smartem_backend.image_cache import ImageCache
+
+
+@pytest.fixture
+def render_calls(monkeypatch):
+    """Replace the renderer with one that records calls and returns fixed-size bytes."""
+    calls: list[tuple] = []
+    lock = threading.Lock()
+
+    def _render(source_path, crop=None, max_size=None):
+        with lock:
+            calls.append((source_path, crop, max_size))
+        return b"P" * 100
+
+    monkeypatch.setattr(image_cache_module, "render_image_png", _render)
+    return calls
+
+
+def _sources(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"square_{i}.tiff"
+        path.write_bytes(b"source-%d" % i)
+        paths.append(path)
+    return paths
+
+
+class TestImageCache:
+    def test_memory_tier_serves_repeat_requests(self, tmp_path, render_calls):
+        cache = ImageCache(tmp_path / "cache", max_bytes=10_000, memory_max_bytes=1_000)
+        (source,) = _sources(tmp_path, 1)
+
+        async def _run():
+            first = await cache.get(source)
+            (tmp_path / "cache" / f"{cache.cache_key(source)}.png").unlink()
+            second = await cache.get(source)
+            return first, second
+
+        first, second = asyncio.run(_run())
+        assert first == second
+        assert len(render_calls) == 1
+        assert cache.stats()["memory_entries"] == 1
+
+    def test_concurrent_requests_render_once(self, tmp_path, render_calls):
+        cache = ImageCache(tmp_path / "cache", max_bytes=10_000)
+        (source,) = _sources(tmp_path, 1)
+
+        async def _run():
+            return await asyncio.gather(*(cache.get(source) for _ in range(10)))
+
+        results = asyncio.run(_run())
+        assert len(set(results)) == 1
+        assert len(render_calls) == 1
+
+    def test_lru_eviction_keeps_disk_within_budget(self, tmp_path, render_calls):
+        cache_dir = tmp_path / "cache"
+        cache = ImageCache(cache_dir, max_bytes=250)
+        a, b, c = _sources(tmp_path, 3)
+
+        async def _run():
+            await cache.get(a)
+            await cache.get(b)
+            await cache.get(a)
+            await cache.get(c)
+
+        asyncio.run(_run())
+        remaining = {p.stem for p in cache_dir.glob("*.png")}
+        assert remaining == {cache.cache_key(a), cache.cache_key(c)}
+        assert cache.stats()["disk_bytes"] <= 250
+        assert cache.evictions == 1
+
+    def test_existing_files_adopted_on_first_use(self, tmp_path, render_calls):
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        old = cache_dir / "stale.png"
+        old.write_bytes(b"x" * 200)
+        os.utime(old, (0, 0))
+        cache = ImageCache(cache_dir, max_bytes=250)
+        (source,) = _sources(tmp_path, 1)
+
+        asyncio.run(cache.get(source))
+
+        assert not old.exists()
+        assert cache.stats()["disk_entries"] == 1
+
+    def test_renders_real_image(self, tmp_path):
+        source = tmp_path / "square.tiff"
+        tifffile.imwrite(source, np.arange(64, dtype=np.uint16).reshape(8, 8))
+        cache = ImageCache(tmp_path / "cache", max_bytes=1024**2)
+
+        png = asyncio.run(cache.get(source, max_size=4))
+        assert png[:8] == b"\x89PNG\r\n\x1a\n"
+
+    def test_prewarm_populates_disk_and_swallows_errors(self, tmp_path, render_calls):
+        cache_dir = tmp_path / "cache"
+        cache = ImageCache(cache_dir, max_bytes=10_000)
+        (source,) = _sources(tmp_path, 1)
+
+        async def _run():
+            cache.schedule_prewarm(source)
+            cache.schedule_prewarm(tmp_path / "missing.tiff")
+            await asyncio.gather(*cache._background)
+
+        asyncio.run(_run())
+        assert (cache_dir / f"{cache.cache_key(source)}.png").exists()
+        assert len(render_calls) == 1
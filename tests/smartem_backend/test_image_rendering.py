@@ -0,0 +1,105 @@
+import io
+
+import mrcfile
+import numpy as np
+import pytest
+import tifffile
+from PIL import Image
+
+from smartem_backend.image_rendering import (
+    crop_region,
+    downsample,
+    downsample_factor,
+    render_image_png,
+    stretch_contrast,
+)
+
+
+def _decode(png: bytes) -> np.ndarray:
+    return np.asarray(Image.open(io.BytesIO(png)))
+
+
+class TestCropRegion:
+    def test_returns_view_centred_on_xy(self):
+        data = np.arange(100).reshape(10, 10)
+        region = crop_region(data, (5, 5, 4, 2))
+        assert region.shape == (2, 4)
+        assert np.shares_memory(region, data)
+        assert region[0, 0] == data[4, 3]
+
+    def test_clamps_to_frame(self):
+        data = np.zeros((10, 10))
+        assert crop_region(data, (1, 1, 6, 6)).shape == (4, 4)
+        assert crop_region(data, (10, 10, 4, 4)).shape == (2, 2)
+        assert crop_region(data, (20, 20, 4, 4)).shape == (0, 0)
+
+    def test_none_returns_input(self):
+        data = np.zeros((3, 3))
+        assert crop_region(data, None) is data
+
+
+class TestDownsample:
+    @pytest.mark.parametrize(
+        "shape,max_size,expected",
+        [((100, 50), None, 1), ((100, 50), 100, 1), ((100, 50), 50, 2), ((4096, 4096), 1000, 5)],
+    )
+    def test_factor(self, shape, max_size, expected):
+        assert downsample_factor(shape, max_size) == expected
+
+    def test_block_mean(self):
+        data = np.arange(16, dtype=np.uint16).reshape(4, 4)
+        out = downsample(data, 2, "mean")
+        assert out.dtype == np.float32
+        np.testing.assert_allclose(out, [[2.5, 4.5], [10.5, 12.5]])
+
+    def test_stride(self):
+        data = np.arange(16, dtype=np.uint16).reshape(4, 4)
+        np.testing.assert_array_equal(downsample(data, 2, "stride"), [[0, 2], [8, 10]])
+
+    def test_factor_one_copies_to_float32(self):
+        data = np.ones((2, 2), dtype=np.uint8)
+        out = downsample(data, 1)
+        assert out.dtype == np.float32
+        assert not np.shares_memory(out, data)
+
+
+class TestStretchContrast:
+    def test_outliers_do_not_flatten_image(self):
+        data = np.tile(np.linspace(0, 100, 100, dtype=np.float32), (100, 1))
+        data[0, 0] = 1e9
+        out = stretch_contrast(data)
+        assert out.dtype == np.uint8
+        assert out[50, 0] == 0
+        assert out[50, -1] == 255
+        assert 100 < out[50, 50] < 155
+
+    def test_constant_image_renders_black(self):
+        out = stretch_contrast(np.full((4, 4), 7.0, dtype=np.float32))
+        assert not out.any()
+
+
+class TestRenderImagePng:
+    def test_tiff_max_size(self, tmp_path):
+        source = tmp_path / "square.tiff"
+        tifffile.imwrite(source, np.arange(64 * 32, dtype=np.uint16).reshape(64, 32))
+        pixels = _decode(render_image_png(source, max_size=16))
+        assert pixels.shape == (16, 8)
+
+    def test_compressed_tiff_falls_back_to_decoded_memmap(self, tmp_path):
+        source = tmp_path / "square.tiff"
+        tifffile.imwrite(source, np.arange(256, dtype=np.uint16).reshape(16, 16), compression="zlib")
+        pixels = _decode(render_image_png(source))
+        assert pixels.shape == (16, 16)
+        assert pixels[0, 0] < pixels[-1, -1]
+
+    def test_mrc_crop_is_normalised_locally(self, tmp_path):
+        source = tmp_path / "Atlas_1.mrc"
+        data = np.zeros((32, 32), dtype=np.float32)
+        data[:16] = np.arange(16 * 32, dtype=np.float32).reshape(16, 32)
+        data[16:] = 1e6
+        with mrcfile.new(source) as mrc:
+            mrc.set_data(data)
+        pixels = _decode(render_image_png(source, crop=(16, 8, 32, 16)))
+        assert pixels.shape == (16, 32)
+        assert pixels.min() == 0
+        assert pixels.max() == 255
@@ -0,0 +1,33 @@
+"""Bulk seeding of default prediction model weights by the initialise CLI."""
+
+import asyncio
+import os
+
+os.environ["SKIP_DB_INIT"] = "true"
+
+from sqlalchemy.dialects import postgresql
+
+from smartem_backend.cli.initialise_prediction_model_weights import (
+    _seed_weights_statement,
+    initialise_all_models_for_grids,
+)
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class TestInitialiseModelWeights:
+    def test_seeds_weights_and_current_weights_in_one_statement(self):
+        sql = _sql(_seed_weights_statement(["grid-1"]))
+
+        assert sql.count("INSERT INTO") == 2
+        assert sql.startswith("WITH seeded AS")
+        assert "INSERT INTO currentqualitypredictionmodelweight (grid_uuid, prediction_model_name, metric_name" in sql
+        assert "grid.uuid IN" in sql
+
+    def test_backfill_covers_all_grids(self):
+        assert "grid.uuid IN" not in _sql(_seed_weights_statement(None))
+
+    def test_empty_grid_list_is_a_no_op(self):
+        assert asyncio.run(initialise_all_models_for_grids([], engine=object())) == 0
@@ -1,22 +1,21 @@
 """Verify the NOTIFY helper issues the right SQL and that writers wire it in."""
 
+import asyncio
 import os
 from unittest.mock import AsyncMock, MagicMock
 
 os.environ["SKIP_DB_INIT"] = "true"
 
-import pytest
 
-from smartem_backend.instruction_notify import INSTRUCTION_CHANNEL, notify_instruction_pending
+from smartem_backend.instruction_notify import INSTRUCTION_CHANNEL, InstructionListener, notify_instruction_pending
 
 
 class TestNotifyHelper:
-    @pytest.mark.asyncio
-    async def test_emits_pg_notify_with_session_id_payload(self):
+    def test_emits_pg_notify_with_session_id_payload(self):
         session = MagicMock()
         session.execute = AsyncMock()
 
-        await notify_instruction_pending(session, "sess-abc")
+        asyncio.run(notify_instruction_pending(session, "sess-abc"))
 
         assert session.execute.await_count == 1
         stmt, params = session.execute.await_args.args
@@ -25,3 +24,139 @@ class TestNotifyHelper:
 
     def test_channel_is_stable(self):
         assert INSTRUCTION_CHANNEL == "agent_instructions"
+
+
+class FakeListenConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.termination_listeners = []
+        self.closed = False
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self, timeout=None):
+        self.closed = True
+
+    def terminate(self):
+        self.closed = True
+
+    def notify(self, payload):
+        self.listeners[INSTRUCTION_CHANNEL](self, 1, INSTRUCTION_CHANNEL, payload)
+
+    def drop(self):
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+
+class FakeConnector:
+    def __init__(self, failures=0):
+        self.connections = []
+        self.failures = failures
+
+    async def __call__(self, dsn):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection refused")
+        self.connections.append(FakeListenConnection())
+        return self.connections[-1]
+
+
+def _listener(connector):
+    return InstructionListener("postgresql://test", connect=connector, reconnect_base_delay=0.01)
+
+
+async def _settle(condition, timeout=1.0):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+class TestInstructionListener:
+    def test_single_connection_shared_by_all_streams(self):
+        async def scenario():
+            connector = FakeConnector()
+            listener = _listener(connector)
+            await listener.start()
+            queues = [listener.subscribe(f"sess-{i}") for i in range(50)]
+            await listener.stop()
+            return connector, queues
+
+        connector, queues = asyncio.run(scenario())
+        assert len(connector.connections) == 1
+        assert connector.connections[0].closed
+        assert len(queues) == 50
+
+    def test_notification_wakes_only_its_session(self):
+        async def scenario():
+            connector = FakeConnector()
+            listener = _listener(connector)
+            await listener.start()
+            first, second, other = listener.subscribe("sess-a"), listener.subscribe("sess-a"), listener.subscribe("b")
+            connector.connections[0].notify("sess-a")
+            connector.connections[0].notify("sess-a")
+            await listener.stop()
+            return first, second, other
+
+        first, second, other = asyncio.run(scenario())
+        # repeated notifications coalesce into a single wake-up per stream
+        assert first.qsize() == 1 and second.qsize() == 1
+        assert other.empty()
+
+    def test_unsubscribe_removes_session(self):
+        async def scenario():
+            connector = FakeConnector()
+            listener = _listener(connector)
+            await listener.start()
+            queue = listener.subscribe("sess-a")
+            listener.unsubscribe("sess-a", queue)
+            listener.unsubscribe("sess-a", queue)
+            connector.connections[0].notify("sess-a")
+            await listener.stop()
+            return listener, queue
+
+        listener, queue = asyncio.run(scenario())
+        assert listener.subscriber_count() == 0
+        assert queue.empty()
+
+    def test_reconnects_and_wakes_every_stream(self):
+        async def scenario():
+            connector = FakeConnector()
+            listener = _listener(connector)
+            await listener.start()
+            queues = [listener.subscribe("sess-a"), listener.subscribe("sess-b")]
+            connector.failures = 2
+            connector.connections[0].drop()
+            await _settle(lambda: listener.reconnect_count == 1)
+            connector.connections[1].notify("sess-a")
+            await listener.stop()
+            return connector, listener, queues
+
+        connector, listener, queues = asyncio.run(scenario())
+        assert len(connector.connections) == 2
+        assert listener.connected is False
+        assert all(queue.qsize() == 1 for queue in queues)
+
+    def test_start_keeps_retrying_when_database_unavailable(self):
+        async def scenario():
+            connector = FakeConnector(failures=3)
+            listener = _listener(connector)
+            await listener.start()
+            assert not listener.connected
+            await _settle(lambda: listener.connected)
+            queue = listener.subscribe("sess-a")
+            connector.connections[0].notify("sess-a")
+            await listener.stop()
+            return listener, queue
+
+        listener, queue = asyncio.run(scenario())
+        # the first successful connection is not a reconnect, so nothing was woken spuriously before the notify
+        assert listener.reconnect_count == 0
+        assert queue.qsize() == 1
@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import scipy.stats
+from sqlalchemy.dialects import postgresql
+
+from smartem_backend.model.database import QualityMetricStatistics
+from smartem_backend.predictions.statistics import MetricMoments, record_metric_values, upsert_metric_moments
+
+from ._async_db_stub import make_async_db, make_execute_result
+
+
+class TestMetricMoments:
+    def test_merge_matches_moments_of_all_values(self):
+        rng = np.random.default_rng(0)
+        first, second = rng.normal(3, 2, 50), rng.normal(5, 1, 7)
+        merged = MetricMoments.from_values(first).merge(MetricMoments.from_values(second))
+        everything = np.concatenate([first, second])
+        assert merged.count == 57
+        assert merged.mean == pytest.approx(everything.mean())
+        assert merged.variance == pytest.approx(everything.var(ddof=1))
+
+    def test_merge_one_at_a_time_matches_welford(self):
+        moments = MetricMoments()
+        for value in (1.0, 4.0, 2.5, 7.0):
+            moments = moments.merge(MetricMoments.from_values([value]))
+        assert moments.variance == pytest.approx(np.var([1.0, 4.0, 2.5, 7.0], ddof=1))
+
+    def test_quality_matches_normal_cdf(self):
+        moments = MetricMoments.from_values([1.0, 2.0, 4.0, 8.0])
+        values = np.array([0.0, 3.75, 10.0])
+        expected = scipy.stats.norm(moments.mean, np.sqrt(moments.variance)).cdf(values)
+        np.testing.assert_allclose(moments.quality(values, larger_better=True), expected)
+        np.testing.assert_allclose(moments.quality(values), 1 - expected)
+
+    def test_quality_without_spread_is_a_step(self):
+        moments = MetricMoments.from_values([2.0])
+        np.testing.assert_array_equal(moments.quality([1.0, 2.0, 3.0]), [1.0, 0.5, 0.0])
+        np.testing.assert_array_equal(moments.quality([1.0, 2.0, 3.0], larger_better=True), [0.0, 0.5, 1.0])
+
+    def test_quality_with_no_history_is_one(self):
+        np.testing.assert_array_equal(MetricMoments().quality([1.0, 2.0]), [1.0, 1.0])
+
+
+class TestPersistence:
+    def test_upsert_merges_in_sql(self):
+        sql = str(
+            upsert_metric_moments("grid-1", "ctf", MetricMoments.from_values([1.0])).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+        assert "ON CONFLICT (name, grid_uuid) DO UPDATE" in sql
+        assert "qualitymetricstatistics.squared_value_sum + excluded.squared_value_sum" in sql
+
+    def test_record_scores_against_stored_moments_before_the_batch(self):
+        db = make_async_db()
+        stored = QualityMetricStatistics(name="ctf", grid_uuid="grid-1", count=1, value_sum=2.0, squared_value_sum=0)
+        db.execute.side_effect = [make_execute_result(stored), MagicMock()]
+
+        quality = asyncio.run(record_metric_values(db, "grid-1", "ctf", [1.0, 3.0]))
+
+        np.testing.assert_array_equal(quality, [1.0, 0.0])
+        assert db.execute.await_count == 2
+        db.commit.assert_not_awaited()
@@ -0,0 +1,189 @@
+"""Transactional outbox: staging publishes in the handler's session and relaying them to the broker."""
+
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+os.environ["SKIP_DB_INIT"] = "true"
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from smartem_backend import mq_publisher, outbox
+from smartem_backend.model.database import MessageOutbox
+from smartem_backend.model.mq_event import AcquisitionCreatedEvent
+from smartem_backend.outbox import OutboxRelay, claim_statement, transactional_publish
+from smartem_backend.rmq.codec import EVENT_CONTENT_TYPE, decode_event
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.asyncpg.dialect()))
+
+
+def _session_factory(claimed_rows):
+    session = MagicMock()
+    result = MagicMock()
+    result.all.return_value = claimed_rows
+    session.execute = AsyncMock(return_value=result)
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session), session
+
+
+def _publisher(published: int | None = None):
+    """Publisher confirming `published` events of each batch, or all of them if None"""
+    publisher = MagicMock()
+    publisher.is_connected = True
+    publisher.publish_encoded = AsyncMock(side_effect=lambda items: len(items) if published is None else published)
+    return publisher
+
+
+class TestStaging:
+    def test_publishes_inside_transactional_publish_are_added_to_the_session(self, monkeypatch):
+        broker = MagicMock()
+        broker.publish_event = AsyncMock(return_value=True)
+        monkeypatch.setattr(mq_publisher, "_publisher", broker)
+        db = MagicMock()
+        db.info = {}
+
+        async def handler():
+            with transactional_publish(db):
+                assert await mq_publisher.publish_acquisition_created(uuid="acq-1") is True
+            assert await mq_publisher.publish_acquisition_created(uuid="acq-2") is True
+
+        asyncio.run(handler())
+
+        (row,) = db.add_all.call_args.args[0]
+        assert isinstance(row, MessageOutbox)
+        assert row.event_type == "acquisition.created"
+        assert row.content_type == EVENT_CONTENT_TYPE
+        assert decode_event(row.body, row.content_type, row.event_type) == AcquisitionCreatedEvent(
+            event_type="acquisition.created", uuid="acq-1"
+        )
+        # only the publish outside the block went to the broker
+        assert broker.publish_event.await_count == 1
+        assert broker.publish_event.await_args.args[1].uuid == "acq-2"
+
+    def test_commit_of_a_session_that_staged_events_wakes_the_relay(self, monkeypatch):
+        relay = MagicMock()
+        monkeypatch.setattr(outbox, "_relay", relay)
+        session = Session()
+
+        session.commit()
+        relay.wake.assert_not_called()
+
+        outbox.stage_events(session, [])
+        session.commit()
+        relay.wake.assert_called_once()
+
+
+class TestOutboxRelay:
+    def test_batches_are_relayed_one_at_a_time_under_an_advisory_lock(self):
+        assert (
+            _sql(outbox.relay_lock_statement()) == "SELECT pg_advisory_xact_lock($1::BIGINT) AS pg_advisory_xact_lock_1"
+        )
+        sql = _sql(claim_statement(500))
+
+        assert sql.startswith("SELECT messageoutbox.id, messageoutbox.event_type")
+        assert "ORDER BY messageoutbox.id" in sql
+        assert "SKIP LOCKED" not in sql
+
+    def test_relayed_batch_is_published_in_id_order_then_deleted(self):
+        factory, session = _session_factory(
+            [
+                (2, "grid.created", b"{}", "application/json", 0),
+                (1, "acquisition.created", b"{}", "application/json", 0),
+            ]
+        )
+        publisher = _publisher()
+        relay = OutboxRelay(factory, publisher, batch_size=10)
+
+        assert asyncio.run(relay.relay_once()) == 2
+
+        assert [(item[0], item[3]) for item in publisher.publish_encoded.await_args.args[0]] == [
+            ("acquisition.created", "1"),
+            ("grid.created", "2"),
+        ]
+        executed = [_sql(call.args[0]) for call in session.execute.await_args_list]
+        assert executed[0].startswith("SELECT pg_advisory_xact_lock")
+        assert executed[2].startswith("DELETE FROM messageoutbox WHERE messageoutbox.id IN")
+        session.commit.assert_awaited_once()
+        assert relay.relayed_count == 2
+
+    def test_confirmed_events_are_deleted_and_the_first_unconfirmed_counted(self):
+        factory, session = _session_factory(
+            [(n, "grid.created", f"{n}".encode(), "application/json", 0) for n in (1, 2, 3, 4)]
+        )
+        # the broker confirmed events 1 and 2, then failed on 3
+        publisher = _publisher(published=2)
+        relay = OutboxRelay(factory, publisher, batch_size=10)
+
+        assert asyncio.run(relay.relay_once()) is None
+
+        # the batch is not republished one event at a time
+        publisher.publish_encoded.assert_awaited_once()
+        statements = [call.args[0] for call in session.execute.await_args_list]
+        deleted, counted = statements[2].compile(), statements[3].compile()
+        assert str(deleted).startswith("DELETE FROM messageoutbox")
+        assert deleted.params["id_1"] == [1, 2]
+        assert str(counted).startswith("UPDATE messageoutbox SET attempts")
+        assert (counted.params["id_1"], counted.params["attempts"]) == (3, 1)
+        session.commit.assert_awaited_once()
+        assert relay.relayed_count == 2
+
+    def test_event_out_of_attempts_is_dead_lettered(self):
+        factory, session = _session_factory([(7, "grid.created", b"{}", "application/json", 2)])
+        relay = OutboxRelay(factory, _publisher(published=0), batch_size=10, max_attempts=3)
+
+        assert asyncio.run(relay.relay_once()) == 0
+
+        executed = [_sql(call.args[0]) for call in session.execute.await_args_list]
+        assert executed[2].startswith("INSERT INTO messageoutboxdeadletter")
+        assert executed[3].startswith("DELETE FROM messageoutbox WHERE messageoutbox.id =")
+        session.commit.assert_awaited_once()
+        assert relay.dead_lettered_count == 1
+
+    def test_failure_while_the_broker_is_down_does_not_count_as_an_attempt(self):
+        factory, session = _session_factory([(1, "acquisition.created", b"{}", "application/json", 0)])
+        publisher = _publisher(published=0)
+        publisher.is_connected = False
+        relay = OutboxRelay(factory, publisher, batch_size=10, max_attempts=1)
+
+        assert asyncio.run(relay.relay_once()) is None
+
+        assert session.execute.await_count == 2
+        assert relay.relayed_count == 0
+
+    def test_relay_connects_a_publisher_that_was_down_at_startup(self):
+        factory, _ = _session_factory([])
+        publisher = _publisher()
+        publisher.is_connected = False
+
+        async def connect():
+            if publisher.connect.await_count == 1:
+                raise ConnectionError("broker down")
+            publisher.is_connected = True
+
+        publisher.connect = AsyncMock(side_effect=connect)
+        relay = OutboxRelay(factory, publisher, poll_seconds=60, retry_base_delay=0.001)
+
+        async def run():
+            relay.start()
+            await asyncio.sleep(0.05)
+            await relay.stop()
+
+        asyncio.run(run())
+
+        assert publisher.connect.await_count == 2
+        assert publisher.is_connected
+
+    def test_empty_outbox_publishes_nothing(self):
+        factory, session = _session_factory([])
+        publisher = _publisher()
+
+        assert asyncio.run(OutboxRelay(factory, publisher).relay_once()) == 0
+
+        publisher.publish_encoded.assert_not_awaited()
+        session.commit.assert_not_awaited()
@@ -80,14 +80,10 @@ class TestMotionCorrectionCompleted:
         assert resp.json()["detail"] == "Micrograph not found"
         assert captured == []
 
-    def test_publish_failure_returns_502(self, client, captured, monkeypatch):
-        async def _fail(**_):
-            return False
-
-        monkeypatch.setattr(api_server, "publish_motion_correction_completed", _fail)
+    def test_event_is_accepted_once_committed_to_the_outbox(self, client, captured):
         resp = client.post(self.endpoint, json={"total_motion": 1.5, "average_motion": 0.1})
-        assert resp.status_code == 502
-        assert "motion_correction_completed" in resp.json()["detail"]
+        assert resp.status_code == 202
+        client._db.commit.assert_awaited_once()
 
     def test_missing_body_field_returns_422(self, client):
         resp = client.post(self.endpoint, json={"total_motion": 1.5})
@@ -0,0 +1,78 @@
+"""AioPikaPublisher.publish_events: bounded confirm window."""
+
+import asyncio
+import json
+
+from aio_pika.exceptions import DeliveryError
+
+from smartem_backend.model.mq_event import MessageQueueEventType
+from smartem_backend.rmq import AioPikaPublisher
+
+
+class FakeExchange:
+    """Confirms each publish after `rtt` seconds, recording bodies and the peak number awaiting a confirm"""
+
+    def __init__(self, rtt: float = 0.001, fail_on: set[int] | None = None) -> None:
+        self.rtt = rtt
+        self.fail_on = fail_on or set()
+        self.bodies: list[bytes] = []
+        self.message_ids: list[str | None] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def publish(self, message, routing_key, *, mandatory=True, **kwargs):
+        index = len(self.bodies)
+        self.bodies.append(message.body)
+        self.message_ids.append(message.message_id)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.rtt)
+        finally:
+            self.in_flight -= 1
+        if index in self.fail_on:
+            raise DeliveryError(None, None)
+
+
+def _publisher(exchange: FakeExchange, confirm_window: int = 100) -> AioPikaPublisher:
+    publisher = AioPikaPublisher("amqp://test", "", "smartem_backend", confirm_window=confirm_window)
+    publisher._exchange = exchange
+    return publisher
+
+
+def _items(n: int):
+    return [(MessageQueueEventType.GRIDSQUARE_CREATED, {"uuid": f"gs-{i}", "grid_uuid": "grid-1"}) for i in range(n)]
+
+
+def test_batch_keeps_a_bounded_window_of_publishes_in_flight():
+    exchange = FakeExchange()
+
+    assert asyncio.run(_publisher(exchange, confirm_window=8).publish_events(_items(50))) is True
+
+    assert exchange.peak_in_flight == 8
+    assert [json.loads(body)["uuid"] for body in exchange.bodies] == [f"gs-{i}" for i in range(50)]
+
+
+def test_batch_stops_after_a_window_with_a_failed_confirm():
+    exchange = FakeExchange(fail_on={5})
+
+    assert asyncio.run(_publisher(exchange, confirm_window=4).publish_events(_items(20))) is False
+
+    # the window holding the failure (items 4-7) was sent in full; nothing after it
+    assert len(exchange.bodies) == 8
+
+
+def test_encoded_batch_reports_how_many_leading_messages_were_confirmed():
+    exchange = FakeExchange(fail_on={6})
+    items = [("gridsquare.created", b"{}", "application/json", str(i)) for i in range(20)]
+
+    # windows 0-3 and the confirms of 4 and 5 came back before the failure at 6
+    assert asyncio.run(_publisher(exchange, confirm_window=4).publish_encoded(items)) == 6
+
+    assert exchange.message_ids == [str(i) for i in range(8)]
+
+
+def test_encoded_batch_fully_confirmed():
+    items = [("gridsquare.created", b"{}", "application/json", str(i)) for i in range(5)]
+
+    assert asyncio.run(_publisher(FakeExchange(), confirm_window=2).publish_encoded(items)) == 5
@@ -92,3 +92,66 @@ class TestCreateQualityPrediction:
         resp = client.post("/quality_predictions", json={"value": 0.5})
         assert resp.status_code == 422
         client._db.add.assert_not_called()
+
+
+class TestGetGridQualityPredictionTimeSeries:
+    def _respond(self, client, rows):
+        results = iter([make_execute_result("grid-1"), make_execute_result(rows)])
+        client._db.execute.side_effect = lambda *a, **kw: next(results)
+
+    def test_404_when_grid_missing(self, client):
+        set_db_row(client, None)
+        resp = client.get("/grids/missing/quality_prediction_time_series")
+        assert resp.status_code == 404
+        assert "not found" in resp.json()["detail"].lower()
+
+    def test_groups_rows_into_columnar_series(self, client):
+        from datetime import datetime
+
+        t1, t2, t3 = (datetime(2026, 1, 1, 0, 0, i) for i in (1, 2, 3))
+        self._respond(
+            client,
+            [
+                (11, "model-a", None, "gs-1", None, t1, 0.1),
+                (12, "model-a", None, "gs-1", "fh-1", t1, 0.5),
+                (13, "model-a", None, "gs-1", None, t2, 0.2),
+                (15, "model-a", "ctf", "gs-1", "fh-1", t3, 0.9),
+            ],
+        )
+        resp = client.get("/grids/grid-1/quality_prediction_time_series")
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["grid_uuid"] == "grid-1"
+        assert (body["cursor"], body["has_more"]) == (15, False)
+        series = {(s["metric_name"], s["foilhole_uuid"]): s for s in body["series"]}
+        assert len(series) == 3
+        square = series[(None, None)]
+        assert square["gridsquare_uuid"] == "gs-1"
+        assert square["timestamps"] == [t1.isoformat(), t2.isoformat()]
+        assert square["values"] == [0.1, 0.2]
+        assert series[("ctf", "fh-1")]["values"] == [0.9]
+
+    def test_pages_by_id_after_the_cursor(self, client):
+        from datetime import datetime
+
+        from sqlalchemy.dialects import postgresql
+
+        t = datetime(2026, 1, 1)
+        self._respond(
+            client, [(21, "model-a", None, "gs-1", None, t, 0.1), (22, "model-a", None, "gs-1", None, t, 0.2)]
+        )
+        resp = client.get("/grids/grid-1/quality_prediction_time_series", params={"after": 20, "limit": 1})
+        assert resp.status_code == 200
+        assert (resp.json()["cursor"], resp.json()["has_more"]) == (21, True)
+        assert resp.json()["series"][0]["values"] == [0.1]
+        query = client._db.execute.await_args_list[1].args[0]
+        sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        assert "qualityprediction.id > 20" in sql
+        assert "ORDER BY qualityprediction.id" in sql
+
+    def test_cursor_is_echoed_when_nothing_new(self, client):
+        self._respond(client, [])
+        resp = client.get("/grids/grid-1/quality_prediction_time_series", params={"after": 42})
+        assert resp.status_code == 200
+        assert resp.json()["series"] == []
+        assert (resp.json()["cursor"], resp.json()["has_more"]) == (42, False)
@@ -0,0 +1,100 @@
+import asyncio
+
+from smartem_backend.refresh_scheduler import RefreshScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(refreshed: list[str], clock: FakeClock, **kwargs) -> RefreshScheduler:
+    async def _refresh(grid_uuid):
+        refreshed.append(grid_uuid)
+
+    return RefreshScheduler(_refresh, clock=clock, **kwargs)
+
+
+class TestRefreshScheduler:
+    def test_burst_of_changes_is_refreshed_once_after_debounce(self):
+        refreshed: list[str] = []
+        clock = FakeClock()
+        scheduler = _scheduler(refreshed, clock, debounce_seconds=5, max_delay_seconds=60)
+
+        for t in (0, 1, 2):
+            clock.now = t
+            scheduler.mark_dirty("grid-1")
+        clock.now = 6
+        assert asyncio.run(scheduler.run_due()) == []
+        clock.now = 7
+        assert asyncio.run(scheduler.run_due()) == ["grid-1"]
+        assert refreshed == ["grid-1"]
+        assert (scheduler.lag.count, scheduler.lag.max) == (1, 7000)
+        assert scheduler.pending() == []
+
+    def test_continuous_changes_are_refreshed_by_max_delay(self):
+        refreshed: list[str] = []
+        clock = FakeClock()
+        scheduler = _scheduler(refreshed, clock, debounce_seconds=5, max_delay_seconds=10)
+
+        for t in range(0, 12, 2):
+            clock.now = t
+            scheduler.mark_dirty("grid-1")
+            asyncio.run(scheduler.run_due())
+        assert refreshed == ["grid-1"]
+
+    def test_failed_refresh_does_not_stop_other_grids(self):
+        clock = FakeClock()
+        refreshed: list[str] = []
+
+        async def _refresh(grid_uuid):
+            if grid_uuid == "grid-1":
+                raise RuntimeError("boom")
+            refreshed.append(grid_uuid)
+
+        scheduler = RefreshScheduler(_refresh, debounce_seconds=0, clock=clock)
+        scheduler.mark_dirty("grid-1")
+        scheduler.mark_dirty("grid-2")
+        asyncio.run(scheduler.run_due())
+        assert refreshed == ["grid-2"]
+
+    def test_failed_refresh_is_retried_with_backoff(self):
+        clock = FakeClock()
+        attempts: list[float] = []
+
+        async def _refresh(grid_uuid):
+            attempts.append(clock.now)
+            if len(attempts) < 3:
+                raise RuntimeError("database unavailable")
+
+        scheduler = RefreshScheduler(
+            _refresh, debounce_seconds=0, retry_base_seconds=10, retry_max_seconds=15, clock=clock
+        )
+        scheduler.mark_dirty("grid-1")
+        for t in range(0, 40):
+            clock.now = t
+            asyncio.run(scheduler.run_due())
+
+        assert attempts == [0, 10, 25]
+        assert scheduler.pending() == []
+        assert scheduler.summary()["failed"] == 2
+        assert scheduler.summary()["retrying"] == 0
+        assert (scheduler.lag.count, scheduler.lag.max) == (1, 25000)
+
+    def test_background_task_refreshes_and_stop_flushes(self):
+        refreshed: list[str] = []
+
+        async def _main():
+            scheduler = _scheduler(refreshed, FakeClock(), debounce_seconds=0)
+            scheduler.start()
+            scheduler.mark_dirty("grid-1")
+            await asyncio.sleep(0.01)
+            scheduler.debounce_seconds = scheduler.max_delay_seconds = 3600
+            scheduler.mark_dirty("grid-2")
+            await scheduler.stop()
+
+        asyncio.run(_main())
+        assert refreshed == ["grid-1", "grid-2"]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Microbenchmark of the per-item response cost of a 1,000 foil hole create batch.
+
+Compares the previous handler shape (each FoilHole built twice, a FoilHoleResponse
+per item, then FastAPI's response_model re-validation and `json.dumps`) with the
+single-pass `smartem_backend.serialisation.json_response` path. No database or
+broker is involved; only the Python-side row building and serialisation is timed.
+"""
+
+import json
+import timeit
+
+import typer
+from pydantic import TypeAdapter
+
+from smartem_backend.model.database import FoilHole
+from smartem_backend.model.entity_status import FoilHoleStatus
+from smartem_backend.model.http_request import FoilHoleCreateRequest
+from smartem_backend.model.http_response import FoilHoleResponse
+from smartem_backend.serialisation import dump_json
+
+app = typer.Typer(help="Time per-item CRUD response serialisation for a foil hole create batch.")
+
+_fastapi_adapter = TypeAdapter(list[FoilHoleResponse])
+
+
+def _requests(n: int) -> list[FoilHoleCreateRequest]:
+    return [
+        FoilHoleCreateRequest(
+            uuid=f"fh-{i}",
+            foilhole_id=f"{i}",
+            gridsquare_id="gs-id",
+            gridsquare_uuid="gs-1",
+            center_x=float(i),
+            center_y=float(i),
+            x_location=i,
+            y_location=i,
+            diameter=40,
+        )
+        for i in range(n)
+    ]
+
+
+def previous(foilholes: list[FoilHoleCreateRequest]) -> bytes:
+    added_holes = []
+    for foilhole in foilholes:
+        foilhole_data = {"gridsquare_uuid": "gs-1", "status": FoilHoleStatus.NONE, **foilhole.model_dump()}
+        FoilHole(**foilhole_data)
+        added_holes.append(FoilHole(**foilhole_data))
+    response = []
+    for foilhole in added_holes:
+        data = {"gridsquare_uuid": "gs-1", "status": FoilHoleStatus.NONE.value, **foilhole.model_dump()}
+        if data["status"] is None:
+            data["status"] = FoilHoleStatus.NONE.value
+        response.append(FoilHoleResponse(**data))
+    # What FastAPI does with the returned list for response_model=list[FoilHoleResponse]
+    validated = _fastapi_adapter.validate_python(response, from_attributes=True)
+    return json.dumps(_fastapi_adapter.dump_python(validated, mode="json")).encode()
+
+
+def current(foilholes: list[FoilHoleCreateRequest]) -> bytes:
+    rows = []
+    for foilhole in foilholes:
+        row = {"gridsquare_uuid": "gs-1", **foilhole.model_dump()}
+        if row["status"] is None:
+            row["status"] = FoilHoleStatus.NONE
+        rows.append(row)
+    [FoilHole(**row) for row in rows]
+    return dump_json(list[FoilHoleResponse], rows)
+
+
+@app.command()
+def main(items: int = 1000, repeat: int = 5, number: int = 5):
+    foilholes = _requests(items)
+    for name, fn in (("previous", previous), ("current", current)):
+        best = min(timeit.repeat(lambda fn=fn: fn(foilholes), repeat=repeat, number=number)) / number
+        typer.echo(f"{name:>8}: {best * 1e3:8.2f} ms per batch, {best / items * 1e6:6.2f} us per item")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Microbenchmark of OrphanManager bookkeeping with a large orphan backlog.
+
+Registers `orphans` foil hole orphans spread over `parents` grid squares, then
+times the two calls the agent's orphan check loop makes every minute
+(`check_timeouts` and `get_orphan_stats`) when nothing has expired, and
+`check_timeouts` when `expiring` orphans expire at once. Per-orphan logging is
+silenced so only the bookkeeping is timed.
+"""
+
+import logging
+import time
+import timeit
+from pathlib import Path
+
+import typer
+
+from smartem_agent.event_classifier import EntityType
+from smartem_agent.orphan_manager import OrphanManager
+from smartem_common.schemas import FoilHoleData
+
+app = typer.Typer(help="Time OrphanManager timeout checks and stats with a large orphan backlog.")
+
+
+def _populated(orphans: int, parents: int, expiring: int) -> OrphanManager:
+    now = time.time()
+    # The first `expiring` orphans are registered an hour ago, the rest now
+    clock = iter([now - 3600] * expiring + [now] * (orphans - expiring) + [now])
+    manager = OrphanManager(timeout_seconds=300.0, clock=lambda: next(clock, now))
+    for i in range(orphans):
+        manager.register_orphan(
+            FoilHoleData(id=str(i), gridsquare_id=str(i % parents)),
+            EntityType.FOILHOLE,
+            str(i % parents),
+            Path(f"/epu/FoilHole_{i}.xml"),
+        )
+    return manager
+
+
+@app.command()
+def main(orphans: int = 100_000, parents: int = 5_000, expiring: int = 100, number: int = 100):
+    logging.disable(logging.WARNING)
+    start = time.perf_counter()
+    manager = _populated(orphans, parents, 0)
+    typer.echo(f"register: {(time.perf_counter() - start) / orphans * 1e6:8.2f} us per orphan")
+
+    idle = min(timeit.repeat(manager.check_timeouts, repeat=5, number=number)) / number
+    stats = min(timeit.repeat(manager.get_orphan_stats, repeat=5, number=number)) / number
+    typer.echo(f"check_timeouts, none expiring: {idle * 1e6:8.2f} us")
+    typer.echo(f"get_orphan_stats:              {stats * 1e6:8.2f} us")
+
+    manager = _populated(orphans, parents, expiring)
+    start = time.perf_counter()
+    timed_out = manager.check_timeouts()
+    elapsed = time.perf_counter() - start
+    typer.echo(f"check_timeouts, {len(timed_out)} expiring: {elapsed * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    app()
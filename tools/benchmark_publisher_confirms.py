@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Throughput of `AioPikaPublisher.publish_events` against an in-memory exchange.
+
+The fake exchange confirms each publish after a fixed round trip, standing in
+for a RabbitMQ broker with publisher confirms. A window of 1 reproduces the
+previous one-confirm-at-a-time loop; larger windows overlap the confirm waits.
+Pass `--url` to publish to a real broker instead (e.g. a local RabbitMQ
+container); the queue named by `--routing-key` is declared durable.
+"""
+
+import asyncio
+import time
+
+import typer
+
+from smartem_backend.model.mq_event import MessageQueueEventType
+from smartem_backend.rmq import AioPikaPublisher
+
+app = typer.Typer(help="Time a gridsquare batch publish with publisher confirms.")
+
+
+class _FakeExchange:
+    def __init__(self, rtt: float) -> None:
+        self.rtt = rtt
+
+    async def publish(self, message, routing_key, *, mandatory=True, **kwargs):
+        await asyncio.sleep(self.rtt)
+
+
+class _InMemoryPublisher(AioPikaPublisher):
+    def __init__(self, rtt: float, **kwargs) -> None:
+        super().__init__("amqp://unused", "", **kwargs)
+        self._rtt = rtt
+
+    async def connect(self) -> None:
+        self._exchange = _FakeExchange(self._rtt)
+
+    async def close(self) -> None:
+        self._exchange = None
+
+
+def _items(n: int):
+    return [
+        (
+            MessageQueueEventType.GRIDSQUARE_CREATED,
+            {"uuid": f"gs-{i}", "grid_uuid": "grid-1", "gridsquare_id": str(i)},
+        )
+        for i in range(n)
+    ]
+
+
+async def _run(items: int, windows: list[int], rtt_ms: float, url: str | None, routing_key: str) -> None:
+    batch = _items(items)
+    for window in windows:
+        if url:
+            publisher = AioPikaPublisher(url, "", routing_key, confirm_window=window)
+        else:
+            publisher = _InMemoryPublisher(rtt_ms / 1e3, routing_key=routing_key, confirm_window=window)
+        await publisher.connect()
+        try:
+            start = time.perf_counter()
+            ok = await publisher.publish_events(batch)
+            elapsed = time.perf_counter() - start
+        finally:
+            await publisher.close()
+        typer.echo(
+            f"window {window:>4}: {elapsed * 1e3:9.2f} ms per batch, {items / elapsed:10.0f} msg/s"
+            + ("" if ok else "  (publish failed)")
+        )
+
+
+@app.command()
+def main(
+    items: int = 1000,
+    window: list[int] = typer.Option([1, 10, 100, 500], help="Confirm windows to compare"),  # noqa: B008
+    rtt_ms: float = typer.Option(0.5, help="Simulated broker round trip for the in-memory exchange"),
+    url: str | None = typer.Option(None, help="AMQP URL of a real broker; the in-memory exchange is used if unset"),
+    routing_key: str = "smartem_backend_benchmark",
+):
+    asyncio.run(_run(items, window, rtt_ms, url, routing_key))
+
+
+if __name__ == "__main__":
+    app()